@@ -8,4 +8,7 @@ class ApiConstants {
   
   // Kid endpoints  
   static const String kidsEndpoint = '/kids';
+
+  // User endpoints
+  static const String usersEndpoint = '/users';
 }
\ No newline at end of file
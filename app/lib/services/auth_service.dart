@@ -5,6 +5,8 @@ import 'package:sign_in_with_apple/sign_in_with_apple.dart';
 import 'package:flutter_facebook_auth/flutter_facebook_auth.dart';
 import 'dart:io' show Platform;
 import 'package:flutter/foundation.dart' show kIsWeb;
+import 'package:http/http.dart' as http;
+import '../constants/api_constants.dart';
 import 'logging_service.dart';
 
 /// Registration completion status
@@ -396,6 +398,9 @@ class AuthService {
         ),
       );
 
+      if (response.user != null) {
+        await _refreshBackendSettings(response.user!.id);
+      }
       return response.user != null;
     } catch (e) {
       _logger.e('Error updating user approval mode', error: e);
@@ -500,10 +505,28 @@ class AuthService {
         ),
       );
 
+      if (response.user != null) {
+        await _refreshBackendSettings(response.user!.id);
+      }
       return response.user != null;
     } catch (e) {
       _logger.e('Error updating user notification preferences', error: e);
       return false;
     }
   }
+
+  /// Tell the backend to drop its cached copy of the parent's settings.
+  /// The metadata update itself has already succeeded, so failures are only logged
+  /// (the backend cache expires on its own).
+  Future<void> _refreshBackendSettings(String userId) async {
+    try {
+      final uri = Uri.parse('${ApiConstants.baseUrl}${ApiConstants.usersEndpoint}/$userId/settings/refresh');
+      final response = await http.post(uri);
+      if (response.statusCode != 200) {
+        _logger.w('Backend settings refresh failed: ${response.statusCode}');
+      }
+    } catch (e) {
+      _logger.w('Backend settings refresh failed', error: e);
+    }
+  }
 } 
\ No newline at end of file
@@ -6,6 +6,7 @@ from datetime import datetime
 from ..base import BaseAgent, AgentVendor
 from ...utils.logger import get_logger
 from ...utils.config import get_config
+from ...utils.timing import timed
 
 logger = get_logger(__name__)
 
@@ -52,6 +53,7 @@ class AppearanceAgent(BaseAgent):
             
         return self._client
     
+    @timed("agent.appearance")
     async def process(self, input_data: str, **kwargs) -> Dict[str, Any]:
         """
         Process image data to extract appearance description.
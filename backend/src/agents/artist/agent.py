@@ -19,9 +19,19 @@ from google.genai import types
 
 from ..base import BaseAgent, AgentVendor
 from ...services.supabase import get_supabase_service
+from ...utils.pacer import get_pacer
+from ...utils.timing import timed, span
 
 logger = logging.getLogger(__name__)
 
+COVER_BUCKET = "story-covers"
+
+
+def cover_folder(story_id: str, speculative: bool = False) -> str:
+    """Storage folder of a story's generated cover; speculative covers get their own."""
+    folder = f"generated/{story_id}"
+    return f"{folder}/speculative" if speculative else folder
+
 
 @dataclass
 class GenerationResult:
@@ -152,6 +162,12 @@ class ArtistAgent(BaseAgent):
         logger.info(f"Artist agent config validated - vendor: {self.vendor}, model: {self.model}, {auth_info}")
         return True
     
+    @timed("agent.artist", describe=lambda result: {
+        "vendor": result["metadata"]["vendor"],
+        "model": result["metadata"]["model"],
+        "retries": result["metadata"]["attempts_made"] - 1,
+        "fallback": result["metadata"]["fallback_used"] or None
+    })
     async def process(self, input_data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """Generate a cover image for the story with retry and fallback logic."""
         logger.info(f"Artist agent process called with primary vendor: {self.primary_vendor}")
@@ -171,7 +187,9 @@ class ArtistAgent(BaseAgent):
         stored_urls = await self._store_in_supabase(
             result.image_url, 
             story_data.get("id"),
-            prompt
+            prompt,
+            write_buffer=kwargs.get("write_buffer"),
+            folder=kwargs.get("storage_folder")
         )
         
         return {
@@ -474,7 +492,8 @@ class ArtistAgent(BaseAgent):
         """Generate image using OpenAI GPT-Image-1."""
         import openai
         
-        client = openai.AsyncOpenAI(api_key=self.api_key)
+        # Retries (429, 5xx, connection errors) are done by the outbound pacer
+        client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
         
         try:
             logger.info("Using OpenAI GPT-Image-1 for image generation")
@@ -496,7 +515,10 @@ class ArtistAgent(BaseAgent):
             }
             
             logger.info(f"Generating image with prompt length: {len(prompt.split())} words")
-            response = await client.images.generate(**params)
+            raw_response = await get_pacer("openai", model).run(
+                lambda: client.images.with_raw_response.generate(**params)
+            )
+            response = raw_response.parse()
             
             image_url = response.data[0].url
             logger.info("Successfully generated image with OpenAI")
@@ -522,13 +544,16 @@ class ArtistAgent(BaseAgent):
             # Generate the image using Google Gen AI SDK
             number_of_images = self.generation_params.get("number_of_images", 1)
             
-            response = self.google_client.models.generate_images(
-                model=self.model,
-                prompt=prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=number_of_images,
-                    include_rai_reason=True,
-                    output_mime_type='image/jpeg'
+            response = await get_pacer("google", self.model).run(
+                lambda: asyncio.to_thread(
+                    self.google_client.models.generate_images,
+                    model=self.model,
+                    prompt=prompt,
+                    config=types.GenerateImagesConfig(
+                        number_of_images=number_of_images,
+                        include_rai_reason=True,
+                        output_mime_type='image/jpeg'
+                    )
                 )
             )
             
@@ -572,8 +597,14 @@ class ArtistAgent(BaseAgent):
             logger.error(f"Error generating image with Google Imagen 3 via Google Gen AI SDK: {e}", exc_info=True)
             raise
     
-    async def _store_in_supabase(self, image_url: str, story_id: Optional[str], prompt: str) -> Dict[str, str]:
-        """Download and store generated image in Supabase Storage."""
+    async def _store_in_supabase(self, image_url: str, story_id: Optional[str], prompt: str,
+                                 write_buffer=None, folder: Optional[str] = None) -> Dict[str, str]:
+        """Download and store generated image in Supabase Storage.
+        
+        The story's cover fields go through write_buffer (a StoryWriteBuffer) when
+        given, so they are coalesced with the pipeline's other story writes.
+        Files go to `folder` in the covers bucket (default `generated/<story_id>`).
+        """
         if not story_id:
             logger.warning("No story_id provided, skipping Supabase storage")
             return {"cover_url": image_url}
@@ -584,9 +615,6 @@ class ArtistAgent(BaseAgent):
                 logger.warning("Supabase service not configured, using direct URL")
                 return {"cover_url": image_url}
             
-            # Get the Supabase client from the service
-            supabase = supabase_service.client
-            
             # Download image data - handle both URLs and base64 data
             if image_url.startswith('data:image/'):
                 # Handle base64 data URL (from Google Imagen)
@@ -599,32 +627,27 @@ class ArtistAgent(BaseAgent):
                         image_data = await response.read()
             
             # Upload to Supabase Storage
-            bucket = "story-covers"
-            
-            # Ensure bucket exists
-            try:
-                supabase.storage.get_bucket(bucket)
-            except:
-                # Create bucket if it doesn't exist
-                supabase.storage.create_bucket(bucket, public=True)
+            bucket = COVER_BUCKET
+            folder = folder or cover_folder(story_id)
             
-            # Upload main image to generated/ subfolder
-            path = f"generated/{str(story_id)}/cover.png"
+            # Upload main image to generated/ subfolder; upsert, as a retried job
+            # uploads to the same path again
+            path = f"{folder}/cover.png"
             logger.info(f"Uploading cover image to path: {path}")
-            supabase.storage.from_(bucket).upload(path, image_data, file_options={"content-type": "image/png"})
+            with span("storage.upload", bytes_in=len(image_data)):
+                cover_url = await supabase_service.upload_file(bucket, path, image_data, "image/png",
+                                                             upsert=True)
             
             # Generate and upload thumbnail to generated/ subfolder
             thumbnail_data = self._create_thumbnail(image_data)
-            thumbnail_path = f"generated/{str(story_id)}/thumbnail.png"
+            thumbnail_path = f"{folder}/thumbnail.png"
             logger.info(f"Uploading thumbnail to path: {thumbnail_path}")
-            supabase.storage.from_(bucket).upload(thumbnail_path, thumbnail_data, file_options={"content-type": "image/png"})
-            
-            # Get public URLs
-            cover_url = supabase.storage.from_(bucket).get_public_url(path)
-            thumbnail_url = supabase.storage.from_(bucket).get_public_url(thumbnail_path)
+            with span("storage.upload", bytes_in=len(thumbnail_data)):
+                thumbnail_url = await supabase_service.upload_file(bucket, thumbnail_path, thumbnail_data,
+                                                                 "image/png", upsert=True)
             
             # Update story record with image URLs
-            await supabase_service.update_story(story_id, {
+            cover_fields = {
                 'cover_image_url': cover_url,
                 'cover_image_thumbnail_url': thumbnail_url,
                 'cover_image_generated_at': datetime.now().isoformat(),
@@ -635,7 +658,11 @@ class ArtistAgent(BaseAgent):
                     'vendor': self.vendor,
                     'generation_params': self.generation_params
                 }
-            })
+            }
+            if write_buffer:
+                await write_buffer.update(cover_fields)
+            else:
+                await supabase_service.update_story(story_id, cover_fields)
             
             logger.info(f"Successfully stored image in Supabase for story {story_id}")
             
@@ -649,6 +676,12 @@ class ArtistAgent(BaseAgent):
             # Fall back to direct URL
             return {"cover_url": image_url}
     
+    async def delete_stored_cover(self, folder: str) -> None:
+        """Delete the cover and thumbnail stored under `folder` (e.g. a discarded speculative cover)."""
+        supabase_service = get_supabase_service()
+        if supabase_service:
+            await supabase_service.delete_files(COVER_BUCKET, [f"{folder}/cover.png", f"{folder}/thumbnail.png"])
+    
     def _create_thumbnail(self, image_data: bytes, size: tuple = (200, 200)) -> bytes:
         """Create a thumbnail from image data."""
         try:
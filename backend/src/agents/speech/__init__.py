@@ -0,0 +1,4 @@
+"""Speech agent module."""
+from .agent import SpeechAgent, create_speech_agent
+
+__all__ = ["SpeechAgent", "create_speech_agent"]
@@ -0,0 +1,78 @@
+"""Speech agent for speech-to-text transcription."""
+import asyncio
+import base64
+import io
+from typing import Dict, Any
+
+from ..base import BaseAgent, AgentVendor
+from ...utils.logger import get_logger
+from ...utils.pacer import get_pacer
+from ...utils.timing import timed
+
+logger = get_logger(__name__)
+
+
+class SpeechAgent(BaseAgent):
+    """Agent that transcribes a kid's voice recording (OpenAI Whisper)."""
+
+    def __init__(self, vendor: AgentVendor, config: Dict[str, Any]):
+        vendor_config = config.get("vendors", {}).get(vendor.value, {})
+        super().__init__(vendor, vendor_config)
+        self.model = vendor_config.get("model", "whisper-1")
+        self._client = None
+
+    def validate_config(self) -> bool:
+        """Validate agent configuration."""
+        if not self.api_key:
+            raise ValueError(f"API key not found for speech vendor: {self.vendor.value}")
+        return True
+
+    def get_vendor_client(self):
+        """Get vendor-specific client."""
+        if self._client:
+            return self._client
+        if self.vendor == AgentVendor.OPENAI:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        else:
+            raise ValueError(f"Unsupported vendor: {self.vendor}")
+        return self._client
+
+    @timed("agent.speech")
+    async def process(self, input_data: str, **kwargs) -> str:
+        """
+        Transcribe a recording.
+
+        Args:
+            input_data: Base64 encoded audio (webm from the app)
+            **kwargs: language (ISO code of the story language)
+
+        Returns:
+            The transcribed text
+        """
+        self.validate_config()
+        client = self.get_vendor_client()
+
+        audio_bytes = base64.b64decode(input_data)
+
+        def transcribe():
+            audio_file = io.BytesIO(audio_bytes)
+            audio_file.name = "recording.webm"  # The API infers the format from the name
+            return client.audio.transcriptions.with_raw_response.create(
+                model=self.model,
+                file=audio_file,
+                language=kwargs.get("language")
+            )
+
+        raw_response = await get_pacer(self.vendor.value, self.model).run(
+            lambda: asyncio.to_thread(transcribe)
+        )
+        text = raw_response.parse().text.strip()
+        logger.info(f"Audio transcribed: {len(text)} characters")
+        return text
+
+
+def create_speech_agent(config: Dict[str, Any]) -> SpeechAgent:
+    """Factory function to create a speech agent."""
+    vendor = AgentVendor(config.get("vendor", "openai"))
+    return SpeechAgent(vendor, config)
@@ -1,5 +1,6 @@
 """Storyteller agent for generating children's stories with JSON response validation."""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, Callable, Iterable
+import asyncio
 import json
 from pydantic import ValidationError
 
@@ -8,9 +9,26 @@ from ...types.domain import Language
 from ...types.story_models import LLMStoryResponse, StoryGenerationContext
 from ...utils.logger import get_logger
 from ...utils.config import get_config
+from ...utils.pacer import get_pacer
+from ...utils.timing import timed, payload_size
+from .streaming import StoryStreamParser
 
 logger = get_logger(__name__)
 
+# Called with ("title" | "paragraph" | "cover_description", text) while a story streams
+StoryEventHandler = Callable[[str, str], None]
+
+
+async def _iterate_in_thread(iterable: Iterable) -> AsyncIterator[Any]:
+    """Iterate a blocking SDK stream without blocking the event loop."""
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
 
 class StorytellerAgent(BaseAgent):
     """Agent for generating children's stories from descriptions."""
@@ -22,6 +40,7 @@ class StorytellerAgent(BaseAgent):
         self.max_tokens = config.get("max_tokens", 300)
         self.temperature = config.get("temperature", 0.7)
         self.word_count = self.main_config["agents"]["storyteller"].get("word_count", "500")
+        self.streaming = config.get("streaming", False)
         self._client = None
     
     def validate_config(self) -> bool:
@@ -43,11 +62,11 @@ class StorytellerAgent(BaseAgent):
             
         elif self.vendor == AgentVendor.OPENAI:
             from openai import OpenAI
-            self._client = OpenAI(api_key=self.api_key)
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
             
         elif self.vendor == AgentVendor.ANTHROPIC:
             from anthropic import Anthropic
-            self._client = Anthropic(api_key=self.api_key)
+            self._client = Anthropic(api_key=self.api_key, max_retries=0)
             
         elif self.vendor == AgentVendor.GOOGLE:
             import google.generativeai as genai
@@ -59,12 +78,16 @@ class StorytellerAgent(BaseAgent):
             
         return self._client
     
-    async def process(self, input_data: str, **kwargs) -> Dict[str, str]:
+    @timed("agent.storyteller", describe=lambda story: {"bytes_out": payload_size(story.get("content", ""))})
+    async def process(self, input_data: str, on_event: Optional[StoryEventHandler] = None,
+                      **kwargs) -> Dict[str, str]:
         """
         Generate a story from an image description.
         
         Args:
             input_data: Image description text
+            on_event: With streaming enabled, called with ("title" | "paragraph" |
+                "cover_description", text) as each part of the story completes
             **kwargs: Additional parameters (language, context, etc.)
             
         Returns:
@@ -85,7 +108,10 @@ class StorytellerAgent(BaseAgent):
             client = self.get_vendor_client()
             
             # Generate story with vendor-specific method
-            raw_response = await self._generate_with_vendor(client, system_prompt, prompt)
+            if self.streaming and on_event:
+                raw_response = await self._stream_story(client, system_prompt, prompt, on_event)
+            else:
+                raw_response = await self._generate_with_vendor(client, system_prompt, prompt)
             
             # Debug: Log the raw response to understand what AI returns
             logger.info(f"Raw AI response: {raw_response[:200]}...")
@@ -170,6 +196,10 @@ class StorytellerAgent(BaseAgent):
             additional_context=additional_context
         )
     
+    def _estimated_tokens(self, system_prompt: str, user_prompt: str) -> int:
+        """Rough token cost of a call (prompt at ~4 chars/token plus the completion budget)."""
+        return (len(system_prompt) + len(user_prompt)) // 4 + self.max_tokens
+    
     async def _generate_with_vendor(self, client, system_prompt: str, user_prompt: str) -> str:
         """Generate story using the appropriate vendor method."""
         if self.vendor == AgentVendor.MISTRAL:
@@ -183,6 +213,28 @@ class StorytellerAgent(BaseAgent):
         else:
             raise ValueError(f"Unsupported vendor: {self.vendor}")
     
+    async def _stream_story(self, client, system_prompt: str, user_prompt: str,
+                            on_event: StoryEventHandler) -> str:
+        """Stream the story, reporting parts as they complete; returns the full raw response."""
+        parser = StoryStreamParser()
+        async for delta in self._stream_with_vendor(client, system_prompt, user_prompt):
+            for kind, text in parser.feed(delta):
+                on_event(kind, text)
+        return parser.text
+    
+    def _stream_with_vendor(self, client, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Text deltas of the story from the appropriate vendor stream."""
+        if self.vendor == AgentVendor.MISTRAL:
+            return self._stream_mistral(system_prompt, user_prompt)
+        elif self.vendor == AgentVendor.OPENAI:
+            return self._stream_openai(client, system_prompt, user_prompt)
+        elif self.vendor == AgentVendor.ANTHROPIC:
+            return self._stream_anthropic(client, system_prompt, user_prompt)
+        elif self.vendor == AgentVendor.GOOGLE:
+            return self._stream_google(system_prompt, user_prompt)
+        else:
+            raise ValueError(f"Unsupported vendor: {self.vendor}")
+    
     def _parse_json_response(self, raw_response: str) -> LLMStoryResponse:
         """Parse and validate JSON response from LLM."""
         try:
@@ -312,11 +364,14 @@ class StorytellerAgent(BaseAgent):
         }
         
         async with httpx.AsyncClient() as http_client:
-            response = await http_client.post(
-                "https://api.mistral.ai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60.0
+            response = await get_pacer("mistral", self.model).run(
+                lambda: http_client.post(
+                    "https://api.mistral.ai/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=60.0
+                ),
+                tokens=self._estimated_tokens(system_prompt, user_prompt)
             )
             response.raise_for_status()
             result = response.json()
@@ -324,29 +379,39 @@ class StorytellerAgent(BaseAgent):
     
     async def _process_openai(self, client, system_prompt: str, user_prompt: str) -> str:
         """Generate story with OpenAI."""
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-            response_format={"type": "json_object"}  # Enable JSON mode for OpenAI
+        raw_response = await get_pacer("openai", self.model).run(
+            lambda: asyncio.to_thread(
+                client.chat.completions.with_raw_response.create,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                response_format={"type": "json_object"}  # Enable JSON mode for OpenAI
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
         )
+        response = raw_response.parse()
         return response.choices[0].message.content
     
     async def _process_anthropic(self, client, system_prompt: str, user_prompt: str) -> str:
         """Generate story with Anthropic Claude."""
-        response = client.messages.create(
-            model=self.model,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=self.max_tokens,
-            temperature=self.temperature
+        raw_response = await get_pacer("anthropic", self.model).run(
+            lambda: asyncio.to_thread(
+                client.messages.with_raw_response.create,
+                model=self.model,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
         )
+        response = raw_response.parse()
         return response.content[0].text
     
     async def _process_google(self, client, system_prompt: str, user_prompt: str) -> str:
@@ -363,13 +428,132 @@ class StorytellerAgent(BaseAgent):
         combined_prompt = f"{system_prompt}\n\n{user_prompt}"
         
         model = genai.GenerativeModel(self.model)
-        response = model.generate_content(
-            combined_prompt,
-            generation_config=generation_config
+        response = await get_pacer("google", self.model).run(
+            lambda: asyncio.to_thread(
+                model.generate_content,
+                combined_prompt,
+                generation_config=generation_config
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
         )
         
         return response.text
     
+    async def _stream_mistral(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream a story from Mistral's server-sent events."""
+        import httpx
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        }
+        
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "response_format": {"type": "json_object"},
+            "stream": True
+        }
+        
+        async with httpx.AsyncClient() as http_client:
+            request = http_client.build_request(
+                "POST", "https://api.mistral.ai/v1/chat/completions",
+                headers=headers, json=payload, timeout=60.0
+            )
+            
+            async def open_stream():
+                response = await http_client.send(request, stream=True)
+                if response.status_code >= 400:
+                    await response.aread()  # Error body for raise_for_status; closes the stream
+                return response
+            
+            response = await get_pacer("mistral", self.model).run(
+                open_stream, tokens=self._estimated_tokens(system_prompt, user_prompt)
+            )
+            try:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+            finally:
+                await response.aclose()
+    
+    async def _stream_openai(self, client, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream a story from OpenAI."""
+        raw_response = await get_pacer("openai", self.model).run(
+            lambda: asyncio.to_thread(
+                client.chat.completions.with_raw_response.create,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+                stream=True
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
+        )
+        async for chunk in _iterate_in_thread(raw_response.parse()):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _stream_anthropic(self, client, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream a story from Anthropic Claude."""
+        raw_response = await get_pacer("anthropic", self.model).run(
+            lambda: asyncio.to_thread(
+                client.messages.with_raw_response.create,
+                model=self.model,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
+        )
+        async for event in _iterate_in_thread(raw_response.parse()):
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+    
+    async def _stream_google(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """Stream a story from Google Gemini."""
+        import google.generativeai as genai
+        
+        generation_config = genai.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.max_tokens
+        )
+        model = genai.GenerativeModel(self.model)
+        response = await get_pacer("google", self.model).run(
+            lambda: asyncio.to_thread(
+                model.generate_content,
+                f"{system_prompt}\n\n{user_prompt}",
+                generation_config=generation_config,
+                stream=True
+            ),
+            tokens=self._estimated_tokens(system_prompt, user_prompt)
+        )
+        async for chunk in _iterate_in_thread(response):
+            if chunk.text:
+                yield chunk.text
+    
     def _extract_title(self, story_content: str) -> str:
         """Extract or generate a title from the story."""
         lines = story_content.strip().split('\n')
@@ -0,0 +1,154 @@
+"""Incremental parsing of a streamed JSON story response."""
+import json
+from typing import List, Optional, Tuple
+
+# Parser states
+_OUTSIDE, _KEY, _AFTER_KEY, _BEFORE_VALUE, _VALUE, _OTHER_VALUE = range(6)
+
+StoryEvent = Tuple[str, str]
+
+
+class StoryStreamParser:
+    """
+    Releases fields of a `{"title", "content", "cover_description"}` JSON
+    object while it is still being streamed.
+
+    `feed()` takes raw text deltas and returns events as soon as they are
+    complete: ("title", text) and ("cover_description", text) when their
+    string closes, and ("paragraph", text) for every finished paragraph of
+    `content` (paragraphs are separated by a blank line; the last one is
+    released when the string closes). Anything outside the object (markdown
+    fences, chatter) is ignored; the complete text is kept in `text` for the
+    normal parse once the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._state = _OUTSIDE
+        self._depth = 0
+        self._key: List[str] = []
+        self._current_key: Optional[str] = None
+        self._value: List[str] = []
+        self._escape = ""
+        self._depth_in_other = 0
+        self._in_other_string = False
+        self._other_escape = False
+
+    def feed(self, delta: str) -> List[StoryEvent]:
+        """Consume a text delta and return the events it completes."""
+        self.text += delta
+        events: List[StoryEvent] = []
+        for char in delta:
+            self._consume(char, events)
+        return events
+
+    def _consume(self, char: str, events: List[StoryEvent]) -> None:
+        state = self._state
+        if state == _OUTSIDE:
+            if char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth = max(self._depth - 1, 0)
+            elif char == '"' and self._depth == 1:
+                self._key = []
+                self._state = _KEY
+        elif state == _KEY:
+            if self._escape or char == "\\":
+                self._escape = "" if self._escape else "\\"
+                self._key.append(char)
+            elif char == '"':
+                self._current_key = "".join(self._key)
+                self._state = _AFTER_KEY
+            else:
+                self._key.append(char)
+        elif state == _AFTER_KEY:
+            if char == ":":
+                self._state = _BEFORE_VALUE
+        elif state == _BEFORE_VALUE:
+            if char == '"':
+                self._value = []
+                self._escape = ""
+                self._state = _VALUE
+            elif not char.isspace():
+                # Non-string value (number, null, nested object): skip it
+                self._depth_in_other = 0
+                self._state = _OTHER_VALUE
+                self._consume_other(char)
+        elif state == _VALUE:
+            self._consume_value(char, events)
+        elif state == _OTHER_VALUE:
+            self._consume_other(char)
+
+    def _consume_other(self, char: str) -> None:
+        if self._in_other_string:
+            if self._other_escape:
+                self._other_escape = False
+            elif char == "\\":
+                self._other_escape = True
+            elif char == '"':
+                self._in_other_string = False
+            return
+        if char == '"':
+            self._in_other_string = True
+        elif char in "{[":
+            self._depth_in_other += 1
+        elif char in "}]":
+            if self._depth_in_other == 0:
+                # End of the enclosing object
+                self._depth = max(self._depth - 1, 0)
+                self._state = _OUTSIDE
+            else:
+                self._depth_in_other -= 1
+        elif char == "," and self._depth_in_other == 0:
+            self._state = _OUTSIDE
+
+    def _consume_value(self, char: str, events: List[StoryEvent]) -> None:
+        if self._escape:
+            self._escape += char
+            decoded = self._decode_escape()
+            if decoded is None:
+                return
+            self._escape = ""
+            self._append(decoded, events)
+        elif char == "\\":
+            self._escape = "\\"
+        elif char == '"':
+            self._close_value(events)
+        else:
+            self._append(char, events)
+
+    def _decode_escape(self) -> Optional[str]:
+        """Decoded text of the pending escape, or None while it is incomplete."""
+        escape = self._escape
+        try:
+            if escape[1] == "u":
+                if len(escape) < 6:
+                    return None
+                # High surrogate: wait for the low half
+                if 0xD800 <= int(escape[2:6], 16) <= 0xDBFF and len(escape) < 12:
+                    return None
+            return json.loads(f'"{escape}"')
+        except ValueError:
+            # Malformed escape: keep it verbatim, the final parse decides
+            return escape
+
+    def _append(self, text: str, events: List[StoryEvent]) -> None:
+        self._value.append(text)
+        if self._current_key == "content" and "\n" in text:
+            value = "".join(self._value)
+            if "\n\n" in value:
+                *paragraphs, rest = value.split("\n\n")
+                for paragraph in paragraphs:
+                    if paragraph.strip():
+                        events.append(("paragraph", paragraph.strip()))
+                self._value = [rest]
+
+    def _close_value(self, events: List[StoryEvent]) -> None:
+        value = "".join(self._value)
+        if self._current_key == "content":
+            if value.strip():
+                events.append(("paragraph", value.strip()))
+        elif self._current_key in ("title", "cover_description"):
+            events.append((self._current_key, value))
+        self._value = []
+        self._state = _OUTSIDE
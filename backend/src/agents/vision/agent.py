@@ -1,11 +1,15 @@
 """Vision agent for image analysis."""
+import asyncio
 import base64
 import os
 from typing import Dict, Any, Optional
 
 from ..base import BaseAgent, AgentVendor
+from .cache import VisionDescriptionCache
 from ...utils.logger import get_logger
 from ...utils.config import get_config
+from ...utils.pacer import get_pacer
+from ...utils.timing import timed, current_span
 
 logger = get_logger(__name__)
 
@@ -18,6 +22,7 @@ class VisionAgent(BaseAgent):
         self.main_config = get_config()
         self.prompts = self.main_config["agents"]["vision"]["prompts"]
         self._client = None
+        self._cache: Optional[VisionDescriptionCache] = None
     
     def validate_config(self) -> bool:
         """Validate agent configuration."""
@@ -39,24 +44,36 @@ class VisionAgent(BaseAgent):
             
         elif self.vendor == AgentVendor.OPENAI:
             from openai import OpenAI
-            self._client = OpenAI(api_key=self.api_key)
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
             
         elif self.vendor == AgentVendor.ANTHROPIC:
             from anthropic import Anthropic
-            self._client = Anthropic(api_key=self.api_key)
+            self._client = Anthropic(api_key=self.api_key, max_retries=0)
             
         else:
             raise ValueError(f"Unsupported vendor: {self.vendor}")
             
         return self._client
     
+    @property
+    def cache(self) -> Optional[VisionDescriptionCache]:
+        """Shared description cache (None when `cache.enabled` is false)."""
+        cache_config = self.config.get("cache") or {}
+        if not cache_config.get("enabled", False):
+            return None
+        if self._cache is None:
+            from ...services.supabase import get_supabase_service
+            self._cache = VisionDescriptionCache(get_supabase_service(), cache_config)
+        return self._cache
+    
+    @timed("agent.vision")
     async def process(self, input_data: str, **kwargs) -> str:
         """
         Analyze an image and return a description.
         
         Args:
             input_data: Base64 encoded image data
-            **kwargs: Additional parameters (e.g., custom_prompt)
+            **kwargs: Additional parameters (e.g., custom_prompt, kid_id for the cache)
             
         Returns:
             Image description suitable for story generation
@@ -74,21 +91,37 @@ class VisionAgent(BaseAgent):
         if "custom_prompt" in kwargs:
             prompt = kwargs["custom_prompt"]
         
+        # Repeated uploads of the same picture reuse its description
+        cache = self.cache
+        kid_id = kwargs.get("kid_id")
+        if cache:
+            scope = cache.scope(self.vendor.value, self.model, prompt)
+            # Decoding and hashing a multi-MB upload is CPU work; keep it off the event loop
+            keys = await asyncio.to_thread(cache.image_keys, input_data)
+            description = await cache.lookup(scope, keys, kid_id)
+            current_span().set(cache="hit" if description is not None else "miss")
+            if description is not None:
+                return description
+        
         try:
             client = self.get_vendor_client()
             
             if self.vendor == AgentVendor.GOOGLE:
-                return await self._process_google(client, input_data, prompt)
+                description = await self._process_google(client, input_data, prompt)
             elif self.vendor == AgentVendor.OPENAI:
-                return await self._process_openai(client, input_data, prompt)
+                description = await self._process_openai(client, input_data, prompt)
             elif self.vendor == AgentVendor.ANTHROPIC:
-                return await self._process_anthropic(client, input_data, prompt)
+                description = await self._process_anthropic(client, input_data, prompt)
             else:
                 raise ValueError(f"Unsupported vendor: {self.vendor}")
                 
         except Exception as e:
             logger.error(f"Vision processing failed: {e}")
             raise
+        
+        if cache and description:
+            await cache.store(scope, keys, description, kid_id)
+        return description
     
     async def _process_google(self, client, image_data: str, prompt: str) -> str:
         """Process image with Google Gemini."""
@@ -100,12 +133,15 @@ class VisionAgent(BaseAgent):
         image = PIL.Image.open(io.BytesIO(image_bytes))
         
         # Generate content
-        response = client.generate_content([prompt, image])
+        response = await get_pacer("google", self.model).run(
+            lambda: asyncio.to_thread(client.generate_content, [prompt, image])
+        )
         return response.text
     
     async def _process_openai(self, client, image_data: str, prompt: str) -> str:
         """Process image with OpenAI Vision."""
-        response = client.chat.completions.create(
+        raw_response = await get_pacer("openai", self.model).run(lambda: asyncio.to_thread(
+            client.chat.completions.with_raw_response.create,
             model=self.model,
             messages=[
                 {
@@ -122,12 +158,14 @@ class VisionAgent(BaseAgent):
                 }
             ],
             max_tokens=300
-        )
+        ))
+        response = raw_response.parse()
         return response.choices[0].message.content
     
     async def _process_anthropic(self, client, image_data: str, prompt: str) -> str:
         """Process image with Anthropic Claude."""
-        response = client.messages.create(
+        raw_response = await get_pacer("anthropic", self.model).run(lambda: asyncio.to_thread(
+            client.messages.with_raw_response.create,
             model=self.model,
             max_tokens=300,
             messages=[
@@ -149,7 +187,8 @@ class VisionAgent(BaseAgent):
                     ]
                 }
             ]
-        )
+        ))
+        response = raw_response.parse()
         return response.content[0].text
 
 
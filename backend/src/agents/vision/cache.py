@@ -0,0 +1,83 @@
+"""Content-addressed cache of image descriptions."""
+import base64
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from ...utils.image_hash import perceptual_hash
+from ...utils.logger import get_logger
+from ...utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+LOOKUPS = REGISTRY.counter("mira_vision_cache_lookups_total", "Vision description cache lookups", ("result",))
+
+
+@dataclass
+class ImageKeys:
+    """Exact and perceptual identity of an uploaded image."""
+    content_hash: str
+    perceptual_hash: Optional[int]
+
+
+def decode_image(image_data: str) -> bytes:
+    """Bytes of a base64 image, with or without a data URL prefix."""
+    if "," in image_data:
+        image_data = image_data.split(",", 1)[1]
+    return base64.b64decode(image_data)
+
+
+class VisionDescriptionCache:
+    """
+    Descriptions of images already analysed, shared by every process through
+    the repository.
+
+    Entries are scoped by vendor, model and prompt version: the hash of the
+    prompt text plus `prompt_version` from config, so editing the prompt (or
+    bumping the version) starts a fresh cache. A lookup matches the exact
+    image bytes first (from any kid), then the closest perceptual hash within
+    `max_distance` bits among the same kid's images only, so a near-identical
+    match can never hand one family's description to another. The store
+    keeps at most `max_entries` descriptions, evicting the least recently
+    used.
+    """
+
+    def __init__(self, repository, cache_config: Dict[str, Any]):
+        self.repository = repository
+        self.prompt_version = str(cache_config.get("prompt_version", 1))
+        self.max_distance = int(cache_config.get("max_distance", 4))
+        self.max_entries = int(cache_config.get("max_entries", 20000))
+
+    def scope(self, vendor: str, model: str, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"{vendor}/{model}/v{self.prompt_version}-{prompt_hash}"
+
+    @staticmethod
+    def image_keys(image_data: str) -> ImageKeys:
+        image_bytes = decode_image(image_data)
+        return ImageKeys(hashlib.sha256(image_bytes).hexdigest(), perceptual_hash(image_bytes))
+
+    async def lookup(self, scope: str, keys: ImageKeys, kid_id: Optional[str] = None) -> Optional[str]:
+        """Cached description of this image (or the kid's near-identical one); None on a miss or error."""
+        try:
+            match = await self.repository.find_vision_description(
+                scope, keys.content_hash, keys.perceptual_hash, kid_id, self.max_distance
+            )
+        except Exception as e:
+            logger.warning(f"Vision cache lookup failed, analysing image: {e}")
+            return None
+        if match is None:
+            LOOKUPS.inc(result="miss")
+            return None
+        LOOKUPS.inc(result="exact" if match["content_hash"] == keys.content_hash else "similar")
+        logger.info(f"Vision cache hit ({scope}, distance {match['distance']})")
+        return match["description"]
+
+    async def store(self, scope: str, keys: ImageKeys, description: str, kid_id: Optional[str] = None) -> None:
+        """Remember a fresh description; failures only cost the next lookup."""
+        try:
+            await self.repository.save_vision_description(
+                scope, keys.content_hash, keys.perceptual_hash, kid_id, description, self.max_entries
+            )
+        except Exception as e:
+            logger.warning(f"Could not cache vision description: {e}")
@@ -1,13 +1,28 @@
 """Voice agent for text-to-speech conversion."""
+import asyncio
 import io
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..base import BaseAgent, AgentVendor
 from ...utils.logger import get_logger
 from ...utils.config import get_config
+from ...utils.pacer import get_pacer
+from ...utils.timing import timed, span, current_span, payload_size
+from .audio import can_concat, concat_audio
+from .cache import TtsAudioCache, tts_cache_key
 
 logger = get_logger(__name__)
 
+# Content type per OpenAI response_format
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "opus": "audio/opus",
+    "aac": "audio/aac",
+    "pcm": "audio/pcm"
+}
+
 
 class VoiceAgent(BaseAgent):
     """Agent for converting text to speech."""
@@ -17,6 +32,12 @@ class VoiceAgent(BaseAgent):
         # For voice agent, config IS the voice config (passed from new structure)
         self.voice_config = config
         self._clients = {}  # Cache clients per vendor
+        # Synthesize paragraph by paragraph while the storyteller is still streaming
+        self.pipelined = config.get("pipelined", False)
+        # Paragraph-parallel synthesis of complete stories
+        self.parallel = config.get("parallel", {}) or {}
+        self.request_timeout = float(self.parallel.get("timeout_seconds", 60.0))
+        self._cache: Optional[TtsAudioCache] = None
     
     def validate_config(self) -> bool:
         """Validate agent configuration."""
@@ -26,10 +47,30 @@ class VoiceAgent(BaseAgent):
             raise ValueError("No language configurations found in voice config")
         return True
     
+    @property
+    def cache(self) -> Optional[TtsAudioCache]:
+        """Shared audio cache (None when `cache.enabled` is false)."""
+        cache_config = self.voice_config.get("cache") or {}
+        if not cache_config.get("enabled", False):
+            return None
+        if self._cache is None:
+            from ...services.supabase import get_supabase_service
+            self._cache = TtsAudioCache(get_supabase_service(), cache_config)
+        return self._cache
+    
+    def cache_key(self, text: str, language: str) -> str:
+        """Cache key of the audio `process` would produce for this text and language."""
+        return tts_cache_key(text, self._get_language_config(language))
+    
+    @timed("agent.voice", agent_attrs=False)
     async def process(self, input_data: str, **kwargs) -> Tuple[bytes, str]:
         """
         Convert text to speech using language-specific configuration.
         
+        With `parallel.enabled`, the text is split on paragraph boundaries and
+        the chunks are synthesized concurrently, each retried on its own, then
+        joined into one file.
+        
         Args:
             input_data: Text to convert to speech
             **kwargs: Additional parameters (language is required)
@@ -38,21 +79,63 @@ class VoiceAgent(BaseAgent):
             Tuple of (audio_bytes, content_type)
         """
         language = kwargs.get("language", "en")
+        chunks = self.split_chunks(input_data)
+        if len(chunks) < 2 or not self.parallel.get("enabled", False) or not self._joinable(language):
+            return await self.synthesize_chunk(input_data, language)
+        
+        logger.info(f"Processing TTS for language: {language} in {len(chunks)} parallel chunks")
+        limit = asyncio.Semaphore(int(self.parallel.get("max_concurrency", 4)))
+        
+        async def synthesize(chunk: str) -> Tuple[bytes, str]:
+            async with limit:
+                return await self.synthesize_chunk(chunk, language)
+        
+        tasks = [asyncio.create_task(synthesize(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+        return self.join_segments(results)
+    
+    async def synthesize_chunk(self, text: str, language: str) -> Tuple[bytes, str]:
+        """One TTS request, retried up to `parallel.chunk_retries` times with backoff."""
+        retries = int(self.parallel.get("chunk_retries", 2))
+        backoff = float(self.parallel.get("retry_backoff_seconds", 1.0))
+        attempt = 0
+        with span("tts.chunk", bytes_in=payload_size(text)) as timing:
+            while True:
+                try:
+                    result = await self._synthesize(text, language)
+                    timing.set(bytes_out=payload_size(result), retries=attempt)
+                    return result
+                except Exception as e:
+                    if attempt >= retries:
+                        timing.set(retries=attempt)
+                        raise
+                    attempt += 1
+                    logger.warning(f"TTS chunk failed ({e}), retrying {attempt}/{retries}")
+                    await asyncio.sleep(backoff * (2 ** (attempt - 1)))
+    
+    async def _synthesize(self, text: str, language: str) -> Tuple[bytes, str]:
+        """A single TTS request for the language's vendor."""
         logger.info(f"Processing TTS for language: {language}")
         
         # Get language-specific configuration
         lang_config = self._get_language_config(language)
         vendor = lang_config["vendor"]
+        current_span().set(vendor=vendor, model=lang_config["model"])
         
         try:
             if vendor == "elevenlabs":
-                return await self._process_elevenlabs(lang_config, input_data)
+                return await self._process_elevenlabs(lang_config, text)
             elif vendor == "openai":
-                return await self._process_openai(lang_config, input_data)
+                return await self._process_openai(lang_config, text)
             elif vendor == "google":
-                return await self._process_google(lang_config, input_data)
+                return await self._process_google(lang_config, text)
             elif vendor == "azure":
-                return await self._process_azure(lang_config, input_data)
+                return await self._process_azure(lang_config, text)
             else:
                 raise ValueError(f"Unsupported vendor: {vendor}")
                 
@@ -60,6 +143,55 @@ class VoiceAgent(BaseAgent):
             logger.error(f"TTS processing failed for language {language}: {e}")
             raise
     
+    def split_chunks(self, text: str) -> List[str]:
+        """
+        Paragraphs of the text (split on blank lines), with paragraphs shorter
+        than `parallel.min_chunk_chars` merged into the next one.
+        """
+        min_chars = int(self.parallel.get("min_chunk_chars", 0))
+        chunks: List[str] = []
+        pending = ""
+        for paragraph in text.split("\n\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            pending = f"{pending}\n\n{paragraph}" if pending else paragraph
+            if len(pending) >= min_chars:
+                chunks.append(pending)
+                pending = ""
+        if pending:
+            if chunks and len(pending) < min_chars:
+                chunks[-1] = f"{chunks[-1]}\n\n{pending}"
+            else:
+                chunks.append(pending)
+        return chunks
+    
+    @staticmethod
+    def join_segments(results: List[Tuple[bytes, str]]) -> Tuple[bytes, str]:
+        """Join (audio, content_type) results of one format into a single file."""
+        content_types = {content_type for _, content_type in results}
+        if len(content_types) != 1:
+            raise ValueError(f"Cannot join mixed audio formats: {content_types}")
+        content_type = content_types.pop()
+        return concat_audio([audio for audio, _ in results], content_type), content_type
+    
+    def _joinable(self, language: str) -> bool:
+        try:
+            return can_concat(self.content_type(language))
+        except ValueError:
+            return False
+    
+    def content_type(self, language: str) -> str:
+        """Content type of the audio process() returns for a language."""
+        lang_config = self._get_language_config(language)
+        if lang_config["vendor"] == "openai":
+            return CONTENT_TYPES.get(lang_config["settings"].get("response_format", "mp3"), "audio/mpeg")
+        return "audio/mpeg"
+    
+    def can_synthesize_paragraphs(self, language: str) -> bool:
+        """Whether paragraphs can be synthesized separately and joined for this language."""
+        return self.pipelined and self._joinable(language)
+    
     def _get_language_config(self, language: str) -> Dict[str, Any]:
         """Get configuration for specific language, merging with vendor config."""
         lang_configs = self.voice_config.get("languages", {})
@@ -161,11 +293,13 @@ class VoiceAgent(BaseAgent):
         logger.info(f"ElevenLabs TTS: voice_id={voice_id}, speed={speed_factor}")
         
         async with httpx.AsyncClient() as http_client:
-            response = await http_client.post(
-                f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-                headers=headers,
-                json=payload,
-                timeout=60.0
+            response = await get_pacer("elevenlabs", payload["model_id"]).run(
+                lambda: http_client.post(
+                    f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.request_timeout
+                )
             )
             response.raise_for_status()
             audio_bytes = response.content
@@ -205,25 +339,19 @@ class VoiceAgent(BaseAgent):
         logger.info(f"OpenAI TTS: voice={voice}, model={model}, speed={settings.get('speed', 1.0)}, format={format_type}")
         
         async with httpx.AsyncClient() as http_client:
-            response = await http_client.post(
-                "https://api.openai.com/v1/audio/speech",
-                headers=headers,
-                json=payload,
-                timeout=60.0
+            response = await get_pacer("openai", model).run(
+                lambda: http_client.post(
+                    "https://api.openai.com/v1/audio/speech",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.request_timeout
+                )
             )
             response.raise_for_status()
             audio_bytes = response.content
         
         # Return appropriate content type based on format
-        content_type_map = {
-            "mp3": "audio/mpeg",
-            "flac": "audio/flac", 
-            "wav": "audio/wav",
-            "opus": "audio/opus",
-            "aac": "audio/aac",
-            "pcm": "audio/pcm"
-        }
-        content_type = content_type_map.get(format_type, "audio/mpeg")
+        content_type = CONTENT_TYPES.get(format_type, "audio/mpeg")
         
         return audio_bytes, content_type
     
@@ -0,0 +1,205 @@
+"""Joining separately synthesized audio segments into one file."""
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+MP3_CONTENT_TYPE = "audio/mpeg"
+OPUS_CONTENT_TYPE = "audio/opus"
+
+# MPEG audio layer III bitrates (kbps) by version, and sample rates
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+
+
+def _id3v2_size(data: bytes) -> int:
+    """Length of a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)  # syncsafe integer
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def strip_id3(data: bytes, leading: bool = True, trailing: bool = True) -> bytes:
+    """Remove a leading ID3v2 tag and/or a trailing ID3v1 tag from MP3 data."""
+    if leading:
+        data = data[_id3v2_size(data):]
+    if trailing and len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def _mp3_frame(data: bytes, offset: int) -> Optional[Tuple[int, int, bool]]:
+    """(frame length, side info length, mono) of the layer III frame at offset, or None."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 25}.get((data[offset + 1] >> 3) & 0x03)
+    layer = (data[offset + 1] >> 1) & 0x03
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 0x03
+    if version is None or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (data[offset + 2] >> 1) & 0x01
+    mono = (data[offset + 3] >> 6) == 3
+    if version == 1:
+        length = 144 * bitrate // sample_rate + padding
+        side_info = 17 if mono else 32
+    else:
+        length = 72 * bitrate // sample_rate + padding
+        side_info = 9 if mono else 17
+    return length, side_info, mono
+
+
+def strip_mp3_info_frame(data: bytes) -> bytes:
+    """
+    Remove a leading Xing/Info/VBRI frame.
+
+    Encoders put the frame count and seek table of a file in that first
+    (silent) frame; kept in a joined file it would make players report the
+    first segment's duration and seek wrongly.
+    """
+    frame = _mp3_frame(data, 0)
+    if frame is None:
+        return data
+    length, side_info, _ = frame
+    if data[4 + side_info:8 + side_info] in (b"Xing", b"Info") or data[36:40] == b"VBRI":
+        return data[length:]
+    return data
+
+
+def concat_mp3(segments: List[bytes]) -> bytes:
+    """
+    Join MP3 segments into one stream.
+
+    MP3 frames are self-delimiting, so segments can be appended once the
+    metadata between them is removed: the first segment keeps its leading
+    ID3 tag and the last its trailing one, and per-segment Xing/Info
+    frames are dropped so players derive duration from the frames.
+    """
+    last = len(segments) - 1
+    joined = []
+    for index, segment in enumerate(segments):
+        tag = b""
+        if index == 0:
+            tag_size = _id3v2_size(segment)
+            tag, segment = segment[:tag_size], segment[tag_size:]
+        segment = strip_id3(segment, leading=index > 0, trailing=index < last)
+        joined.append(tag + strip_mp3_info_frame(segment))
+    return b"".join(joined)
+
+
+# Ogg CRC-32 (polynomial 0x04C11DB7, not reflected) computed with zlib's
+# reflected CRC over bit-reversed bytes
+_REVERSE_BITS = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+
+
+def ogg_crc(data: bytes) -> int:
+    """Checksum of an Ogg page (with its CRC field zeroed)."""
+    reflected = zlib.crc32(data.translate(_REVERSE_BITS), 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return int(f"{reflected:032b}"[::-1], 2)
+
+
+class OggPage:
+    """One Ogg page: header fields, lacing values and body."""
+
+    HEADER = struct.Struct("<4sBBqIIIB")
+
+    def __init__(self, header_type: int, granule: int, serial: int, sequence: int,
+                 lacing: bytes, body: bytes):
+        self.header_type = header_type
+        self.granule = granule
+        self.serial = serial
+        self.sequence = sequence
+        self.lacing = lacing
+        self.body = body
+
+    @property
+    def completes_packet(self) -> bool:
+        """Whether the last packet on this page ends on it."""
+        return bool(self.lacing) and self.lacing[-1] < 255
+
+    def to_bytes(self) -> bytes:
+        header = self.HEADER.pack(b"OggS", 0, self.header_type, self.granule, self.serial,
+                                  self.sequence, 0, len(self.lacing))
+        page = header + self.lacing + self.body
+        return page[:22] + struct.pack("<I", ogg_crc(page)) + page[26:]
+
+
+def parse_ogg_pages(data: bytes) -> List[OggPage]:
+    """Split an Ogg stream into pages."""
+    pages = []
+    offset = 0
+    while offset < len(data):
+        if data[offset:offset + 4] != b"OggS":
+            raise ValueError(f"Invalid Ogg page at byte {offset}")
+        _, _, header_type, granule, serial, sequence, _, count = OggPage.HEADER.unpack_from(data, offset)
+        lacing_start = offset + OggPage.HEADER.size
+        lacing = data[lacing_start:lacing_start + count]
+        body_start = lacing_start + count
+        body_end = body_start + sum(lacing)
+        pages.append(OggPage(header_type, granule, serial, sequence, lacing, data[body_start:body_end]))
+        offset = body_end
+    return pages
+
+
+def concat_ogg_opus(segments: List[bytes]) -> bytes:
+    """
+    Join Ogg Opus files into a single logical stream.
+
+    Later segments lose their OpusHead/OpusTags header pages; their pages
+    are moved to the first segment's serial number with continuous page
+    sequence numbers and granule positions, and only the final page keeps
+    the end-of-stream flag. Each later segment's pre-skip (a few ms of
+    encoder priming) becomes part of the audio.
+    """
+    output: List[OggPage] = []
+    serial = None
+    granule_offset = 0
+    for index, segment in enumerate(segments):
+        pages = parse_ogg_pages(segment)
+        if index > 0:
+            # Drop the OpusHead page and the pages carrying OpusTags
+            pages = pages[1:]
+            while pages and not pages[0].completes_packet:
+                pages = pages[1:]
+            pages = pages[1:]
+        if serial is None and pages:
+            serial = pages[0].serial
+        segment_granule = 0
+        for page in pages:
+            if page.granule != -1:
+                segment_granule = page.granule
+                page.granule += granule_offset
+            page.serial = serial
+            page.sequence = len(output)
+            page.header_type &= ~0x04  # end of stream
+            output.append(page)
+        granule_offset += segment_granule
+    if output:
+        output[-1].header_type |= 0x04
+    return b"".join(page.to_bytes() for page in output)
+
+
+def concat_audio(segments: List[bytes], content_type: str) -> bytes:
+    """Join audio segments of one content type; raises ValueError for formats that cannot be joined."""
+    if not segments:
+        raise ValueError("No audio segments to join")
+    if len(segments) == 1:
+        return segments[0]
+    if content_type == MP3_CONTENT_TYPE:
+        return concat_mp3(segments)
+    if content_type == OPUS_CONTENT_TYPE:
+        return concat_ogg_opus(segments)
+    raise ValueError(f"Cannot join audio segments of type {content_type}")
+
+
+def can_concat(content_type: str) -> bool:
+    """Whether segments of this content type can be joined."""
+    return content_type in (MP3_CONTENT_TYPE, OPUS_CONTENT_TYPE)
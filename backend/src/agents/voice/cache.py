@@ -0,0 +1,103 @@
+"""Content-addressed cache of synthesized audio."""
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+from ...utils.logger import get_logger
+from ...utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+LOOKUPS = REGISTRY.counter("mira_tts_cache_lookups_total", "TTS audio cache lookups", ("result",))
+EVICTIONS = REGISTRY.counter("mira_tts_cache_evictions_total", "Cached TTS audio objects deleted")
+
+# Shared audio objects live under this prefix of the audio bucket
+CACHE_PREFIX = "tts/"
+
+EXTENSIONS = {
+    "audio/mpeg": "mp3",
+    "audio/flac": "flac",
+    "audio/wav": "wav",
+    "audio/opus": "opus",
+    "audio/aac": "aac",
+    "audio/pcm": "pcm"
+}
+
+
+def tts_cache_key(text: str, lang_config: Dict[str, Any]) -> str:
+    """sha256 of the text and everything that shapes its audio: vendor, model, voice and merged settings."""
+    identity = {
+        "text": text,
+        "vendor": lang_config.get("vendor"),
+        "model": lang_config.get("model"),
+        "voice": lang_config.get("voice_id") or lang_config.get("voice"),
+        "settings": lang_config.get("settings") or {},
+    }
+    payload = json.dumps(identity, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cached_audio(audio_filename: Optional[str]) -> bool:
+    """Whether a story's audio is a shared cache object (deleted only by eviction)."""
+    return bool(audio_filename) and audio_filename.startswith(CACHE_PREFIX)
+
+
+class TtsAudioCache:
+    """
+    Synthesized audio stored once per cache key in the audio bucket, under
+    `tts/<key>.<ext>`, and referenced by every story with the same text and
+    voice settings.
+
+    The repository keeps one row per object. Past `max_entries` objects or
+    `max_bytes` in total, the least recently used ones are deleted, except
+    objects a story still references and objects used within
+    `min_idle_seconds` (a story that just got a hit writes its reference at
+    the end of the pipeline).
+    """
+
+    def __init__(self, repository, cache_config: Dict[str, Any]):
+        self.repository = repository
+        self.max_entries = int(cache_config.get("max_entries", 5000))
+        self.max_bytes = int(cache_config.get("max_bytes", 5 * 1024 ** 3))
+        self.min_idle_seconds = float(cache_config.get("min_idle_seconds", 3600))
+
+    @staticmethod
+    def filename(key: str, content_type: str) -> str:
+        return f"{CACHE_PREFIX}{key}.{EXTENSIONS.get(content_type, 'mp3')}"
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Filename of the audio stored for this key; None on a miss or error."""
+        try:
+            match = await self.repository.find_tts_audio(key)
+        except Exception as e:
+            logger.warning(f"TTS cache lookup failed, synthesizing audio: {e}")
+            return None
+        LOOKUPS.inc(result="hit" if match else "miss")
+        if match is None:
+            return None
+        logger.info(f"TTS cache hit: {match['filename']}")
+        return match["filename"]
+
+    async def store(self, key: str, audio_data: bytes, content_type: str) -> str:
+        """
+        Upload fresh audio under its content-addressed name and return the
+        filename. Upload errors propagate; recording and eviction failures only
+        cost later hits.
+        """
+        filename = self.filename(key, content_type)
+        filename = await self.repository.upload_audio(audio_data, filename)
+        try:
+            evicted = await self.repository.save_tts_audio(
+                key, filename, content_type, len(audio_data),
+                self.max_entries, self.max_bytes, self.min_idle_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Could not record cached TTS audio {filename}: {e}")
+            return filename
+        for stale in evicted:
+            try:
+                await self.repository.delete_audio(stale)
+                EVICTIONS.inc()
+            except Exception as e:
+                logger.warning(f"Could not delete evicted TTS audio {stale}: {e}")
+        return filename
@@ -4,8 +4,11 @@ from datetime import datetime
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
-from .routes import health, kids, stories, email_review
-from .middleware import add_cors_middleware, add_security_middleware, add_exception_handlers
+from .routes import health, kids, stories, email_review, users, metrics
+from .middleware import (
+    add_cors_middleware, add_rate_limit_middleware, add_security_middleware, add_exception_handlers,
+    add_metrics_middleware
+)
 from ..utils.logger import setup_logging, get_logger
 from ..utils.config import load_config
 
@@ -16,11 +19,21 @@ async def lifespan(app: FastAPI):
     # Startup
     logger = get_logger(__name__)
     logger.info("Mira Storyteller backend starting up...")
+    from ..core import story_jobs
+    if story_jobs.get_jobs_config().get("embedded_worker", True):
+        try:
+            await story_jobs.start_story_worker()
+        except Exception as e:
+            logger.error(f"Failed to start embedded job worker: {e}")
     
     yield
     
     # Shutdown
     logger.info("Mira Storyteller backend shutting down...")
+    await story_jobs.stop_story_worker()
+    from ..services import supabase as supabase_module
+    if supabase_module.supabase_service:
+        supabase_module.supabase_service.close()
 
 
 def create_app() -> FastAPI:
@@ -47,16 +60,27 @@ def create_app() -> FastAPI:
     # Add middleware
     from .middleware import logging_middleware
     api_config = config.get("api", {})
+    # Added before CORS so CORS (outer) also decorates 429 responses
+    add_rate_limit_middleware(app, config.get("rate_limit", {}))
     add_cors_middleware(app, api_config.get("cors", {}))
     add_security_middleware(app)
     add_exception_handlers(app)
     app.middleware("http")(logging_middleware)
+    # Added last so it is outermost and sees every response, including 429s
+    add_metrics_middleware(app, config.get("metrics", {}))
     
     # Include routers
     app.include_router(health.router)
     app.include_router(kids.router)
     app.include_router(stories.router)
     app.include_router(email_review.router)
+    app.include_router(users.router)
+    metrics_config = config.get("metrics", {})
+    if metrics_config.get("enabled", True):
+        if metrics_config.get("token"):
+            app.include_router(metrics.router)
+        else:
+            get_logger(__name__).warning("metrics.enabled is set but metrics.token is not; /metrics is not served")
     
     # Legacy endpoints removed - Flutter app now uses proper /stories routes
     
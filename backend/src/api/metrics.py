@@ -0,0 +1,149 @@
+"""HTTP request metrics and the scrape-time collectors behind /metrics."""
+import time
+from typing import Any, Dict, List, Optional
+
+from starlette.routing import Match
+
+from ..utils.logger import get_logger
+from ..utils.metrics import (
+    REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, HTTP_DB_CALLS,
+    track_db_calls, stop_tracking_db_calls,
+)
+from ..utils.pacer import pacer_stats
+
+logger = get_logger(__name__)
+
+UNMATCHED_ROUTE = "unmatched"
+
+_registered = False
+
+
+def route_template(scope) -> str:
+    """
+    Route path template of a request ("/stories/{story_id}"), never the raw path.
+
+    Requests answered before routing (429s from the rate limiter) are matched
+    against the app's routes here so they are labelled like the others.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return candidate.path
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, their latency and the data-layer round
+    trips each one made, labelled by method and route template.
+
+    Added last so it wraps every other middleware and also sees 429s and
+    unhandled errors.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        db_calls, token = track_db_calls()
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            stop_tracking_db_calls(token)
+            method = scope["method"]
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_DB_CALLS.observe(db_calls[0], method=method, route=route)
+
+
+def _family(name: str, type_name: str, documentation: str,
+            rows: List[Dict[str, Any]], label: str, key: str) -> tuple:
+    samples = [(name, {label: row["name"]}, row[key]) for row in rows if row.get(key) is not None]
+    return name, type_name, documentation, samples
+
+
+def collect_outbound() -> List[tuple]:
+    """Vendor call counters kept by the outbound pacers."""
+    rows = pacer_stats()
+    return [
+        _family("mira_vendor_calls_total", "counter", "Vendor API calls", rows, "pacer", "calls"),
+        _family("mira_vendor_throttled_total", "counter", "Vendor 429 responses", rows, "pacer", "throttled"),
+        _family("mira_vendor_retries_total", "counter", "Vendor calls retried after a 429 or 5xx",
+                rows, "pacer", "retries"),
+        _family("mira_vendor_errors_total", "counter", "Vendor calls that raised", rows, "pacer", "errors"),
+        _family("mira_vendor_in_flight", "gauge", "Vendor calls in flight", rows, "pacer", "in_flight"),
+        _family("mira_vendor_waiting", "gauge", "Vendor calls queued by the pacer", rows, "pacer", "waiting"),
+        _family("mira_vendor_wait_seconds_total", "counter", "Time spent queued by the pacer", rows, "pacer",
+                "wait_seconds_total"),
+    ]
+
+
+def collect_caches() -> List[tuple]:
+    """Hit/miss counters of the repository read-through caches."""
+    from ..services.supabase import get_supabase_service
+    try:
+        rows = get_supabase_service().cache_stats()
+    except Exception as e:
+        logger.warning(f"Could not read cache stats for metrics: {e}")
+        return []
+    return [
+        _family("mira_cache_hits_total", "counter", "Cache hits", rows, "cache", "hits"),
+        _family("mira_cache_misses_total", "counter", "Cache misses", rows, "cache", "misses"),
+        _family("mira_cache_evictions_total", "counter", "Cache evictions", rows, "cache", "evictions"),
+        _family("mira_cache_entries", "gauge", "Cache entries", rows, "cache", "entries"),
+        _family("mira_cache_hit_ratio", "gauge", "Cache hit ratio", rows, "cache", "hit_ratio"),
+    ]
+
+
+def collect_admission() -> List[tuple]:
+    """Admission control counters and the last read job queue depth."""
+    from ..core.admission import get_admission_controller
+    try:
+        stats = get_admission_controller().stats()
+    except Exception as e:
+        logger.warning(f"Could not read admission stats for metrics: {e}")
+        return []
+
+    def single(name: str, type_name: str, documentation: str, value: Optional[float]) -> tuple:
+        return name, type_name, documentation, [(name, {}, value)] if value is not None else []
+
+    return [
+        single("mira_generation_in_flight", "gauge", "Generation requests holding an admission slot",
+               stats["in_flight"]),
+        single("mira_job_queue_depth", "gauge", "Story jobs queued", stats["queue_depth"]),
+        single("mira_admission_admitted_total", "counter", "Generation requests admitted", stats["admitted"]),
+        single("mira_admission_degraded_total", "counter", "Generation requests admitted without an AI cover",
+               stats["degraded"]),
+        single("mira_admission_rejected_total", "counter", "Generation requests shed", stats["rejected"]),
+    ]
+
+
+def register_collectors() -> None:
+    """Add the scrape-time collectors to the process registry (once)."""
+    global _registered
+    if _registered:
+        return
+    for collector in (collect_outbound, collect_caches, collect_admission):
+        REGISTRY.add_collector(collector)
+    _registered = True
+
@@ -6,8 +6,10 @@ from fastapi.responses import JSONResponse
 import time
 from typing import Dict, Any
 
-from ..core.exceptions import MiraException, ValidationError, NotFoundError
+from ..core.exceptions import MiraException, ValidationError, NotFoundError, OverloadedError
 from ..utils.logger import get_logger
+from .metrics import MetricsMiddleware, register_collectors
+from .rate_limit import RateLimitMiddleware
 
 logger = get_logger(__name__)
 
@@ -23,6 +25,22 @@ def add_cors_middleware(app: FastAPI, cors_config: Dict[str, Any]) -> None:
     )
 
 
+def add_rate_limit_middleware(app: FastAPI, rate_limit_config: Dict[str, Any]) -> None:
+    """Add inbound rate limiting (skipped when rate_limit.enabled is false)."""
+    if not rate_limit_config.get("enabled", False):
+        return
+    app.add_middleware(RateLimitMiddleware, rate_limit_config=rate_limit_config)
+    logger.info(f"Rate limiting enabled ({rate_limit_config.get('backend', 'memory')} backend)")
+
+
+def add_metrics_middleware(app: FastAPI, metrics_config: Dict[str, Any]) -> None:
+    """Add request metrics for /metrics (skipped when metrics.enabled is false)."""
+    if not metrics_config.get("enabled", True):
+        return
+    register_collectors()
+    app.add_middleware(MetricsMiddleware)
+
+
 def add_security_middleware(app: FastAPI) -> None:
     """Add security middleware."""
     # Add trusted host middleware for production
@@ -92,6 +110,19 @@ def add_exception_handlers(app: FastAPI) -> None:
             }
         )
     
+    @app.exception_handler(OverloadedError)
+    async def overloaded_error_handler(request: Request, exc: OverloadedError):
+        """Handle shed requests with a retry hint."""
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={
+                "error": exc.message,
+                "code": exc.code,
+                "detail": "Service is busy, retry later"
+            },
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+    
     @app.exception_handler(MiraException)
     async def mira_exception_handler(request: Request, exc: MiraException):
         """Handle custom Mira exceptions."""
@@ -0,0 +1,235 @@
+"""Inbound rate limiting keyed by parent, kid or client IP."""
+import json
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.logger import get_logger
+from ..utils.metrics import RATE_LIMITED
+from ..utils.rate_limit import sliding_window_retry_after
+
+logger = get_logger(__name__)
+
+_UUID = r"[0-9a-fA-F-]{36}"
+
+# (pattern, identity kind) for ids carried in the path
+_PATH_KEYS = [
+    (re.compile(rf"^/kids/user/({_UUID})"), "parent"),
+    (re.compile(rf"^/users/({_UUID})"), "parent"),
+    (re.compile(rf"^/stories/kid/({_UUID})"), "kid"),
+    (re.compile(rf"^/kids/({_UUID})"), "kid"),
+]
+
+# ids carried in JSON bodies, found without parsing the (possibly multi-MB) payload
+_BODY_KEYS = [
+    (re.compile(rb'"user_id"\s*:\s*"([^"]{1,64})"'), "parent"),
+    (re.compile(rb'"kid_id"\s*:\s*"([^"]{1,64})"'), "kid"),
+]
+
+WINDOWS = (("requests_per_minute", 60), ("requests_per_hour", 3600))
+
+
+class RateLimitBackend(ABC):
+    """Counter storage for the rate limiter."""
+
+    @abstractmethod
+    async def hit(self, key: str, window_seconds: int, limit: int) -> float:
+        """Count a request for `key` if it fits; returns 0 if allowed, else seconds to wait."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process sliding window counters: two integers per (key, window).
+
+    Keys are kept in LRU order and bounded by `max_keys`, so a flood of
+    distinct IPs cannot grow memory without limit.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._counters: "OrderedDict[Tuple[str, int], List[int]]" = OrderedDict()
+
+    async def hit(self, key: str, window_seconds: int, limit: int) -> float:
+        now = self._clock()
+        window_index = int(now // window_seconds)
+        elapsed = now - window_index * window_seconds
+
+        counter_key = (key, window_seconds)
+        counter = self._counters.get(counter_key)
+        if counter is None:
+            counter = self._counters[counter_key] = [window_index, 0, 0]
+        self._counters.move_to_end(counter_key)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+
+        # counter = [current window index, previous count, current count]
+        if counter[0] != window_index:
+            counter[1] = counter[2] if counter[0] == window_index - 1 else 0
+            counter[2] = 0
+            counter[0] = window_index
+
+        retry_after = sliding_window_retry_after(counter[1], counter[2], elapsed, window_seconds, limit)
+        if retry_after == 0:
+            counter[2] += 1
+        return retry_after
+
+
+class RepositoryRateLimitBackend(RateLimitBackend):
+    """Counters shared by all API workers, stored through the repository (hit_rate_limit RPC)."""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def hit(self, key: str, window_seconds: int, limit: int) -> float:
+        return await self.repository.hit_rate_limit(key, window_seconds, limit)
+
+
+def create_rate_limit_backend(rate_limit_config: Dict[str, Any]) -> RateLimitBackend:
+    """Build the backend selected by `rate_limit.backend` ("memory" or "repository")."""
+    backend = rate_limit_config.get("backend", "memory")
+    if backend == "memory":
+        return MemoryRateLimitBackend(max_keys=rate_limit_config.get("max_keys", 100000))
+    if backend == "repository":
+        from ..services.supabase import get_supabase_service
+        return RepositoryRateLimitBackend(get_supabase_service())
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing `rate_limit` from app.yaml.
+
+    Every request counts against its client IP. If it also names the parent
+    (user_id in path, query or JSON body) or else the kid (kid_id), it counts
+    against that identity too; the ids are unauthenticated, so they add a
+    budget but never replace the IP one. Global per-minute/per-hour limits
+    apply to every key; entries under `routes` add tighter limits for
+    expensive endpoints. Over-limit requests get 429 with Retry-After. If the
+    backend fails, requests are let through.
+    """
+
+    def __init__(self, app, rate_limit_config: Dict[str, Any], backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.config = rate_limit_config
+        self.backend = backend or create_rate_limit_backend(rate_limit_config)
+        self.limits = self._limits(rate_limit_config)
+        self.route_limits = {
+            route: self._limits(limits) for route, limits in (rate_limit_config.get("routes") or {}).items()
+        }
+        self.exempt_paths = set(rate_limit_config.get("exempt_paths", []))
+        self.trust_forwarded_for = rate_limit_config.get("trust_forwarded_for", False)
+
+    @staticmethod
+    def _limits(config: Dict[str, Any]) -> List[Tuple[int, int]]:
+        return [(window, int(config[name])) for name, window in WINDOWS if config.get(name)]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        identity = self._identity_from_url(scope)
+        if identity is None and scope["method"] in ("POST", "PUT", "PATCH"):
+            body, receive = await self._buffer_body(receive)
+            identity = self._identity_from_body(body)
+        identities = [f"ip:{self._client_ip(scope)}"]
+        if identity is not None:
+            identities.append(identity)
+
+        route = f"{scope['method']} {scope['path']}"
+        checks = []
+        for key in identities:
+            checks += [(key, key, window, limit) for window, limit in self.limits]
+            checks += [(key, f"{route}|{key}", window, limit) for window, limit in self.route_limits.get(route, [])]
+
+        retry_after = 0.0
+        limited_by = None
+        try:
+            for key, counter_key, window, limit in checks:
+                wait = await self.backend.hit(counter_key, window, limit)
+                if wait > retry_after:
+                    retry_after, limited_by = wait, key
+        except Exception as e:
+            logger.error(f"Rate limit backend failed, allowing request: {e}")
+            retry_after = 0.0
+
+        if retry_after > 0:
+            logger.warning(f"Rate limited {limited_by} on {route} (retry after {retry_after:.1f}s)")
+            RATE_LIMITED.inc(identity=limited_by.split(":", 1)[0])
+            await self._reject(send, retry_after)
+            return
+        await self.app(scope, receive, send)
+
+    def _identity_from_url(self, scope) -> Optional[str]:
+        query = scope.get("query_string", b"").decode("latin-1")
+        for kind, name in (("parent", "user_id"), ("kid", "kid_id")):
+            match = re.search(rf"(?:^|&){name}=([^&]+)", query)
+            if match:
+                return f"{kind}:{match.group(1)}"
+        for pattern, kind in _PATH_KEYS:
+            match = pattern.match(scope["path"])
+            if match:
+                return f"{kind}:{match.group(1)}"
+        return None
+
+    @staticmethod
+    def _identity_from_body(body: bytes) -> Optional[str]:
+        for pattern, kind in _BODY_KEYS:
+            match = pattern.search(body)
+            if match:
+                return f"{kind}:{match.group(1).decode('utf-8', 'replace')}"
+        return None
+
+    @staticmethod
+    async def _buffer_body(receive):
+        """Read the whole request body and return it with a receive() that replays it."""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(send, retry_after: float) -> None:
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({
+            "error": "Too many requests",
+            "code": "RATE_LIMITED",
+            "detail": f"Rate limit exceeded, retry after {seconds}s"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
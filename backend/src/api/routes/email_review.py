@@ -5,7 +5,6 @@ from typing import Optional
 import os
 
 from ...services.supabase import get_supabase_service
-from ...types.domain import StoryStatus
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -19,51 +18,29 @@ async def review_story_via_email(
 ):
     """Handle story review from email links."""
     try:
-        supabase = get_supabase_service()
-        
-        # Validate token and get story info
-        token_result = supabase.client.table("story_review_tokens").select(
-            "*, stories!inner(id, title, kid_id, kids!inner(name, user_id))"
-        ).eq("token", token).single().execute()
-        
-        if not token_result.data:
+        if action not in ("approve", "decline"):
             return HTMLResponse(
-                content=_generate_error_page("Invalid or expired review link"),
+                content=_generate_error_page("Invalid action specified"),
                 status_code=400
             )
         
-        token_data = token_result.data
-        story_id = token_data["story_id"]
-        story_title = token_data["stories"]["title"]
-        kid_name = token_data["stories"]["kids"]["name"]
+        supabase = get_supabase_service()
         
-        # Check if token is expired
-        from datetime import datetime
-        expires_at = datetime.fromisoformat(token_data["expires_at"].replace('Z', '+00:00'))
-        if datetime.now(expires_at.tzinfo) > expires_at:
+        # Validate and burn the token, update the story and log the action in one
+        # transaction so a double-clicked link cannot apply two reviews
+        declined_reason = "Declined via email" if action == "decline" else None
+        review = await supabase.consume_review_token(token, action, declined_reason)
+        
+        if not review:
             return HTMLResponse(
-                content=_generate_error_page("This review link has expired"),
+                content=_generate_error_page("Invalid or expired review link"),
                 status_code=400
             )
         
-        # Process the action
+        story_title = review["story_title"]
+        kid_name = review["kid_name"]
+        
         if action == "approve":
-            # Update story status to approved
-            await supabase.update_story(story_id, {
-                "status": StoryStatus.APPROVED.value
-            })
-            
-            # Log the action
-            supabase.client.table("story_review_actions").insert({
-                "story_id": story_id,
-                "user_id": token_data["stories"]["kids"]["user_id"],
-                "action": "approve",
-                "review_method": "email"
-            }).execute()
-            
-            # Delete the token (one-time use)
-            supabase.client.table("story_review_tokens").delete().eq("token", token).execute()
-            
             return HTMLResponse(
                 content=_generate_success_page(
                     f"✅ Story Approved!",
@@ -71,40 +48,14 @@ async def review_story_via_email(
                     "The story is now available in your child's library."
                 )
             )
-            
-        elif action == "decline":
-            # For decline, we might want to show a form for feedback
-            # For now, just mark as declined
-            await supabase.update_story(story_id, {
-                "status": StoryStatus.REJECTED.value,
-                "declined_reason": "Declined via email"
-            })
-            
-            # Log the action
-            supabase.client.table("story_review_actions").insert({
-                "story_id": story_id,
-                "user_id": token_data["stories"]["kids"]["user_id"],
-                "action": "decline",
-                "review_method": "email",
-                "declined_reason": "Declined via email"
-            }).execute()
-            
-            # Delete the token
-            supabase.client.table("story_review_tokens").delete().eq("token", token).execute()
-            
-            return HTMLResponse(
-                content=_generate_success_page(
-                    f"❌ Story Declined",
-                    f'"{story_title}" by {kid_name} has been declined.',
-                    "This story will not be shown to your child."
-                )
-            )
         
-        else:
-            return HTMLResponse(
-                content=_generate_error_page("Invalid action specified"),
-                status_code=400
+        return HTMLResponse(
+            content=_generate_success_page(
+                f"❌ Story Declined",
+                f'"{story_title}" by {kid_name} has been declined.',
+                "This story will not be shown to your child."
             )
+        )
             
     except Exception as e:
         logger.error(f"Error processing email review: {e}")
@@ -124,17 +75,14 @@ async def email_login(
         supabase = get_supabase_service()
         
         # Validate token and get story info
-        token_result = supabase.client.table("story_review_tokens").select(
-            "*, stories!inner(id, title, kid_id, kids!inner(name, user_id))"
-        ).eq("token", token).single().execute()
+        token_data = await supabase.get_review_token(token)
         
-        if not token_result.data:
+        if not token_data:
             return HTMLResponse(
                 content=_generate_error_page("Invalid or expired review link"),
                 status_code=400
             )
         
-        token_data = token_result.data
         story_id = token_data["story_id"]
         user_id = token_data["stories"]["kids"]["user_id"]
         
@@ -162,13 +110,7 @@ async def email_login(
             redirect_to = f"{base_url}/parent-dashboard?story={story_id}&action={redirect}"
             
             # Use Supabase Admin API to generate a magic link
-            result = supabase.client.auth.admin.generate_link(
-                type="magiclink",
-                email=user_email,
-                options={
-                    "redirect_to": redirect_to
-                }
-            )
+            result = await supabase.generate_magic_link(user_email, redirect_to)
             
             if result and hasattr(result, 'properties') and result.properties.get('action_link'):
                 # Redirect to the magic link
@@ -5,6 +5,8 @@ from typing import Dict, Any
 from ...types.responses import HealthResponse
 from ...services.supabase import get_supabase_service
 from ...utils.logger import get_logger
+from ...utils.pacer import pacer_stats
+from ...core.admission import get_admission_controller
 
 logger = get_logger(__name__)
 router = APIRouter(tags=["health"])
@@ -29,6 +31,7 @@ async def detailed_health_check() -> HealthResponse:
         supabase = get_supabase_service()
         supabase_status = await supabase.health_check()
         services["supabase"] = supabase_status
+        services["caches"] = {stats["name"]: stats for stats in supabase.cache_stats()}
     except Exception as e:
         logger.error(f"Supabase health check failed: {e}")
         services["supabase"] = {
@@ -36,6 +39,12 @@ async def detailed_health_check() -> HealthResponse:
             "error": str(e)
         }
     
+    # Outbound vendor pacing: queue wait times and throttling per (vendor, model)
+    services["outbound"] = {stats["name"]: stats for stats in pacer_stats()}
+    
+    # Load shedding on the generation endpoints
+    services["admission"] = get_admission_controller().stats()
+    
     # Check AI agents (just verify they can be initialized)
     services["agents"] = {
         "vision": "configured",
@@ -1,11 +1,12 @@
 """Kid profile management endpoints."""
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 
 from ...types.requests import CreateKidRequest, UpdateKidRequest, ExtractAppearanceRequest
 from ...types.responses import KidResponse, KidListResponse, StoryResponse, ExtractAppearanceResponse
 from ...services.supabase import get_supabase_service
-from ...core.validators import validate_kid_name, validate_age, validate_uuid
+from ...core.validators import validate_kid_name, validate_age, validate_uuid, validate_list_view
 from ...core.exceptions import NotFoundError, ValidationError
 from ...utils.logger import get_logger
 from ...agents.appearance.agent import create_appearance_agent
@@ -29,9 +30,6 @@ async def create_kid(request: CreateKidRequest) -> KidResponse:
         supabase = get_supabase_service()
         kid = await supabase.create_kid(request)
         
-        # Get all stories count (for parent dashboard)
-        stories = await supabase.get_all_stories_for_kid(kid.id, limit=1)
-        
         return KidResponse(
             id=kid.id,
             user_id=kid.user_id,
@@ -64,13 +62,14 @@ async def get_kid(kid_id: str) -> KidResponse:
         validate_uuid(kid_id, "kid_id")
         
         supabase = get_supabase_service()
-        kid = await supabase.get_kid(kid_id)
+        # Profile and story count (for parent dashboard) are independent lookups
+        kid, stories_count = await asyncio.gather(
+            supabase.get_kid(kid_id),
+            supabase.count_stories_for_kid(kid_id)
+        )
         
         if not kid:
             raise NotFoundError("Kid profile", kid_id)
-            
-        # Get all stories count (for parent dashboard)
-        stories = await supabase.get_all_stories_for_kid(kid_id)
         
         return KidResponse(
             id=kid.id,
@@ -86,7 +85,7 @@ async def get_kid(kid_id: str) -> KidResponse:
             favorite_genres=kid.favorite_genres,
             parent_notes=kid.parent_notes,
             preferred_language=kid.preferred_language,
-            stories_count=len(stories),
+            stories_count=stories_count,
             created_at=kid.created_at
         )
         
@@ -158,13 +157,13 @@ async def update_kid(kid_id: str, request: UpdateKidRequest) -> KidResponse:
             validate_age(request.age)
             
         supabase = get_supabase_service()
-        kid = await supabase.update_kid(kid_id, request)
+        kid, stories_count = await asyncio.gather(
+            supabase.update_kid(kid_id, request),
+            supabase.count_stories_for_kid(kid_id)
+        )
         
         if not kid:
             raise NotFoundError("Kid profile", kid_id)
-            
-        # Get all stories count (for parent dashboard)
-        stories = await supabase.get_all_stories_for_kid(kid_id)
         
         return KidResponse(
             id=kid.id,
@@ -180,7 +179,7 @@ async def update_kid(kid_id: str, request: UpdateKidRequest) -> KidResponse:
             favorite_genres=kid.favorite_genres,
             parent_notes=kid.parent_notes,
             preferred_language=kid.preferred_language,
-            stories_count=len(stories),
+            stories_count=stories_count,
             created_at=kid.created_at
         )
         
@@ -217,10 +216,14 @@ async def delete_kid(kid_id: str):
 
 
 @router.get("/{kid_id}/stories", response_model=List[dict])
-async def get_kid_stories(kid_id: str):
-    """Get all stories for a specific kid - matches old backend format."""
+async def get_kid_stories(kid_id: str, view: str = "full"):
+    """Get all stories for a specific kid - matches old backend format.
+    
+    view=summary drops content and caption for library/grid screens.
+    """
     try:
         validate_uuid(kid_id, "kid_id")
+        validate_list_view(view)
         
         supabase = get_supabase_service()
         
@@ -230,10 +233,10 @@ async def get_kid_stories(kid_id: str):
             raise NotFoundError("Kid", kid_id)
         
         # Get stories for the kid
-        stories = await supabase.get_stories_for_kid(kid_id)
+        stories = await supabase.get_stories_for_kid(kid_id, view=view)
         
         # Return in format expected by Flutter app (matching old backend)
-        return [
+        items = [
             {
                 "story_id": story.id,
                 "kid_id": story.kid_id,
@@ -251,6 +254,10 @@ async def get_kid_stories(kid_id: str):
             }
             for story in stories
         ]
+        if view == "summary":
+            for item in items:
+                del item["content"], item["caption"]
+        return items
         
     except NotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
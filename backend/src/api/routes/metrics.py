@@ -0,0 +1,34 @@
+"""Prometheus scrape endpoint."""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ...core.admission import get_admission_controller
+from ...utils.config import get_config
+from ...utils.logger import get_logger
+from ...utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)) -> PlainTextResponse:
+    """Metrics of this API process in the Prometheus text format (requires metrics.token)."""
+    token = get_config().get("metrics", {}).get("token")
+    if not token:
+        raise HTTPException(status_code=503, detail="Metrics token not configured")
+    if not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    # Refresh the job queue depth (cached by the controller) so idle APIs still report it
+    try:
+        await get_admission_controller().get_queue_depth()
+    except Exception as e:
+        logger.warning(f"Could not refresh queue depth for metrics: {e}")
+
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,25 +1,29 @@
 """Story generation and management endpoints."""
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from typing import List, Optional
 from datetime import datetime
-import base64
-import tempfile
-import os
+import asyncio
+import uuid
 
 from ...types.requests import (
     GenerateStoryRequest, ReviewStoryRequest, InitiateVoiceStoryRequest,
     TranscribeAudioRequest, SubmitStoryTextRequest
 )
 from ...types.responses import (
-    StoryResponse, StoryListResponse, GenerateStoryResponse,
-    InitiateStoryResponse, TranscriptionResponse
+    StoryResponse, StorySummaryResponse, StoryListResponse, GenerateStoryResponse,
+    InitiateStoryResponse, TranscriptionResponse, StoryTimelineResponse, StoryTimelineRun
 )
 from ...types.domain import StoryStatus, InputFormat
 from ...services.supabase import get_supabase_service
 from ...services.background_music_service import background_music_service
-from ...core.story_processor import get_story_processor
-from ...core.validators import validate_base64_image, validate_uuid, validate_story_content
-from ...core.exceptions import NotFoundError, ValidationError, AgentError
+from ...agents.speech.agent import create_speech_agent
+from ...agents.voice.cache import is_cached_audio
+from ...core.story_jobs import enqueue_image_to_story, enqueue_text_to_story, mark_story_failed
+from ...core.admission import get_admission_controller
+from ...core.story_dedup import DuplicateRequest, get_story_deduplicator
+from ...core.validators import validate_base64_image, validate_uuid, validate_story_content, validate_list_view
+from ...core.pagination import decode_cursor, next_cursor
+from ...core.exceptions import NotFoundError, ValidationError, AgentError, OverloadedError
 from ...utils.logger import get_logger
 import yaml
 
@@ -34,56 +38,97 @@ def get_agents_config():
     return config["agents"]
 
 
+def overloaded_response(error: OverloadedError) -> HTTPException:
+    """HTTP error for a shed request, with a Retry-After hint."""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=error.message,
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def duplicate_response(duplicate: DuplicateRequest) -> GenerateStoryResponse:
+    """Response for a request that attached to the story an identical earlier request started."""
+    return GenerateStoryResponse(
+        story_id=duplicate.story_id,
+        status=duplicate.status,
+        message="Story generation already started",
+        duplicate=True
+    )
+
+
 @router.post("/generate", response_model=GenerateStoryResponse)
 async def generate_story(
     request: GenerateStoryRequest,
-    background_tasks: BackgroundTasks
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ) -> GenerateStoryResponse:
-    """Generate a story from an uploaded image."""
+    """
+    Generate a story from an uploaded image.
+    
+    A retried request (same Idempotency-Key, or the same image for the same
+    kid and language within the dedup window) gets the story the first one
+    started instead of running the pipeline again.
+    """
+    dedup = get_story_deduplicator()
+    story_id = str(uuid.uuid4())
+    keys = {}
+    story = None
     try:
         # Validate input
         validate_base64_image(request.image_data)
         validate_uuid(request.kid_id, "kid_id")
         
-        # Verify kid exists
-        supabase = get_supabase_service()
-        kid = await supabase.get_kid(request.kid_id)
-        if not kid:
-            raise NotFoundError("Kid profile", request.kid_id)
-        
-        # Select random background music
-        background_music_filename = background_music_service.get_random_track()
-        if background_music_filename:
-            logger.info(f"Selected background music: {background_music_filename}")
-        else:
-            logger.warning("No background music tracks available")
-        
-        # Create story record with PROCESSING status from the start
-        story_data = {
-            "kid_id": request.kid_id,
-            "title": "New Story",
-            "content": "",
-            "language": request.language.value,
-            "status": StoryStatus.PROCESSING.value,  # Start with PROCESSING, not PENDING
-            "background_music_filename": background_music_filename
-        }
-        story = await supabase.create_story(story_data)
+        keys = dedup.image_request_keys(request.kid_id, request.language.value, request.image_data,
+                                        idempotency_key)
+        duplicate = await dedup.claim(keys, story_id)
+        if duplicate:
+            return duplicate_response(duplicate)
         
-        # Process story in background
-        agents_config = get_agents_config()
-        processor = get_story_processor(agents_config)
-        background_tasks.add_task(
-            processor.process_image_to_story,
-            request,
-            story.id
-        )
+        try:
+            # Shed load before doing any work for this request
+            async with get_admission_controller().admit() as degraded:
+                # Verify kid exists
+                supabase = get_supabase_service()
+                kid = await supabase.get_kid(request.kid_id)
+                if not kid:
+                    raise NotFoundError("Kid profile", request.kid_id)
+                
+                # Select random background music
+                background_music_filename = background_music_service.get_random_track()
+                if background_music_filename:
+                    logger.info(f"Selected background music: {background_music_filename}")
+                else:
+                    logger.warning("No background music tracks available")
+                
+                # Create story record with PROCESSING status from the start
+                story_data = {
+                    "id": story_id,  # the id the dedup keys were claimed for
+                    "kid_id": request.kid_id,
+                    "title": "New Story",
+                    "content": "",
+                    "language": request.language.value,
+                    "status": StoryStatus.PROCESSING.value,  # Start with PROCESSING, not PENDING
+                    "background_music_filename": background_music_filename
+                }
+                story = await supabase.create_story(story_data)
+                
+                # Queue the pipeline run; it survives restarts and runs on any worker
+                await enqueue_image_to_story(request, story.id, skip_cover=degraded)
+        except Exception:
+            # Nothing was queued: don't leave the story processing forever, and let a retry start anew
+            if story:
+                await mark_story_failed(story.id)
+            await dedup.release(keys, story_id)
+            raise
         
         return GenerateStoryResponse(
             story_id=story.id,
             status=StoryStatus.PROCESSING,
-            message="Story generation started"
+            message="Story generation started (default cover, service busy)" if degraded else "Story generation started"
         )
         
+    except OverloadedError as e:
+        raise overloaded_response(e)
     except (NotFoundError, ValidationError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -111,7 +156,7 @@ async def get_background_music_tracks() -> dict:
             track_info = {
                 "filename": filename,
                 "display_name": display_name,
-                "url": supabase.client.storage.from_(bucket_name).get_public_url(filename),
+                "url": supabase.get_public_url(bucket_name, filename),
                 "cover_image": f"assets/audio-covers/{cover_filename}"  # Local asset path
             }
             track_list.append(track_info)
@@ -127,19 +172,59 @@ async def get_background_music_tracks() -> dict:
 
 
 
+def story_summary(story) -> StorySummaryResponse:
+    """Build the content-free list shape for a story."""
+    return StorySummaryResponse(
+        id=story.id,
+        kid_id=story.kid_id,
+        child_name=story.child_name,
+        title=story.title,
+        audio_url=story.audio_url,
+        background_music_url=story.background_music_url,
+        cover_image_url=story.cover_image_url,
+        cover_image_thumbnail_url=story.cover_image_thumbnail_url,
+        status=story.status,
+        language=story.language,
+        is_favourite=story.is_favourite,
+        created_at=story.created_at,
+        updated_at=story.updated_at
+    )
+
+
 @router.get("/pending", response_model=StoryListResponse)
-async def get_pending_stories() -> StoryListResponse:
-    """Get all pending stories for parent review."""
+async def get_pending_stories(
+    user_id: Optional[str] = None,
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+    view: str = "full"
+) -> StoryListResponse:
+    """
+    Get pending stories for parent review, newest first.
+    
+    Pass `user_id` to scope the queue to one parent's kids and the returned
+    `next_cursor` as `cursor` for the next page. Use view=summary to omit content.
+    """
     try:
+        if user_id is not None:
+            validate_uuid(user_id, "user_id")
+        else:
+            logger.warning("Pending stories requested without user_id; returning unscoped queue page")
+        if page_size < 1 or page_size > 100:
+            raise ValidationError("Page size must be between 1 and 100")
+        if cursor:
+            decode_cursor(cursor)
+        validate_list_view(view)
         logger.info("Getting pending stories")
         supabase = get_supabase_service()
         
-        # Get all pending stories from database using the service method
-        stories_data = await supabase.get_pending_stories()
+        # Get one page of pending stories from database using the service method
+        stories_data = await supabase.get_pending_stories(
+            user_id=user_id, limit=page_size, cursor=cursor, view=view
+        )
         logger.info(f"Found {len(stories_data)} pending stories")
         
         # Convert to response format
-        stories = [
+        stories = [story_summary(story) for story in stories_data] if view == "summary" else [
             StoryResponse(
                 id=story.id,
                 kid_id=story.kid_id,
@@ -161,11 +246,15 @@ async def get_pending_stories() -> StoryListResponse:
         
         return StoryListResponse(
             stories=stories,
-            total=len(stories),
+            # Only a first page that is not full knows the queue size without counting
+            total=len(stories) if not cursor and len(stories) < page_size else None,
             page=1,
-            page_size=len(stories)
+            page_size=page_size,
+            next_cursor=next_cursor(stories_data, page_size)
         )
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get pending stories: {e}")
         raise HTTPException(status_code=500, detail="Failed to get pending stories")
@@ -208,13 +297,48 @@ async def get_story(story_id: str) -> StoryResponse:
         raise HTTPException(status_code=500, detail="Failed to get story")
 
 
+@router.get("/{story_id}/timeline", response_model=StoryTimelineResponse)
+async def get_story_timeline(story_id: str) -> StoryTimelineResponse:
+    """Get the timing spans of every pipeline run of a story."""
+    try:
+        validate_uuid(story_id, "story_id")
+        
+        supabase = get_supabase_service()
+        timelines = await supabase.get_story_timelines(story_id)
+        if not timelines and not await supabase.get_story(story_id):
+            raise NotFoundError("Story", story_id)
+        
+        return StoryTimelineResponse(
+            story_id=story_id,
+            runs=[StoryTimelineRun(**timeline) for timeline in timelines]
+        )
+        
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get story timeline: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get story timeline")
+
+
 @router.get("/kid/{kid_id}", response_model=StoryListResponse)
 async def get_stories_for_kid(
     kid_id: str,
     page: int = 1,
-    page_size: int = 20
+    page_size: int = 20,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    view: str = "full"
 ) -> StoryListResponse:
-    """Get all stories for a kid."""
+    """
+    Get approved stories for a kid, newest first.
+    
+    Pass the returned `next_cursor` back as `cursor` for constant-cost paging;
+    `page` is still honoured when no cursor is given. `count` selects how
+    `total` is computed: "exact", "estimated" or "none" to skip it.
+    `view=summary` returns rows without content.
+    """
     try:
         validate_uuid(kid_id, "kid_id")
         
@@ -222,14 +346,30 @@ async def get_stories_for_kid(
             raise ValidationError("Page must be >= 1")
         if page_size < 1 or page_size > 100:
             raise ValidationError("Page size must be between 1 and 100")
-            
-        offset = (page - 1) * page_size
+        if count not in ("exact", "estimated", "none"):
+            raise ValidationError("count must be one of: exact, estimated, none")
+        if cursor:
+            decode_cursor(cursor)
+        validate_list_view(view)
         
         supabase = get_supabase_service()
-        stories = await supabase.get_stories_for_kid(kid_id, limit=page_size, offset=offset)
+        if cursor:
+            list_call = supabase.get_stories_for_kid(kid_id, limit=page_size, cursor=cursor, view=view)
+        else:
+            list_call = supabase.get_stories_for_kid(
+                kid_id, limit=page_size, offset=(page - 1) * page_size, view=view
+            )
+        
+        if count == "none":
+            stories, total = await list_call, None
+        else:
+            stories, total = await asyncio.gather(
+                list_call,
+                supabase.count_stories_for_kid(kid_id, status="approved", method=count)
+            )
         
         # Convert to response format
-        story_responses = [
+        story_responses = [story_summary(story) for story in stories] if view == "summary" else [
             StoryResponse(
                 id=story.id,
                 kid_id=story.kid_id,
@@ -248,14 +388,12 @@ async def get_stories_for_kid(
             for story in stories
         ]
         
-        # Get total count (simplified - just return current page count)
-        total = len(stories) + offset if len(stories) == page_size else offset + len(stories)
-        
         return StoryListResponse(
             stories=story_responses,
             total=total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=next_cursor(stories, page_size)
         )
         
     except ValidationError as e:
@@ -332,8 +470,8 @@ async def delete_story(story_id: str):
         if not story:
             raise NotFoundError("Story", story_id)
             
-        # Delete audio file if exists
-        if story.audio_url:
+        # Delete audio file if exists (cached TTS audio is shared; eviction removes it)
+        if story.audio_url and not is_cached_audio(story.audio_filename):
             filename = story.audio_url.split("/")[-1]
             await supabase.delete_audio(filename)
             
@@ -451,71 +589,38 @@ async def transcribe_audio(request: TranscribeAudioRequest) -> TranscriptionResp
         if story.status != StoryStatus.TRANSCRIBING:
             raise ValidationError(f"Story is not in transcribing state: {story.status}")
         
-        # Decode base64 audio
-        audio_bytes = base64.b64decode(request.audio_data)
+        # Get Speech (Whisper) config
+        agents_config = get_agents_config()
+        speech_agent = create_speech_agent(agents_config.get("speech", {}))
         
-        # Create temporary file for audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
+        # Transcribe audio
+        transcribed_text = await speech_agent.process(request.audio_data, language=story.language.value)
         
-        try:
-            # Get Speech (Whisper) config
-            agents_config = get_agents_config()
-            speech_config = agents_config.get("speech", {})
-            current_vendor = speech_config.get("vendor", "openai")
-            vendor_config = speech_config.get("vendors", {}).get(current_vendor, {})
-            api_key = vendor_config.get("api_key")
-            
-            if not api_key:
-                raise ValueError(f"API key not found for speech vendor: {current_vendor}")
-            
-            # Import OpenAI client
-            import openai
-            client = openai.OpenAI(api_key=api_key)
-            
-            # Transcribe audio
-            model = vendor_config.get("model", "whisper-1")
-            with open(temp_audio_path, 'rb') as audio_file:
-                transcript_response = client.audio.transcriptions.create(
-                    model=model,
-                    file=audio_file,
-                    language=story.language.value  # Use story's language in ISO format
-                )
-            
-            transcribed_text = transcript_response.text.strip()
-            logger.info(f"Audio transcribed: {len(transcribed_text)} characters")
-            
-            # Update story status only (no permanent audio storage for user recordings)
-            updates = {
-                "status": StoryStatus.DRAFT.value
-            }
-            await supabase.update_story(request.story_id, updates)
-            
-            # Store in story_inputs table
-            story_input_data = {
-                "story_id": request.story_id,
-                "input_type": "audio_transcription",
-                "input_value": transcribed_text,
-                "metadata": {
-                    "speech_vendor": current_vendor,
-                    "speech_model": model,
-                    "transcription_language": story.language
-                }
+        # Update story status only (no permanent audio storage for user recordings)
+        updates = {
+            "status": StoryStatus.DRAFT.value
+        }
+        await supabase.update_story(request.story_id, updates)
+        
+        # Store in story_inputs table
+        story_input_data = {
+            "story_id": request.story_id,
+            "input_type": "audio_transcription",
+            "input_value": transcribed_text,
+            "metadata": {
+                "speech_vendor": speech_agent.vendor.value,
+                "speech_model": speech_agent.model,
+                "transcription_language": story.language
             }
-            await supabase.create_story_input(story_input_data)
-            
-            return TranscriptionResponse(
-                story_id=request.story_id,
-                transcribed_text=transcribed_text,
-                status=StoryStatus.DRAFT
-            )
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_audio_path):
-                os.unlink(temp_audio_path)
-                
+        }
+        await supabase.create_story_input(story_input_data)
+        
+        return TranscriptionResponse(
+            story_id=request.story_id,
+            transcribed_text=transcribed_text,
+            status=StoryStatus.DRAFT
+        )
+        
     except (NotFoundError, ValidationError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -526,65 +631,78 @@ async def transcribe_audio(request: TranscribeAudioRequest) -> TranscriptionResp
 @router.post("/submit-text", response_model=GenerateStoryResponse)
 async def submit_story_text(
     request: SubmitStoryTextRequest,
-    background_tasks: BackgroundTasks
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ) -> GenerateStoryResponse:
-    """Submit final text for story generation."""
+    """Submit final text for story generation (a repeated submit attaches to the running story)."""
+    dedup = get_story_deduplicator()
+    keys = {}
     try:
-        # Validate story exists and is in draft state
         supabase = get_supabase_service()
         story = await supabase.get_story(request.story_id)
         if not story:
             raise NotFoundError("Story", request.story_id)
-            
-        if story.status != StoryStatus.DRAFT:
-            raise ValidationError(f"Story is not in draft state: {story.status}")
-        
-        # Validate text
-        text = request.text.strip()
-        if len(text) < 10:
-            raise ValidationError("Text too short (minimum 10 characters)")
-        if len(text) > 500:
-            raise ValidationError("Text too long (maximum 500 characters)")
         
-        # Update story status to processing
-        updates = {
-            "status": StoryStatus.PROCESSING.value
-        }
-        await supabase.update_story(request.story_id, updates)
-        
-        # Get original transcription from story_inputs to compare
-        original_transcription_input = await supabase.get_story_input_by_type(request.story_id, "audio_transcription")
-        original_transcription = original_transcription_input.get("input_value", "") if original_transcription_input else ""
-        
-        # Store final text in story_inputs
-        story_input_data = {
-            "story_id": request.story_id,
-            "input_type": "text_final",
-            "input_value": text,
-            "metadata": {
-                "original_transcription": original_transcription,
-                "text_edited": original_transcription != text
-            }
-        }
-        await supabase.create_story_input(story_input_data)
+        keys = dedup.text_request_keys(request.story_id, story.kid_id, idempotency_key)
+        duplicate = await dedup.claim(keys, request.story_id)
+        if duplicate:
+            return duplicate_response(duplicate)
         
-        # Process story in background
-        agents_config = get_agents_config()
-        processor = get_story_processor(agents_config)
-        background_tasks.add_task(
-            processor.process_text_to_story,
-            request.story_id,
-            text,
-            story.kid_id,
-            story.language
-        )
+        started = False
+        try:
+            # Shed load before doing any work for this request
+            async with get_admission_controller().admit() as degraded:
+                # Validate story is in draft state
+                if story.status != StoryStatus.DRAFT:
+                    raise ValidationError(f"Story is not in draft state: {story.status}")
+                
+                # Validate text
+                text = request.text.strip()
+                if len(text) < 10:
+                    raise ValidationError("Text too short (minimum 10 characters)")
+                if len(text) > 500:
+                    raise ValidationError("Text too long (maximum 500 characters)")
+                
+                # Update story status to processing
+                updates = {
+                    "status": StoryStatus.PROCESSING.value
+                }
+                await supabase.update_story(request.story_id, updates)
+                started = True
+                
+                # Get original transcription from story_inputs to compare
+                original_transcription_input = await supabase.get_story_input_by_type(request.story_id, "audio_transcription")
+                original_transcription = original_transcription_input.get("input_value", "") if original_transcription_input else ""
+                
+                # Store final text in story_inputs
+                story_input_data = {
+                    "story_id": request.story_id,
+                    "input_type": "text_final",
+                    "input_value": text,
+                    "metadata": {
+                        "original_transcription": original_transcription,
+                        "text_edited": original_transcription != text
+                    }
+                }
+                await supabase.create_story_input(story_input_data)
+                
+                # Queue the pipeline run; it survives restarts and runs on any worker
+                await enqueue_text_to_story(request.story_id, text, story.kid_id, story.language,
+                                            skip_cover=degraded)
+        except Exception:
+            # Nothing was queued: don't leave the story processing forever
+            if started:
+                await mark_story_failed(request.story_id)
+            await dedup.release(keys, request.story_id)
+            raise
         
         return GenerateStoryResponse(
             story_id=request.story_id,
             status=StoryStatus.PROCESSING,
-            message="Story generation started"
+            message="Story generation started (default cover, service busy)" if degraded else "Story generation started"
         )
         
+    except OverloadedError as e:
+        raise overloaded_response(e)
     except (NotFoundError, ValidationError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -745,14 +863,14 @@ async def review_story_simple(request: dict):
         updated_story = await supabase.update_story(story_id, update_data)
         
         # Log the review action in story_review_actions table
-        supabase.client.table("story_review_actions").insert({
+        await supabase.create_review_action({
             "story_id": story_id,
             "user_id": kid.user_id,
             "action": action,
             "feedback": feedback,
             "declined_reason": feedback if not approved else None,
             "review_method": "app"
-        }).execute()
+        })
         
         logger.info(f"Story {story_id} {action}ed by parent {kid.user_id}")
         
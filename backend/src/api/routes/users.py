@@ -0,0 +1,33 @@
+"""Parent account endpoints."""
+from fastapi import APIRouter, HTTPException
+
+from ...services.supabase import get_supabase_service
+from ...core.validators import validate_uuid
+from ...core.exceptions import ValidationError
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.post("/{user_id}/settings/refresh")
+async def refresh_user_settings(user_id: str) -> dict:
+    """Drop the cached parent profile after the app changes auth metadata settings."""
+    try:
+        validate_uuid(user_id, "user_id")
+
+        supabase = get_supabase_service()
+        supabase.invalidate_parent_profile(user_id)
+        profile = await supabase.get_parent_profile(user_id)
+
+        return {
+            "user_id": user_id,
+            "approval_mode": profile["approval_mode"],
+            "notification_preferences": profile["notification_preferences"]
+        }
+
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to refresh user settings: {e}")
+        raise HTTPException(status_code=500, detail="Failed to refresh user settings")
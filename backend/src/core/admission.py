@@ -0,0 +1,131 @@
+"""Admission control for the story generation endpoints."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Callable, AsyncIterator
+
+from ..services.repository import Repository
+from ..services.supabase import get_supabase_service
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+from .exceptions import OverloadedError
+
+logger = get_logger(__name__)
+
+
+class AdmissionController:
+    """
+    Decides whether a new story pipeline is accepted before any work is done.
+
+    Two signals are checked against high-water marks from `jobs.admission`:
+    generation requests this process is handling right now (each holds a
+    base64 image in memory) and the depth of the shared job queue. Above
+    `degrade_queue_depth` stories are still accepted but skip the AI cover;
+    above `max_queue_depth` or `max_in_flight` requests are rejected with a
+    retry hint. The queue depth is re-read at most every
+    `depth_cache_seconds`, so a burst costs one count query.
+    """
+
+    def __init__(self, repository: Repository, admission_config: Optional[Dict[str, Any]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        admission_config = admission_config or {}
+        self.repository = repository
+        self.enabled = admission_config.get("enabled", True)
+        self.max_in_flight = int(admission_config.get("max_in_flight", 32))
+        self.degrade_queue_depth = int(admission_config.get("degrade_queue_depth", 50))
+        self.max_queue_depth = int(admission_config.get("max_queue_depth", 200))
+        self.retry_after = int(admission_config.get("retry_after_seconds", 30))
+        self.in_flight_retry_after = int(admission_config.get("in_flight_retry_after_seconds", 2))
+        self.depth_cache_seconds = float(admission_config.get("depth_cache_seconds", 2))
+        self._clock = clock
+
+        self.in_flight = 0
+        self.queue_depth: Optional[int] = None
+        self._depth_read_at = float("-inf")
+        self._depth_lock = asyncio.Lock()
+
+        self.admitted = 0
+        self.degraded = 0
+        self.rejected = 0
+
+    async def get_queue_depth(self) -> Optional[int]:
+        """Queued job count, reused for depth_cache_seconds; None if it cannot be read."""
+        if self._clock() - self._depth_read_at < self.depth_cache_seconds:
+            return self.queue_depth
+        async with self._depth_lock:
+            # Another request may have refreshed it while we waited
+            if self._clock() - self._depth_read_at < self.depth_cache_seconds:
+                return self.queue_depth
+            try:
+                self.queue_depth = await self.repository.count_jobs("queued")
+            except Exception as e:
+                logger.error(f"Could not read job queue depth, admitting without it: {e}")
+                self.queue_depth = None
+            self._depth_read_at = self._clock()
+            return self.queue_depth
+
+    async def _check_queue(self) -> bool:
+        """Degrade (True) or reject based on the queue depth."""
+        depth = await self.get_queue_depth()
+        if depth is not None and depth >= self.max_queue_depth:
+            self.rejected += 1
+            logger.warning(f"Shedding generation request: {depth} jobs queued")
+            raise OverloadedError("Story generation is busy, please retry later", retry_after=self.retry_after)
+        if depth is not None and depth >= self.degrade_queue_depth:
+            self.degraded += 1
+            logger.info(f"Admitting generation request in degraded mode: {depth} jobs queued")
+            return True
+        return False
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[bool]:
+        """
+        Admit one generation request and hold an in-flight slot for the block.
+
+        Yields True when the pipeline should run in degraded mode (no AI
+        cover). Raises OverloadedError when the request is shed.
+        """
+        if not self.enabled:
+            yield False
+            return
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            logger.warning(f"Shedding generation request: {self.in_flight} already in flight")
+            raise OverloadedError("Too many story requests in progress, please retry shortly",
+                                  retry_after=self.in_flight_retry_after, status_code=429)
+
+        # Take the slot before awaiting anything so a burst cannot overshoot max_in_flight
+        self.in_flight += 1
+        try:
+            degraded = await self._check_queue()
+            self.admitted += 1
+            yield degraded
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Admission counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "degraded": self.degraded,
+            "rejected": self.rejected,
+            "max_in_flight": self.max_in_flight,
+            "degrade_queue_depth": self.degrade_queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+# Process-wide controller shared by the generation endpoints
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the admission controller configured from `jobs.admission`."""
+    global _admission_controller
+    if _admission_controller is None:
+        admission_config = get_config().get("jobs", {}).get("admission", {})
+        _admission_controller = AdmissionController(get_supabase_service(), admission_config)
+    return _admission_controller
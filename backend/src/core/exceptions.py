@@ -50,4 +50,11 @@ class StorageError(MiraException):
 class RateLimitError(MiraException):
     """Raised when rate limit is exceeded."""
     def __init__(self, message: str = "Rate limit exceeded"):
-        super().__init__(message, code="RATE_LIMIT_ERROR")
\ No newline at end of file
+        super().__init__(message, code="RATE_LIMIT_ERROR")
+
+class OverloadedError(MiraException):
+    """Raised when the service sheds load; clients should retry after `retry_after` seconds."""
+    def __init__(self, message: str, retry_after: int, status_code: int = 503):
+        self.retry_after = retry_after
+        self.status_code = status_code
+        super().__init__(message, code="OVERLOADED")
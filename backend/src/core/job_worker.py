@@ -0,0 +1,151 @@
+"""Worker that claims jobs from the repository's durable queue and runs them."""
+import asyncio
+import os
+import socket
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from ..services.repository import Repository
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobWorker:
+    """
+    Polls the story_jobs queue and runs claimed jobs as tasks on the event loop.
+
+    Each worker process claims at most `concurrency` jobs at a time, keeps their
+    heartbeats fresh while they run and periodically requeues jobs whose worker
+    stopped heartbeating. Failed jobs are retried with exponential backoff until
+    they run out of attempts.
+    """
+
+    def __init__(self, repository: Repository, handlers: Dict[str, JobHandler],
+                 jobs_config: Optional[Dict[str, Any]] = None, worker_id: Optional[str] = None):
+        jobs_config = jobs_config or {}
+        self.repository = repository
+        self.handlers = handlers
+        self.concurrency = int(jobs_config.get("concurrency", 4))
+        self.poll_interval = float(jobs_config.get("poll_interval_seconds", 1.0))
+        self.heartbeat_interval = float(jobs_config.get("heartbeat_interval_seconds", 10))
+        self.stale_after = float(jobs_config.get("stale_after_seconds", 120))
+        self.retry_backoff = float(jobs_config.get("retry_backoff_seconds", 15))
+        self.max_retry_backoff = float(jobs_config.get("max_retry_backoff_seconds", 300))
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self.running: Dict[str, asyncio.Task] = {}
+        self._loops: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def notify(self) -> None:
+        """Wake the poll loop now (e.g. right after enqueueing in the same process)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start polling and heartbeating in the background."""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._loops = [
+            asyncio.create_task(self._poll_loop(), name="job-worker-poll"),
+            asyncio.create_task(self._heartbeat_loop(), name="job-worker-heartbeat"),
+        ]
+        logger.info(f"Job worker {self.worker_id} started (concurrency {self.concurrency})")
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Stop claiming jobs and wait up to `timeout` seconds for running ones.
+
+        Jobs still running after the timeout are cancelled without being failed;
+        they stop heartbeating and another worker picks them up once stale.
+        """
+        self._stopping = True
+        self.notify()
+        if self.running:
+            logger.info(f"Job worker {self.worker_id} waiting for {len(self.running)} running job(s)")
+            _, pending = await asyncio.wait(list(self.running.values()), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff before the next attempt."""
+        return min(self.retry_backoff * (2 ** max(attempts - 1, 0)), self.max_retry_backoff)
+
+    async def poll_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them. Returns the number claimed."""
+        free = self.concurrency - len(self.running)
+        if free <= 0:
+            return 0
+        jobs = await self.repository.claim_jobs(self.worker_id, free)
+        for job in jobs:
+            self.running[job["id"]] = asyncio.create_task(self._run_job(job), name=f"job-{job['id']}")
+        return len(jobs)
+
+    async def _poll_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_sweep = 0.0
+        while not self._stopping:
+            try:
+                if loop.time() - last_sweep >= self.stale_after / 2:
+                    last_sweep = loop.time()
+                    recovered = await self.repository.requeue_stale_jobs(self.stale_after)
+                    if recovered:
+                        logger.warning(f"Recovered {len(recovered)} stale job(s)")
+                claimed = await self.poll_once()
+                if claimed and len(self.running) < self.concurrency:
+                    continue  # The queue may have more ready work
+            except Exception as e:
+                logger.error(f"Job poll failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self.running:
+                continue
+            try:
+                await self.repository.heartbeat_jobs(self.worker_id, list(self.running))
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        try:
+            handler = self.handlers.get(job["kind"])
+            if handler is None:
+                logger.error(f"No handler for job {job_id} of kind {job['kind']}")
+                await self.repository.fail_job(job_id, self.worker_id, f"Unknown job kind: {job['kind']}")
+                return
+
+            logger.info(f"Running job {job_id} ({job['kind']}, attempt {job['attempts']}/{job['max_attempts']})")
+            try:
+                await handler(job)
+            except Exception as e:
+                retry_in = self.retry_delay(job["attempts"]) if job["attempts"] < job["max_attempts"] else None
+                if retry_in is None:
+                    logger.error(f"Job {job_id} failed permanently: {e}")
+                else:
+                    logger.warning(f"Job {job_id} failed, retrying in {retry_in:.0f}s: {e}")
+                await self.repository.fail_job(job_id, self.worker_id, str(e)[:1000], retry_in)
+            else:
+                await self.repository.complete_job(job_id, self.worker_id)
+        except Exception as e:
+            # Queue bookkeeping failed; the stale sweep settles the job later
+            logger.error(f"Failed to record result of job {job_id}: {e}")
+        finally:
+            self.running.pop(job_id, None)
+            self.notify()
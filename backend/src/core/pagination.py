@@ -0,0 +1,57 @@
+"""Keyset (cursor) pagination helpers for newest-first listings."""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from .exceptions import ValidationError
+from .validators import validate_uuid
+
+
+def encode_cursor(created_at: Union[datetime, str], row_id: str) -> str:
+    """Build an opaque cursor pointing just past the given row."""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (created_at ISO string, row id)
+
+    Raises:
+        ValidationError: If the cursor is malformed. Both values end up inside
+            a PostgREST filter string, so the row id must be a UUID.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        validate_uuid(row_id, "pagination cursor")
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValidationError("Invalid pagination cursor") from e
+    return created_at, row_id
+
+
+def keyset_filter(cursor: str) -> str:
+    """
+    PostgREST `or` filter selecting rows after the cursor in
+    `created_at DESC, id DESC` order.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    return (
+        f'created_at.lt."{created_at}",'
+        f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+    )
+
+
+def next_cursor(rows: list, page_size: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page was not full."""
+    if len(rows) < page_size or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,76 @@
+"""Per-story context shared by every stage of the story pipeline."""
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from ..types.domain import Kid, Story
+from .story_write_buffer import StoryWriteBuffer
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PipelineContext:
+    """
+    Carries the kid, parent settings and story snapshot through one pipeline run.
+
+    Each entity is fetched at most once per story: concurrent stages asking for
+    the same entity share a single in-flight load (single-flight), and values
+    the caller already has (e.g. the kid loaded by the route) can be seeded.
+    Failed loads are not cached, so a later stage may retry them.
+    """
+
+    def __init__(self, supabase, story_id: str, kid_id: str, kid: Optional[Kid] = None):
+        self.supabase = supabase
+        self.story_id = story_id
+        self.kid_id = kid_id
+        self.writes = StoryWriteBuffer(supabase, story_id)
+        self._values: Dict[str, Any] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        if kid is not None:
+            self._values["kid"] = kid
+
+    async def _load(self, name: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached value, joining an in-flight load or starting one."""
+        if name in self._values:
+            return self._values[name]
+
+        task = self._inflight.get(name)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._inflight[name] = task
+        try:
+            value = await task
+        finally:
+            if self._inflight.get(name) is task:
+                del self._inflight[name]
+
+        self._values[name] = value
+        return value
+
+    async def get_kid(self) -> Kid:
+        """Get the kid profile for this story."""
+        kid = await self._load("kid", lambda: self.supabase.get_kid(self.kid_id))
+        if not kid:
+            self._values.pop("kid", None)
+            raise ValueError(f"Kid not found: {self.kid_id}")
+        return kid
+
+    async def get_approval_mode(self) -> str:
+        """Get the parent's approval mode."""
+        async def load():
+            kid = await self.get_kid()
+            return await self.supabase.get_user_approval_mode(kid.user_id)
+        return await self._load("approval_mode", load)
+
+    async def get_parent_email(self) -> Optional[str]:
+        """Get the parent's email address."""
+        async def load():
+            kid = await self.get_kid()
+            return await self.supabase.get_user_email(kid.user_id)
+        return await self._load("parent_email", load)
+
+    async def get_story(self) -> Optional[Story]:
+        """Get the latest story snapshot, preferring the row returned by our own last write."""
+        if self.writes.last_story is not None:
+            return self.writes.last_story
+        return await self._load("story", lambda: self.supabase.get_story(self.story_id))
@@ -0,0 +1,149 @@
+"""Cover generation that starts before the story is finished."""
+import asyncio
+import re
+from typing import Dict, Any, Optional, Set
+
+from ..agents.artist.agent import ArtistAgent, cover_folder
+from ..types.domain import Kid
+from ..utils.logger import get_logger
+from .story_write_buffer import StoryWriteBuffer
+
+logger = get_logger(__name__)
+
+SOURCE_INPUT = "input"
+SOURCE_COVER_DESCRIPTION = "cover_description"
+
+_WORD = re.compile(r"[^\W\d_]{4,}")
+_STOPWORDS = frozenset({
+    "that", "this", "with", "from", "into", "onto", "their", "there", "they", "them",
+    "have", "has", "been", "were", "while", "which", "where", "what", "when", "some",
+    "very", "also", "about", "over", "under", "image", "picture", "drawing", "scene",
+    "shows", "showing", "appears", "background", "foreground",
+})
+
+
+def content_words(text: str) -> Set[str]:
+    """Lowercased words of four or more letters, without common filler words."""
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS}
+
+
+def scene_overlap(speculative: str, final: str) -> float:
+    """Fraction of the final scene's content words that the speculative scene also has."""
+    final_words = content_words(final)
+    if not final_words:
+        return 0.0
+    return len(final_words & content_words(speculative)) / len(final_words)
+
+
+class _CoverFields:
+    """Stands in for the write buffer so a speculative cover is only written once accepted."""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+
+    async def update(self, fields: Dict[str, Any]) -> None:
+        self.fields.update(fields)
+
+
+class SpeculativeCover:
+    """
+    Generates the cover concurrently with story writing (artist `speculative` config).
+
+    With `source: input` the image is started from the vision description
+    (or the submitted text) before the storyteller runs; with
+    `source: cover_description` it starts as soon as the storyteller streams
+    its cover description. `resolve()` then judges the speculative scene
+    against the story's final cover_description: an identical description
+    is always kept, any other needs `min_overlap` of the final description's
+    content words. A rejected or failed cover returns None and the caller
+    generates one the normal way.
+
+    The speculative image is stored in its own folder, so a rejected run that
+    already uploaded (or is still uploading on the I/O pool after `cancel`)
+    never collides with the normal cover. A kept cover stays where it is; a
+    rejected one is deleted once its run has settled.
+    """
+
+    def __init__(self, artist_agent: ArtistAgent, story_id: str, kid: Kid,
+                 speculative_config: Dict[str, Any]):
+        self.artist_agent = artist_agent
+        self.story_id = story_id
+        self.kid = kid
+        self.source = speculative_config.get("source", SOURCE_INPUT)
+        self.min_overlap = float(speculative_config.get("min_overlap", 0.3))
+        self.scene: Optional[str] = None
+        self.storage_folder = cover_folder(story_id, speculative=True)
+        self._fields = _CoverFields()
+        self._task: Optional[asyncio.Task] = None
+        self._cleanup: Optional[asyncio.Task] = None
+
+    def start(self, scene: str) -> None:
+        """Start generating a cover for `scene`; later calls are ignored."""
+        if self._task or not scene.strip():
+            return
+        self.scene = scene
+        self._task = asyncio.create_task(self.artist_agent.process({
+            "story": {
+                "id": self.story_id,
+                "title": "",
+                "cover_description": scene
+            },
+            "kid": {
+                "name": self.kid.name,
+                "appearance_description": self.kid.appearance_description
+            }
+        }, write_buffer=self._fields, storage_folder=self.storage_folder), name=f"cover-{self.story_id}")
+        logger.info(f"Started speculative cover for story {self.story_id} from its {self.source}")
+
+    def start_from_input(self, text: str) -> None:
+        """Start from the pipeline input when configured to."""
+        if self.source == SOURCE_INPUT:
+            self.start(text)
+
+    def on_event(self, kind: str, text: str) -> None:
+        """Storyteller stream callback; starts from the streamed cover description when configured to."""
+        if kind == SOURCE_COVER_DESCRIPTION and self.source == SOURCE_COVER_DESCRIPTION:
+            self.start(text)
+
+    def accepts(self, cover_description: str) -> bool:
+        """Whether a cover drawn from the speculative scene fits the final cover description."""
+        if self.scene is None:
+            return False
+        if self.scene.strip() == cover_description.strip():
+            return True
+        overlap = scene_overlap(self.scene, cover_description)
+        logger.info(f"Speculative cover for story {self.story_id}: {overlap:.0%} scene overlap "
+                    f"(minimum {self.min_overlap:.0%})")
+        return overlap >= self.min_overlap
+
+    async def resolve(self, cover_description: str,
+                      writes: StoryWriteBuffer) -> Optional[Dict[str, Any]]:
+        """The artist result if the speculative cover is kept (its fields go to `writes`), else None."""
+        if not self._task:
+            return None
+        if not self.accepts(cover_description):
+            logger.info(f"Discarding speculative cover for story {self.story_id}")
+            self.cancel()
+            self._cleanup = asyncio.create_task(self._discard(), name=f"cover-cleanup-{self.story_id}")
+            return None
+        try:
+            result = await self._task
+        except Exception as e:
+            logger.warning(f"Speculative cover for story {self.story_id} failed: {e}")
+            return None
+        await writes.update(self._fields.fields)
+        logger.info(f"Using speculative cover for story {self.story_id}")
+        return result
+
+    async def _discard(self) -> None:
+        """Delete whatever the rejected run stored, after it has settled."""
+        await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            await self.artist_agent.delete_stored_cover(self.storage_folder)
+        except Exception as e:
+            logger.warning(f"Could not delete discarded cover of story {self.story_id}: {e}")
+
+    def cancel(self) -> None:
+        """Stop a speculative cover that is still being generated."""
+        if self._task:
+            self._task.cancel()
@@ -0,0 +1,169 @@
+"""Declarative stage graph that runs pipeline stages as soon as their inputs exist."""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable, List, Tuple
+
+from ..utils.logger import get_logger
+from ..utils.metrics import STAGE_LATENCY, STAGE_RETRIES
+from ..utils.timing import span
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    `run` is called with the stage's `inputs` as keyword arguments once they
+    are all available and returns its output (a dict keyed by output name
+    when it declares several). Each attempt is bounded by `timeout`; a
+    failed attempt is retried `retries` times. When an optional stage still
+    fails, `recover(error)` supplies its output instead (None without it)
+    and the graph carries on; a required stage failing stops the graph.
+    """
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Optional[Tuple[str, ...]] = None
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_delay: float = 0.0
+    optional: bool = False
+    recover: Optional[Callable[[Exception], Awaitable[Any]]] = None
+
+    def __post_init__(self):
+        self.inputs = tuple(self.inputs)
+        self.outputs = tuple(self.outputs) if self.outputs is not None else (self.name,)
+
+    def configure(self, options: Optional[Dict[str, Any]]) -> "Stage":
+        """Apply timeout/retry settings from config (`timeout_seconds`, `retries`, `retry_delay_seconds`)."""
+        options = options or {}
+        if options.get("timeout_seconds") is not None:
+            self.timeout = float(options["timeout_seconds"])
+        if options.get("retries") is not None:
+            self.retries = int(options["retries"])
+        if options.get("retry_delay_seconds") is not None:
+            self.retry_delay = float(options["retry_delay_seconds"])
+        return self
+
+
+@dataclass
+class GraphRun:
+    """Values produced by a graph run and the errors optional stages recovered from."""
+    values: Dict[str, Any]
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+
+class StageGraph:
+    """
+    Runs stages with as much parallelism as their data dependencies allow.
+
+    The graph is checked when built: output names must be unique, every input
+    must be produced by a stage or supplied to `run()`, and there must be no
+    cycles. A stage starts the moment its last input is produced. If a
+    required stage fails, stages still running are cancelled and its error
+    is raised unchanged.
+    """
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: List[Stage] = list(stages)
+        self.producers: Dict[str, Stage] = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by both "
+                                     f"'{self.producers[output].name}' and '{stage.name}'")
+                self.producers[output] = stage
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(stage: Stage, path: List[str]) -> None:
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [stage.name])}")
+            visiting.add(stage.name)
+            for name in stage.inputs:
+                if name in self.producers:
+                    visit(self.producers[name], path + [stage.name])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages:
+            visit(stage, [])
+
+    async def run(self, initial: Optional[Dict[str, Any]] = None) -> GraphRun:
+        """Run every stage and return all produced values."""
+        values: Dict[str, Any] = dict(initial or {})
+        missing = {name for stage in self.stages for name in stage.inputs} - set(self.producers) - set(values)
+        if missing:
+            raise ValueError(f"No stage produces {', '.join(sorted(missing))}")
+
+        graph_run = GraphRun(values)
+        pending = list(self.stages)
+        running: Dict[asyncio.Task, Stage] = {}
+        try:
+            while pending or running:
+                for stage in [s for s in pending if all(name in values for name in s.inputs)]:
+                    pending.remove(stage)
+                    inputs = {name: values[name] for name in stage.inputs}
+                    running[asyncio.create_task(self._run_stage(stage, inputs, graph_run),
+                                                name=f"stage-{stage.name}")] = stage
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    self._store(stage, task.result(), values)
+        finally:
+            for task in running:
+                task.cancel()
+        return graph_run
+
+    async def _run_stage(self, stage: Stage, inputs: Dict[str, Any], graph_run: GraphRun) -> Any:
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            result, outcome = await self._attempt(stage, inputs, graph_run)
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage=stage.name, outcome=outcome)
+
+    async def _attempt(self, stage: Stage, inputs: Dict[str, Any], graph_run: GraphRun) -> Tuple[Any, str]:
+        """Run a stage with its timeout and retries; returns its output and outcome."""
+        attempt = 0
+        with span(f"stage.{stage.name}") as timing:
+            while True:
+                attempt += 1
+                timing.set(retries=attempt - 1 or None)
+                try:
+                    return await asyncio.wait_for(stage.run(**inputs), timeout=stage.timeout), "ok"
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        e = asyncio.TimeoutError(f"Stage '{stage.name}' timed out after {stage.timeout}s")
+                    if attempt <= stage.retries:
+                        logger.warning(f"Stage '{stage.name}' failed (attempt {attempt}), retrying: {e}")
+                        STAGE_RETRIES.inc(stage=stage.name)
+                        await asyncio.sleep(stage.retry_delay)
+                        continue
+                    if not stage.optional:
+                        logger.error(f"Stage '{stage.name}' failed: {e}")
+                        raise e
+                    logger.warning(f"Optional stage '{stage.name}' failed, continuing: {e}")
+                    timing.fail(e)
+                    graph_run.errors[stage.name] = e
+                    return (await stage.recover(e) if stage.recover else None), "recovered"
+
+    @staticmethod
+    def _store(stage: Stage, result: Any, values: Dict[str, Any]) -> None:
+        if len(stage.outputs) == 1:
+            values[stage.outputs[0]] = result
+            return
+        for output in stage.outputs:
+            values[output] = (result or {}).get(output)
@@ -0,0 +1,137 @@
+"""Deduplication of story generation requests by idempotency key and content."""
+import base64
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from ..services.repository import Repository
+from ..services.supabase import get_supabase_service
+from ..types.domain import StoryStatus
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+from .exceptions import ValidationError
+
+logger = get_logger(__name__)
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+@dataclass
+class DuplicateRequest:
+    """Story an earlier, identical request already started."""
+    story_id: str
+    status: StoryStatus
+
+
+def image_content_hash(image_data: str) -> str:
+    """sha256 of the decoded image, so the same upload hashes alike with or without a data URL prefix."""
+    if "," in image_data:
+        image_data = image_data.split(",", 1)[1]
+    return hashlib.sha256(base64.b64decode(image_data)).hexdigest()
+
+
+class StoryDeduplicator:
+    """
+    Attaches repeated generation requests to the story the first one started.
+
+    A request is identified by its Idempotency-Key header (kept for
+    `idempotency_ttl_seconds`) and by what it asks for, e.g. the kid,
+    language and image content hash (kept for `window_seconds`). The first
+    request claims its keys before creating a story; a repeat finds the
+    claim and gets that story back, processing or finished, instead of
+    starting another pipeline. Claims held by a story that failed (or no
+    longer exists) are taken over, so retrying after an error works.
+    """
+
+    def __init__(self, repository: Repository, dedup_config: Dict[str, Any]):
+        self.repository = repository
+        self.enabled = bool(dedup_config.get("enabled", True))
+        self.window_seconds = float(dedup_config.get("window_seconds", 600))
+        self.idempotency_ttl_seconds = float(dedup_config.get("idempotency_ttl_seconds", 86400))
+        # A claim whose story row does not exist yet is in flight for this long
+        self.pending_claim_seconds = float(dedup_config.get("pending_claim_seconds", 60))
+
+    def _keys(self, kid_id: str, content_key: Optional[str],
+              idempotency_key: Optional[str]) -> Dict[str, float]:
+        if not self.enabled:
+            return {}
+        keys = {}
+        if idempotency_key:
+            if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+                raise ValidationError(f"Idempotency-Key longer than {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+            # Scoped by kid so keys from different clients cannot collide
+            keys[f"idempotency:{kid_id}:{idempotency_key}"] = self.idempotency_ttl_seconds
+        if content_key and self.window_seconds > 0:
+            keys[content_key] = self.window_seconds
+        return keys
+
+    def image_request_keys(self, kid_id: str, language: str, image_data: str,
+                           idempotency_key: Optional[str] = None) -> Dict[str, float]:
+        """Claim keys of a /stories/generate request (key -> seconds to keep it)."""
+        content_key = f"image:{kid_id}:{language}:{image_content_hash(image_data)}" if self.enabled else None
+        return self._keys(kid_id, content_key, idempotency_key)
+
+    def text_request_keys(self, story_id: str, kid_id: str,
+                          idempotency_key: Optional[str] = None) -> Dict[str, float]:
+        """Claim keys of a /stories/submit-text request: one pipeline per drafted story."""
+        return self._keys(kid_id, f"submit-text:{story_id}", idempotency_key)
+
+    async def claim(self, keys: Dict[str, float], story_id: str) -> Optional[DuplicateRequest]:
+        """
+        Claim `keys` for the story about to be created.
+
+        Returns None when this request owns the keys and should start the
+        pipeline, otherwise the story to attach to.
+        """
+        if not keys:
+            return None
+        existing = await self.repository.claim_story_request(keys, story_id)
+        if existing is None:
+            return None
+        duplicate = await self._attach(existing)
+        if duplicate:
+            logger.info(f"Duplicate story request attached to story {duplicate.story_id} ({duplicate.status.value})")
+            return duplicate
+
+        logger.info(f"Taking over request claim of failed or missing story {existing['story_id']}")
+        await self.repository.release_story_request(list(keys), existing["story_id"])
+        existing = await self.repository.claim_story_request(keys, story_id)
+        if existing is None:
+            return None
+        # Another retry took the keys over first and is starting the story now
+        return DuplicateRequest(existing["story_id"], StoryStatus.PROCESSING)
+
+    async def _attach(self, claim: Dict[str, Any]) -> Optional[DuplicateRequest]:
+        story = await self.repository.get_story(claim["story_id"])
+        if story is None:
+            if float(claim.get("age_seconds") or 0) < self.pending_claim_seconds:
+                # Claimed a moment ago; the first request is still creating its story
+                return DuplicateRequest(claim["story_id"], StoryStatus.PROCESSING)
+            return None
+        if story.status == StoryStatus.ERROR:
+            return None
+        # A drafted story whose text is being submitted is as good as processing
+        status = StoryStatus.PROCESSING if story.status == StoryStatus.DRAFT else story.status
+        return DuplicateRequest(story.id, status)
+
+    async def release(self, keys: Dict[str, float], story_id: str) -> None:
+        """Give up claims after the request failed before its pipeline was queued."""
+        if not keys:
+            return
+        try:
+            await self.repository.release_story_request(list(keys), story_id)
+        except Exception as e:
+            logger.error(f"Could not release request claim of story {story_id}: {e}")
+
+
+# Process-wide deduplicator shared by the generation endpoints
+_story_deduplicator: Optional[StoryDeduplicator] = None
+
+
+def get_story_deduplicator() -> StoryDeduplicator:
+    """Get or create the deduplicator configured from `jobs.dedup`."""
+    global _story_deduplicator
+    if _story_deduplicator is None:
+        dedup_config = get_config().get("jobs", {}).get("dedup", {})
+        _story_deduplicator = StoryDeduplicator(get_supabase_service(), dedup_config)
+    return _story_deduplicator
@@ -0,0 +1,168 @@
+"""Story pipeline jobs: enqueueing from the API and handlers for the job worker."""
+import base64
+from typing import Dict, Any, Optional
+
+from ..services.supabase import get_supabase_service
+from ..types.domain import StoryStatus
+from ..types.requests import GenerateStoryRequest
+from ..utils.config import get_config, load_config
+from ..utils.logger import get_logger
+from .job_worker import JobWorker, JobHandler
+from .story_processor import get_story_processor
+
+logger = get_logger(__name__)
+
+IMAGE_TO_STORY = "image_to_story"
+TEXT_TO_STORY = "text_to_story"
+
+# Worker running inside this process, if any (woken up on enqueue)
+_story_worker: Optional[JobWorker] = None
+
+
+def get_jobs_config() -> Dict[str, Any]:
+    """The `jobs` section of app.yaml."""
+    return get_config().get("jobs", {})
+
+
+async def enqueue_story_job(kind: str, story_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist a pipeline run for a story; a worker picks it up from the queue."""
+    job = await get_supabase_service().enqueue_job(
+        kind, payload, story_id=story_id, max_attempts=int(get_jobs_config().get("max_attempts", 3))
+    )
+    logger.info(f"Queued {kind} job {job['id']} for story {story_id}")
+    if _story_worker:
+        _story_worker.notify()
+    return job
+
+
+def _uploads_bucket() -> str:
+    return get_jobs_config().get("uploads_bucket", "story-uploads")
+
+
+async def _delete_upload(image_path: str) -> None:
+    try:
+        await get_supabase_service().delete_files(_uploads_bucket(), [image_path])
+    except Exception as e:
+        logger.warning(f"Could not delete uploaded image {image_path}: {e}")
+
+
+async def enqueue_image_to_story(request: GenerateStoryRequest, story_id: str,
+                                 skip_cover: bool = False) -> Dict[str, Any]:
+    """
+    Queue the image pipeline for a story (skip_cover when admitted in degraded mode).
+
+    The image goes to the private uploads bucket and the job only carries its
+    path, so claims and retries do not move a multi-MB payload.
+    """
+    image_path = f"{story_id}/input"
+    image_bytes = base64.b64decode(request.image_data)
+    await get_supabase_service().upload_file(_uploads_bucket(), image_path, image_bytes,
+                                             "application/octet-stream", public=False)
+    try:
+        return await enqueue_story_job(IMAGE_TO_STORY, story_id, {
+            "request": {**request.dict(exclude={"image_data"}), "language": request.language.value},
+            "image_path": image_path,
+            "skip_cover": skip_cover
+        })
+    except Exception:
+        await _delete_upload(image_path)
+        raise
+
+
+async def enqueue_text_to_story(story_id: str, text: str, kid_id: str, language: str,
+                                skip_cover: bool = False) -> Dict[str, Any]:
+    """Queue the text pipeline for a story (skip_cover when admitted in degraded mode)."""
+    return await enqueue_story_job(TEXT_TO_STORY, story_id, {
+        "text": text,
+        "kid_id": kid_id,
+        "language": getattr(language, "value", language),
+        "skip_cover": skip_cover
+    })
+
+
+async def mark_story_failed(story_id: str) -> None:
+    """Mark a story as error when its pipeline cannot run (not queued, or its input is gone)."""
+    try:
+        await get_supabase_service().update_story(story_id, {"status": StoryStatus.ERROR.value})
+    except Exception as e:
+        logger.error(f"Could not mark story {story_id} as error: {e}")
+
+
+def _is_final_attempt(job: Dict[str, Any]) -> bool:
+    return job["attempts"] >= job["max_attempts"]
+
+
+async def _load_image_request(payload: Dict[str, Any]) -> GenerateStoryRequest:
+    request_data = dict(payload["request"])
+    if payload.get("image_path"):
+        image_bytes = await get_supabase_service().download_file(_uploads_bucket(), payload["image_path"])
+        request_data["image_data"] = base64.b64encode(image_bytes).decode("ascii")
+    # Jobs queued before images moved to storage carry image_data inline
+    return GenerateStoryRequest(**request_data)
+
+
+async def run_image_to_story(job: Dict[str, Any]) -> None:
+    """Job handler for IMAGE_TO_STORY; the uploaded image is deleted after the last run."""
+    payload = job["payload"]
+    image_path = payload.get("image_path")
+    final_attempt = _is_final_attempt(job)
+    processor = get_story_processor(load_config()["agents"])
+    try:
+        try:
+            request = await _load_image_request(payload)
+        except Exception:
+            # The processor never ran, so it could not mark the story
+            if final_attempt:
+                await mark_story_failed(job["story_id"])
+            raise
+        await processor.process_image_to_story(
+            request, job["story_id"], final_attempt=final_attempt,
+            skip_cover=payload.get("skip_cover", False)
+        )
+    except Exception:
+        if final_attempt and image_path:
+            await _delete_upload(image_path)
+        raise
+    if image_path:
+        await _delete_upload(image_path)
+
+
+async def run_text_to_story(job: Dict[str, Any]) -> None:
+    """Job handler for TEXT_TO_STORY."""
+    processor = get_story_processor(load_config()["agents"])
+    payload = job["payload"]
+    await processor.process_text_to_story(
+        job["story_id"], payload["text"], payload["kid_id"], payload["language"],
+        final_attempt=_is_final_attempt(job), skip_cover=payload.get("skip_cover", False)
+    )
+
+
+STORY_JOB_HANDLERS: Dict[str, JobHandler] = {
+    IMAGE_TO_STORY: run_image_to_story,
+    TEXT_TO_STORY: run_text_to_story,
+}
+
+
+async def start_story_worker(jobs_config: Optional[Dict[str, Any]] = None) -> JobWorker:
+    """Start a story job worker on the running event loop."""
+    global _story_worker
+    worker = JobWorker(get_supabase_service(), STORY_JOB_HANDLERS, jobs_config or get_jobs_config())
+    await worker.start()
+    _story_worker = worker
+    return worker
+
+
+async def stop_story_worker(timeout: Optional[float] = None) -> None:
+    """Stop the worker started by start_story_worker, letting running jobs finish."""
+    global _story_worker
+    if not _story_worker:
+        return
+    worker, _story_worker = _story_worker, None
+    if timeout is None:
+        timeout = float(get_jobs_config().get("shutdown_timeout_seconds", 30))
+    await worker.stop(timeout)
+
+
+def get_story_worker() -> Optional[JobWorker]:
+    """Worker running in this process, if any."""
+    return _story_worker
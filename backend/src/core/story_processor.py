@@ -1,17 +1,25 @@
 """Core story processing logic that orchestrates agents."""
 import uuid
-import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime
 
 from ..agents.vision.agent import create_vision_agent
-from ..agents.storyteller.agent import create_storyteller_agent
+from ..agents.storyteller.agent import create_storyteller_agent, StoryEventHandler
 from ..agents.voice.agent import create_voice_agent
 from ..agents.artist.agent import ArtistAgent
+from ..agents.speech.agent import create_speech_agent
 from ..services.supabase import get_supabase_service
-from ..types.domain import Story, StoryStatus, InputFormat, Language
+from .story_write_buffer import StoryWriteBuffer
+from .pipeline_context import PipelineContext
+from .streamed_speech import StreamedSpeech
+from .speculative_cover import SpeculativeCover
+from .stage_graph import Stage, StageGraph, GraphRun
+from ..types.domain import Kid, Story, StoryStatus, InputFormat, Language
 from ..types.requests import GenerateStoryRequest
+from ..utils.config import get_config
 from ..utils.logger import get_logger
+from ..utils.metrics import PIPELINES_IN_FLIGHT, PIPELINE_RUNS
+from ..utils.timing import Timeline, span, current_span
 
 logger = get_logger(__name__)
 
@@ -24,6 +32,7 @@ class StoryProcessor:
         self.vision_agent = create_vision_agent(agents_config["vision"])
         self.storyteller_agent = create_storyteller_agent(agents_config["storyteller"])
         self.voice_agent = create_voice_agent(agents_config["voice"])
+        self.speech_agent = create_speech_agent(agents_config.get("speech", {}))
         # Initialize artist agent if configured
         self.artist_agent = None
         if "artist" in agents_config:
@@ -36,55 +45,183 @@ class StoryProcessor:
                 self.artist_agent = None
         self.supabase = get_supabase_service()
         
-    async def process_image_to_story(self, request: GenerateStoryRequest, story_id: str) -> Story:
+    async def process_image_to_story(self, request: GenerateStoryRequest, story_id: str,
+                                     kid: Optional[Kid] = None, final_attempt: bool = True,
+                                     skip_cover: bool = False) -> Story:
         """
         Process an image through the full pipeline to generate a story.
         
-        Steps:
-        1. Update story status to processing
-        2. Analyze image to get description
-        3. Generate story from description
-        4. Generate audio from story
-        5. Update story with results
+        Stages: vision (image description) -> storyteller -> voice and cover
+        in parallel -> finalize. See `_story_stages` for everything after vision.
         
         Args:
             request: The story generation request
             story_id: ID of the existing story record to update
+            kid: Kid profile already loaded by the caller, if any
+            final_attempt: Mark the story as error on failure (False when the job will be retried)
+            skip_cover: Use the default cover instead of generating one (admitted under load)
         """
-        
-        try:
-            # Story already created with PROCESSING status - no need to update
-            
-            # Step 1: Analyze image
+        async def vision(image_data: str) -> str:
             logger.info(f"Analyzing image for story {story_id}")
-            image_description = await self.vision_agent.process(request.image_data)
+            image_description = await self.vision_agent.process(image_data, kid_id=request.kid_id)
             
             # Store image description in story_inputs table (not in stories table)
-            from ..utils.config import load_config
-            config = load_config()
-            story_input_data = {
+            vision_config = get_config()["agents"]["vision"]
+            await self.supabase.create_story_input({
                 "story_id": story_id,
                 "input_type": "image",
                 "input_value": image_description,
                 "metadata": {
-                    "vision_model": config["agents"]["vision"]["model"],
-                    "vision_provider": config["agents"]["vision"]["vendor"],
+                    "vision_model": vision_config["model"],
+                    "vision_provider": vision_config["vendor"],
                     "processing_timestamp": datetime.utcnow().isoformat()
                 }
-            }
-            await self.supabase.create_story_input(story_input_data)
-            
-            # Step 2: Generate story - need to get kid info first
+            })
+            return image_description
+        
+        context = PipelineContext(self.supabase, story_id, request.kid_id, kid=kid)
+        graph_run = await self._run_pipeline(
+            context, request.language.value,
+            [Stage("vision", vision, inputs=("image_data",), outputs=("prompt",))],
+            {"image_data": request.image_data},
+            final_attempt=final_attempt, skip_cover=skip_cover
+        )
+        return graph_run.values["result"]
+    
+    async def process_text_to_story(self, story_id: str, text: str, kid_id: str, language: str,
+                                    kid: Optional[Kid] = None, final_attempt: bool = True,
+                                    skip_cover: bool = False) -> None:
+        """
+        Process text to generate a story (used for both text input and transcribed audio).
+        
+        Stages: storyteller -> voice and cover in parallel -> finalize.
+        """
+        logger.info(f"Processing text to story for {story_id} from text: {text[:50]}...")
+        context = PipelineContext(self.supabase, story_id, kid_id, kid=kid)
+        await self._run_pipeline(context, language, [], {"prompt": text},
+                                 final_attempt=final_attempt, skip_cover=skip_cover)
+    
+    async def process_voice_to_story(self, story_id: str, audio_data: str, kid_id: str, language: str,
+                                     kid: Optional[Kid] = None, final_attempt: bool = True,
+                                     skip_cover: bool = False) -> None:
+        """
+        Process a voice recording to generate a story.
+        
+        Stages: transcription -> storyteller -> voice and cover in parallel -> finalize.
+        
+        Args:
+            audio_data: Base64 encoded recording
+        """
+        async def transcription(audio_data: str) -> str:
+            logger.info(f"Transcribing recording for story {story_id}")
+            text = await self.speech_agent.process(audio_data, language=language)
+            await self.supabase.create_story_input({
+                "story_id": story_id,
+                "input_type": "audio_transcription",
+                "input_value": text,
+                "metadata": {
+                    "speech_vendor": self.speech_agent.vendor.value,
+                    "speech_model": self.speech_agent.model,
+                    "transcription_language": language
+                }
+            })
+            return text
+        
+        context = PipelineContext(self.supabase, story_id, kid_id, kid=kid)
+        await self._run_pipeline(
+            context, language,
+            [Stage("transcription", transcription, inputs=("audio_data",), outputs=("prompt",))],
+            {"audio_data": audio_data},
+            final_attempt=final_attempt, skip_cover=skip_cover
+        )
+    
+    async def _run_pipeline(self, context: PipelineContext, language: str, input_stages: List[Stage],
+                            initial: Dict[str, Any], final_attempt: bool = True,
+                            skip_cover: bool = False) -> GraphRun:
+        """
+        Run an input format's stages (producing `prompt`) followed by the shared story stages.
+        
+        Timeouts and retries per stage come from `pipeline.stages` in app config;
+        the run's timing spans are stored as its timeline (`pipeline.timeline`).
+        """
+        story_id = context.story_id
+        speech = self._start_speech(language, story_id)
+        covers: List[SpeculativeCover] = []
+        stages = input_stages + self._story_stages(context, language, speech, covers, skip_cover)
+        pipeline_config = get_config().get("pipeline", {})
+        stage_config = pipeline_config.get("stages", {})
+        for stage in stages:
+            stage.configure(stage_config.get(stage.name))
+        timeline_config = pipeline_config.get("timeline", {})
+        timeline = Timeline(max_spans=int(timeline_config.get("max_spans", 200)))
+        
+        PIPELINES_IN_FLIGHT.inc()
+        try:
+            with timeline.record():
+                graph_run = await StageGraph(stages).run(initial)
+        except Exception as e:
+            PIPELINE_RUNS.inc(status="failed")
+            logger.error(f"Story processing failed for {story_id}: {e}")
+            if speech:
+                speech.cancel()
+            for cover in covers:
+                cover.cancel()
+            # Update story status to error; a retried run keeps it processing
+            if final_attempt:
+                await context.writes.update({
+                    "status": StoryStatus.ERROR.value
+                })
+            if timeline_config.get("enabled", True):
+                await self._save_timeline(story_id, timeline, "failed")
+            raise
+        finally:
+            PIPELINES_IN_FLIGHT.dec()
+        
+        PIPELINE_RUNS.inc(status="completed")
+        if timeline_config.get("enabled", True):
+            await self._save_timeline(story_id, timeline, "completed")
+        return graph_run
+    
+    async def _save_timeline(self, story_id: str, timeline: Timeline, status: str) -> None:
+        """Log a per-stage summary and store the run's spans; never fails the pipeline."""
+        stages = ", ".join(f"{s.name[len('stage.'):]} {s.duration_ms:.0f}ms"
+                           for s in sorted(timeline.spans, key=lambda s: s.start_ms)
+                           if s.name.startswith("stage."))
+        logger.info(f"Story {story_id} {status} in {timeline.duration_ms:.0f}ms: {stages}")
+        try:
+            await self.supabase.save_story_timeline(story_id, status, timeline.to_dict())
+        except Exception as e:
+            logger.warning(f"Could not save timeline for story {story_id}: {e}")
+    
+    def _story_stages(self, context: PipelineContext, language: str, speech: Optional[StreamedSpeech],
+                      covers: List[SpeculativeCover], skip_cover: bool) -> List[Stage]:
+        """
+        Stages shared by every input format, starting from the `prompt` they produce.
+        
+        Audio and the AI cover are optional: when they fail the story is still
+        finished, without audio or with the default cover.
+        """
+        story_id = context.story_id
+        writes = context.writes
+        
+        async def kid() -> Kid:
+            return await context.get_kid()
+        
+        async def speculative_cover(prompt: str, kid: Kid) -> Optional[SpeculativeCover]:
+            # The input is enough to start a speculative cover
+            cover = self._start_cover(story_id, kid, skip_cover)
+            if cover:
+                covers.append(cover)
+                cover.start_from_input(prompt)
+            return cover
+        
+        async def storyteller(prompt: str, kid: Kid,
+                              speculative_cover: Optional[SpeculativeCover]) -> Dict[str, Any]:
             logger.info(f"Generating story content for {story_id}")
-            
-            # Get kid information for personalized story
-            kid = await self.supabase.get_kid(request.kid_id)
-            if not kid:
-                raise ValueError(f"Kid not found: {request.kid_id}")
-            
             story_result = await self.storyteller_agent.process(
-                image_description,
-                language=request.language,
+                prompt,
+                on_event=self._story_events(speech, speculative_cover),
+                language=Language(language),
                 kid_name=kid.name,
                 age=kid.age,
                 appearance=kid.appearance_description,
@@ -92,137 +229,160 @@ class StoryProcessor:
                 parent_notes=kid.parent_notes
             )
             
-            # Update story with content and cover description
-            await self.supabase.update_story(story_id, {
+            # Update story with content and cover description (flushed eagerly - clients poll content)
+            await writes.update({
                 "title": story_result["title"],
                 "content": story_result["content"],
                 "cover_description": story_result.get("cover_description", "")
             })
-            
-            # Steps 3 & 4: Generate audio and cover image in parallel
-            logger.info(f"Starting parallel generation of audio and cover image for story {story_id}")
-            
-            # Create tasks for parallel execution
-            tasks = []
-            
-            # Task 1: Generate audio
-            async def generate_audio():
-                try:
-                    logger.info(f"Generating audio for story {story_id}")
-                    audio_data, content_type = await self.voice_agent.process(
-                        story_result["content"],
-                        language=request.language.value
-                    )
-                    
-                    # Upload audio to storage
-                    filename = f"{story_id}.mp3"
-                    audio_filename = await self.supabase.upload_audio(audio_data, filename)
-                    
-                    # Update story with audio filename
-                    await self.supabase.update_story(story_id, {
-                        "audio_filename": audio_filename,
-                    })
-                    
-                    logger.info(f"Audio generation completed for story {story_id}")
-                    return {"success": True, "audio_filename": audio_filename}
-                except Exception as e:
-                    logger.error(f"Audio generation failed for story {story_id}: {e}", exc_info=True)
-                    return {"success": False, "error": str(e)}
-            
-            # Task 2: Generate cover image (if artist agent is available)
-            async def generate_image():
-                if not self.artist_agent:
-                    logger.warning("Artist agent not available - no cover image will be generated")
-                    return {"success": False, "reason": "Artist agent not available"}
+            return story_result
+        
+        async def voice(story: Dict[str, Any]) -> str:
+            # Unchanged text with the same voice settings reuses the stored audio
+            cache = self.voice_agent.cache
+            audio_filename = None
+            if cache:
+                cache_key = self.voice_agent.cache_key(story["content"], language)
+                audio_filename = await cache.lookup(cache_key)
+                current_span().set(cache="hit" if audio_filename else "miss")
+            
+            if audio_filename:
+                if speech:
+                    speech.cancel()
+            else:
+                logger.info(f"Generating audio for story {story_id}")
+                audio_data, content_type = await self._synthesize_story(story["content"], language, speech)
                 
-                try:
-                    logger.info(f"Starting cover image generation for story {story_id}")
-                    logger.info(f"Artist vendor: {self.artist_agent.vendor}, model: {self.artist_agent.model}")
-                    image_result = await self.artist_agent.process({
-                        "story": {
-                            "id": story_id,
-                            "title": story_result["title"],
-                            "cover_description": story_result.get("cover_description", "")  # Use new field
-                        },
-                        "kid": {
-                            "name": kid.name,
-                            "appearance_description": kid.appearance_description
-                        }
-                        # No longer passing image_data or image_description
-                    })
-                    
-                    logger.info(f"Cover image generated successfully for story {story_id}")
+                # Upload audio to storage
+                with span("storage.upload", bytes_in=len(audio_data)):
+                    if cache:
+                        audio_filename = await cache.store(cache_key, audio_data, content_type)
+                    else:
+                        audio_filename = await self.supabase.upload_audio(audio_data, f"{story_id}.mp3")
+            
+            # Buffer audio filename until the final status write
+            await writes.update({
+                "audio_filename": audio_filename,
+            })
+            logger.info(f"Audio generation completed for story {story_id}")
+            return audio_filename
+        
+        async def voice_failed(error: Exception) -> None:
+            # Audio is optional - continue without it, storing the error for a later retry
+            if speech:
+                speech.cancel()
+            await writes.update({
+                "audio_error": str(error),
+                "audio_failed_at": datetime.utcnow().isoformat()
+            })
+        
+        async def artist(story: Dict[str, Any], kid: Kid,
+                         speculative_cover: Optional[SpeculativeCover]) -> Dict[str, Any]:
+            if skip_cover:
+                logger.info(f"Skipping cover image generation for story {story_id} (degraded mode)")
+                return {"success": False, "reason": "Skipped under load"}
+            if not self.artist_agent:
+                logger.warning("Artist agent not available - no cover image will be generated")
+                return {"success": False, "reason": "Artist agent not available"}
+            
+            if speculative_cover:
+                image_result = await speculative_cover.resolve(story.get("cover_description", ""), writes)
+                if image_result:
                     return {"success": True, "image_result": image_result}
-                except Exception as e:
-                    logger.error(f"Failed to generate cover image for story {story_id}: {e}", exc_info=True)
-                    return {"success": False, "error": str(e)}
-            
-            # Add tasks
-            tasks.append(generate_audio())
-            tasks.append(generate_image())
-            
-            # Execute tasks in parallel
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            audio_result, image_result = results
-            
-            # Log results
-            logger.info(f"Audio generation result: {audio_result.get('success', False) if isinstance(audio_result, dict) else 'Exception occurred'}")
-            logger.info(f"Image generation result: {image_result.get('success', False) if isinstance(image_result, dict) else 'Exception occurred'}")
-            
-            # Handle exceptions in results
-            if isinstance(audio_result, Exception):
-                logger.error(f"Audio generation raised exception: {audio_result}")
-                audio_result = {"success": False, "error": str(audio_result)}
             
-            if isinstance(image_result, Exception):
-                logger.error(f"Image generation raised exception: {image_result}")
-                image_result = {"success": False, "error": str(image_result)}
-            
-            # Audio is optional - continue even if it fails
-            if not audio_result.get("success", False):
-                logger.warning(f"Audio generation failed for story {story_id}, continuing without audio: {audio_result.get('error', 'Unknown error')}")
-                # Store audio error for potential retry later
-                await self.supabase.update_story(story_id, {
-                    "audio_error": audio_result.get('error', 'Unknown error'),
-                    "audio_failed_at": datetime.utcnow().isoformat()
-                })
+            logger.info(f"Starting cover image generation for story {story_id}")
+            logger.info(f"Artist vendor: {self.artist_agent.vendor}, model: {self.artist_agent.model}")
+            image_result = await self.artist_agent.process({
+                "story": {
+                    "id": story_id,
+                    "title": story["title"],
+                    "cover_description": story.get("cover_description", "")
+                },
+                "kid": {
+                    "name": kid.name,
+                    "appearance_description": kid.appearance_description
+                }
+            }, write_buffer=writes)
             
-            # Handle image generation failure with fallback to default cover
-            if not image_result.get("success", False):
+            logger.info(f"Cover image generated successfully for story {story_id}")
+            return {"success": True, "image_result": image_result}
+        
+        async def artist_failed(error: Exception) -> Dict[str, Any]:
+            return {"success": False, "error": str(error)}
+        
+        async def default_cover(cover: Dict[str, Any], story: Dict[str, Any]) -> Dict[str, Any]:
+            # Fall back to the default cover when no AI cover was generated
+            if not cover.get("success", False):
                 logger.info(f"Image generation failed for story {story_id}, assigning default cover")
-                await self._assign_default_cover(story_id, story_result.get("content", ""))
-            
+                await self._assign_default_cover(story_id, story.get("content", ""), writes,
+                                                 reason=cover.get("reason", "AI generation failed"))
+            return cover
+        
+        async def finalize(audio: Optional[str], final_cover: Dict[str, Any]) -> Optional[Story]:
             # Only determine final status after ALL processing is complete
-            final_status = await self._determine_story_status(request.kid_id, story_id)
-            story = await self.supabase.update_story(story_id, {
+            final_status = await self._determine_story_status(context)
+            # Final status is written atomically together with all buffered media fields
+            story = await writes.finalize({
                 "status": final_status.value
             })
-            
-            logger.info(f"Story {story_id} completed with status: {final_status.value}")
+            logger.info(f"Story {story_id} completed with status: {final_status.value} ({writes.writes} story writes)")
             return story
-            
-        except Exception as e:
-            logger.error(f"Story processing failed for {story_id}: {e}")
-            # Update story status to error
-            await self.supabase.update_story(story_id, {
-                "status": StoryStatus.ERROR.value
-            })
-            raise
+        
+        return [
+            Stage("kid", kid),
+            Stage("speculative_cover", speculative_cover, inputs=("prompt", "kid")),
+            Stage("storyteller", storyteller, inputs=("prompt", "kid", "speculative_cover"), outputs=("story",)),
+            Stage("voice", voice, inputs=("story",), outputs=("audio",), optional=True, recover=voice_failed),
+            Stage("artist", artist, inputs=("story", "kid", "speculative_cover"), outputs=("cover",),
+                  optional=True, recover=artist_failed),
+            Stage("default_cover", default_cover, inputs=("cover", "story"), outputs=("final_cover",)),
+            Stage("finalize", finalize, inputs=("audio", "final_cover"), outputs=("result",)),
+        ]
+    
+    def _start_speech(self, language: str, story_id: str) -> Optional[StreamedSpeech]:
+        """Paragraph-by-paragraph TTS during story streaming, when both agents support it."""
+        if self.storyteller_agent.streaming and self.voice_agent.can_synthesize_paragraphs(language):
+            return StreamedSpeech(self.voice_agent, language, story_id)
+        return None
     
-    async def _determine_story_status(self, kid_id: str, story_id: str) -> StoryStatus:
+    def _start_cover(self, story_id: str, kid: Kid, skip_cover: bool) -> Optional[SpeculativeCover]:
+        """Cover generation concurrent with story writing, when enabled in the artist config."""
+        if skip_cover or not self.artist_agent:
+            return None
+        speculative_config = self.artist_agent.config.get("speculative", {})
+        if not speculative_config.get("enabled", False):
+            return None
+        return SpeculativeCover(self.artist_agent, story_id, kid, speculative_config)
+    
+    @staticmethod
+    def _story_events(*listeners) -> Optional[StoryEventHandler]:
+        """Storyteller stream callback feeding every active listener (speech, cover)."""
+        handlers = [listener.on_event for listener in listeners if listener]
+        if len(handlers) <= 1:
+            return handlers[0] if handlers else None
+        
+        def on_event(kind: str, text: str) -> None:
+            for handler in handlers:
+                handler(kind, text)
+        return on_event
+    
+    async def _synthesize_story(self, content: str, language: str,
+                                speech: Optional[StreamedSpeech] = None) -> Tuple[bytes, str]:
+        """Audio for the story: joined streamed segments if usable, else one TTS request."""
+        if speech:
+            audio = await speech.finish(content)
+            if audio:
+                return audio
+        return await self.voice_agent.process(content, language=language)
+    
+    async def _determine_story_status(self, context: PipelineContext) -> StoryStatus:
         """
         Determine the final story status based on parent's approval mode.
         """
         try:
-            # Get kid profile to find parent user_id
-            kid = await self.supabase.get_kid(kid_id)
-            if not kid:
-                logger.error(f"Kid profile not found: {kid_id}")
-                return StoryStatus.PENDING  # Safe fallback
-            
-            # Get parent's approval mode
-            approval_mode = await self.supabase.get_user_approval_mode(kid.user_id)
-            logger.info(f"Parent approval mode for kid {kid_id}: {approval_mode}")
+            # Get parent's approval mode (kid profile comes from the pipeline context)
+            approval_mode = await context.get_approval_mode()
+            logger.info(f"Parent approval mode for kid {context.kid_id}: {approval_mode}")
             
             if approval_mode == 'auto':
                 # Auto-approve stories
@@ -232,7 +392,7 @@ class StoryProcessor:
                 return StoryStatus.PENDING
             elif approval_mode == 'email':
                 # Require parent review via email - send notification
-                await self._send_email_notification(story_id, kid)
+                await self._send_email_notification(context)
                 return StoryStatus.PENDING
             else:
                 # Unknown mode, default to pending for safety
@@ -243,30 +403,32 @@ class StoryProcessor:
             logger.error(f"Error determining story status: {e}")
             return StoryStatus.PENDING  # Safe fallback
     
-    async def _send_email_notification(self, story_id: str, kid):
+    async def _send_email_notification(self, context: PipelineContext):
         """
         Send email notification to parent for story review.
         """
+        story_id = context.story_id
         try:
+            kid = await context.get_kid()
+            
             # Get parent's email address
-            parent_email = await self.supabase.get_user_email(kid.user_id)
+            parent_email = await context.get_parent_email()
             if not parent_email:
                 logger.error(f"No email found for parent of kid {kid.id}")
                 return
             
-            # Get story details
-            story = await self.supabase.get_story(story_id)
+            # Get story details (snapshot from the pipeline's own content write)
+            story = await context.get_story()
             if not story:
                 logger.error(f"Story not found: {story_id}")
                 return
             
-            # Get approval mode to determine email type
-            approval_mode = await self.supabase.get_user_approval_mode(kid.user_id)
+            approval_mode = await context.get_approval_mode()
             
             # Call Supabase Edge Function for email notification
-            result = await self.supabase.client.functions.invoke(
+            result = await self.supabase.invoke_function(
                 "send-story-notification",
-                {"body": {
+                {
                     "storyId": story_id,
                     "kidId": kid.id,
                     "parentEmail": parent_email,
@@ -274,10 +436,10 @@ class StoryProcessor:
                     "kidName": kid.name,
                     "storyTitle": story.title,
                     "approvalMode": approval_mode
-                }}
+                }
             )
             
-            if result.get("error"):
+            if isinstance(result, dict) and result.get("error"):
                 logger.error(f"Failed to send email notification for story {story_id}: {result['error']}")
             else:
                 logger.info(f"Email notification sent for story {story_id} to {parent_email}")
@@ -286,187 +448,40 @@ class StoryProcessor:
             logger.error(f"Error sending email notification for story {story_id}: {e}")
             # Don't raise - email failure shouldn't stop story processing
     
-    async def _assign_default_cover(self, story_id: str, story_content: str) -> None:
+    async def _assign_default_cover(self, story_id: str, story_content: str,
+                                    writes: Optional[StoryWriteBuffer] = None,
+                                    reason: str = "AI generation failed") -> None:
         """Assign a default cover image when AI generation fails."""
         try:
-            # Build URL for default cover in Supabase Storage
+            # Build URL for default cover in storage
             # Format: https://[project].supabase.co/storage/v1/object/public/story-covers/default/general.png
             supabase_service = get_supabase_service()
-            base_url = supabase_service.client.supabase_url
             
             # Using single default cover for now
-            cover_url = f"{base_url}/storage/v1/object/public/story-covers/default/general.png"
-            thumbnail_url = f"{base_url}/storage/v1/object/public/story-covers/default/general-thumbnail.png"
+            cover_url = supabase_service.get_public_url("story-covers", "default/general.png")
+            thumbnail_url = supabase_service.get_public_url("story-covers", "default/general-thumbnail.png")
             
-            # Update story with default cover URLs
-            await supabase_service.update_story(story_id, {
+            cover_fields = {
                 'cover_image_url': cover_url,
                 'cover_image_thumbnail_url': thumbnail_url,
                 'cover_image_metadata': {
                     'type': 'default',
                     'assigned_at': datetime.now().isoformat(),
-                    'reason': 'AI generation failed'
+                    'reason': reason
                 }
-            })
+            }
+            
+            # Buffered until the final status write when running inside the pipeline
+            if writes:
+                await writes.update(cover_fields)
+            else:
+                await supabase_service.update_story(story_id, cover_fields)
             
             logger.info(f"Assigned default cover for story {story_id}")
             
         except Exception as e:
             logger.error(f"Error assigning default cover for story {story_id}: {e}")
             # Don't raise - this is a fallback, shouldn't block story completion
-    
-    async def process_text_to_story(self, story_id: str, text: str, kid_id: str, language: str) -> None:
-        """
-        Process text to generate a story (used for both text input and transcribed audio).
-        
-        Steps:
-        1. Generate story from text
-        2. Generate audio from story
-        3. Update story with results
-        """
-        try:
-            logger.info(f"Processing text to story for {story_id}")
-            
-            # Step 1: Generate story from text - need to get kid info first
-            logger.info(f"Generating story content for {story_id} from text: {text[:50]}...")
-            
-            # Get kid information for personalized story
-            kid = await self.supabase.get_kid(kid_id)
-            if not kid:
-                raise ValueError(f"Kid not found: {kid_id}")
-            
-            story_result = await self.storyteller_agent.process(
-                text,
-                language=Language(language),
-                kid_name=kid.name,
-                age=kid.age,
-                appearance=kid.appearance_description,
-                genres=kid.favorite_genres or [],
-                parent_notes=kid.parent_notes
-            )
-            
-            # Update story with content and cover description
-            await self.supabase.update_story(story_id, {
-                "title": story_result["title"],
-                "content": story_result["content"],
-                "cover_description": story_result.get("cover_description", "")
-            })
-            
-            # Steps 2 & 3: Generate audio and cover image in parallel
-            logger.info(f"Starting parallel generation of audio and cover image for story {story_id}")
-            
-            # Create tasks for parallel execution
-            tasks = []
-            
-            # Task 1: Generate audio
-            async def generate_audio():
-                try:
-                    logger.info(f"Generating audio for story {story_id}")
-                    audio_data, content_type = await self.voice_agent.process(
-                        story_result["content"],
-                        language=language
-                    )
-                    
-                    # Upload audio to storage
-                    filename = f"{story_id}.mp3"
-                    audio_filename = await self.supabase.upload_audio(audio_data, filename)
-                    
-                    # Update story with audio filename
-                    await self.supabase.update_story(story_id, {
-                        "audio_filename": audio_filename,
-                    })
-                    
-                    logger.info(f"Audio generation completed for story {story_id}")
-                    return {"success": True, "audio_filename": audio_filename}
-                except Exception as e:
-                    logger.error(f"Audio generation failed for story {story_id}: {e}", exc_info=True)
-                    return {"success": False, "error": str(e)}
-            
-            # Task 2: Generate cover image (if artist agent is available)
-            async def generate_image():
-                if not self.artist_agent:
-                    logger.warning("Artist agent not available - no cover image will be generated")
-                    return {"success": False, "reason": "Artist agent not available"}
-                
-                try:
-                    logger.info(f"Starting cover image generation for story {story_id}")
-                    logger.info(f"Artist vendor: {self.artist_agent.vendor}, model: {self.artist_agent.model}")
-                    image_result = await self.artist_agent.process({
-                        "story": {
-                            "id": story_id,
-                            "title": story_result["title"],
-                            "cover_description": story_result.get("cover_description", "")  # Use new field
-                        },
-                        "kid": {
-                            "name": kid.name,
-                            "appearance_description": kid.appearance_description
-                        }
-                        # No image_data or text description for text stories
-                    })
-                    
-                    logger.info(f"Cover image generated successfully for story {story_id}")
-                    return {"success": True, "image_result": image_result}
-                except Exception as e:
-                    logger.error(f"Failed to generate cover image for story {story_id}: {e}", exc_info=True)
-                    return {"success": False, "error": str(e)}
-            
-            # Add tasks
-            tasks.append(generate_audio())
-            tasks.append(generate_image())
-            
-            # Execute tasks in parallel
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            audio_result, image_result = results
-            
-            # Log results
-            logger.info(f"Audio generation result: {audio_result.get('success', False) if isinstance(audio_result, dict) else 'Exception occurred'}")
-            logger.info(f"Image generation result: {image_result.get('success', False) if isinstance(image_result, dict) else 'Exception occurred'}")
-            
-            # Handle exceptions in results
-            if isinstance(audio_result, Exception):
-                logger.error(f"Audio generation raised exception: {audio_result}")
-                audio_result = {"success": False, "error": str(audio_result)}
-            
-            if isinstance(image_result, Exception):
-                logger.error(f"Image generation raised exception: {image_result}")
-                image_result = {"success": False, "error": str(image_result)}
-            
-            # Audio is optional - continue even if it fails
-            if not audio_result.get("success", False):
-                logger.warning(f"Audio generation failed for story {story_id}, continuing without audio: {audio_result.get('error', 'Unknown error')}")
-                # Store audio error for potential retry later
-                await self.supabase.update_story(story_id, {
-                    "audio_error": audio_result.get('error', 'Unknown error'),
-                    "audio_failed_at": datetime.utcnow().isoformat()
-                })
-
-            # Handle image generation failure with fallback to default cover
-            if not image_result.get("success", False):
-                logger.info(f"Image generation failed for story {story_id}, assigning default cover")
-                await self._assign_default_cover(story_id, story_result.get("content", ""))
-            
-            # Only determine final status after ALL processing is complete
-            final_status = await self._determine_story_status(kid_id, story_id)
-            await self.supabase.update_story(story_id, {
-                "status": final_status.value
-            })
-            
-            logger.info(f"Story {story_id} completed with status: {final_status.value}")
-            
-        except Exception as e:
-            logger.error(f"Story processing failed for {story_id}: {e}")
-            # Update story status to error
-            await self.supabase.update_story(story_id, {
-                "status": StoryStatus.ERROR.value
-            })
-            raise
-    
-    async def process_voice_to_story(self, audio_data: str, kid_id: str, language: Language = Language.ENGLISH) -> Story:
-        """
-        Future: Process voice recording to generate a story.
-        """
-        # This will use speech agent -> storyteller -> voice agent
-        raise NotImplementedError("Voice-to-story not yet implemented")
 
 
 # Global processor instance
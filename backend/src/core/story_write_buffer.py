@@ -0,0 +1,85 @@
+"""Write-behind buffer that coalesces story updates during pipeline processing."""
+import asyncio
+from typing import Dict, Any, Optional, Iterable
+
+from ..types.domain import Story
+from ..utils.logger import get_logger
+from ..utils.timing import span
+
+logger = get_logger(__name__)
+
+
+class StoryWriteBuffer:
+    """
+    Merges field updates for a single story and writes them in as few PATCHes as possible.
+
+    Fields that clients poll for (status, title, content) are flushed immediately
+    together with everything buffered so far. All other fields (audio filename,
+    cover URLs, error details, ...) wait for the next flush at a stage boundary.
+    """
+
+    EAGER_FIELDS = frozenset({"status", "title", "content"})
+
+    def __init__(self, supabase, story_id: str, eager_fields: Optional[Iterable[str]] = None):
+        self.supabase = supabase
+        self.story_id = story_id
+        self.eager_fields = frozenset(eager_fields) if eager_fields is not None else self.EAGER_FIELDS
+        self.writes = 0
+        self.last_story: Optional[Story] = None
+        self._pending: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> Dict[str, Any]:
+        """Fields buffered but not yet written."""
+        return dict(self._pending)
+
+    async def update(self, fields: Dict[str, Any]) -> Optional[Story]:
+        """Buffer field updates, flushing immediately if any of them is polled by clients."""
+        self._pending.update(fields)
+        if self.eager_fields.intersection(fields):
+            return await self.flush()
+        return None
+
+    async def flush(self) -> Optional[Story]:
+        """Write all buffered fields in a single update. No-op if nothing is pending."""
+        async with self._lock:
+            if not self._pending:
+                return self.last_story
+
+            data, self._pending = self._pending, {}
+            try:
+                with span("db.update_story", fields=len(data)):
+                    story = await self.supabase.update_story(self.story_id, data)
+            except Exception:
+                # Keep the unwritten fields, letting anything buffered meanwhile win
+                self._pending = {**data, **self._pending}
+                raise
+
+            self.writes += 1
+            if story:
+                self.last_story = story
+            logger.debug(f"Flushed {len(data)} fields for story {self.story_id} (write #{self.writes})")
+            return story
+
+    async def finalize(self, fields: Dict[str, Any]) -> Optional[Story]:
+        """
+        Write everything buffered plus the terminal fields through the finalize_story RPC.
+
+        Returns None (and writes nothing) if the story already left the processing state.
+        """
+        async with self._lock:
+            data, self._pending = {**self._pending, **fields}, {}
+            try:
+                with span("db.finalize_story", fields=len(data)):
+                    story = await self.supabase.finalize_story(self.story_id, data)
+            except Exception:
+                self._pending = {**data, **self._pending}
+                raise
+
+            self.writes += 1
+            if story:
+                self.last_story = story
+            else:
+                logger.warning(f"Story {self.story_id} is no longer processing; final fields not applied")
+            return story
@@ -0,0 +1,67 @@
+"""Text-to-speech that runs alongside a streaming storyteller."""
+import asyncio
+from typing import List, Optional, Tuple
+
+from ..agents.voice.agent import VoiceAgent
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def split_paragraphs(content: str) -> List[str]:
+    """Paragraphs of story content as the storyteller separates them (blank lines)."""
+    return [paragraph.strip() for paragraph in content.split("\n\n") if paragraph.strip()]
+
+
+class StreamedSpeech:
+    """
+    Voices a story paragraph by paragraph while it is still being written.
+
+    `on_event` is handed to the storyteller; every completed paragraph starts
+    its own TTS request right away (vendor concurrency is bounded by the
+    pacer) and is retried on its own if it fails. `finish()` checks the
+    streamed paragraphs against the final story content and joins the
+    segments. If they differ (e.g. the response needed the fallback parser)
+    it returns None and the caller voices the final content instead.
+    """
+
+    def __init__(self, voice_agent: VoiceAgent, language: str, story_id: str):
+        self.voice_agent = voice_agent
+        self.language = language
+        self.story_id = story_id
+        self.paragraphs: List[str] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def on_event(self, kind: str, text: str) -> None:
+        """Storyteller stream callback; starts TTS for each finished paragraph."""
+        if kind != "paragraph":
+            return
+        index = len(self.paragraphs)
+        self.paragraphs.append(text)
+        self._tasks.append(asyncio.create_task(
+            self.voice_agent.synthesize_chunk(text, self.language),
+            name=f"tts-{self.story_id}-{index}"
+        ))
+        logger.info(f"Started TTS for paragraph {index + 1} of story {self.story_id} while it is still streaming")
+
+    async def finish(self, content: str) -> Optional[Tuple[bytes, str]]:
+        """Joined audio for `content`, or None if the streamed segments cannot be used."""
+        if not self._tasks:
+            return None
+        if split_paragraphs(content) != self.paragraphs:
+            logger.warning(f"Streamed paragraphs of story {self.story_id} differ from the final content, "
+                           f"discarding {len(self._tasks)} segment(s)")
+            self.cancel()
+            return None
+
+        try:
+            results = await asyncio.gather(*self._tasks)
+        except Exception:
+            self.cancel()
+            raise
+        return self.voice_agent.join_segments(results)
+
+    def cancel(self) -> None:
+        """Cancel segments still being synthesized."""
+        for task in self._tasks:
+            task.cancel()
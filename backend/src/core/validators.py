@@ -109,6 +109,20 @@ def validate_uuid(uuid_string: str, field_name: str = "ID") -> None:
         raise ValidationError(f"Invalid {field_name} format")
 
 
+def validate_list_view(view: str) -> None:
+    """
+    Validate a list endpoint's `view` parameter.
+    
+    Args:
+        view: Requested projection, "full" or "summary"
+        
+    Raises:
+        ValidationError: If validation fails
+    """
+    if view not in ("full", "summary"):
+        raise ValidationError("view must be one of: full, summary")
+
+
 def validate_story_content(content: str) -> None:
     """
     Validate story content.
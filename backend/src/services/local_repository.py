@@ -0,0 +1,956 @@
+"""Local SQLite + filesystem repository for offline development, load tests and benchmarks."""
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional, Dict, Any, Iterable
+
+from ..types.domain import Kid, Story
+from ..types.requests import CreateKidRequest, UpdateKidRequest
+from ..utils.logger import get_logger
+from ..utils.config import get_config
+from ..core.pagination import decode_cursor
+from ..utils.rate_limit import sliding_window_retry_after
+from ..utils.image_hash import hamming_distance
+from .repository import Repository, FINALIZE_COLUMNS
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+create table if not exists kids (
+    id text primary key,
+    user_id text not null,
+    name text not null,
+    age integer,
+    gender text,
+    avatar_type text,
+    appearance_method text,
+    appearance_description text,
+    appearance_extracted_at text,
+    appearance_metadata text,
+    favorite_genres text,
+    parent_notes text,
+    preferred_language text,
+    created_at text not null,
+    updated_at text
+);
+create index if not exists kids_user_id_idx on kids (user_id);
+
+create table if not exists stories (
+    id text primary key,
+    kid_id text not null references kids (id) on delete cascade,
+    title text,
+    content text,
+    image_description text,
+    audio_filename text,
+    audio_error text,
+    audio_failed_at text,
+    background_music_filename text,
+    cover_image_url text,
+    cover_image_thumbnail_url text,
+    cover_image_metadata text,
+    cover_image_generated_at text,
+    language text,
+    status text,
+    is_favourite integer not null default 0,
+    declined_reason text,
+    parent_feedback text,
+    metadata text,
+    created_at text not null,
+    updated_at text
+);
+create index if not exists stories_kid_status_created_idx on stories (kid_id, status, created_at desc, id desc);
+create index if not exists stories_kid_created_idx on stories (kid_id, created_at desc, id desc);
+create index if not exists stories_status_created_idx on stories (status, created_at desc);
+
+create table if not exists story_inputs (
+    id text primary key,
+    story_id text not null references stories (id) on delete cascade,
+    input_type text,
+    input_value text,
+    metadata text,
+    created_at text not null
+);
+create index if not exists story_inputs_story_id_input_type_idx on story_inputs (story_id, input_type);
+create index if not exists story_inputs_story_id_created_at_idx on story_inputs (story_id, created_at);
+
+create table if not exists story_review_tokens (
+    token text primary key,
+    story_id text not null references stories (id) on delete cascade,
+    expires_at text not null,
+    created_at text
+);
+
+create table if not exists story_review_actions (
+    id text primary key,
+    story_id text not null,
+    user_id text,
+    action text,
+    review_method text,
+    declined_reason text,
+    feedback text,
+    created_at text not null
+);
+
+create table if not exists story_jobs (
+    id text primary key,
+    kind text not null,
+    story_id text references stories (id) on delete cascade,
+    payload text,
+    status text not null default 'queued',
+    attempts integer not null default 0,
+    max_attempts integer not null default 3,
+    run_after text not null,
+    locked_by text,
+    heartbeat_at text,
+    last_error text,
+    created_at text not null,
+    updated_at text
+);
+create index if not exists story_jobs_ready_idx on story_jobs (status, run_after, created_at);
+
+create table if not exists rate_limit_counters (
+    key text not null,
+    window_seconds integer not null,
+    window_index integer not null,
+    count integer not null default 0,
+    primary key (key, window_seconds, window_index)
+);
+
+-- Generation request keys (idempotency keys, content hashes) claimed by a story
+create table if not exists story_requests (
+    key text primary key,
+    story_id text not null,
+    expires_at text not null,
+    created_at text not null
+);
+
+-- Image descriptions keyed by scope (vendor/model/prompt) and image hashes;
+-- near-identical (perceptual) matches are limited to the same kid's images
+create table if not exists vision_descriptions (
+    scope text not null,
+    content_hash text not null,
+    perceptual_hash integer,
+    kid_id text,
+    description text not null,
+    hits integer not null default 0,
+    last_used_at text not null,
+    created_at text not null,
+    primary key (scope, content_hash)
+);
+create index if not exists vision_descriptions_last_used_at_idx on vision_descriptions (last_used_at);
+create index if not exists vision_descriptions_scope_kid_idx on vision_descriptions (scope, kid_id);
+
+-- Synthesized audio objects shared by stories, keyed by hash of text and voice settings
+create table if not exists tts_audio (
+    key text primary key,
+    filename text not null,
+    content_type text not null,
+    size_bytes integer not null,
+    hits integer not null default 0,
+    last_used_at text not null,
+    created_at text not null
+);
+create index if not exists tts_audio_last_used_at_idx on tts_audio (last_used_at);
+create index if not exists stories_audio_filename_idx on stories (audio_filename);
+
+create table if not exists story_timelines (
+    id text primary key,
+    story_id text not null references stories (id) on delete cascade,
+    status text not null,
+    total_ms real,
+    spans text,
+    created_at text not null
+);
+create index if not exists story_timelines_story_id_created_at_idx on story_timelines (story_id, created_at);
+
+-- Stand-in for Supabase Auth: parent email and user_metadata
+create table if not exists users (
+    id text primary key,
+    email text,
+    user_metadata text
+);
+
+-- Edge Function calls are recorded instead of executed
+create table if not exists function_invocations (
+    id text primary key,
+    function_name text not null,
+    body text,
+    created_at text not null
+);
+"""
+
+TABLES = ("kids", "stories", "story_inputs", "story_review_tokens", "story_review_actions",
+          "story_jobs", "rate_limit_counters", "story_requests", "vision_descriptions",
+          "tts_audio", "story_timelines", "users", "function_invocations")
+
+JSON_COLUMNS = {
+    "kids": {"appearance_metadata", "favorite_genres"},
+    "stories": {"cover_image_metadata", "metadata"},
+    "story_inputs": {"metadata"},
+    "story_jobs": {"payload"},
+    "story_timelines": {"spans"},
+    "users": {"user_metadata"},
+    "function_invocations": {"body"},
+}
+
+BOOL_COLUMNS = {"stories": {"is_favourite"}}
+
+
+def _now(offset_seconds: float = 0) -> str:
+    """UTC timestamp in a fixed-width ISO format so text ordering matches time ordering."""
+    return (datetime.utcnow() + timedelta(seconds=offset_seconds)).isoformat(timespec="microseconds")
+
+
+def _normalize_timestamp(value: str) -> str:
+    """Bring an ISO timestamp (naive or aware) into the stored naive-UTC format."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(timespec="microseconds")
+
+
+class LocalRepository(Repository):
+    """
+    Repository backed by a SQLite file and a storage directory.
+
+    Mirrors the Supabase backend's semantics (projections, keyset pagination,
+    first-input joins, finalize/consume RPCs, public URLs) so the pipeline can
+    run and be measured without a Supabase project. SQLite has a single writer,
+    so all statements run on a one-thread I/O pool against one connection.
+    """
+
+    def __init__(self, path: str = None):
+        """Open (and create if needed) the local database and storage directory."""
+        config = get_config()
+        local_config = config.get("repository", {}).get("local", {})
+        self.root = Path(path or local_config.get("path", "./local_data")).resolve()
+        self.storage_root = self.root / "storage"
+        self.storage_bucket = config["supabase"]["storage"]["bucket"]
+        self.public_url_base = local_config.get("public_url_base")
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.storage_root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "mira.sqlite3"
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode = wal")
+        self._conn.execute("pragma foreign_keys = on")
+        self._conn.executescript(SCHEMA)
+        self._table_columns = {
+            table: {row["name"] for row in self._conn.execute(f"pragma table_info({table})")}
+            for table in TABLES
+        }
+
+        super().__init__(config, 1, "local-repo-io")
+        logger.info(f"Local repository initialized at {self.root}")
+
+    def close(self) -> None:
+        """Release the I/O pool and the database connection."""
+        super().close()
+        self._conn.close()
+
+    # Low-level helpers (run on the I/O thread)
+    def _encode(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate columns and convert values to SQLite types."""
+        unknown = set(data) - self._table_columns[table]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table}: {', '.join(sorted(unknown))}")
+        encoded = {}
+        for key, value in data.items():
+            if key in JSON_COLUMNS.get(table, ()) and value is not None:
+                value = json.dumps(value, default=str)
+            elif hasattr(value, "value"):  # Enums
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            encoded[key] = value
+        return encoded
+
+    @staticmethod
+    def _decode(table: str, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a SQLite row back into the dict shape PostgREST returns."""
+        data = dict(row)
+        for key in JSON_COLUMNS.get(table, ()):
+            if data.get(key) is not None:
+                data[key] = json.loads(data[key])
+        for key in BOOL_COLUMNS.get(table, ()):
+            if key in data:
+                data[key] = bool(data[key])
+        return data
+
+    def _insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._encode(table, data)
+        columns = ", ".join(data)
+        placeholders = ", ".join("?" for _ in data)
+        row = self._conn.execute(
+            f"insert into {table} ({columns}) values ({placeholders}) returning *", list(data.values())
+        ).fetchone()
+        return self._decode(table, row)
+
+    def _update(self, table: str, row_id: str, data: Dict[str, Any], where: str = "",
+                params: Iterable[Any] = ()) -> Optional[Dict[str, Any]]:
+        data = self._encode(table, data)
+        assignments = ", ".join(f"{column} = ?" for column in data)
+        row = self._conn.execute(
+            f"update {table} set {assignments} where id = ? {where} returning *",
+            [*data.values(), row_id, *params]
+        ).fetchone()
+        return self._decode(table, row) if row else None
+
+    def _select(self, table: str, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        return [self._decode(table, row) for row in self._conn.execute(sql, list(params))]
+
+    def _scalar(self, sql: str, params: Iterable[Any] = ()) -> Any:
+        """First column of the first row; execute and fetch both stay on the I/O thread."""
+        return self._conn.execute(sql, list(params)).fetchone()[0]
+
+    @staticmethod
+    def _story_select(view: str, alias: str = "s") -> str:
+        columns = Repository.story_columns(view)
+        if columns == "*":
+            return f"{alias}.*"
+        return ", ".join(f"{alias}.{column.strip()}" for column in columns.split(","))
+
+    @staticmethod
+    def _keyset(cursor: Optional[str], alias: str = "s") -> tuple:
+        """SQL fragment and params selecting rows after a cursor in (created_at, id) DESC order."""
+        if not cursor:
+            return "", []
+        created_at, row_id = decode_cursor(cursor)
+        created_at = _normalize_timestamp(created_at)
+        return (
+            f" and ({alias}.created_at < ? or ({alias}.created_at = ? and {alias}.id < ?))",
+            [created_at, created_at, row_id],
+        )
+
+    # Kid Profile Operations
+    async def create_kid(self, request: CreateKidRequest) -> Kid:
+        """Create a new kid profile."""
+        data = {
+            "id": str(uuid.uuid4()),
+            "user_id": request.user_id,
+            "name": request.name,
+            "age": request.age,
+            "gender": request.gender,
+            "avatar_type": request.avatar_type,
+            "appearance_method": request.appearance_method,
+            "appearance_description": request.appearance_description,
+            "favorite_genres": request.favorite_genres,
+            "parent_notes": request.parent_notes,
+            "preferred_language": request.preferred_language,
+            "created_at": _now(),
+        }
+        kid = Kid(**await self._run(self._insert, "kids", data))
+        self._kids.set(kid.id, kid)
+        return kid
+
+    async def _fetch_kid(self, kid_id: str) -> Optional[Kid]:
+        rows = await self._run(self._select, "kids", "select * from kids where id = ?", [kid_id])
+        return Kid(**rows[0]) if rows else None
+
+    async def get_kids_for_user(self, user_id: str) -> List[Kid]:
+        rows = await self._run(self._select, "kids", "select * from kids where user_id = ?", [user_id])
+        kids = [Kid(**row) for row in rows]
+        for kid in kids:
+            self._kids.set(kid.id, kid)
+        return kids
+
+    async def get_kids_with_story_counts(self, user_id: str) -> List[Dict]:
+        return await self._run(
+            self._select, "kids",
+            """select k.*, (select count(*) from stories s where s.kid_id = k.id) as stories_count
+               from kids k where k.user_id = ?""",
+            [user_id]
+        )
+
+    async def update_kid(self, kid_id: str, request: UpdateKidRequest) -> Optional[Kid]:
+        update_data = request.dict(exclude_unset=True)
+        update_data["updated_at"] = _now()
+
+        self._kids.invalidate(kid_id)
+        row = await self._run(self._update, "kids", kid_id, update_data)
+        if row:
+            kid = Kid(**row)
+            self._kids.set(kid_id, kid)
+            return kid
+        return None
+
+    async def delete_kid(self, kid_id: str) -> bool:
+        self._kids.invalidate(kid_id)
+        cursor = await self._run(self._conn.execute, "delete from kids where id = ?", [kid_id])
+        return cursor.rowcount > 0
+
+    # Story Operations
+    async def create_story(self, story_data: Dict[str, Any]) -> Story:
+        data = {"id": str(uuid.uuid4()), **story_data, "created_at": _now()}
+        return Story(**await self._run(self._insert, "stories", data))
+
+    async def get_story(self, story_id: str) -> Optional[Story]:
+        rows = await self._run(self._select, "stories", "select * from stories where id = ?", [story_id])
+        return self._story_from_row(rows[0]) if rows else None
+
+    async def get_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        return await self._list_stories_for_kid(kid_id, limit, offset, cursor, status="approved", view=view)
+
+    async def get_all_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                      cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        return await self._list_stories_for_kid(kid_id, limit, offset, cursor, view=view)
+
+    async def _list_stories_for_kid(self, kid_id: str, limit: int, offset: int = 0,
+                                    cursor: Optional[str] = None,
+                                    status: Optional[str] = None,
+                                    view: str = "full") -> List[Story]:
+        sql = f"select {self._story_select(view)} from stories s where s.kid_id = ?"
+        params: List[Any] = [kid_id]
+        if status:
+            sql += " and s.status = ?"
+            params.append(status)
+        keyset_sql, keyset_params = self._keyset(cursor)
+        sql += keyset_sql + " order by s.created_at desc, s.id desc limit ?"
+        params += [*keyset_params, limit]
+        if offset and not cursor:
+            sql += " offset ?"
+            params.append(offset)
+        rows = await self._run(self._select, "stories", sql, params)
+        return [self._story_from_row(row) for row in rows]
+
+    async def count_stories_for_kid(self, kid_id: str, status: Optional[str] = None,
+                                    method: str = "exact") -> int:
+        """Count stories for a kid (always exact locally)."""
+        sql = "select count(*) from stories where kid_id = ?"
+        params = [kid_id]
+        if status:
+            sql += " and status = ?"
+            params.append(status)
+        return await self._run(self._scalar, sql, params)
+
+    async def update_story(self, story_id: str, update_data: Dict[str, Any]) -> Optional[Story]:
+        update_data["updated_at"] = _now()
+        row = await self._run(self._update, "stories", story_id, update_data)
+        return self._story_from_row(row) if row else None
+
+    async def finalize_story(self, story_id: str, fields: Dict[str, Any]) -> Optional[Story]:
+        """Same contract as the finalize_story RPC: only processing stories, listed columns only."""
+        data = {key: value for key, value in fields.items() if key in FINALIZE_COLUMNS}
+        data["updated_at"] = _now()
+        row = await self._run(self._update, "stories", story_id, data, "and status = ?", ["processing"])
+        return self._story_from_row(row) if row else None
+
+    async def get_pending_stories(self, user_id: Optional[str] = None, limit: int = 50,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        try:
+            sql = f"""select {self._story_select(view)}, k.name as child_name,
+                             (select i.input_value from story_inputs i
+                               where i.story_id = s.id order by i.created_at limit 1) as caption
+                        from stories s join kids k on k.id = s.kid_id
+                       where s.status = 'pending'"""
+            params: List[Any] = []
+            if user_id:
+                sql += " and k.user_id = ?"
+                params.append(user_id)
+            keyset_sql, keyset_params = self._keyset(cursor)
+            sql += keyset_sql + " order by s.created_at desc, s.id desc limit ?"
+            params += [*keyset_params, limit]
+            rows = await self._run(self._select, "stories", sql, params)
+            for row in rows:
+                # Caption comes from the first story input, as in the Supabase backend
+                row["image_description"] = row.pop("caption") or ""
+            return [self._story_from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting pending stories: {e}")
+            return []
+
+    # Story Input Operations
+    def _replace_story_input(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._conn:
+            self._conn.execute("begin immediate")
+            self._conn.execute(
+                "delete from story_inputs where story_id = ? and input_type is ?",
+                [data["story_id"], data.get("input_type")]
+            )
+            return self._insert("story_inputs", data)
+
+    async def create_story_input(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        data = {"id": str(uuid.uuid4()), **input_data, "created_at": _now()}
+        return await self._run(self._replace_story_input, data)
+
+    async def get_story_input(self, story_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(
+            self._select, "story_inputs", "select * from story_inputs where story_id = ? limit 1", [story_id]
+        )
+        return rows[0] if rows else None
+
+    async def get_story_input_by_type(self, story_id: str, input_type: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(
+            self._select, "story_inputs",
+            "select * from story_inputs where story_id = ? and input_type = ? limit 1",
+            [story_id, input_type]
+        )
+        return rows[0] if rows else None
+
+    # Storage Operations
+    def _object_path(self, bucket: str, path: str) -> Path:
+        target = (self.storage_root / bucket / path).resolve()
+        if self.storage_root not in target.parents:
+            raise ValueError(f"Invalid storage path: {bucket}/{path}")
+        return target
+
+    def _write_object(self, bucket: str, path: str, file_data: bytes) -> None:
+        target = self._object_path(bucket, path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(file_data)
+
+    async def upload_audio(self, file_data: bytes, filename: str) -> str:
+        await self._run(self._write_object, self.storage_bucket, filename, file_data)
+        return filename
+
+    async def upload_file(self, bucket: str, path: str, file_data: bytes, content_type: str,
+                          public: bool = True, upsert: bool = False) -> str:
+        await self._run(self._write_object, bucket, path, file_data)
+        return self.get_public_url(bucket, path)
+
+    def get_public_url(self, bucket: str, path: str) -> str:
+        """HTTP URL under repository.local.public_url_base if set, else a file:// URI."""
+        if self.public_url_base:
+            return f"{self.public_url_base.rstrip('/')}/{bucket}/{path}"
+        return self._object_path(bucket, path).as_uri()
+
+    def build_audio_url(self, audio_filename: str) -> str:
+        if not audio_filename:
+            return None
+        return self.get_public_url(self.storage_bucket, audio_filename)
+
+    def build_background_music_url(self, music_filename: str) -> str:
+        if not music_filename:
+            return None
+        from .background_music_service import background_music_service
+        return self.get_public_url(background_music_service.get_bucket_name(), music_filename)
+
+    async def delete_audio(self, filename: str) -> bool:
+        target = self._object_path(self.storage_bucket, filename)
+        if not target.exists():
+            return False
+        await self._run(target.unlink)
+        return True
+
+    async def download_file(self, bucket: str, path: str) -> bytes:
+        return await self._run(self._object_path(bucket, path).read_bytes)
+
+    async def delete_files(self, bucket: str, paths: List[str]) -> None:
+        for path in paths:
+            await self._run(self._object_path(bucket, path).unlink, missing_ok=True)
+
+    # Review Operations
+    def _review_token_row(self, token: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            """select t.*, s.title, s.kid_id, k.name as kid_name, k.user_id
+                 from story_review_tokens t
+                 join stories s on s.id = t.story_id
+                 join kids k on k.id = s.kid_id
+                where t.token = ?""",
+            [token]
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "token": row["token"],
+            "story_id": row["story_id"],
+            "expires_at": row["expires_at"],
+            "created_at": row["created_at"],
+            "stories": {
+                "id": row["story_id"],
+                "title": row["title"],
+                "kid_id": row["kid_id"],
+                "kids": {"name": row["kid_name"], "user_id": row["user_id"]},
+            },
+        }
+
+    async def get_review_token(self, token: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._review_token_row, token)
+
+    def _consume_review_token(self, token: str, action: str,
+                              declined_reason: Optional[str]) -> Optional[Dict[str, Any]]:
+        if action not in ("approve", "decline"):
+            raise ValueError(f"invalid review action: {action}")
+        with self._conn:
+            self._conn.execute("begin immediate")
+            token_data = self._review_token_row(token)
+            if not token_data:
+                return None
+            expires_at = datetime.fromisoformat(token_data["expires_at"].replace("Z", "+00:00"))
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) >= expires_at:
+                return None
+
+            story_id = token_data["story_id"]
+            status = "approved" if action == "approve" else "rejected"
+            self._conn.execute("delete from story_review_tokens where token = ?", [token])
+            self._conn.execute(
+                """update stories
+                      set status = ?, updated_at = ?,
+                          declined_reason = case when ? = 'decline' then ? else declined_reason end
+                    where id = ?""",
+                [status, _now(), action, declined_reason, story_id]
+            )
+            user_id = token_data["stories"]["kids"]["user_id"]
+            self._insert("story_review_actions", {
+                "id": str(uuid.uuid4()),
+                "story_id": story_id,
+                "user_id": user_id,
+                "action": action,
+                "review_method": "email",
+                "declined_reason": declined_reason,
+                "created_at": _now(),
+            })
+        return {
+            "story_id": story_id,
+            "story_title": token_data["stories"]["title"],
+            "kid_name": token_data["stories"]["kids"]["name"],
+            "user_id": user_id,
+            "status": status,
+        }
+
+    async def consume_review_token(self, token: str, action: str,
+                                   declined_reason: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await self._run(self._consume_review_token, token, action, declined_reason)
+
+    async def create_review_action(self, action_data: Dict[str, Any]) -> None:
+        data = {"id": str(uuid.uuid4()), "created_at": _now(), **action_data}
+        await self._run(self._insert, "story_review_actions", data)
+
+    # Job Queue Operations
+    async def enqueue_job(self, kind: str, payload: Dict[str, Any], story_id: Optional[str] = None,
+                          max_attempts: int = 3) -> Dict[str, Any]:
+        now = _now()
+        return await self._run(self._insert, "story_jobs", {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "story_id": story_id,
+            "payload": payload,
+            "status": "queued",
+            "max_attempts": max_attempts,
+            "run_after": now,
+            "created_at": now,
+        })
+
+    def _claim_jobs(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        now = _now()
+        with self._conn:
+            # Write lock up front, so two workers can never claim the same row
+            self._conn.execute("begin immediate")
+            ids = [row["id"] for row in self._conn.execute(
+                """select id from story_jobs where status = 'queued' and run_after <= ?
+                    order by run_after, created_at limit ?""",
+                [now, limit]
+            )]
+            if not ids:
+                return []
+            placeholders = ", ".join("?" for _ in ids)
+            rows = self._conn.execute(
+                f"""update story_jobs
+                       set status = 'running', attempts = attempts + 1, locked_by = ?,
+                           heartbeat_at = ?, updated_at = ?
+                     where id in ({placeholders}) returning *""",
+                [worker_id, now, now, *ids]
+            ).fetchall()
+        return [self._decode("story_jobs", row) for row in rows]
+
+    async def claim_jobs(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        return await self._run(self._claim_jobs, worker_id, limit)
+
+    async def heartbeat_jobs(self, worker_id: str, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        now = _now()
+        placeholders = ", ".join("?" for _ in job_ids)
+        await self._run(
+            self._conn.execute,
+            f"""update story_jobs set heartbeat_at = ?, updated_at = ?
+                 where id in ({placeholders}) and locked_by = ? and status = 'running'""",
+            [now, now, *job_ids, worker_id]
+        )
+
+    async def complete_job(self, job_id: str, worker_id: str) -> None:
+        await self._run(
+            self._conn.execute,
+            """update story_jobs set status = 'succeeded', locked_by = null, updated_at = ?
+                where id = ? and locked_by = ?""",
+            [_now(), job_id, worker_id]
+        )
+
+    async def fail_job(self, job_id: str, worker_id: str, error: str,
+                       retry_in: Optional[float] = None) -> None:
+        """Same contract as the fail_story_job RPC."""
+        status = "failed" if retry_in is None else "queued"
+        await self._run(
+            self._conn.execute,
+            """update story_jobs
+                  set status = ?, run_after = coalesce(?, run_after), last_error = ?,
+                      locked_by = null, updated_at = ?
+                where id = ? and locked_by = ? and status = 'running'""",
+            [status, None if retry_in is None else _now(retry_in), error, _now(), job_id, worker_id]
+        )
+
+    def _requeue_stale_jobs(self, stale_after: float) -> List[Dict[str, Any]]:
+        now = _now()
+        with self._conn:
+            self._conn.execute("begin immediate")
+            rows = [self._decode("story_jobs", row) for row in self._conn.execute(
+                """update story_jobs
+                      set status = case when attempts >= max_attempts then 'failed' else 'queued' end,
+                          locked_by = null, last_error = 'worker heartbeat lost',
+                          run_after = ?, updated_at = ?
+                    where status = 'running' and heartbeat_at < ?
+                returning *""",
+                [now, now, _now(-stale_after)]
+            ).fetchall()]
+            for job in rows:
+                if job["status"] == "failed" and job["story_id"]:
+                    self._conn.execute(
+                        "update stories set status = 'error', updated_at = ? where id = ? and status = 'processing'",
+                        [now, job["story_id"]]
+                    )
+        return rows
+
+    async def requeue_stale_jobs(self, stale_after: float) -> List[Dict[str, Any]]:
+        """Same contract as the requeue_stale_story_jobs RPC."""
+        return await self._run(self._requeue_stale_jobs, stale_after)
+
+    async def count_jobs(self, status: str = "queued") -> int:
+        return await self._run(self._scalar, "select count(*) from story_jobs where status = ?", [status])
+
+    # Rate Limiting
+    def _hit_rate_limit(self, key: str, window_seconds: int, limit: int) -> float:
+        now = datetime.utcnow().timestamp()
+        window_index = int(now // window_seconds)
+        with self._conn:
+            self._conn.execute("begin immediate")
+            counts = dict(self._conn.execute(
+                """select window_index, count from rate_limit_counters
+                    where key = ? and window_seconds = ? and window_index >= ?""",
+                [key, window_seconds, window_index - 1]
+            ).fetchall())
+            retry_after = sliding_window_retry_after(
+                counts.get(window_index - 1, 0), counts.get(window_index, 0),
+                now - window_index * window_seconds, window_seconds, limit
+            )
+            if retry_after == 0:
+                self._conn.execute(
+                    """insert into rate_limit_counters (key, window_seconds, window_index, count)
+                       values (?, ?, ?, 1)
+                       on conflict (key, window_seconds, window_index) do update set count = count + 1""",
+                    [key, window_seconds, window_index]
+                )
+                self._conn.execute(
+                    "delete from rate_limit_counters where key = ? and window_seconds = ? and window_index < ?",
+                    [key, window_seconds, window_index - 1]
+                )
+        return retry_after
+
+    async def hit_rate_limit(self, key: str, window_seconds: int, limit: int) -> float:
+        """Same contract as the rate_limit_hit RPC."""
+        return await self._run(self._hit_rate_limit, key, window_seconds, limit)
+
+    # Request Deduplication
+    def _claim_story_request(self, keys: Dict[str, float], story_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        placeholders = ", ".join("?" for _ in keys)
+        with self._conn:
+            self._conn.execute("begin immediate")
+            self._conn.execute("delete from story_requests where expires_at <= ?", [_now()])
+            row = self._conn.execute(
+                f"""select story_id, created_at from story_requests
+                     where key in ({placeholders}) order by created_at limit 1""",
+                list(keys)
+            ).fetchone()
+            if row:
+                age = (now - datetime.fromisoformat(row[1])).total_seconds()
+                return {"story_id": row[0], "age_seconds": age}
+            self._conn.executemany(
+                "insert into story_requests (key, story_id, expires_at, created_at) values (?, ?, ?, ?)",
+                [(key, story_id, _now(ttl), _now()) for key, ttl in keys.items()]
+            )
+        return None
+
+    async def claim_story_request(self, keys: Dict[str, float], story_id: str) -> Optional[Dict[str, Any]]:
+        """Same contract as the claim_story_request RPC."""
+        return await self._run(self._claim_story_request, keys, story_id)
+
+    async def release_story_request(self, keys: List[str], story_id: str) -> None:
+        placeholders = ", ".join("?" for _ in keys)
+        await self._run(self._conn.execute,
+                        f"delete from story_requests where story_id = ? and key in ({placeholders})",
+                        [story_id, *keys])
+
+    # Vision Description Cache
+    def _find_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                 kid_id: Optional[str], max_distance: int) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "select content_hash, description from vision_descriptions where scope = ? and content_hash = ?",
+            [scope, content_hash]
+        ).fetchone()
+        match = {"content_hash": row[0], "description": row[1], "distance": 0} if row else None
+        if match is None and perceptual_hash is not None and kid_id:
+            # One kid's images in a bounded table, so the scan is cheap
+            for candidate_hash, candidate_phash, description in self._conn.execute(
+                """select content_hash, perceptual_hash, description from vision_descriptions
+                    where scope = ? and kid_id = ? and perceptual_hash is not null""",
+                [scope, kid_id]
+            ):
+                distance = hamming_distance(perceptual_hash, candidate_phash)
+                if distance <= max_distance and (match is None or distance < match["distance"]):
+                    match = {"content_hash": candidate_hash, "description": description, "distance": distance}
+        if match:
+            self._conn.execute(
+                "update vision_descriptions set hits = hits + 1, last_used_at = ? where scope = ? and content_hash = ?",
+                [_now(), scope, match["content_hash"]]
+            )
+        return match
+
+    async def find_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], max_distance: int) -> Optional[Dict[str, Any]]:
+        """Same contract as the match_vision_description RPC."""
+        return await self._run(self._find_vision_description, scope, content_hash, perceptual_hash,
+                               kid_id, max_distance)
+
+    def _save_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                 kid_id: Optional[str], description: str, max_entries: int) -> None:
+        now = _now()
+        with self._conn:
+            self._conn.execute("begin immediate")
+            self._conn.execute(
+                """insert into vision_descriptions
+                       (scope, content_hash, perceptual_hash, kid_id, description, last_used_at, created_at)
+                   values (?, ?, ?, ?, ?, ?, ?)
+                   on conflict (scope, content_hash) do update
+                       set description = excluded.description, last_used_at = excluded.last_used_at""",
+                [scope, content_hash, perceptual_hash, kid_id, description, now, now]
+            )
+            self._conn.execute(
+                """delete from vision_descriptions where rowid in (
+                       select rowid from vision_descriptions order by last_used_at desc limit -1 offset ?)""",
+                [max_entries]
+            )
+
+    async def save_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], description: str, max_entries: int) -> None:
+        """Same contract as the save_vision_description RPC."""
+        await self._run(self._save_vision_description, scope, content_hash, perceptual_hash,
+                        kid_id, description, max_entries)
+
+    # TTS Audio Cache
+    def _find_tts_audio(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._conn:
+            row = self._conn.execute(
+                "select filename, content_type from tts_audio where key = ?", [key]
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("update tts_audio set hits = hits + 1, last_used_at = ? where key = ?",
+                               [_now(), key])
+        return {"filename": row[0], "content_type": row[1]}
+
+    async def find_tts_audio(self, key: str) -> Optional[Dict[str, Any]]:
+        """Same contract as the find_tts_audio RPC."""
+        return await self._run(self._find_tts_audio, key)
+
+    def _save_tts_audio(self, key: str, filename: str, content_type: str, size_bytes: int,
+                        max_entries: int, max_bytes: int, min_idle_seconds: float) -> List[str]:
+        now = _now()
+        idle_before = _now(-min_idle_seconds)
+        evicted = []
+        with self._conn:
+            self._conn.execute("begin immediate")
+            self._conn.execute(
+                """insert into tts_audio (key, filename, content_type, size_bytes, last_used_at, created_at)
+                   values (?, ?, ?, ?, ?, ?)
+                   on conflict (key) do update
+                       set filename = excluded.filename, content_type = excluded.content_type,
+                           size_bytes = excluded.size_bytes, last_used_at = excluded.last_used_at""",
+                [key, filename, content_type, size_bytes, now, now]
+            )
+            # Keep the most recently used objects within budget; past it, drop the idle unreferenced ones
+            kept_entries, kept_bytes = 0, 0
+            for candidate, candidate_filename, candidate_bytes, last_used_at, referenced in self._conn.execute(
+                """select t.key, t.filename, t.size_bytes, t.last_used_at,
+                          exists (select 1 from stories s where s.audio_filename = t.filename)
+                     from tts_audio t
+                    order by t.last_used_at desc"""
+            ).fetchall():
+                over_budget = kept_entries >= max_entries or kept_bytes + candidate_bytes > max_bytes
+                if over_budget and not referenced and last_used_at < idle_before:
+                    self._conn.execute("delete from tts_audio where key = ?", [candidate])
+                    evicted.append(candidate_filename)
+                else:
+                    kept_entries += 1
+                    kept_bytes += candidate_bytes
+        return evicted
+
+    async def save_tts_audio(self, key: str, filename: str, content_type: str, size_bytes: int,
+                             max_entries: int, max_bytes: int, min_idle_seconds: float) -> List[str]:
+        """Same contract as the save_tts_audio RPC."""
+        return await self._run(self._save_tts_audio, key, filename, content_type, size_bytes,
+                               max_entries, max_bytes, min_idle_seconds)
+
+    # Pipeline Timelines
+    async def save_story_timeline(self, story_id: str, status: str, timeline: Dict[str, Any]) -> None:
+        await self._run(self._insert, "story_timelines", {
+            "id": str(uuid.uuid4()),
+            "story_id": story_id,
+            "status": status,
+            "total_ms": timeline.get("total_ms"),
+            "spans": timeline.get("spans", []),
+            "created_at": _now(),
+        })
+
+    async def get_story_timelines(self, story_id: str) -> List[Dict[str, Any]]:
+        return await self._run(
+            self._select, "story_timelines",
+            "select status, total_ms, spans, created_at from story_timelines where story_id = ? order by created_at",
+            [story_id]
+        )
+
+    # Auth and Functions
+    async def generate_magic_link(self, email: str, redirect_to: str) -> Any:
+        """No local auth: the 'magic link' goes straight to the redirect target."""
+        return SimpleNamespace(properties={"action_link": redirect_to, "email": email})
+
+    async def invoke_function(self, function_name: str, body: Dict[str, Any]) -> Any:
+        """Record the invocation in function_invocations instead of calling an Edge Function."""
+        await self._run(self._insert, "function_invocations", {
+            "id": str(uuid.uuid4()),
+            "function_name": function_name,
+            "body": body,
+            "created_at": _now(),
+        })
+        return {"recorded": True, "function": function_name}
+
+    async def _fetch_parent_profile(self, user_id: str) -> Dict[str, Any]:
+        rows = await self._run(self._select, "users", "select * from users where id = ?", [user_id])
+        user = rows[0] if rows else {}
+        return self._parent_profile(user.get("email"), user.get("user_metadata"))
+
+    async def upsert_user(self, user_id: str, email: Optional[str] = None,
+                          user_metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Create or replace a local parent account (stand-in for Supabase Auth)."""
+        data = self._encode("users", {"id": user_id, "email": email, "user_metadata": user_metadata or {}})
+        await self._run(
+            self._conn.execute,
+            "insert or replace into users (id, email, user_metadata) values (?, ?, ?)",
+            [data["id"], data["email"], data["user_metadata"]]
+        )
+        self.invalidate_parent_profile(user_id)
+
+    # Health Check
+    async def health_check(self) -> Dict[str, Any]:
+        try:
+            await self._run(self._conn.execute, "select 1")
+            return {"status": "healthy", "connected": True, "backend": "local", "path": str(self.db_path)}
+        except Exception as e:
+            logger.error(f"Local repository health check failed: {e}")
+            return {"status": "unhealthy", "connected": False, "error": str(e)}
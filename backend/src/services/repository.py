@@ -0,0 +1,400 @@
+"""Data repository interface shared by the Supabase and local backends."""
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable
+
+from ..types.domain import Kid, Story, StoryStatus
+from ..types.requests import CreateKidRequest, UpdateKidRequest
+from ..utils.logger import get_logger
+from ..utils.config import get_config
+from ..utils.cache import create_cache
+from ..utils.metrics import count_db_call
+
+logger = get_logger(__name__)
+
+# Column projections for story listings. "summary" leaves out content,
+# image_description, metadata and cover_image_metadata (which can hold a
+# whole base64 image) so library screens only move what they render.
+STORY_PROJECTIONS = {
+    "full": "*",
+    "summary": (
+        "id, kid_id, title, status, language, is_favourite, "
+        "cover_image_url, cover_image_thumbnail_url, audio_filename, "
+        "background_music_filename, created_at, updated_at"
+    ),
+}
+
+# Columns finalize_story may write (mirrors the finalize_story RPC)
+FINALIZE_COLUMNS = (
+    "title", "content", "status", "audio_filename", "audio_error", "audio_failed_at",
+    "cover_image_url", "cover_image_thumbnail_url", "cover_image_metadata",
+    "cover_image_generated_at",
+)
+
+
+class Repository(ABC):
+    """
+    Kids, stories, story inputs, review tokens/actions, storage, the story job
+    queue and parent settings.
+
+    Implementations run their blocking client calls on a dedicated I/O pool via
+    `_run`. Kid profiles and parent settings are served through the shared
+    read-through caches, so backends only implement the raw fetches.
+    """
+
+    def __init__(self, config: Dict[str, Any], io_workers: int, thread_name_prefix: str):
+        self.config = config
+        self.io_workers = io_workers
+        self._executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix=thread_name_prefix)
+
+        cache_config = config.get("cache", {})
+        self._parent_profiles = create_cache(
+            "parent_profile", cache_config.get("parent_profile"), default_ttl=120, default_max_entries=10000
+        )
+        self._kids = create_cache(
+            "kid_profile", cache_config.get("kid_profile"), default_ttl=300, default_max_entries=10000
+        )
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking client call on the I/O pool without blocking the event loop (one DB round trip)."""
+        count_db_call()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        """Release the I/O pool (called on application shutdown)."""
+        self._executor.shutdown(wait=False)
+
+    def _story_from_row(self, story_data: Dict[str, Any]) -> Story:
+        """Build a Story from a stories row, resolving media filenames to URLs."""
+        audio_filename = story_data.get("audio_filename")
+        if audio_filename:
+            story_data["audio_url"] = self.build_audio_url(audio_filename)
+        background_music_filename = story_data.get("background_music_filename")
+        if background_music_filename:
+            story_data["background_music_url"] = self.build_background_music_url(background_music_filename)
+        return Story(**story_data)
+
+    @staticmethod
+    def story_columns(view: str = "full") -> str:
+        """Column projection for a listing view ("full" or "summary")."""
+        return STORY_PROJECTIONS[view]
+
+    # Kid Profile Operations
+    @abstractmethod
+    async def create_kid(self, request: CreateKidRequest) -> Kid:
+        """Create a new kid profile."""
+
+    async def get_kid(self, kid_id: str) -> Optional[Kid]:
+        """Get a kid profile by ID (read-through cached, invalidated by kid writes)."""
+        return await self._kids.get_or_load(kid_id, lambda: self._fetch_kid(kid_id))
+
+    @abstractmethod
+    async def _fetch_kid(self, kid_id: str) -> Optional[Kid]:
+        """Fetch a kid profile from the backing store."""
+
+    @abstractmethod
+    async def get_kids_for_user(self, user_id: str) -> List[Kid]:
+        """Get all kid profiles for a user."""
+
+    @abstractmethod
+    async def get_kids_with_story_counts(self, user_id: str) -> List[Dict]:
+        """Get all kid profiles for a user as dicts with a stories_count key."""
+
+    @abstractmethod
+    async def update_kid(self, kid_id: str, request: UpdateKidRequest) -> Optional[Kid]:
+        """Update a kid profile."""
+
+    @abstractmethod
+    async def delete_kid(self, kid_id: str) -> bool:
+        """Delete a kid profile."""
+
+    # Story Operations
+    @abstractmethod
+    async def create_story(self, story_data: Dict[str, Any]) -> Story:
+        """Create a new story."""
+
+    @abstractmethod
+    async def get_story(self, story_id: str) -> Optional[Story]:
+        """Get a story by ID."""
+
+    @abstractmethod
+    async def get_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        """Get approved stories for a kid, newest first."""
+
+    @abstractmethod
+    async def get_all_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                      cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        """Get stories of any status for a kid, newest first."""
+
+    @abstractmethod
+    async def count_stories_for_kid(self, kid_id: str, status: Optional[str] = None,
+                                    method: str = "exact") -> int:
+        """Count stories for a kid without transferring rows."""
+
+    @abstractmethod
+    async def update_story(self, story_id: str, update_data: Dict[str, Any]) -> Optional[Story]:
+        """Update a story."""
+
+    @abstractmethod
+    async def finalize_story(self, story_id: str, fields: Dict[str, Any]) -> Optional[Story]:
+        """Apply final pipeline fields if the story is still processing; None otherwise."""
+
+    async def update_story_status(self, story_id: str, status: StoryStatus) -> Optional[Story]:
+        """Update story status."""
+        return await self.update_story(story_id, {"status": status.value})
+
+    @abstractmethod
+    async def get_pending_stories(self, user_id: Optional[str] = None, limit: int = 50,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        """Get one page of pending stories for parent review, newest first."""
+
+    # Story Input Operations
+    @abstractmethod
+    async def create_story_input(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a story input record, replacing the story's earlier input of the same type."""
+
+    @abstractmethod
+    async def get_story_input(self, story_id: str) -> Optional[Dict[str, Any]]:
+        """Get story input data for a story."""
+
+    @abstractmethod
+    async def get_story_input_by_type(self, story_id: str, input_type: str) -> Optional[Dict[str, Any]]:
+        """Get story input data for a story by input type."""
+
+    # Storage Operations
+    @abstractmethod
+    async def upload_audio(self, file_data: bytes, filename: str) -> str:
+        """Store an audio file in the audio bucket and return its filename."""
+
+    @abstractmethod
+    async def upload_file(self, bucket: str, path: str, file_data: bytes, content_type: str,
+                          public: bool = True, upsert: bool = False) -> str:
+        """Store a file in a bucket and return its public URL (`upsert` replaces an existing object)."""
+
+    @abstractmethod
+    def get_public_url(self, bucket: str, path: str) -> str:
+        """Public URL of a stored object."""
+
+    @abstractmethod
+    def build_audio_url(self, audio_filename: str) -> str:
+        """Convert audio filename to full public URL."""
+
+    @abstractmethod
+    def build_background_music_url(self, music_filename: str) -> str:
+        """Convert background music filename to full public URL."""
+
+    @abstractmethod
+    async def delete_audio(self, filename: str) -> bool:
+        """Delete audio file from storage."""
+
+    @abstractmethod
+    async def download_file(self, bucket: str, path: str) -> bytes:
+        """Contents of a stored object."""
+
+    @abstractmethod
+    async def delete_files(self, bucket: str, paths: List[str]) -> None:
+        """Delete objects from a bucket; missing ones are ignored."""
+
+    # Review Operations
+    @abstractmethod
+    async def get_review_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get a review token joined with `stories{id, title, kid_id, kids{name, user_id}}`."""
+
+    @abstractmethod
+    async def consume_review_token(self, token: str, action: str,
+                                   declined_reason: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Atomically burn a review token and apply its review; None if unusable."""
+
+    @abstractmethod
+    async def create_review_action(self, action_data: Dict[str, Any]) -> None:
+        """Log a parent review action."""
+
+    # Job Queue Operations
+    @abstractmethod
+    async def enqueue_job(self, kind: str, payload: Dict[str, Any], story_id: Optional[str] = None,
+                          max_attempts: int = 3) -> Dict[str, Any]:
+        """Add a job to the story_jobs queue, runnable immediately."""
+
+    @abstractmethod
+    async def claim_jobs(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Atomically claim up to `limit` runnable jobs for a worker (attempts is incremented)."""
+
+    @abstractmethod
+    async def heartbeat_jobs(self, worker_id: str, job_ids: List[str]) -> None:
+        """Refresh the heartbeat of jobs the worker is still running."""
+
+    @abstractmethod
+    async def complete_job(self, job_id: str, worker_id: str) -> None:
+        """Mark a claimed job as succeeded."""
+
+    @abstractmethod
+    async def fail_job(self, job_id: str, worker_id: str, error: str,
+                       retry_in: Optional[float] = None) -> None:
+        """Record a failure; requeue after `retry_in` seconds, or fail permanently when None."""
+
+    @abstractmethod
+    async def requeue_stale_jobs(self, stale_after: float) -> List[Dict[str, Any]]:
+        """
+        Recover running jobs whose heartbeat is older than `stale_after` seconds.
+
+        Jobs with attempts left go back to the queue; the rest fail and their
+        story is marked as error if it is still processing.
+        """
+
+    @abstractmethod
+    async def count_jobs(self, status: str = "queued") -> int:
+        """Number of jobs in a status (queue depth)."""
+
+    # Rate Limiting
+    @abstractmethod
+    async def hit_rate_limit(self, key: str, window_seconds: int, limit: int) -> float:
+        """Count a request in a shared sliding window; 0 if allowed, else seconds until it would be."""
+
+    # Request Deduplication
+    @abstractmethod
+    async def claim_story_request(self, keys: Dict[str, float], story_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim request keys (key -> seconds to keep the claim) for `story_id`.
+
+        Returns None when every key was claimed by this call. If an unexpired
+        claim already holds one of them, nothing is claimed and that claim is
+        returned (`story_id`, `age_seconds`).
+        """
+
+    @abstractmethod
+    async def release_story_request(self, keys: List[str], story_id: str) -> None:
+        """Drop the claims `story_id` holds on these keys."""
+
+    # Vision Description Cache
+    @abstractmethod
+    async def find_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], max_distance: int) -> Optional[Dict[str, Any]]:
+        """
+        Cached description in `scope` for the image with `content_hash` (any kid),
+        else the one of `kid_id`'s images whose perceptual hash is closest within
+        `max_distance` bits. Marks it used; returns `description`, `content_hash`
+        and `distance`.
+        """
+
+    @abstractmethod
+    async def save_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], description: str, max_entries: int) -> None:
+        """Store a description of `kid_id`'s image, evicting the least recently used beyond `max_entries`."""
+
+    # TTS Audio Cache
+    @abstractmethod
+    async def find_tts_audio(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored audio object for a TTS cache key (`filename`, `content_type`); marks it used."""
+
+    @abstractmethod
+    async def save_tts_audio(self, key: str, filename: str, content_type: str, size_bytes: int,
+                             max_entries: int, max_bytes: int, min_idle_seconds: float) -> List[str]:
+        """
+        Record an uploaded audio object, then evict the least recently used
+        beyond `max_entries` objects or `max_bytes` in total. Objects referenced
+        by a story's audio_filename or used within `min_idle_seconds` are kept.
+        Returns the evicted filenames, for the caller to delete from storage.
+        """
+
+    # Pipeline Timelines
+    @abstractmethod
+    async def save_story_timeline(self, story_id: str, status: str, timeline: Dict[str, Any]) -> None:
+        """Store the timing spans of one pipeline run (`Timeline.to_dict()`)."""
+
+    @abstractmethod
+    async def get_story_timelines(self, story_id: str) -> List[Dict[str, Any]]:
+        """Timelines of every pipeline run of a story, oldest first."""
+
+    # Auth and Functions
+    @abstractmethod
+    async def generate_magic_link(self, email: str, redirect_to: str) -> Any:
+        """Generate a passwordless login link (object with a `properties` dict)."""
+
+    @abstractmethod
+    async def invoke_function(self, function_name: str, body: Dict[str, Any]) -> Any:
+        """Invoke a server-side function such as the story notification email."""
+
+    # User Settings Operations
+    async def get_parent_profile(self, user_id: str) -> Dict[str, Any]:
+        """Get a parent's email and settings.
+
+        One backend lookup serves all settings accessors; results are kept in a
+        bounded TTL cache until they expire or invalidate_parent_profile is called.
+        """
+        return await self._parent_profiles.get_or_load(user_id, lambda: self._fetch_parent_profile(user_id))
+
+    @abstractmethod
+    async def _fetch_parent_profile(self, user_id: str) -> Dict[str, Any]:
+        """Fetch {'email', 'approval_mode', 'notification_preferences'} for a parent."""
+
+    @staticmethod
+    def _parent_profile(email: Optional[str], metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalize parent auth metadata into a profile with defaults applied."""
+        metadata = metadata or {}
+        prefs = metadata.get('notification_preferences', {}) or {}
+        return {
+            'email': email,
+            'approval_mode': metadata.get('approval_mode', 'auto'),
+            'notification_preferences': {
+                'new_story': prefs.get('new_story', True),
+                'email_notifications': prefs.get('email_notifications', True),
+            },
+        }
+
+    def invalidate_parent_profile(self, user_id: str) -> None:
+        """Drop a cached parent profile (call when the parent changes settings)."""
+        self._parent_profiles.invalidate(user_id)
+
+    async def get_user_approval_mode(self, user_id: str) -> str:
+        """Get user's approval mode from auth metadata."""
+        try:
+            profile = await self.get_parent_profile(user_id)
+            return profile['approval_mode']
+        except Exception as e:
+            logger.error(f"Error getting user approval mode: {e}")
+            return 'auto'  # Default fallback
+
+    async def get_user_email(self, user_id: str) -> Optional[str]:
+        """Get user's email address from auth."""
+        try:
+            profile = await self.get_parent_profile(user_id)
+            return profile['email']
+        except Exception as e:
+            logger.error(f"Error getting user email: {e}")
+            return None
+
+    async def get_user_notification_preferences(self, user_id: str) -> Dict[str, bool]:
+        """Get user's notification preferences from auth metadata."""
+        try:
+            profile = await self.get_parent_profile(user_id)
+            return dict(profile['notification_preferences'])
+        except Exception as e:
+            logger.error(f"Error getting user notification preferences: {e}")
+            return {'new_story': True, 'email_notifications': True}  # Default fallback
+
+    def cache_stats(self) -> List[Dict[str, Any]]:
+        """Hit/miss counters for the repository's in-process caches."""
+        return [self._kids.stats(), self._parent_profiles.stats()]
+
+    # Health Check
+    @abstractmethod
+    async def health_check(self) -> Dict[str, Any]:
+        """Check backend connectivity."""
+
+
+def create_repository(config: Optional[Dict[str, Any]] = None) -> Repository:
+    """Build the repository selected by `repository.backend` ("supabase" or "local")."""
+    config = config or get_config()
+    backend = config.get("repository", {}).get("backend", "supabase")
+
+    if backend == "supabase":
+        from .supabase import SupabaseService
+        return SupabaseService()
+    if backend == "local":
+        from .local_repository import LocalRepository
+        return LocalRepository()
+    raise ValueError(f"Unknown repository backend: {backend}")
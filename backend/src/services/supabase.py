@@ -8,12 +8,14 @@ from ..types.domain import Kid, Story, StoryStatus, Language
 from ..types.requests import CreateKidRequest, UpdateKidRequest
 from ..utils.logger import get_logger
 from ..utils.config import get_config
+from ..core.pagination import keyset_filter
+from .repository import Repository, create_repository
 
 logger = get_logger(__name__)
 
 
-class SupabaseService:
-    """Service for all Supabase operations."""
+class SupabaseService(Repository):
+    """Repository backed by Supabase (PostgREST, Storage, Auth and Edge Functions)."""
     
     def __init__(self, url: str = None, key: str = None):
         """Initialize Supabase client."""
@@ -26,7 +28,15 @@ class SupabaseService:
             raise ValueError("Supabase URL and KEY must be provided")
             
         self.client: Client = create_client(self.url, self.key)
-        logger.info("Supabase client initialized")
+        
+        # supabase-py is synchronous, so every round-trip runs on a bounded
+        # dedicated I/O pool instead of blocking the event loop
+        super().__init__(self.config, self.config["supabase"].get("io_workers", 64), "supabase-io")
+        logger.info(f"Supabase client initialized ({self.io_workers} I/O workers)")
+    
+    async def _execute(self, query) -> Any:
+        """Execute a PostgREST query builder on the I/O pool."""
+        return await self._run(query.execute)
     
     # Kid Profile Operations
     async def create_kid(self, request: CreateKidRequest) -> Kid:
@@ -47,20 +57,25 @@ class SupabaseService:
             "created_at": datetime.utcnow().isoformat(),
         }
         
-        result = self.client.table("kids").insert(data).execute()
-        return Kid(**result.data[0])
+        result = await self._execute(self.client.table("kids").insert(data))
+        kid = Kid(**result.data[0])
+        self._kids.set(kid.id, kid)
+        return kid
     
-    async def get_kid(self, kid_id: str) -> Optional[Kid]:
-        """Get a kid profile by ID."""
-        result = self.client.table("kids").select("*").eq("id", kid_id).execute()
+    async def _fetch_kid(self, kid_id: str) -> Optional[Kid]:
+        """Fetch a kid profile from the database."""
+        result = await self._execute(self.client.table("kids").select("*").eq("id", kid_id))
         if result.data:
             return Kid(**result.data[0])
         return None
     
     async def get_kids_for_user(self, user_id: str) -> List[Kid]:
         """Get all kid profiles for a user."""
-        result = self.client.table("kids").select("*").eq("user_id", user_id).execute()
-        return [Kid(**kid) for kid in result.data]
+        result = await self._execute(self.client.table("kids").select("*").eq("user_id", user_id))
+        kids = [Kid(**kid) for kid in result.data]
+        for kid in kids:
+            self._kids.set(kid.id, kid)
+        return kids
     
     async def get_kids_with_story_counts(self, user_id: str) -> List[Dict]:
         """Get all kid profiles for a user with their story counts in a single query.
@@ -68,9 +83,9 @@ class SupabaseService:
         """
         # Use Supabase's ability to count related records efficiently
         # This creates a single query with a LEFT JOIN to count stories
-        result = self.client.table("kids").select(
+        result = await self._execute(self.client.table("kids").select(
             "*, stories(count)"
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
         
         kids_with_counts = []
         for kid_data in result.data:
@@ -91,14 +106,18 @@ class SupabaseService:
         update_data = request.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
-        result = self.client.table("kids").update(update_data).eq("id", kid_id).execute()
+        self._kids.invalidate(kid_id)
+        result = await self._execute(self.client.table("kids").update(update_data).eq("id", kid_id))
         if result.data:
-            return Kid(**result.data[0])
+            kid = Kid(**result.data[0])
+            self._kids.set(kid_id, kid)
+            return kid
         return None
     
     async def delete_kid(self, kid_id: str) -> bool:
         """Delete a kid profile."""
-        result = self.client.table("kids").delete().eq("id", kid_id).execute()
+        self._kids.invalidate(kid_id)
+        result = await self._execute(self.client.table("kids").delete().eq("id", kid_id))
         return len(result.data) > 0
     
     # Story Operations
@@ -111,97 +130,94 @@ class SupabaseService:
             "created_at": datetime.utcnow().isoformat(),
         }
         
-        result = self.client.table("stories").insert(data).execute()
+        result = await self._execute(self.client.table("stories").insert(data))
         return Story(**result.data[0])
     
     async def get_story(self, story_id: str) -> Optional[Story]:
         """Get a story by ID."""
-        result = self.client.table("stories").select("*").eq("id", story_id).execute()
+        result = await self._execute(self.client.table("stories").select("*").eq("id", story_id))
         if result.data:
-            story_data = result.data[0]
-            # Convert audio_filename to audio_url
-            audio_filename = story_data.get("audio_filename")
-            if audio_filename:
-                story_data["audio_url"] = self.build_audio_url(audio_filename)
-            # Convert background_music_filename to background_music_url
-            background_music_filename = story_data.get("background_music_filename")
-            if background_music_filename:
-                story_data["background_music_url"] = self.build_background_music_url(background_music_filename)
-            return Story(**story_data)
+            return self._story_from_row(result.data[0])
         return None
     
-    async def get_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0) -> List[Story]:
+    async def get_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
         """Get all approved stories for a kid (children should only see approved stories)."""
-        result = (
-            self.client.table("stories")
-            .select("*")
-            .eq("kid_id", kid_id)
-            .eq("status", "approved")  # Only show approved stories to children
-            .order("created_at", desc=True)
-            .limit(limit)
-            .offset(offset)
-            .execute()
-        )
-        # Convert filenames to URLs for each story
-        stories = []
-        for story_data in result.data:
-            audio_filename = story_data.get("audio_filename")
-            if audio_filename:
-                story_data["audio_url"] = self.build_audio_url(audio_filename)
-            background_music_filename = story_data.get("background_music_filename")
-            if background_music_filename:
-                story_data["background_music_url"] = self.build_background_music_url(background_music_filename)
-            stories.append(Story(**story_data))
-        return stories
+        return await self._list_stories_for_kid(kid_id, limit, offset, cursor, status="approved", view=view)
     
-    async def get_all_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0) -> List[Story]:
+    async def get_all_stories_for_kid(self, kid_id: str, limit: int = 20, offset: int = 0,
+                                      cursor: Optional[str] = None, view: str = "full") -> List[Story]:
         """Get ALL stories for a kid (for parent dashboard - includes pending/rejected)."""
-        result = (
-            self.client.table("stories")
-            .select("*")
-            .eq("kid_id", kid_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .offset(offset)
-            .execute()
-        )
+        return await self._list_stories_for_kid(kid_id, limit, offset, cursor, view=view)
+    
+    async def _list_stories_for_kid(self, kid_id: str, limit: int, offset: int = 0,
+                                    cursor: Optional[str] = None,
+                                    status: Optional[str] = None,
+                                    view: str = "full") -> List[Story]:
+        """
+        Newest-first story listing ordered by (created_at, id).
+        
+        With a cursor the page is found by keyset seek, so page N costs the same
+        as page 1; offset is kept for page-number clients. Summary rows come back
+        with empty content.
+        """
+        query = self.client.table("stories").select(self.story_columns(view)).eq("kid_id", kid_id)
+        if status:
+            query = query.eq("status", status)
+        if cursor:
+            query = query.or_(keyset_filter(cursor))
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+        if offset and not cursor:
+            query = query.offset(offset)
+        result = await self._execute(query)
+        
         # Convert filenames to URLs for each story
-        stories = []
-        for story_data in result.data:
-            audio_filename = story_data.get("audio_filename")
-            if audio_filename:
-                story_data["audio_url"] = self.build_audio_url(audio_filename)
-            background_music_filename = story_data.get("background_music_filename")
-            if background_music_filename:
-                story_data["background_music_url"] = self.build_background_music_url(background_music_filename)
-            stories.append(Story(**story_data))
-        return stories
+        return [self._story_from_row(story_data) for story_data in result.data]
+    
+    async def count_stories_for_kid(self, kid_id: str, status: Optional[str] = None,
+                                    method: str = "exact") -> int:
+        """
+        Count stories for a kid with a head-only count query (no rows transferred).
+        
+        method is a PostgREST count method: "exact", "planned" or "estimated".
+        """
+        query = self.client.table("stories").select("id", count=method, head=True).eq("kid_id", kid_id)
+        if status:
+            query = query.eq("status", status)
+        result = await self._execute(query)
+        return result.count or 0
     
     async def update_story(self, story_id: str, update_data: Dict[str, Any]) -> Optional[Story]:
         """Update a story."""
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
-        result = self.client.table("stories").update(update_data).eq("id", story_id).execute()
+        result = await self._execute(self.client.table("stories").update(update_data).eq("id", story_id))
         if result.data:
-            story_data = result.data[0]
-            # Convert audio_filename to audio_url
-            audio_filename = story_data.get("audio_filename")
-            if audio_filename:
-                story_data["audio_url"] = self.build_audio_url(audio_filename)
-            # Convert background_music_filename to background_music_url
-            background_music_filename = story_data.get("background_music_filename")
-            if background_music_filename:
-                story_data["background_music_url"] = self.build_background_music_url(background_music_filename)
-            return Story(**story_data)
+            return self._story_from_row(result.data[0])
         return None
     
-    async def update_story_status(self, story_id: str, status: StoryStatus) -> Optional[Story]:
-        """Update story status."""
-        return await self.update_story(story_id, {"status": status.value})
+    async def finalize_story(self, story_id: str, fields: Dict[str, Any]) -> Optional[Story]:
+        """
+        Apply a pipeline's final fields and terminal status via the finalize_story RPC.
+        
+        Returns None when the story is no longer processing (already finalized or
+        reviewed), in which case nothing was written.
+        """
+        result = await self._execute(
+            self.client.rpc("finalize_story", {"p_story_id": story_id, "p_fields": fields})
+        )
+        if result.data:
+            return self._story_from_row(result.data[0])
+        return None
     
     # Story Input Operations
     async def create_story_input(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new story input record."""
+        """
+        Create a story input record.
+
+        An earlier input of the same type for the story is deleted first, so a
+        retried job (or stage) re-running vision/transcription leaves one row.
+        """
         input_id = str(uuid.uuid4())
         data = {
             "id": input_id,
@@ -209,24 +225,53 @@ class SupabaseService:
             "created_at": datetime.utcnow().isoformat(),
         }
         
-        result = self.client.table("story_inputs").insert(data).execute()
+        await self._execute(
+            self.client.table("story_inputs").delete()
+            .eq("story_id", data["story_id"]).eq("input_type", data.get("input_type"))
+        )
+        result = await self._execute(self.client.table("story_inputs").insert(data))
         return result.data[0] if result.data else {}
     
     async def get_story_input(self, story_id: str) -> Optional[Dict[str, Any]]:
         """Get story input data for a story."""
-        result = self.client.table("story_inputs").select("*").eq("story_id", story_id).execute()
+        result = await self._execute(self.client.table("story_inputs").select("*").eq("story_id", story_id))
         return result.data[0] if result.data else None
     
     async def get_story_input_by_type(self, story_id: str, input_type: str) -> Optional[Dict[str, Any]]:
         """Get story input data for a story by input type."""
-        result = self.client.table("story_inputs").select("*").eq("story_id", story_id).eq("input_type", input_type).execute()
+        result = await self._execute(self.client.table("story_inputs").select("*").eq("story_id", story_id).eq("input_type", input_type))
         return result.data[0] if result.data else None
     
-    async def get_pending_stories(self) -> List[Story]:
-        """Get all pending stories for parent review."""
+    async def get_pending_stories(self, user_id: Optional[str] = None, limit: int = 50,
+                                  cursor: Optional[str] = None, view: str = "full") -> List[Story]:
+        """
+        Get one page of pending stories for parent review, newest first.
+        
+        Scoped to a parent's kids when user_id is given. Each story is joined to
+        its first input only (the caption), and pages are keyset-seeked on
+        (created_at, id) so review screens cost the same at any queue depth.
+        """
         try:
-            # Get stories with kids info and story inputs
-            result = self.client.table("stories").select("*, kids!inner(name), story_inputs!left(input_value)").eq("status", "pending").order("created_at.desc").execute()
+            # Get stories with kids info and the first story input
+            columns = (
+                f"{self.story_columns(view)}, kids!inner(name, user_id), "
+                "story_inputs!left(input_value)"
+            )
+            query = self.client.table("stories").select(columns).eq("status", "pending")
+            if user_id:
+                query = query.eq("kids.user_id", user_id)
+            if cursor:
+                query = query.or_(keyset_filter(cursor))
+            query = (
+                query.order("created_at", desc=True)
+                .order("id", desc=True)
+                .limit(1, foreign_table="story_inputs")
+                .limit(limit)
+            )
+            # Embedded ordering must be its own param: order(foreign_table=...) emits
+            # story_inputs(created_at) in the top-level order, which PostgREST rejects
+            query.params = query.params.add("story_inputs.order", "created_at.asc")
+            result = await self._execute(query)
             
             stories = []
             for item in result.data:
@@ -246,6 +291,8 @@ class SupabaseService:
                     title=item.get("title", ""),
                     content=item.get("content", ""),
                     audio_url=audio_url,
+                    cover_image_url=item.get("cover_image_url"),
+                    cover_image_thumbnail_url=item.get("cover_image_thumbnail_url"),
                     status=StoryStatus(item.get("status", "pending")),
                     language=Language(item.get("language", "english")),
                     is_favourite=item.get("is_favourite", False),
@@ -268,26 +315,49 @@ class SupabaseService:
         
         # Ensure bucket exists
         try:
-            self.client.storage.create_bucket(bucket)
+            await self._run(self.client.storage.create_bucket, bucket)
         except Exception:
             # Bucket might already exist
             pass
         
         # Upload file
-        result = self.client.storage.from_(bucket).upload(
+        await self._run(
+            self.client.storage.from_(bucket).upload,
             path=filename,
             file=file_data,
-            file_options={"content-type": "audio/mpeg"}
+            # Content-addressed uploads (tts/) can race with an identical one
+            file_options={"content-type": "audio/mpeg", "upsert": "true"}
         )
         
         # Return just the filename - API response builder will create full URL
         return filename
     
+    async def upload_file(self, bucket: str, path: str, file_data: bytes, content_type: str,
+                          public: bool = True, upsert: bool = False) -> str:
+        """Upload a file to an arbitrary storage bucket and return its public URL."""
+        try:
+            await self._run(self.client.storage.get_bucket, bucket)
+        except Exception:
+            # Create bucket if it doesn't exist
+            await self._run(self.client.storage.create_bucket, bucket, options={"public": public})
+        
+        await self._run(
+            self.client.storage.from_(bucket).upload,
+            path,
+            file_data,
+            file_options={"content-type": content_type, "upsert": "true" if upsert else "false"}
+        )
+        return self.get_public_url(bucket, path)
+    
+    def get_public_url(self, bucket: str, path: str) -> str:
+        """Public URL of an object in Supabase Storage."""
+        return self.client.storage.from_(bucket).get_public_url(path)
+    
     def build_audio_url(self, audio_filename: str) -> str:
         """Convert audio filename to full public URL."""
         if not audio_filename:
             return None
-        return self.client.storage.from_(self.storage_bucket).get_public_url(audio_filename)
+        return self.get_public_url(self.storage_bucket, audio_filename)
     
     def build_background_music_url(self, music_filename: str) -> str:
         """Convert background music filename to full public URL."""
@@ -295,61 +365,229 @@ class SupabaseService:
             return None
         from .background_music_service import background_music_service
         bucket_name = background_music_service.get_bucket_name()
-        return self.client.storage.from_(bucket_name).get_public_url(music_filename)
+        return self.get_public_url(bucket_name, music_filename)
     
     async def delete_audio(self, filename: str) -> bool:
         """Delete audio file from storage."""
         bucket = self.storage_bucket
-        result = self.client.storage.from_(bucket).remove([filename])
+        result = await self._run(self.client.storage.from_(bucket).remove, [filename])
         return len(result) > 0
     
-    # User Settings Operations
-    async def get_user_approval_mode(self, user_id: str) -> str:
-        """Get user's approval mode from auth metadata."""
-        try:
-            # Get user from auth
-            user = self.client.auth.admin.get_user_by_id(user_id)
-            if user and user.user and user.user.user_metadata:
-                return user.user.user_metadata.get('approval_mode', 'auto')
-            return 'auto'
-        except Exception as e:
-            logger.error(f"Error getting user approval mode: {e}")
-            return 'auto'  # Default fallback
+    async def download_file(self, bucket: str, path: str) -> bytes:
+        """Download an object from a storage bucket."""
+        return await self._run(self.client.storage.from_(bucket).download, path)
     
-    async def get_user_email(self, user_id: str) -> Optional[str]:
-        """Get user's email address from auth."""
-        try:
-            # Get user from auth
-            user = self.client.auth.admin.get_user_by_id(user_id)
-            if user and user.user:
-                return user.user.email
-            return None
-        except Exception as e:
-            logger.error(f"Error getting user email: {e}")
-            return None
+    async def delete_files(self, bucket: str, paths: List[str]) -> None:
+        """Delete objects from a storage bucket."""
+        await self._run(self.client.storage.from_(bucket).remove, paths)
     
-    async def get_user_notification_preferences(self, user_id: str) -> Dict[str, bool]:
-        """Get user's notification preferences from auth metadata."""
-        try:
-            # Get user from auth
-            user = self.client.auth.admin.get_user_by_id(user_id)
-            if user and user.user and user.user.user_metadata:
-                prefs = user.user.user_metadata.get('notification_preferences', {})
-                return {
-                    'new_story': prefs.get('new_story', True),
-                    'email_notifications': prefs.get('email_notifications', True),
-                }
-            return {'new_story': True, 'email_notifications': True}
-        except Exception as e:
-            logger.error(f"Error getting user notification preferences: {e}")
-            return {'new_story': True, 'email_notifications': True}  # Default fallback
+    # Review Operations
+    async def get_review_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get a review token with its story and kid info."""
+        result = await self._execute(
+            self.client.table("story_review_tokens").select(
+                "*, stories!inner(id, title, kid_id, kids!inner(name, user_id))"
+            ).eq("token", token).limit(1)
+        )
+        return result.data[0] if result.data else None
+
+    async def consume_review_token(self, token: str, action: str,
+                                   declined_reason: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically burn a review token and apply its review via the consume_review_token RPC.
+        
+        Returns story_id, story_title, kid_name, user_id and status, or None if the
+        token is unknown, expired or already used.
+        """
+        result = await self._execute(self.client.rpc("consume_review_token", {
+            "p_token": token,
+            "p_action": action,
+            "p_declined_reason": declined_reason
+        }))
+        return result.data[0] if result.data else None
+
+    async def create_review_action(self, action_data: Dict[str, Any]) -> None:
+        """Log a parent review action in the story_review_actions table."""
+        await self._execute(self.client.table("story_review_actions").insert(action_data))
+
+    # Job Queue Operations
+    async def enqueue_job(self, kind: str, payload: Dict[str, Any], story_id: Optional[str] = None,
+                          max_attempts: int = 3) -> Dict[str, Any]:
+        """Insert a queued job into story_jobs."""
+        result = await self._execute(self.client.table("story_jobs").insert({
+            "kind": kind,
+            "story_id": story_id,
+            "payload": payload,
+            "max_attempts": max_attempts
+        }))
+        return result.data[0]
+
+    async def claim_jobs(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Claim runnable jobs via the claim_story_jobs RPC (FOR UPDATE SKIP LOCKED)."""
+        result = await self._execute(
+            self.client.rpc("claim_story_jobs", {"p_worker": worker_id, "p_limit": limit})
+        )
+        return result.data or []
+
+    async def heartbeat_jobs(self, worker_id: str, job_ids: List[str]) -> None:
+        """Refresh heartbeats via the heartbeat_story_jobs RPC (database clock)."""
+        if not job_ids:
+            return
+        await self._execute(
+            self.client.rpc("heartbeat_story_jobs", {"p_worker": worker_id, "p_job_ids": job_ids})
+        )
+
+    async def complete_job(self, job_id: str, worker_id: str) -> None:
+        """Mark a job as succeeded if this worker still owns it."""
+        await self._execute(
+            self.client.table("story_jobs").update({
+                "status": "succeeded",
+                "locked_by": None,
+                "updated_at": datetime.utcnow().isoformat()
+            }).eq("id", job_id).eq("locked_by", worker_id)
+        )
+
+    async def fail_job(self, job_id: str, worker_id: str, error: str,
+                       retry_in: Optional[float] = None) -> None:
+        """Record a job failure via the fail_story_job RPC."""
+        await self._execute(self.client.rpc("fail_story_job", {
+            "p_job_id": job_id,
+            "p_worker": worker_id,
+            "p_error": error,
+            "p_retry_in_seconds": retry_in
+        }))
+
+    async def requeue_stale_jobs(self, stale_after: float) -> List[Dict[str, Any]]:
+        """Recover jobs of dead workers via the requeue_stale_story_jobs RPC."""
+        result = await self._execute(
+            self.client.rpc("requeue_stale_story_jobs", {"p_stale_seconds": stale_after})
+        )
+        return result.data or []
+
+    async def count_jobs(self, status: str = "queued") -> int:
+        """Head-only count of jobs in a status."""
+        result = await self._execute(
+            self.client.table("story_jobs").select("id", count="exact", head=True).eq("status", status)
+        )
+        return result.count or 0
 
+    # Rate Limiting
+    async def hit_rate_limit(self, key: str, window_seconds: int, limit: int) -> float:
+        """Shared sliding window counter via the rate_limit_hit RPC."""
+        result = await self._execute(self.client.rpc("rate_limit_hit", {
+            "p_key": key,
+            "p_window_seconds": window_seconds,
+            "p_limit": limit
+        }))
+        return float(result.data or 0)
+
+    # Request Deduplication
+    async def claim_story_request(self, keys: Dict[str, float], story_id: str) -> Optional[Dict[str, Any]]:
+        """Claim generation request keys via the claim_story_request RPC."""
+        result = await self._execute(self.client.rpc("claim_story_request", {
+            "p_keys": list(keys),
+            "p_ttl_seconds": [int(ttl) for ttl in keys.values()],
+            "p_story_id": story_id
+        }))
+        return result.data[0] if result.data else None
+
+    async def release_story_request(self, keys: List[str], story_id: str) -> None:
+        """Delete the story's claims on these keys."""
+        await self._execute(
+            self.client.table("story_requests").delete().eq("story_id", story_id).in_("key", keys)
+        )
+
+    # Vision Description Cache
+    async def find_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], max_distance: int) -> Optional[Dict[str, Any]]:
+        """Exact or nearest cached description via the match_vision_description RPC."""
+        result = await self._execute(self.client.rpc("match_vision_description", {
+            "p_scope": scope,
+            "p_content_hash": content_hash,
+            "p_perceptual_hash": perceptual_hash,
+            "p_kid_id": kid_id,
+            "p_max_distance": max_distance
+        }))
+        return result.data[0] if result.data else None
+
+    async def save_vision_description(self, scope: str, content_hash: str, perceptual_hash: Optional[int],
+                                      kid_id: Optional[str], description: str, max_entries: int) -> None:
+        """Upsert a description and evict beyond max_entries via the save_vision_description RPC."""
+        await self._execute(self.client.rpc("save_vision_description", {
+            "p_scope": scope,
+            "p_content_hash": content_hash,
+            "p_perceptual_hash": perceptual_hash,
+            "p_kid_id": kid_id,
+            "p_description": description,
+            "p_max_entries": max_entries
+        }))
+
+    # TTS Audio Cache
+    async def find_tts_audio(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored audio for a cache key via the find_tts_audio RPC (marks it used)."""
+        result = await self._execute(self.client.rpc("find_tts_audio", {"p_key": key}))
+        return result.data[0] if result.data else None
+
+    async def save_tts_audio(self, key: str, filename: str, content_type: str, size_bytes: int,
+                             max_entries: int, max_bytes: int, min_idle_seconds: float) -> List[str]:
+        """Record an audio object and evict unreferenced ones via the save_tts_audio RPC."""
+        result = await self._execute(self.client.rpc("save_tts_audio", {
+            "p_key": key,
+            "p_filename": filename,
+            "p_content_type": content_type,
+            "p_size_bytes": size_bytes,
+            "p_max_entries": max_entries,
+            "p_max_bytes": max_bytes,
+            "p_min_idle_seconds": min_idle_seconds
+        }))
+        return [row["filename"] for row in result.data or []]
+
+    # Pipeline Timelines
+    async def save_story_timeline(self, story_id: str, status: str, timeline: Dict[str, Any]) -> None:
+        """Insert one run's spans into story_timelines."""
+        await self._execute(self.client.table("story_timelines").insert({
+            "story_id": story_id,
+            "status": status,
+            "total_ms": timeline.get("total_ms"),
+            "spans": timeline.get("spans", []),
+        }))
+
+    async def get_story_timelines(self, story_id: str) -> List[Dict[str, Any]]:
+        """Timelines of a story's pipeline runs, oldest first."""
+        result = await self._execute(
+            self.client.table("story_timelines").select("status, total_ms, spans, created_at")
+            .eq("story_id", story_id).order("created_at")
+        )
+        return result.data or []
+
+    async def generate_magic_link(self, email: str, redirect_to: str) -> Any:
+        """Generate a passwordless login link via the Auth Admin API."""
+        return await self._run(
+            self.client.auth.admin.generate_link,
+            {"type": "magiclink", "email": email, "options": {"redirect_to": redirect_to}}
+        )
+
+    # Edge Functions
+    async def invoke_function(self, function_name: str, body: Dict[str, Any]) -> Any:
+        """Invoke a Supabase Edge Function."""
+        return await self._run(self.client.functions.invoke, function_name, {"body": body})
+
+    # User Settings Operations
+    async def _fetch_parent_profile(self, user_id: str) -> Dict[str, Any]:
+        """Fetch a parent profile from the Auth Admin API."""
+        user = await self._run(self.client.auth.admin.get_user_by_id, user_id)
+        auth_user = user.user if user else None
+        return self._parent_profile(
+            auth_user.email if auth_user else None,
+            auth_user.user_metadata if auth_user else None
+        )
+    
     # Health Check
     async def health_check(self) -> Dict[str, Any]:
         """Check Supabase connection health."""
         try:
             # Try a simple query
-            result = self.client.table("kids").select("id").limit(1).execute()
+            await self._execute(self.client.table("kids").select("id").limit(1))
             return {
                 "status": "healthy",
                 "connected": True,
@@ -365,12 +603,12 @@ class SupabaseService:
 
 
 # Global instance
-supabase_service: Optional[SupabaseService] = None
+supabase_service: Optional[Repository] = None
 
 
-def get_supabase_service() -> SupabaseService:
-    """Get or create Supabase service instance."""
+def get_supabase_service() -> Repository:
+    """Get or create the data service for the configured repository backend (Supabase by default)."""
     global supabase_service
     if not supabase_service:
-        supabase_service = SupabaseService()
+        supabase_service = create_repository()
     return supabase_service
\ No newline at end of file
@@ -17,6 +17,14 @@ class StoryStatus(str, Enum):
     ABANDONED = "abandoned"  # User left without submitting
 
 
+class JobStatus(str, Enum):
+    """Background job status in the story_jobs queue."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class InputFormat(str, Enum):
     """Input format for story generation."""
     IMAGE = "image"
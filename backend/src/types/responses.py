@@ -1,6 +1,6 @@
 """Response types for API endpoints."""
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union, Dict, Any
 from pydantic import BaseModel, Field
 from .domain import StoryStatus, InputFormat, Language
 
@@ -27,12 +27,33 @@ class StoryResponse(BaseModel):
         from_attributes = True
 
 
+class StorySummaryResponse(BaseModel):
+    """Lightweight story shape for list views (no content); full text comes from GET /stories/{id}."""
+    id: str
+    kid_id: str
+    child_name: Optional[str] = None
+    title: str
+    audio_url: Optional[str] = None
+    background_music_url: Optional[str] = None
+    cover_image_url: Optional[str] = None
+    cover_image_thumbnail_url: Optional[str] = None
+    status: StoryStatus
+    language: Language
+    is_favourite: bool = False
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class StoryListResponse(BaseModel):
     """Response for a list of stories."""
-    stories: List[StoryResponse]
-    total: int
+    stories: List[Union[StoryResponse, StorySummaryResponse]]
+    total: Optional[int] = None  # None when the caller opted out of counting
     page: int = 1
     page_size: int = 20
+    next_cursor: Optional[str] = None  # Opaque keyset cursor for the next page
 
 
 class KidResponse(BaseModel):
@@ -74,6 +95,8 @@ class GenerateStoryResponse(BaseModel):
     story_id: str
     status: StoryStatus = StoryStatus.PROCESSING
     message: str = "Story generation started"
+    # True when an earlier identical request already started this story
+    duplicate: bool = False
 
 
 class HealthResponse(BaseModel):
@@ -107,6 +130,20 @@ class TranscriptionResponse(BaseModel):
     message: str = "Audio transcribed successfully"
 
 
+class StoryTimelineRun(BaseModel):
+    """Timing spans of one pipeline run."""
+    status: str
+    total_ms: Optional[float] = None
+    spans: List[Dict[str, Any]] = []
+    created_at: datetime
+
+
+class StoryTimelineResponse(BaseModel):
+    """Pipeline run timelines of a story, oldest first."""
+    story_id: str
+    runs: List[StoryTimelineRun]
+
+
 class ExtractAppearanceResponse(BaseModel):
     """Response for appearance extraction."""
     description: str = Field(..., description="Natural language appearance description")
@@ -0,0 +1,123 @@
+"""In-process LRU + TTL cache used by the service layer."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    Tracks hit/miss/eviction counters so caches can be sized from real traffic.
+    `get_or_load` collapses concurrent misses for the same key into one load,
+    and does not store its result if the key was set or invalidated while the
+    load was in flight (the loaded value may predate that write).
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped by set/invalidate; only tracked for keys with a load in flight
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry (refreshing its LRU position) or default."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def _bump(self, key: Hashable) -> None:
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace an entry, evicting the least recently used if full."""
+        self._bump(key)
+        self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        self._bump(key)
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        for key in self._generations:
+            self._generations[key] += 1
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          cache_none: bool = False) -> Any:
+        """Read-through lookup. None results are not cached unless cache_none is set."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            self._generations[key] = 0
+            try:
+                value = await task
+            finally:
+                del self._inflight[key]
+                changed = self._generations.pop(key) != 0
+            if (value is not None or cache_none) and not changed:
+                self._store(key, value)
+            return value
+
+        return await task
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and hit ratio for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_cache(name: str, cache_config: Optional[Dict[str, Any]] = None,
+                 default_ttl: float = 300.0, default_max_entries: int = 1024) -> TTLCache:
+    """Build a TTLCache from a `cache.<name>` config section."""
+    cache_config = cache_config or {}
+    return TTLCache(
+        name,
+        max_entries=cache_config.get("max_entries", default_max_entries),
+        ttl_seconds=cache_config.get("ttl_seconds", default_ttl),
+    )
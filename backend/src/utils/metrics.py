@@ -0,0 +1,229 @@
+"""In-process metrics with Prometheus text exposition."""
+import math
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable, Iterable, List, Tuple
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+# Latency buckets in seconds, from fast API reads up to whole story pipelines
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """Base for labelled metrics; each label combination keeps its own value."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count (requests, errors, retries)."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (in-flight requests, queue depth)."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, plus their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, the +Inf overflow, then sum
+            state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for key, state in self._values.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, state[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class Registry:
+    """
+    Metrics of this process.
+
+    Counters, gauges and histograms are updated inline on hot paths (a dict
+    lookup and an addition). Values that already live elsewhere (pacer,
+    cache and admission counters) are read by collectors at scrape time
+    instead of being mirrored.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable returning (name, type, help, samples) families at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        families = [(metric.name, metric.type_name, metric.documentation, metric.samples())
+                    for metric in self._metrics.values()]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, type_name, documentation, samples in families:
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Reset every metric value (tests)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+# Process-wide registry
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "mira_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "mira_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("mira_http_requests_in_flight", "HTTP requests being handled")
+HTTP_DB_CALLS = REGISTRY.histogram(
+    "mira_http_request_db_calls", "Data-layer round trips per HTTP request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34))
+RATE_LIMITED = REGISTRY.counter("mira_rate_limited_total", "Requests rejected with 429 by the rate limiter",
+                                ("identity",))
+DB_CALLS = REGISTRY.counter("mira_db_calls_total", "Data-layer round trips")
+
+PIPELINES_IN_FLIGHT = REGISTRY.gauge("mira_pipelines_in_flight", "Story pipelines running in this process")
+PIPELINE_RUNS = REGISTRY.counter("mira_pipeline_runs_total", "Story pipeline runs by outcome", ("status",))
+STAGE_LATENCY = REGISTRY.histogram(
+    "mira_pipeline_stage_duration_seconds", "Pipeline stage latency (all attempts)", ("stage", "outcome"))
+STAGE_RETRIES = REGISTRY.counter("mira_pipeline_stage_retries_total", "Pipeline stage retries", ("stage",))
+AGENT_LATENCY = REGISTRY.histogram(
+    "mira_agent_duration_seconds", "Agent call latency", ("agent", "vendor", "outcome"))
+
+# Data-layer round trips of the current HTTP request
+_db_calls: ContextVar[Optional[List[int]]] = ContextVar("db_calls", default=None)
+
+
+def count_db_call() -> None:
+    """Count one data-layer round trip (globally and for the current request)."""
+    DB_CALLS.inc()
+    calls = _db_calls.get()
+    if calls is not None:
+        calls[0] += 1
+
+
+def track_db_calls() -> Tuple[List[int], Any]:
+    """Start counting round trips for the current request; returns (counter, reset token)."""
+    calls = [0]
+    return calls, _db_calls.set(calls)
+
+
+def stop_tracking_db_calls(token: Any) -> None:
+    _db_calls.reset(token)
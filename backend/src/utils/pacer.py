@@ -0,0 +1,381 @@
+"""Outbound request pacing for AI vendor APIs, driven by their rate-limit headers."""
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+import httpx
+
+from .config import get_config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+# Header names per dimension: (limit, remaining, reset) candidates, first match wins
+_LIMIT_HEADERS = {
+    "requests": (
+        ("x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit", "x-ratelimit-limit-req-minute"),
+        ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining",
+         "x-ratelimit-remaining-req-minute"),
+        ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"),
+    ),
+    "tokens": (
+        ("x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit", "x-ratelimit-limit-tokens-minute"),
+        ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining",
+         "x-ratelimit-remaining-tokens-minute"),
+        ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"),
+    ),
+}
+
+
+def parse_reset(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Seconds until a limit resets.
+
+    Accepts plain seconds ("1.5"), Go-style durations ("6m0s", "20ms") and
+    RFC 3339 / HTTP dates (Anthropic reset headers, Retry-After dates).
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(f"{number}{unit}" for number, unit in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(number) * scale[unit] for number, unit in parts)
+    now = now or datetime.now(timezone.utc)
+    for parse in (lambda v: datetime.fromisoformat(v.replace("Z", "+00:00")), parsedate_to_datetime):
+        try:
+            moment = parse(value)
+        except (TypeError, ValueError):
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max((moment - now).total_seconds(), 0.0)
+    return None
+
+
+def _first(headers: Mapping[str, str], names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        if name in headers:
+            return headers[name]
+    return None
+
+
+def _response_info(error: BaseException) -> Tuple[Optional[int], Optional[Mapping[str, str]]]:
+    """Status code and headers carried by a vendor SDK / httpx exception, if any."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code  # google-genai APIError
+    return status, getattr(response, "headers", None)
+
+
+# Connection and timeout errors raised by the OpenAI / Anthropic SDKs carry no status
+_CONNECTION_ERRORS = {"APIConnectionError", "APITimeoutError"}
+
+
+def _is_transient(error: Optional[BaseException], status: Optional[int]) -> bool:
+    """Server-side failures worth retrying: 408/409, 5xx and dropped connections."""
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    if error is None:
+        return False
+    if isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    return any(cls.__name__ in _CONNECTION_ERRORS for cls in type(error).__mro__)
+
+
+class TokenBucket:
+    """Refilling budget of requests or tokens per window."""
+
+    def __init__(self, capacity: float, window_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / window_seconds
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self.available = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until `cost` can be taken (0 if available now)."""
+        self._refill()
+        cost = min(cost, self.capacity)
+        if self.available >= cost:
+            return 0.0
+        return (cost - self.available) / self.rate if self.rate > 0 else self.window_seconds
+
+    def take(self, cost: float) -> None:
+        self._refill()
+        self.available -= min(cost, self.capacity)
+
+    def update(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float]) -> None:
+        """Align the bucket with the provider's view of the limit."""
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+            self.rate = self.capacity / self.window_seconds
+        if remaining is not None:
+            self.available = min(self.available, float(remaining))
+            if reset and remaining < self.capacity:
+                # The provider refills (capacity - remaining) over `reset` seconds
+                self.rate = max(self.rate, (self.capacity - remaining) / reset)
+
+
+class OutboundPacer:
+    """
+    Paces calls to one (vendor, model) so bursts queue instead of hitting 429s.
+
+    Request and token buckets are seeded from config and then follow the
+    provider's x-ratelimit-* headers. A 429 blocks the pacer until Retry-After
+    (or the reset header) and the call is retried in place, so callers only see
+    a longer wait. 5xx responses and connection errors are retried with
+    exponential backoff. Paced SDK clients are built with max_retries=0 so
+    every retry goes through here. Waiters are served in FIFO order.
+    """
+
+    def __init__(self, vendor: str, model: Optional[str] = None,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_wait_seconds: float = 120.0,
+                 max_throttle_retries: int = 3,
+                 max_error_retries: int = 2,
+                 error_backoff_seconds: float = 0.5,
+                 default_retry_after: float = 2.0,
+                 enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.vendor = vendor
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_wait_seconds = max_wait_seconds
+        self.max_throttle_retries = max_throttle_retries
+        self.max_error_retries = max_error_retries
+        self.error_backoff_seconds = error_backoff_seconds
+        self.default_retry_after = default_retry_after
+        self.enabled = enabled
+        self._clock = clock
+        self._sleep = sleep
+        self.buckets: Dict[str, Optional[TokenBucket]] = {
+            "requests": TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None,
+            "tokens": TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None,
+        }
+        self.blocked_until = 0.0
+        self._queue = asyncio.Lock()
+        self._slot_freed = asyncio.Event()
+
+        self.calls = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.throttled = 0
+        self.retries = 0
+        self.errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.vendor}/{self.model}" if self.model else self.vendor
+
+    def _delay(self, tokens: float) -> float:
+        delay = max(self.blocked_until - self._clock(), 0.0)
+        for dimension, cost in (("requests", 1), ("tokens", tokens)):
+            bucket = self.buckets[dimension]
+            if bucket and cost:
+                delay = max(delay, bucket.wait_time(cost))
+        return delay
+
+    async def acquire(self, tokens: float = 0) -> float:
+        """Wait for budget (and a concurrency slot) in FIFO order. Returns seconds waited."""
+        started = self._clock()
+        self.waiting += 1
+        try:
+            async with self._queue:
+                while True:
+                    delay = self._delay(tokens)
+                    waited = self._clock() - started
+                    if delay <= 0:
+                        break
+                    if waited + delay > self.max_wait_seconds:
+                        logger.warning(f"Outbound pacer {self.name}: waited {waited:.1f}s, sending anyway")
+                        break
+                    await self._sleep(delay)
+                while self.max_concurrency and self.in_flight >= self.max_concurrency:
+                    self._slot_freed.clear()
+                    await self._slot_freed.wait()
+                for dimension, cost in (("requests", 1), ("tokens", tokens)):
+                    if self.buckets[dimension] and cost:
+                        self.buckets[dimension].take(cost)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+
+        waited = self._clock() - started
+        self.calls += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return waited
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slot_freed.set()
+
+    def observe(self, headers: Optional[Mapping[str, str]], status: Optional[int] = None) -> None:
+        """Update buckets from response headers; a 429 blocks the pacer until Retry-After."""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        now = self._clock()
+
+        for dimension, (limit_names, remaining_names, reset_names) in _LIMIT_HEADERS.items():
+            limit = _first(headers, limit_names)
+            remaining = _first(headers, remaining_names)
+            reset = parse_reset(_first(headers, reset_names))
+            if limit is None and remaining is None:
+                continue
+            try:
+                limit = float(limit) if limit is not None else None
+                remaining = float(remaining) if remaining is not None else None
+            except ValueError:
+                continue
+            bucket = self.buckets[dimension]
+            if bucket is None and limit:
+                bucket = self.buckets[dimension] = TokenBucket(limit, clock=self._clock)
+            if bucket:
+                bucket.update(limit, remaining, reset)
+            if remaining == 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+        concurrency = headers.get("maximum-concurrent-requests")
+        if concurrency and concurrency.isdigit():
+            self.max_concurrency = int(concurrency)
+
+        if status == 429:
+            self.throttled += 1
+            retry_after = None
+            if "retry-after-ms" in headers:
+                retry_after = parse_reset(headers["retry-after-ms"])
+                retry_after = retry_after / 1000 if retry_after is not None else None
+            if retry_after is None:
+                retry_after = parse_reset(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = parse_reset(_first(headers, _LIMIT_HEADERS["requests"][2]))
+            retry_after = retry_after if retry_after is not None else self.default_retry_after
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            logger.warning(f"Outbound pacer {self.name}: throttled by vendor, pausing {retry_after:.1f}s")
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: float = 0) -> T:
+        """
+        Run `call` when the pacer allows it.
+
+        Results and exceptions exposing `status_code` / `headers` (httpx
+        responses, OpenAI raw responses, vendor SDK errors) feed observe(). A 429
+        is retried in place up to max_throttle_retries times; 5xx responses and
+        connection errors up to max_error_retries times after a backoff.
+        """
+        if not self.enabled:
+            return await call()
+        throttle_attempt = error_attempt = 0
+        while True:
+            await self.acquire(tokens)
+            error = None
+            try:
+                result = await call()
+                status = getattr(result, "status_code", None)
+                self.observe(getattr(result, "headers", None), status)
+            except Exception as e:
+                error = e
+                status, headers = _response_info(e)
+                if status is not None:
+                    self.observe(headers, status)
+            finally:
+                self.release()
+
+            if status == 429 and throttle_attempt < self.max_throttle_retries:
+                throttle_attempt += 1
+                self.retries += 1
+                continue
+            if _is_transient(error, status) and error_attempt < self.max_error_retries:
+                backoff = self.error_backoff_seconds * 2 ** error_attempt
+                error_attempt += 1
+                self.retries += 1
+                logger.warning(f"Outbound pacer {self.name}: transient vendor error "
+                               f"({status or type(error).__name__}), retrying in {backoff:.1f}s")
+                await self._sleep(backoff)
+                continue
+            if error is not None:
+                self.errors += 1
+                raise error
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and throttling counters for monitoring."""
+        stats = {
+            "name": self.name,
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "errors": self.errors,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "wait_seconds_max": round(self.wait_seconds_max, 3),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.calls, 3) if self.calls else 0.0,
+        }
+        for dimension, bucket in self.buckets.items():
+            if bucket:
+                stats[f"{dimension}_per_minute"] = round(bucket.rate * 60, 2)
+                stats[f"{dimension}_available"] = round(bucket.available, 2)
+        return stats
+
+
+# Process-wide pacers, shared by every agent talking to the same (vendor, model)
+_pacers: Dict[Tuple[str, Optional[str]], OutboundPacer] = {}
+
+
+def get_pacer(vendor: str, model: Optional[str] = None) -> OutboundPacer:
+    """Shared pacer for a (vendor, model), configured from the `outbound` config section."""
+    key = (vendor, model)
+    pacer = _pacers.get(key)
+    if pacer is None:
+        outbound = get_config().get("outbound", {})
+        vendor_limits = outbound.get("limits", {}).get(vendor, {}) or {}
+        limits = {**vendor_limits, **(vendor_limits.get("models", {}).get(model, {}) or {})}
+        pacer = OutboundPacer(
+            vendor, model,
+            requests_per_minute=limits.get("requests_per_minute"),
+            tokens_per_minute=limits.get("tokens_per_minute"),
+            max_concurrency=limits.get("max_concurrency"),
+            max_wait_seconds=outbound.get("max_wait_seconds", 120),
+            max_throttle_retries=outbound.get("max_throttle_retries", 3),
+            max_error_retries=outbound.get("max_error_retries", 2),
+            error_backoff_seconds=outbound.get("error_backoff_seconds", 0.5),
+            default_retry_after=outbound.get("default_retry_after_seconds", 2),
+            enabled=outbound.get("enabled", True),
+        )
+        _pacers[key] = pacer
+    return pacer
+
+
+def pacer_stats() -> List[Dict[str, Any]]:
+    """Stats for every pacer created in this process."""
+    return [pacer.stats() for pacer in _pacers.values()]
+
+
+def reset_pacers() -> None:
+    """Forget all pacers (tests, config reloads)."""
+    _pacers.clear()
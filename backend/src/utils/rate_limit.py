@@ -0,0 +1,21 @@
+"""Sliding-window rate limit math shared by the in-memory and database counters."""
+
+
+def sliding_window_retry_after(previous: int, current: int, elapsed: float,
+                               window: float, limit: int) -> float:
+    """
+    Sliding-window-counter check.
+
+    The request rate is estimated as the previous fixed window's count,
+    weighted by how much of it still overlaps the sliding window, plus the
+    current window's count. Returns 0 when one more request fits under `limit`,
+    otherwise the seconds until it will.
+    """
+    estimate = previous * (1 - elapsed / window) + current
+    if estimate + 1 <= limit:
+        return 0.0
+    if current + 1 > limit:
+        # Only possible once the current window has rolled over and decayed
+        return (window - elapsed) + window * (1 - (limit - 1) / current)
+    # previous > 0 here: wait until its weight has decayed enough
+    return max(window * (1 - (limit - 1 - current) / previous) - elapsed, 0.0)
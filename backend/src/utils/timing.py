@@ -0,0 +1,176 @@
+"""Structured timing spans collected per story pipeline run."""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable, Iterator, List
+
+from .metrics import AGENT_LATENCY
+
+# Timeline of the pipeline run the current task belongs to (copied into tasks it creates)
+_timeline: ContextVar[Optional["Timeline"]] = ContextVar("timeline", default=None)
+_span: ContextVar[Optional["Span"]] = ContextVar("timing_span", default=None)
+
+
+class Span:
+    """One timed operation: name, offsets in ms and attributes (vendor, model, bytes_in/out, retries)."""
+
+    __slots__ = ("name", "start_ms", "duration_ms", "attrs", "error")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.start_ms = 0.0
+        self.duration_ms = 0.0
+        self.attrs = {key: value for key, value in attrs.items() if value is not None}
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        """Add attributes, ignoring None values."""
+        self.attrs.update((key, value) for key, value in attrs.items() if value is not None)
+
+    def fail(self, error: BaseException) -> None:
+        """Mark the span as failed with the error's type."""
+        self.error = type(error).__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"name": self.name, "start_ms": round(self.start_ms, 1), "ms": round(self.duration_ms, 1)}
+        data.update(self.attrs)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class _NullSpan(Span):
+    """Span handed out when no timeline is recording; attributes are dropped."""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def fail(self, error: BaseException) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan("", {})
+
+
+class Timeline:
+    """
+    Spans of one pipeline run.
+
+    `record()` makes it the current timeline for the block; every `span()`
+    entered in that task or in tasks it starts is added to it. At most
+    `max_spans` are kept so a pathological run stays compact.
+    """
+
+    def __init__(self, max_spans: int = 200, clock: Callable[[], float] = time.perf_counter):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._clock = clock
+        self._started = clock()
+        self.duration_ms = 0.0
+
+    def offset_ms(self) -> float:
+        return (self._clock() - self._started) * 1000
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    @contextmanager
+    def record(self) -> Iterator["Timeline"]:
+        token = _timeline.set(self)
+        try:
+            yield self
+        finally:
+            _timeline.reset(token)
+            self.duration_ms = self.offset_ms()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "total_ms": round(self.duration_ms, 1),
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start_ms)],
+        }
+        if self.dropped:
+            data["dropped_spans"] = self.dropped
+        return data
+
+
+def current_timeline() -> Optional[Timeline]:
+    """Timeline being recorded for the current task, if any."""
+    return _timeline.get()
+
+
+def current_span() -> Span:
+    """Innermost open span of the current task (a no-op span outside a timeline)."""
+    return _span.get() or _NULL_SPAN
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time the block as a span of the current timeline; free when no timeline is recording."""
+    timeline = _timeline.get()
+    if timeline is None:
+        yield _NULL_SPAN
+        return
+    current = Span(name, attrs)
+    current.start_ms = timeline.offset_ms()
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _span.reset(token)
+        current.duration_ms = timeline.offset_ms() - current.start_ms
+        timeline.add(current)
+
+
+def payload_size(value: Any) -> Optional[int]:
+    """Approximate size in bytes of an agent input or output (None if it has no obvious size)."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, tuple) and value:
+        return payload_size(value[0])
+    return None
+
+
+def timed(name: str, agent_attrs: bool = True,
+          describe: Optional[Callable[[Any], Dict[str, Any]]] = None) -> Callable:
+    """
+    Decorator for agent `process` methods: one span per call with the agent's
+    vendor and model and the input/output sizes. `describe(result)` may add
+    or override attributes (e.g. the vendor a fallback actually used).
+    Every call is also counted in the agent latency metric, with or without
+    a timeline.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(self, input_data, *args, **kwargs):
+            started = time.perf_counter()
+            vendor = getattr(self, "vendor", None)
+            vendor = getattr(vendor, "value", vendor)
+            outcome = "error"
+            try:
+                if _timeline.get() is None:
+                    result = await fn(self, input_data, *args, **kwargs)
+                    outcome = "ok"
+                    return result
+                attrs = {"vendor": vendor, "model": getattr(self, "model", None)} if agent_attrs else {}
+                with span(name, bytes_in=payload_size(input_data), **attrs) as timing:
+                    result = await fn(self, input_data, *args, **kwargs)
+                    outcome = "ok"
+                    timing.set(bytes_out=payload_size(result))
+                    if describe:
+                        timing.set(**describe(result))
+                    return result
+            finally:
+                AGENT_LATENCY.observe(time.perf_counter() - started, agent=name,
+                                      vendor=vendor if agent_attrs and vendor else "", outcome=outcome)
+        return wrapper
+    return decorator
@@ -4,13 +4,14 @@ import asyncio
 import os
 import sys
 from pathlib import Path
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 from typing import Dict, Any
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from src.api.app import create_app, load_config
+from src.services.local_repository import LocalRepository
 from src.services.supabase import SupabaseService
 from src.agents.vision.agent import VisionAgent
 from src.agents.storyteller.agent import StorytellerAgent
@@ -88,14 +89,34 @@ def mock_supabase_service():
     service.create_story = AsyncMock()
     service.get_story = AsyncMock()
     service.get_stories_for_kid = AsyncMock()
+    service.count_stories_for_kid = AsyncMock(return_value=0)
     service.update_story = AsyncMock()
     service.update_story_status = AsyncMock()
+    service.enqueue_job = AsyncMock(return_value={"id": "job-123"})
     service.upload_audio = AsyncMock()
     service.delete_audio = AsyncMock()
     service.health_check = AsyncMock()
     return service
 
 
+@pytest.fixture
+def local_repo_config():
+    """Minimal configuration for a LocalRepository."""
+    return {
+        "supabase": {"storage": {"bucket": "audio-files"}},
+        "repository": {"backend": "local"},
+    }
+
+
+@pytest.fixture
+def local_repo(tmp_path, local_repo_config):
+    """LocalRepository (SQLite + filesystem storage) in a temporary directory."""
+    with patch("src.services.local_repository.get_config", return_value=local_repo_config):
+        repository = LocalRepository(path=str(tmp_path))
+    yield repository
+    repository.close()
+
+
 @pytest.fixture
 def mock_vision_agent():
     """Mock vision agent for testing."""
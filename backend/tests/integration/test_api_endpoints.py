@@ -284,7 +284,7 @@ class TestStoryEndpoints:
         
         # Verify pagination was passed to service
         mock_supabase_service.get_stories_for_kid.assert_called_once_with(
-            "kid-123", limit=10, offset=10
+            "kid-123", limit=10, offset=10, view="full"
         )
     
     @pytest.mark.asyncio
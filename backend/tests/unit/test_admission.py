@@ -0,0 +1,116 @@
+"""Unit tests for admission control on the generation endpoints."""
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from src.core.admission import AdmissionController
+from src.core.exceptions import OverloadedError
+
+CONFIG = {
+    "max_in_flight": 2,
+    "degrade_queue_depth": 5,
+    "max_queue_depth": 10,
+    "retry_after_seconds": 30,
+    "in_flight_retry_after_seconds": 2,
+    "depth_cache_seconds": 2,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_controller(depth=0, clock=None, **overrides):
+    repository = Mock()
+    repository.count_jobs = AsyncMock(return_value=depth)
+    return AdmissionController(repository, {**CONFIG, **overrides}, clock=clock or FakeClock())
+
+
+class TestAdmissionController:
+    """High-water marks on queue depth and in-flight requests."""
+
+    @pytest.mark.asyncio
+    async def test_accepts_below_marks(self):
+        controller = make_controller(depth=4)
+
+        async with controller.admit() as degraded:
+            assert controller.in_flight == 1
+        assert degraded is False
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_degrades_above_degrade_depth(self):
+        controller = make_controller(depth=5)
+
+        async with controller.admit() as degraded:
+            pass
+        assert degraded is True
+        assert controller.stats()["degraded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_with_503_above_max_depth(self):
+        controller = make_controller(depth=10)
+
+        with pytest.raises(OverloadedError) as error:
+            async with controller.admit():
+                pass
+        assert error.value.status_code == 503
+        assert error.value.retry_after == 30
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_with_429_when_in_flight_is_full(self):
+        controller = make_controller()
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as error:
+            async with controller.admit():
+                pass
+        release.set()
+        await asyncio.gather(*holders)
+
+        assert error.value.status_code == 429
+        assert error.value.retry_after == 2
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_depth_is_cached(self):
+        clock = FakeClock()
+        controller = make_controller(depth=1, clock=clock)
+
+        for _ in range(3):
+            async with controller.admit():
+                pass
+        clock.now += 5
+        async with controller.admit():
+            pass
+
+        assert controller.repository.count_jobs.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unreadable_depth_admits(self):
+        controller = make_controller()
+        controller.repository.count_jobs = AsyncMock(side_effect=RuntimeError("db down"))
+
+        async with controller.admit() as degraded:
+            pass
+        assert degraded is False
+
+    @pytest.mark.asyncio
+    async def test_disabled_admits_everything(self):
+        controller = make_controller(depth=100, enabled=False)
+
+        async with controller.admit() as degraded:
+            pass
+        assert degraded is False
+        controller.repository.count_jobs.assert_not_called()
@@ -0,0 +1,97 @@
+"""Unit tests for the in-process TTL/LRU cache."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from src.utils.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test expiry, eviction and counters."""
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache("test", ttl_seconds=10, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache("test", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.evictions == 1
+
+    def test_stats_report_hit_ratio(self):
+        cache = TTLCache("test")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(0.6667)
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_collapses_concurrent_misses(self):
+        cache = TTLCache("test")
+
+        async def slow_load():
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        loader = AsyncMock(side_effect=slow_load)
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(10)))
+
+        assert loader.await_count == 1
+        assert all(r == {"value": 42} for r in results)
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_does_not_cache_none_by_default(self):
+        cache = TTLCache("test")
+        loader = AsyncMock(return_value=None)
+
+        await cache.get_or_load("k", loader)
+        await cache.get_or_load("k", loader)
+
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_load_is_not_overwritten(self):
+        cache = TTLCache("test")
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def stale_load():
+            started.set()
+            await release.wait()
+            return "stale"
+
+        load = asyncio.create_task(cache.get_or_load("k", stale_load))
+        await started.wait()
+        cache.invalidate("k")
+        release.set()
+
+        assert await load == "stale"
+        assert cache.get("k") is None
+        assert await cache.get_or_load("k", AsyncMock(return_value="fresh")) == "fresh"
+        assert cache.get("k") == "fresh"
@@ -0,0 +1,269 @@
+"""Unit tests for the durable story job queue and its worker."""
+import asyncio
+import base64
+import io
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import patch, AsyncMock, Mock
+from fastapi import HTTPException
+from PIL import Image
+
+from src.api.routes import stories as story_routes
+from src.core.job_worker import JobWorker
+from src.core.story_dedup import StoryDeduplicator
+from src.core.story_processor import StoryProcessor
+from src.core import story_jobs
+from src.types.requests import CreateKidRequest, GenerateStoryRequest
+
+
+FAST_JOBS = {
+    "concurrency": 2,
+    "poll_interval_seconds": 0.01,
+    "heartbeat_interval_seconds": 0.01,
+    "stale_after_seconds": 60,
+    "retry_backoff_seconds": 0,
+}
+
+
+async def make_story(local_repo, status="processing"):
+    kid = await local_repo.create_kid(CreateKidRequest(user_id="user-1", name="Alice", age=6, avatar_type="profile1"))
+    return await local_repo.create_story({"kid_id": kid.id, "title": "New Story", "content": "",
+                                          "language": "en", "status": status})
+
+
+async def wait_for(predicate, timeout=2.0):
+    """Poll until predicate() (a coroutine function) is truthy."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+class TestJobQueue:
+    """Repository-level queue semantics (local backend mirrors the RPCs)."""
+
+    @pytest.mark.asyncio
+    async def test_claim_is_exclusive(self, local_repo):
+        story = await make_story(local_repo)
+        job = await local_repo.enqueue_job("image_to_story", {"request": {"kid_id": "k"}}, story_id=story.id)
+
+        first = await local_repo.claim_jobs("worker-a", 5)
+        second = await local_repo.claim_jobs("worker-b", 5)
+
+        assert [j["id"] for j in first] == [job["id"]]
+        assert first[0]["attempts"] == 1
+        assert first[0]["payload"] == {"request": {"kid_id": "k"}}
+        assert second == []
+        assert await local_repo.count_jobs("running") == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_retried_after_backoff(self, local_repo):
+        await local_repo.enqueue_job("text_to_story", {})
+        job = (await local_repo.claim_jobs("worker-a", 1))[0]
+
+        await local_repo.fail_job(job["id"], "worker-a", "boom", retry_in=3600)
+        assert await local_repo.claim_jobs("worker-a", 1) == []
+        assert await local_repo.count_jobs("queued") == 1
+
+        await local_repo.enqueue_job("text_to_story", {})
+        job = (await local_repo.claim_jobs("worker-a", 1))[0]
+        await local_repo.fail_job(job["id"], "worker-a", "boom", retry_in=0)
+        retried = await local_repo.claim_jobs("worker-a", 1)
+        assert retried[0]["attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_only_owner_can_settle_job(self, local_repo):
+        await local_repo.enqueue_job("text_to_story", {})
+        job = (await local_repo.claim_jobs("worker-a", 1))[0]
+
+        await local_repo.complete_job(job["id"], "worker-b")
+        assert await local_repo.count_jobs("running") == 1
+
+        await local_repo.complete_job(job["id"], "worker-a")
+        assert await local_repo.count_jobs("succeeded") == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_jobs_are_requeued_or_failed(self, local_repo):
+        story = await make_story(local_repo)
+        await local_repo.enqueue_job("image_to_story", {}, story_id=story.id, max_attempts=2)
+        await local_repo.claim_jobs("dead-worker", 1)
+
+        recovered = await local_repo.requeue_stale_jobs(stale_after=-1)
+        assert recovered[0]["status"] == "queued"
+        assert (await local_repo.get_story(story.id)).status == "processing"
+
+        await local_repo.claim_jobs("dead-worker", 1)
+        recovered = await local_repo.requeue_stale_jobs(stale_after=-1)
+        assert recovered[0]["status"] == "failed"
+        assert (await local_repo.get_story(story.id)).status == "error"
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_keeps_job_alive(self, local_repo):
+        await local_repo.enqueue_job("text_to_story", {})
+        job = (await local_repo.claim_jobs("worker-a", 1))[0]
+
+        await local_repo.heartbeat_jobs("worker-a", [job["id"]])
+
+        assert await local_repo.requeue_stale_jobs(stale_after=60) == []
+
+
+class TestJobWorker:
+    """The worker runs handlers, retries failures and respects its concurrency."""
+
+    @pytest.mark.asyncio
+    async def test_runs_job_and_completes_it(self, local_repo):
+        handler = AsyncMock()
+        worker = JobWorker(local_repo, {"text_to_story": handler}, FAST_JOBS, worker_id="w1")
+        await local_repo.enqueue_job("text_to_story", {"text": "hi"})
+
+        await worker.start()
+        try:
+            assert await wait_for(lambda: _count(local_repo, "succeeded", 1))
+        finally:
+            await worker.stop()
+
+        assert handler.await_args.args[0]["payload"] == {"text": "hi"}
+
+    @pytest.mark.asyncio
+    async def test_failed_handler_is_retried_until_attempts_run_out(self, local_repo):
+        handler = AsyncMock(side_effect=RuntimeError("vendor down"))
+        worker = JobWorker(local_repo, {"text_to_story": handler}, FAST_JOBS, worker_id="w1")
+        await local_repo.enqueue_job("text_to_story", {}, max_attempts=2)
+
+        await worker.start()
+        try:
+            assert await wait_for(lambda: _count(local_repo, "failed", 1))
+        finally:
+            await worker.stop()
+
+        assert handler.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_kind_fails_without_retry(self, local_repo):
+        worker = JobWorker(local_repo, {}, FAST_JOBS, worker_id="w1")
+        await local_repo.enqueue_job("mystery", {})
+
+        assert await worker.poll_once() == 1
+        await asyncio.gather(*worker.running.values())
+
+        assert await local_repo.count_jobs("failed") == 1
+
+    @pytest.mark.asyncio
+    async def test_claims_no_more_than_concurrency(self, local_repo):
+        release = asyncio.Event()
+
+        async def handler(job):
+            await release.wait()
+
+        worker = JobWorker(local_repo, {"text_to_story": handler}, FAST_JOBS, worker_id="w1")
+        for _ in range(3):
+            await local_repo.enqueue_job("text_to_story", {})
+
+        assert await worker.poll_once() == 2
+        assert await worker.poll_once() == 0
+        release.set()
+        await asyncio.gather(*worker.running.values())
+
+        assert await local_repo.count_jobs("queued") == 1
+
+    def test_retry_delay_is_exponential_and_capped(self, local_repo):
+        worker = JobWorker(local_repo, {}, {"retry_backoff_seconds": 10, "max_retry_backoff_seconds": 25})
+        assert [worker.retry_delay(n) for n in (1, 2, 3)] == [10, 20, 25]
+
+
+class TestStoryJobs:
+    """Story pipeline jobs only mark the story as error on their last attempt."""
+
+    @pytest.mark.asyncio
+    async def test_text_job_passes_attempt_state_to_processor(self):
+        processor = Mock(process_text_to_story=AsyncMock())
+        job = {"story_id": "story-1", "attempts": 1, "max_attempts": 3,
+               "payload": {"text": "A cat", "kid_id": "kid-1", "language": "en"}}
+
+        with patch.object(story_jobs, "get_story_processor", return_value=processor), \
+                patch.object(story_jobs, "load_config", return_value={"agents": {}}):
+            await story_jobs.run_text_to_story(job)
+
+        processor.process_text_to_story.assert_awaited_once_with(
+            "story-1", "A cat", "kid-1", "en", final_attempt=False, skip_cover=False
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_non_final_attempt_keeps_story_processing(self):
+        supabase = Mock()
+        supabase.update_story = AsyncMock()
+        supabase.get_kid = AsyncMock(side_effect=RuntimeError("db down"))
+        processor = StoryProcessor.__new__(StoryProcessor)
+        processor.supabase = supabase
+        processor.storyteller_agent = Mock(streaming=False)
+
+        with pytest.raises(RuntimeError):
+            await processor.process_text_to_story("story-1", "A cat", "kid-1", "en", final_attempt=False)
+        supabase.update_story.assert_not_called()
+
+        with pytest.raises(RuntimeError):
+            await processor.process_text_to_story("story-1", "A cat", "kid-1", "en")
+        assert supabase.update_story.await_args.args[1] == {"status": "error"}
+
+
+def png_base64() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 80, 40)).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class TestImageJobs:
+    """Image jobs carry a storage reference instead of the base64 image."""
+
+    @pytest.mark.asyncio
+    async def test_image_is_stored_once_and_deleted_after_the_run(self, local_repo):
+        image = png_base64()
+        story = await make_story(local_repo)
+        request = GenerateStoryRequest(kid_id=story.kid_id, image_data=image)
+        processor = Mock(process_image_to_story=AsyncMock())
+
+        with patch.object(story_jobs, "get_supabase_service", return_value=local_repo):
+            await story_jobs.enqueue_image_to_story(request, story.id)
+            [job] = await local_repo.claim_jobs("worker-1", 1)
+            assert "image_data" not in job["payload"]["request"]
+            assert job["payload"]["image_path"] == f"{story.id}/input"
+
+            with patch.object(story_jobs, "get_story_processor", return_value=processor), \
+                    patch.object(story_jobs, "load_config", return_value={"agents": {}}):
+                await story_jobs.run_image_to_story(job)
+
+        loaded = processor.process_image_to_story.await_args.args[0]
+        assert loaded.image_data == image
+        assert loaded.kid_id == story.kid_id
+        with pytest.raises(FileNotFoundError):
+            await local_repo.download_file("story-uploads", f"{story.id}/input")
+
+    @pytest.mark.asyncio
+    async def test_failed_enqueue_marks_story_error(self, local_repo):
+        kid = await local_repo.create_kid(CreateKidRequest(
+            user_id="11111111-1111-1111-1111-111111111111", name="Alice", age=6, avatar_type="profile1"))
+        admission = Mock()
+
+        @asynccontextmanager
+        async def admit():
+            yield False
+        admission.admit = admit
+
+        with patch.object(story_routes, "get_supabase_service", return_value=local_repo), \
+                patch.object(story_jobs, "get_supabase_service", return_value=local_repo), \
+                patch.object(story_routes, "get_admission_controller", return_value=admission), \
+                patch.object(story_routes, "get_story_deduplicator", return_value=StoryDeduplicator(local_repo, {})), \
+                patch.object(story_jobs, "enqueue_story_job", AsyncMock(side_effect=RuntimeError("db down"))):
+            with pytest.raises(HTTPException):
+                await story_routes.generate_story(
+                    GenerateStoryRequest(kid_id=kid.id, image_data=png_base64()), idempotency_key=None
+                )
+
+        stories = await local_repo.get_all_stories_for_kid(kid.id)
+        assert [story.status.value for story in stories] == ["error"]
+
+
+async def _count(local_repo, status, expected):
+    return await local_repo.count_jobs(status) == expected
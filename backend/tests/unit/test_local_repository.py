@@ -0,0 +1,172 @@
+"""Unit tests for the SQLite/filesystem repository backend."""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from src.services.local_repository import LocalRepository
+from src.services.repository import create_repository
+from src.types.requests import CreateKidRequest, UpdateKidRequest
+from src.core.pagination import next_cursor
+
+
+USER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+async def make_kid(local_repo, user_id=USER_ID, name="Alice"):
+    return await local_repo.create_kid(CreateKidRequest(user_id=user_id, name=name, age=6, avatar_type="profile1"))
+
+
+async def make_story(local_repo, kid_id, status="approved", **fields):
+    return await local_repo.create_story({
+        "kid_id": kid_id, "title": "The Happy Cat", "content": "Once upon a time...",
+        "language": "en", "status": status, **fields,
+    })
+
+
+class TestLocalRepository:
+    """The local backend mirrors the Supabase backend's contracts."""
+
+    def test_factory_selects_local_backend(self, tmp_path, local_repo_config):
+        config = {**local_repo_config, "repository": {"backend": "local", "local": {"path": str(tmp_path)}}}
+        with patch("src.services.local_repository.get_config", return_value=config):
+            repository = create_repository(config)
+        assert isinstance(repository, LocalRepository)
+        repository.close()
+
+    @pytest.mark.asyncio
+    async def test_kid_round_trip_and_counts(self, local_repo):
+        kid = await make_kid(local_repo)
+        await make_story(local_repo, kid.id)
+        await make_story(local_repo, kid.id, status="pending")
+
+        await local_repo.update_kid(kid.id, UpdateKidRequest(name="Alicia"))
+
+        assert (await local_repo.get_kid(kid.id)).name == "Alicia"
+        assert await local_repo.count_stories_for_kid(kid.id) == 2
+        assert await local_repo.count_stories_for_kid(kid.id, status="approved") == 1
+        assert (await local_repo.get_kids_with_story_counts(USER_ID))[0]["stories_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages_cover_every_story_once(self, local_repo):
+        kid = await make_kid(local_repo)
+        created = {(await make_story(local_repo, kid.id)).id for _ in range(5)}
+
+        seen, cursor = [], None
+        while True:
+            page = await local_repo.get_stories_for_kid(kid.id, limit=2, cursor=cursor)
+            seen += [story.id for story in page]
+            cursor = next_cursor(page, 2)
+            if not cursor:
+                break
+
+        assert len(seen) == 5 and set(seen) == created
+
+    @pytest.mark.asyncio
+    async def test_summary_view_omits_content(self, local_repo):
+        kid = await make_kid(local_repo)
+        await make_story(local_repo, kid.id)
+
+        story = (await local_repo.get_stories_for_kid(kid.id, view="summary"))[0]
+
+        assert story.title == "The Happy Cat"
+        assert story.content == ""
+
+    @pytest.mark.asyncio
+    async def test_pending_queue_scoped_with_first_input(self, local_repo):
+        kid = await make_kid(local_repo)
+        story = await make_story(local_repo, kid.id, status="pending")
+        await local_repo.create_story_input({"story_id": story.id, "input_type": "image", "input_value": "A cat"})
+        await local_repo.create_story_input({"story_id": story.id, "input_type": "text_final", "input_value": "Later"})
+        other = await make_kid(local_repo, user_id=USER_ID.replace("1", "2"), name="Bob")
+        await make_story(local_repo, other.id, status="pending")
+
+        pending = await local_repo.get_pending_stories(user_id=USER_ID)
+
+        assert [s.id for s in pending] == [story.id]
+        assert pending[0].child_name == "Alice"
+        assert pending[0].image_description == "A cat"
+
+    @pytest.mark.asyncio
+    async def test_retried_input_replaces_the_earlier_attempt(self, local_repo):
+        kid = await make_kid(local_repo)
+        story = await make_story(local_repo, kid.id)
+        for description in ("A cat", "A cat on a mat"):
+            await local_repo.create_story_input({"story_id": story.id, "input_type": "image",
+                                                 "input_value": description})
+        await local_repo.create_story_input({"story_id": story.id, "input_type": "text_final", "input_value": "Later"})
+
+        rows = await local_repo._run(local_repo._select, "story_inputs",
+                                     "select * from story_inputs where story_id = ? order by input_type", [story.id])
+
+        assert [(r["input_type"], r["input_value"]) for r in rows] == [("image", "A cat on a mat"),
+                                                                      ("text_final", "Later")]
+
+    @pytest.mark.asyncio
+    async def test_finalize_only_touches_processing_stories(self, local_repo):
+        kid = await make_kid(local_repo)
+        story = await make_story(local_repo, kid.id, status="processing")
+
+        finalized = await local_repo.finalize_story(story.id, {"status": "approved", "audio_filename": "a.mp3"})
+        again = await local_repo.finalize_story(story.id, {"status": "error"})
+
+        assert finalized.status.value == "approved"
+        assert finalized.audio_url.endswith("audio-files/a.mp3")
+        assert again is None
+        assert (await local_repo.get_story(story.id)).status.value == "approved"
+
+    @pytest.mark.asyncio
+    async def test_review_token_is_single_use(self, local_repo):
+        kid = await make_kid(local_repo)
+        story = await make_story(local_repo, kid.id, status="pending")
+        expires_at = (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+        local_repo._conn.execute(
+            "insert into story_review_tokens (token, story_id, expires_at) values (?, ?, ?)",
+            ["tok", story.id, expires_at]
+        )
+
+        first = await local_repo.consume_review_token("tok", "approve")
+        second = await local_repo.consume_review_token("tok", "approve")
+
+        assert first["status"] == "approved" and first["kid_name"] == "Alice"
+        assert second is None
+        assert (await local_repo.get_story(story.id)).status.value == "approved"
+
+    @pytest.mark.asyncio
+    async def test_uploads_land_in_storage_directory(self, local_repo, tmp_path):
+        url = await local_repo.upload_file("story-covers", "s1/cover.png", b"png", "image/png")
+
+        assert (tmp_path / "storage" / "story-covers" / "s1" / "cover.png").read_bytes() == b"png"
+        assert url.startswith("file://")
+        with pytest.raises(ValueError):
+            await local_repo.upload_file("story-covers", "../../escape.png", b"x", "image/png")
+
+    @pytest.mark.asyncio
+    async def test_parent_profile_defaults_and_local_users(self, local_repo):
+        assert await local_repo.get_user_approval_mode(USER_ID) == "auto"
+
+        await local_repo.upsert_user(USER_ID, "parent@example.com", {"approval_mode": "email"})
+
+        assert await local_repo.get_user_approval_mode(USER_ID) == "email"
+        assert await local_repo.get_user_email(USER_ID) == "parent@example.com"
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_limit_counts_until_limit(self, local_repo):
+        results = [await local_repo.hit_rate_limit("kid:k1", 3600, 3) for _ in range(4)]
+
+        assert results[:3] == [0, 0, 0]
+        assert results[3] > 0
+        assert await local_repo.hit_rate_limit("kid:k2", 3600, 3) == 0
+
+    @pytest.mark.asyncio
+    async def test_story_timelines_round_trip(self, local_repo):
+        kid = await make_kid(local_repo)
+        story = await make_story(local_repo, kid.id, status="processing")
+
+        await local_repo.save_story_timeline(story.id, "failed", {"total_ms": 10.0, "spans": []})
+        await local_repo.save_story_timeline(story.id, "completed", {
+            "total_ms": 1234.5, "spans": [{"name": "stage.vision", "start_ms": 0.0, "ms": 800.0}],
+        })
+
+        runs = await local_repo.get_story_timelines(story.id)
+        assert [run["status"] for run in runs] == ["failed", "completed"]
+        assert runs[1]["spans"][0]["name"] == "stage.vision"
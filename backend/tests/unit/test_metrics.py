@@ -0,0 +1,127 @@
+"""Unit tests for in-process metrics and the /metrics endpoint."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.metrics import MetricsMiddleware
+from src.api.rate_limit import MemoryRateLimitBackend, RateLimitMiddleware
+from src.api.routes import metrics as metrics_route
+from src.core.stage_graph import Stage, StageGraph
+from src.utils.metrics import (
+    Registry, REGISTRY, HTTP_REQUESTS, HTTP_DB_CALLS, STAGE_LATENCY, STAGE_RETRIES, count_db_call,
+)
+
+KID_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def make_client(rate_limit_config=None):
+    app = FastAPI()
+
+    @app.get("/stories/kid/{kid_id}")
+    async def stories(kid_id: str):
+        count_db_call()
+        count_db_call()
+        return {"kid_id": kid_id}
+
+    app.include_router(metrics_route.router)
+    if rate_limit_config:
+        app.add_middleware(RateLimitMiddleware, rate_limit_config=rate_limit_config,
+                           backend=MemoryRateLimitBackend())
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+class TestRegistry:
+    """Metrics render in the Prometheus text format."""
+
+    def test_render(self):
+        registry = Registry()
+        requests = registry.counter("demo_requests_total", "Requests", ("route",))
+        latency = registry.histogram("demo_latency_seconds", "Latency", buckets=(0.1, 1.0))
+        requests.inc(route='/a"b')
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+        registry.add_collector(lambda: [("demo_depth", "gauge", "Depth", [("demo_depth", {}, 3)])])
+
+        lines = registry.render().splitlines()
+
+        assert "# TYPE demo_requests_total counter" in lines
+        assert 'demo_requests_total{route="/a\\"b"} 1' in lines
+        assert 'demo_latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'demo_latency_seconds_bucket{le="1"} 2' in lines
+        assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert "demo_latency_seconds_sum 5.55" in lines
+        assert "demo_latency_seconds_count 3" in lines
+        assert "demo_depth 3" in lines
+
+    def test_labels_must_match(self):
+        counter = Registry().counter("demo_total", "Demo", ("route",))
+
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.inc(path="/x")
+
+
+class TestMetricsMiddleware:
+    """Requests are labelled by route template and count their data-layer round trips."""
+
+    def test_route_template_and_db_calls(self, monkeypatch):
+        monkeypatch.setattr(metrics_route, "get_config", lambda: {"metrics": {"token": "secret"}})
+        client = make_client()
+        before = HTTP_REQUESTS.value(method="GET", route="/stories/kid/{kid_id}", status=200)
+        calls_before = HTTP_DB_CALLS.count(method="GET", route="/stories/kid/{kid_id}")
+
+        assert client.get(f"/stories/kid/{KID_ID}").status_code == 200
+
+        assert HTTP_REQUESTS.value(method="GET", route="/stories/kid/{kid_id}", status=200) == before + 1
+        assert HTTP_DB_CALLS.count(method="GET", route="/stories/kid/{kid_id}") == calls_before + 1
+        body = client.get("/metrics", headers={"Authorization": "Bearer secret"}).text
+        assert 'mira_http_request_db_calls_bucket{method="GET",route="/stories/kid/{kid_id}",le="2"}' in body
+        assert KID_ID not in body
+
+    def test_rate_limited_requests_keep_route_label(self):
+        client = make_client({"requests_per_minute": 1})
+        before = HTTP_REQUESTS.value(method="GET", route="/stories/kid/{kid_id}", status=429)
+
+        client.get(f"/stories/kid/{KID_ID}")
+        assert client.get(f"/stories/kid/{KID_ID}").status_code == 429
+
+        assert HTTP_REQUESTS.value(method="GET", route="/stories/kid/{kid_id}", status=429) == before + 1
+
+    def test_token_protects_endpoint(self, monkeypatch):
+        monkeypatch.setattr(metrics_route, "get_config", lambda: {"metrics": {"token": "secret"}})
+        client = make_client()
+
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    def test_endpoint_is_not_served_without_a_token(self, monkeypatch):
+        monkeypatch.setattr(metrics_route, "get_config", lambda: {"metrics": {"enabled": True, "token": None}})
+        client = make_client()
+
+        assert client.get("/metrics").status_code == 503
+        assert client.get("/metrics", headers={"Authorization": "Bearer None"}).status_code == 503
+
+
+class TestStageMetrics:
+    """Stage latency and retries are recorded by the stage graph."""
+
+    @pytest.mark.asyncio
+    async def test_stage_latency_and_retries(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("vendor hiccup")
+            return "ok"
+
+        before = STAGE_LATENCY.count(stage="metrics_flaky", outcome="ok")
+
+        await StageGraph([Stage("metrics_flaky", flaky, retries=1)]).run()
+
+        assert STAGE_LATENCY.count(stage="metrics_flaky", outcome="ok") == before + 1
+        assert STAGE_RETRIES.value(stage="metrics_flaky") >= 1
+        assert 'mira_pipeline_stage_retries_total{stage="metrics_flaky"}' in REGISTRY.render()
@@ -0,0 +1,225 @@
+"""Unit tests for outbound vendor pacing."""
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timezone
+
+from src.utils.pacer import OutboundPacer, parse_reset, get_pacer, reset_pacers
+
+
+class FakeClock:
+    """Monotonic clock advanced by the pacer's sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class RateLimitError(Exception):
+    """Shape of vendor SDK errors: status_code plus the HTTP response."""
+
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = FakeResponse(429, headers)
+
+
+def make_pacer(clock, **kwargs):
+    return OutboundPacer("openai", "gpt-4o", clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestParseReset:
+    """Vendor reset/Retry-After formats."""
+
+    def test_formats(self):
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert parse_reset("1.5") == 1.5
+        assert parse_reset("6m0s") == 360
+        assert parse_reset("20ms") == pytest.approx(0.02)
+        assert parse_reset("2026-01-01T00:00:30Z", now=now) == 30
+        assert parse_reset("Thu, 01 Jan 2026 00:00:10 GMT", now=now) == 10
+        assert parse_reset(None) is None
+        assert parse_reset("soon") is None
+
+
+class TestOutboundPacer:
+    """Token buckets, header feedback and 429 handling."""
+
+    @pytest.mark.asyncio
+    async def test_configured_rate_spaces_calls(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, requests_per_minute=2)
+
+        for _ in range(3):
+            await pacer.run(lambda: _ok())
+
+        # Two calls fit the bucket, the third waits for one request to refill
+        assert clock.sleeps == [pytest.approx(30)]
+        stats = pacer.stats()
+        assert stats["calls"] == 3
+        assert stats["wait_seconds_max"] == pytest.approx(30)
+
+    @pytest.mark.asyncio
+    async def test_exhausted_headers_block_until_reset(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock)
+
+        await pacer.run(lambda: _ok({
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        }))
+        await pacer.run(lambda: _ok())
+
+        assert clock.sleeps and sum(clock.sleeps) == pytest.approx(2)
+        assert pacer.buckets["requests"].capacity == 500
+
+    @pytest.mark.asyncio
+    async def test_429_response_is_retried_after_retry_after(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock)
+        responses = [FakeResponse(429, {"Retry-After": "5"}), FakeResponse(200)]
+
+        result = await pacer.run(lambda: _return(responses.pop(0)))
+
+        assert result.status_code == 200
+        assert clock.sleeps == [5]
+        assert pacer.throttled == 1
+
+    @pytest.mark.asyncio
+    async def test_429_exception_is_retried_then_raised(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, max_throttle_retries=1, default_retry_after=3)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise RateLimitError()
+
+        with pytest.raises(RateLimitError):
+            await pacer.run(call)
+
+        assert len(calls) == 2
+        assert clock.sleeps == [3]
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock)
+
+        async def call():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await pacer.run(call)
+        assert pacer.calls == 1
+        assert pacer.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_server_errors_are_retried_with_backoff(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, max_error_retries=2, error_backoff_seconds=0.5)
+        outcomes = [httpx.ConnectError("reset by peer"), FakeResponse(503), FakeResponse(200)]
+
+        async def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        result = await pacer.run(call)
+
+        assert result.status_code == 200
+        assert clock.sleeps == [0.5, 1.0]
+        assert pacer.retries == 2 and pacer.errors == 0
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_returned_once_retries_run_out(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, max_error_retries=1)
+
+        result = await pacer.run(lambda: _return(FakeResponse(500)))
+
+        assert result.status_code == 500
+        assert pacer.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_token_budget(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, tokens_per_minute=1000)
+
+        await pacer.run(lambda: _ok(), tokens=800)
+        await pacer.run(lambda: _ok(), tokens=800)
+
+        # 600 tokens missing at 1000/min
+        assert clock.sleeps == [pytest.approx(36)]
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency(self):
+        pacer = OutboundPacer("elevenlabs", max_concurrency=1)
+        release = asyncio.Event()
+        active = []
+
+        async def call():
+            active.append(1)
+            assert len(active) == 1
+            await release.wait()
+            active.pop()
+
+        first = asyncio.create_task(pacer.run(call))
+        second = asyncio.create_task(pacer.run(call))
+        await asyncio.sleep(0.01)
+        assert pacer.waiting == 1
+        release.set()
+        await asyncio.gather(first, second)
+
+    @pytest.mark.asyncio
+    async def test_disabled_pacer_passes_through(self):
+        clock = FakeClock()
+        pacer = make_pacer(clock, requests_per_minute=1, enabled=False)
+
+        for _ in range(3):
+            await pacer.run(lambda: _ok())
+
+        assert clock.sleeps == []
+
+
+class TestPacerRegistry:
+    """One shared pacer per (vendor, model), configured from app.yaml."""
+
+    def test_model_overrides_vendor_limits(self):
+        config = {"outbound": {"limits": {"openai": {
+            "requests_per_minute": 500, "models": {"dall-e-3": {"requests_per_minute": 7}}
+        }}}}
+        reset_pacers()
+        with patch("src.utils.pacer.get_config", return_value=config):
+            images = get_pacer("openai", "dall-e-3")
+            chat = get_pacer("openai", "gpt-4o")
+            assert get_pacer("openai", "dall-e-3") is images
+        reset_pacers()
+
+        assert images.buckets["requests"].capacity == 7
+        assert chat.buckets["requests"].capacity == 500
+
+
+async def _ok(headers=None):
+    return FakeResponse(200, headers)
+
+
+async def _return(value):
+    return value
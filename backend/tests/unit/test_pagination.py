@@ -0,0 +1,51 @@
+"""Unit tests for keyset pagination cursors."""
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from src.core.pagination import encode_cursor, decode_cursor, keyset_filter, next_cursor
+from src.core.exceptions import ValidationError
+
+STORY_ID = "99999999-9999-4999-8999-999999999999"
+
+
+class TestCursor:
+    """Test cursor encoding and the seek filter."""
+
+    def test_round_trip(self):
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        cursor = encode_cursor(created_at, STORY_ID)
+
+        assert decode_cursor(cursor) == (created_at.isoformat(), STORY_ID)
+        assert "=" not in cursor
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("yesterday", STORY_ID), ""])
+    def test_malformed_cursor_is_rejected(self, cursor):
+        with pytest.raises(ValidationError):
+            decode_cursor(cursor)
+
+    @pytest.mark.parametrize("row_id", [
+        'x"),user_id.neq.(',
+        f'{STORY_ID}"),or(id.gt."0',
+        ["not", "a", "string"],
+    ])
+    def test_cursor_cannot_inject_into_the_filter(self, row_id):
+        cursor = encode_cursor("2024-05-01T12:30:00+00:00", row_id)
+
+        with pytest.raises(ValidationError):
+            keyset_filter(cursor)
+
+    def test_filter_breaks_timestamp_ties_on_id(self):
+        cursor = encode_cursor("2024-05-01T12:30:00+00:00", STORY_ID)
+
+        assert keyset_filter(cursor) == (
+            'created_at.lt."2024-05-01T12:30:00+00:00",'
+            f'and(created_at.eq."2024-05-01T12:30:00+00:00",id.lt."{STORY_ID}")'
+        )
+
+    def test_next_cursor_only_for_full_pages(self):
+        ids = [f"{i}" * 8 + STORY_ID[8:] for i in range(3)]
+        rows = [SimpleNamespace(id=row_id, created_at="2024-05-01T00:00:00") for row_id in ids]
+
+        assert next_cursor(rows, page_size=4) is None
+        assert decode_cursor(next_cursor(rows, page_size=3)) == ("2024-05-01T00:00:00", ids[2])
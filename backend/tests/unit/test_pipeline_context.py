@@ -0,0 +1,83 @@
+"""Unit tests for the per-story pipeline context."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.core.pipeline_context import PipelineContext
+from src.types.domain import Kid
+
+
+@pytest.fixture
+def kid(sample_kid_data):
+    return Kid(**sample_kid_data)
+
+
+@pytest.fixture
+def supabase(kid):
+    service = Mock()
+
+    async def slow_get_kid(kid_id):
+        await asyncio.sleep(0.01)
+        return kid
+
+    service.get_kid = AsyncMock(side_effect=slow_get_kid)
+    service.get_user_approval_mode = AsyncMock(return_value="email")
+    service.get_user_email = AsyncMock(return_value="parent@example.com")
+    service.get_story = AsyncMock(return_value=Mock(title="Fetched"))
+    service.update_story = AsyncMock(return_value=Mock(title="Written"))
+    return service
+
+
+class TestPipelineContext:
+    """Each entity is fetched at most once per story."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_share_one_fetch(self, supabase):
+        context = PipelineContext(supabase, "story-1", "kid-123")
+
+        results = await asyncio.gather(*(context.get_kid() for _ in range(5)))
+
+        assert all(r is results[0] for r in results)
+        supabase.get_kid.assert_awaited_once_with("kid-123")
+
+    @pytest.mark.asyncio
+    async def test_seeded_kid_is_never_fetched(self, supabase, kid):
+        context = PipelineContext(supabase, "story-1", "kid-123", kid=kid)
+
+        await context.get_kid()
+        await context.get_approval_mode()
+        await context.get_parent_email()
+
+        supabase.get_kid.assert_not_called()
+        supabase.get_user_approval_mode.assert_awaited_once_with("user-456")
+        supabase.get_user_email.assert_awaited_once_with("user-456")
+
+    @pytest.mark.asyncio
+    async def test_parent_settings_cached_across_stages(self, supabase):
+        context = PipelineContext(supabase, "story-1", "kid-123")
+
+        for _ in range(3):
+            assert await context.get_approval_mode() == "email"
+
+        supabase.get_user_approval_mode.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_missing_kid_raises_and_is_not_cached(self, supabase):
+        supabase.get_kid = AsyncMock(return_value=None)
+        context = PipelineContext(supabase, "story-1", "kid-123")
+
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Kid not found"):
+                await context.get_kid()
+
+        assert supabase.get_kid.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_story_snapshot_comes_from_last_write(self, supabase):
+        context = PipelineContext(supabase, "story-1", "kid-123")
+        await context.writes.update({"title": "Written"})
+
+        story = await context.get_story()
+
+        assert story.title == "Written"
+        supabase.get_story.assert_not_called()
@@ -0,0 +1,147 @@
+"""Unit tests for inbound rate limiting."""
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.rate_limit import MemoryRateLimitBackend, RateLimitMiddleware, RateLimitBackend
+from src.utils.rate_limit import sliding_window_retry_after
+
+KID_ID = "22222222-2222-2222-2222-222222222222"
+OTHER_KID_ID = "33333333-3333-3333-3333-333333333333"
+
+
+class FakeClock:
+    def __init__(self, now=6000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FailingBackend(RateLimitBackend):
+    async def hit(self, key, window_seconds, limit):
+        raise RuntimeError("counter store down")
+
+
+def make_client(config, backend=None):
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/stories/kid/{kid_id}")
+    async def stories(kid_id: str):
+        return {"kid_id": kid_id}
+
+    @app.post("/stories/generate")
+    async def generate(body: dict):
+        return body
+
+    app.add_middleware(RateLimitMiddleware, rate_limit_config=config, backend=backend)
+    return TestClient(app)
+
+
+class TestSlidingWindow:
+    """Sliding-window-counter estimate and retry hints."""
+
+    def test_allows_under_limit(self):
+        assert sliding_window_retry_after(0, 4, 10, 60, 5) == 0
+
+    def test_current_window_full(self):
+        # 5 hits in this window: wait out the window plus the decay of those 5
+        assert sliding_window_retry_after(0, 5, 10, 60, 5) == pytest.approx(50 + 60 * (1 - 4 / 5))
+
+    def test_previous_window_decays(self):
+        # Half the previous window still overlaps: 10 * 0.5 + 0 >= 5
+        retry_after = sliding_window_retry_after(10, 0, 30, 60, 5)
+        assert retry_after == pytest.approx(60 * (1 - 4 / 10) - 30)
+        assert sliding_window_retry_after(10, 0, 30 + retry_after, 60, 5) == 0
+
+
+class TestMemoryBackend:
+    """Per-process counters."""
+
+    @pytest.mark.asyncio
+    async def test_limit_and_recovery(self):
+        clock = FakeClock()
+        backend = MemoryRateLimitBackend(clock=clock)
+
+        assert [await backend.hit("kid:a", 60, 2) for _ in range(3)] == [0, 0, pytest.approx(90)]
+        clock.now += 120
+        assert await backend.hit("kid:a", 60, 2) == 0
+
+    @pytest.mark.asyncio
+    async def test_keys_are_bounded(self):
+        backend = MemoryRateLimitBackend(max_keys=2, clock=FakeClock())
+
+        for key in ("a", "b", "c"):
+            await backend.hit(key, 60, 10)
+
+        assert len(backend._counters) == 2
+
+
+class TestRateLimitMiddleware:
+    """429 with Retry-After, identity keying and exemptions."""
+
+    CONFIG = {
+        "enabled": True,
+        "requests_per_minute": 3,
+        "exempt_paths": ["/health"],
+        "trust_forwarded_for": True,
+        "routes": {"POST /stories/generate": {"requests_per_minute": 1}},
+    }
+    OTHER_IP = {"X-Forwarded-For": "203.0.113.7"}
+
+    def test_returns_429_with_retry_after(self):
+        client = make_client(self.CONFIG, MemoryRateLimitBackend())
+
+        statuses = [client.get(f"/stories/kid/{KID_ID}").status_code for _ in range(4)]
+        response = client.get(f"/stories/kid/{KID_ID}")
+
+        assert statuses == [200, 200, 200, 429]
+        assert response.json()["code"] == "RATE_LIMITED"
+        assert int(response.headers["retry-after"]) >= 1
+        # The kid's budget follows it to another IP; another kid there has its own
+        assert client.get(f"/stories/kid/{KID_ID}", headers=self.OTHER_IP).status_code == 429
+        assert client.get(f"/stories/kid/{OTHER_KID_ID}", headers=self.OTHER_IP).status_code == 200
+
+    def test_route_limit_keyed_by_body_id(self):
+        client = make_client(self.CONFIG, MemoryRateLimitBackend())
+
+        first = client.post("/stories/generate", json={"kid_id": KID_ID, "image_data": "x"})
+        second = client.post("/stories/generate", json={"kid_id": KID_ID, "image_data": "x"}, headers=self.OTHER_IP)
+        other = client.post("/stories/generate", json={"kid_id": OTHER_KID_ID},
+                            headers={"X-Forwarded-For": "198.51.100.2"})
+
+        # Body is replayed to the endpoint after being inspected
+        assert first.status_code == 200 and first.json()["kid_id"] == KID_ID
+        assert second.status_code == 429
+        assert other.status_code == 200
+
+    def test_rotating_claimed_ids_still_counts_the_client_ip(self):
+        backend = MemoryRateLimitBackend()
+        client = make_client(self.CONFIG, backend)
+
+        statuses = [
+            client.post("/stories/generate", json={"kid_id": str(uuid.uuid4())}).status_code for _ in range(3)
+        ]
+
+        assert statuses == [200, 429, 429]
+        assert ("POST /stories/generate|ip:testclient", 60) in backend._counters
+
+    def test_falls_back_to_client_ip_and_skips_exempt_paths(self):
+        backend = MemoryRateLimitBackend()
+        client = make_client({"requests_per_minute": 1, "exempt_paths": ["/health"]}, backend)
+
+        assert [client.get("/health").status_code for _ in range(3)] == [200, 200, 200]
+        assert client.post("/stories/generate", json={}).status_code == 200
+        assert client.post("/stories/generate", json={}).status_code == 429
+        assert ("ip:testclient", 60) in backend._counters
+
+    def test_backend_failure_allows_request(self):
+        client = make_client(self.CONFIG, FailingBackend())
+
+        assert client.get(f"/stories/kid/{KID_ID}").status_code == 200
@@ -0,0 +1,158 @@
+"""Unit tests for speculative cover generation."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.core.speculative_cover import SpeculativeCover, scene_overlap
+from src.core.story_processor import StoryProcessor
+from src.core.story_write_buffer import StoryWriteBuffer
+from src.types.domain import Kid
+
+COVER_FIELDS = {"cover_image_url": "https://cdn/generated/story-1/speculative/cover.png"}
+
+
+def make_artist(delay=0.0, calls=None, storage=None):
+    """
+    Artist mock that reports its cover fields through the write buffer it is
+    given. With `storage` (a set), uploads are recorded there and fail on an
+    existing path like the non-upserting bucket upload.
+    """
+    async def process(input_data, write_buffer=None, storage_folder=None):
+        if calls is not None:
+            calls.append("artist")
+        await asyncio.sleep(delay)
+        path = f"{storage_folder or 'generated/story-1'}/cover.png"
+        if storage is not None:
+            if path in storage:
+                raise RuntimeError(f"Duplicate: {path}")
+            storage.add(path)
+        await write_buffer.update({"cover_image_url": f"https://cdn/{path}"})
+        return {"success": True, "url": f"https://cdn/{path}"}
+
+    async def delete_stored_cover(folder):
+        if storage is not None:
+            storage.discard(f"{folder}/cover.png")
+
+    artist = Mock(vendor="google", model="imagen")
+    artist.process = AsyncMock(side_effect=process)
+    artist.delete_stored_cover = AsyncMock(side_effect=delete_stored_cover)
+    artist.config = {"speculative": {"enabled": True, "source": "input", "min_overlap": 0.5}}
+    return artist
+
+
+@pytest.fixture
+def supabase():
+    service = Mock()
+    service.update_story = AsyncMock(return_value=Mock(id="story-1"))
+    service.finalize_story = AsyncMock(return_value=Mock(id="story-1"))
+    return service
+
+
+class TestSceneOverlap:
+    """Overlap counts the final description's content words found in the speculative scene."""
+
+    def test_overlap(self):
+        assert scene_overlap("A red dragon flying over a castle", "The dragon and the castle") == 1.0
+        assert scene_overlap("A red dragon", "A kitten asleep in a basket") == 0.0
+        assert scene_overlap("anything", "") == 0.0
+
+
+class TestSpeculativeCover:
+    """The speculative cover is only written when the final description agrees with it."""
+
+    @pytest.mark.asyncio
+    async def test_accepted_cover_fields_go_to_write_buffer(self, supabase, sample_kid_data):
+        artist = make_artist()
+        writes = StoryWriteBuffer(supabase, "story-1")
+        cover = SpeculativeCover(artist, "story-1", Kid(**sample_kid_data), artist.config["speculative"])
+
+        cover.start_from_input("A drawing of a dragon next to a castle")
+        cover.start_from_input("ignored second start")
+        result = await cover.resolve("A friendly dragon in front of a castle", writes)
+
+        assert result["success"] is True
+        assert writes.pending == COVER_FIELDS
+        artist.process.assert_awaited_once()
+        story = artist.process.await_args.args[0]["story"]
+        assert story["cover_description"] == "A drawing of a dragon next to a castle"
+
+    @pytest.mark.asyncio
+    async def test_rejected_cover_is_cancelled(self, supabase, sample_kid_data):
+        artist = make_artist(delay=10)
+        writes = StoryWriteBuffer(supabase, "story-1")
+        cover = SpeculativeCover(artist, "story-1", Kid(**sample_kid_data), artist.config["speculative"])
+
+        cover.start_from_input("A drawing of a dragon")
+        await asyncio.sleep(0)
+        assert await cover.resolve("A kitten asleep in a basket", writes) is None
+        await asyncio.sleep(0)
+
+        assert cover._task.cancelled()
+        assert writes.pending == {}
+
+    @pytest.mark.asyncio
+    async def test_rejected_after_upload_does_not_block_normal_cover(self, supabase, sample_kid_data):
+        storage = set()
+        artist = make_artist(storage=storage)
+        writes = StoryWriteBuffer(supabase, "story-1")
+        cover = SpeculativeCover(artist, "story-1", Kid(**sample_kid_data), artist.config["speculative"])
+
+        cover.start_from_input("A drawing of a dragon")
+        await cover._task
+        assert storage == {"generated/story-1/speculative/cover.png"}
+        assert await cover.resolve("A kitten asleep in a basket", writes) is None
+        await cover._cleanup
+
+        # The normal cover the processor then generates uploads to the usual path
+        result = await artist.process({"story": {"id": "story-1"}}, write_buffer=writes)
+        assert result["url"] == "https://cdn/generated/story-1/cover.png"
+        assert writes.pending == {"cover_image_url": "https://cdn/generated/story-1/cover.png"}
+        assert storage == {"generated/story-1/cover.png"}
+        artist.delete_stored_cover.assert_awaited_once_with("generated/story-1/speculative")
+
+    @pytest.mark.asyncio
+    async def test_streamed_cover_description_is_kept_when_unchanged(self, supabase, sample_kid_data):
+        artist = make_artist()
+        writes = StoryWriteBuffer(supabase, "story-1")
+        cover = SpeculativeCover(artist, "story-1", Kid(**sample_kid_data),
+                                 {"source": "cover_description", "min_overlap": 1.0})
+
+        cover.start_from_input("A drawing of a dragon")
+        cover.on_event("paragraph", "Once upon a time.")
+        assert cover.scene is None
+        cover.on_event("cover_description", "A cat holding a map")
+
+        assert await cover.resolve("A cat holding a map", writes) is not None
+        assert writes.pending == COVER_FIELDS
+
+
+class TestProcessorSpeculativeCover:
+    """The text pipeline starts the cover before the storyteller and reuses it."""
+
+    @pytest.mark.asyncio
+    async def test_cover_started_before_story_is_reused(self, supabase, sample_kid_data):
+        order = []
+        artist = make_artist(calls=order)
+
+        async def write_story(*args, **kwargs):
+            await asyncio.sleep(0)
+            order.append("storyteller")
+            return {"title": "The Dragon", "content": "Once upon a time...",
+                    "cover_description": "A dragon guarding a castle"}
+
+        processor = StoryProcessor.__new__(StoryProcessor)
+        processor.supabase = supabase
+        processor.artist_agent = artist
+        processor.storyteller_agent = Mock(streaming=False, process=AsyncMock(side_effect=write_story))
+        processor.voice_agent = Mock(process=AsyncMock(return_value=(b"audio", "audio/mpeg")),
+                                     can_synthesize_paragraphs=Mock(return_value=False), cache=None)
+        supabase.get_kid = AsyncMock(return_value=Kid(**sample_kid_data))
+        supabase.upload_audio = AsyncMock(return_value="story-1.mp3")
+        supabase.get_user_approval_mode = AsyncMock(return_value="auto")
+
+        await processor.process_text_to_story("story-1", "a dragon and a castle", "kid-123", "en")
+
+        assert order == ["artist", "storyteller"]
+        artist.process.assert_called_once()
+        final_update = supabase.finalize_story.await_args.args[1]
+        assert final_update["cover_image_url"] == COVER_FIELDS["cover_image_url"]
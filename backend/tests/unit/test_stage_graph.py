@@ -0,0 +1,149 @@
+"""Unit tests for the pipeline stage graph."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.core.stage_graph import Stage, StageGraph
+from src.core.story_processor import StoryProcessor
+from src.types.domain import Kid
+
+
+class TestStageGraph:
+    """Stages run as soon as their inputs exist, with timeouts, retries and optional stages."""
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_run_in_parallel(self):
+        started = []
+
+        def stage(name, *inputs, delay=0.1):
+            async def run(**values):
+                started.append(name)
+                await asyncio.sleep(delay)
+                return name + "".join(f"({values[key]})" for key in inputs)
+            return Stage(name, run, inputs=inputs)
+
+        graph = StageGraph([
+            stage("join", "left", "right", delay=0),
+            stage("left", "seed"),
+            stage("right", "seed"),
+        ])
+
+        graph_run = await asyncio.wait_for(graph.run({"seed": "s"}), timeout=0.18)
+
+        assert started == ["left", "right", "join"]
+        assert graph_run.values["join"] == "join(left(s))(right(s))"
+
+    @pytest.mark.asyncio
+    async def test_timed_out_attempt_is_retried(self):
+        attempts = []
+
+        async def slow_then_fast():
+            attempts.append(len(attempts))
+            await asyncio.sleep(1 if len(attempts) == 1 else 0)
+            return "done"
+
+        graph = StageGraph([Stage("slow", slow_then_fast, timeout=0.01, retries=1)])
+
+        assert (await graph.run()).values["slow"] == "done"
+        assert len(attempts) == 2
+
+    @pytest.mark.asyncio
+    async def test_optional_stage_failure_is_recovered(self):
+        async def fail():
+            raise RuntimeError("vendor down")
+
+        async def recover(error):
+            return f"fallback: {error}"
+
+        async def use(cover):
+            return cover
+
+        graph = StageGraph([
+            Stage("artist", fail, outputs=("cover",), optional=True, recover=recover),
+            Stage("finalize", use, inputs=("cover",)),
+        ])
+
+        graph_run = await graph.run()
+
+        assert graph_run.values["finalize"] == "fallback: vendor down"
+        assert isinstance(graph_run.errors["artist"], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_required_failure_cancels_running_stages(self):
+        cancelled = asyncio.Event()
+
+        async def fail():
+            raise ValueError("Kid not found")
+
+        async def long_running():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        graph = StageGraph([Stage("kid", fail), Stage("vision", long_running)])
+
+        with pytest.raises(ValueError, match="Kid not found"):
+            await graph.run()
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_invalid_graphs_are_rejected(self):
+        async def run(**values):
+            return None
+
+        with pytest.raises(ValueError, match="cycle"):
+            StageGraph([Stage("a", run, inputs=("b",)), Stage("b", run, inputs=("a",))])
+        with pytest.raises(ValueError, match="produced by both"):
+            StageGraph([Stage("a", run, outputs=("x",)), Stage("b", run, outputs=("x",))])
+        with pytest.raises(ValueError, match="No stage produces image_data"):
+            await StageGraph([Stage("vision", run, inputs=("image_data",))]).run()
+
+    def test_configure_from_settings(self):
+        stage = Stage("vision", AsyncMock()).configure({"timeout_seconds": 30, "retries": 2})
+
+        assert (stage.timeout, stage.retries, stage.outputs) == (30.0, 2, ("vision",))
+
+
+class TestVoicePipeline:
+    """process_voice_to_story transcribes and then reuses the shared story stages."""
+
+    @pytest.mark.asyncio
+    async def test_voice_to_story(self, sample_kid_data):
+        supabase = Mock()
+        supabase.update_story = AsyncMock(return_value=Mock(id="story-1"))
+        supabase.finalize_story = AsyncMock(return_value=Mock(id="story-1"))
+        supabase.get_kid = AsyncMock(return_value=Kid(**sample_kid_data))
+        supabase.create_story_input = AsyncMock()
+        supabase.upload_audio = AsyncMock(side_effect=RuntimeError("storage down"))
+        supabase.get_user_approval_mode = AsyncMock(return_value="app")
+        supabase.save_story_timeline = AsyncMock()
+
+        processor = StoryProcessor.__new__(StoryProcessor)
+        processor.supabase = supabase
+        processor.artist_agent = None
+        processor.speech_agent = Mock(vendor=Mock(value="openai"), model="whisper-1",
+                                      process=AsyncMock(return_value="A dragon who loves soup"))
+        processor.storyteller_agent = Mock(streaming=False, process=AsyncMock(return_value={
+            "title": "Soup Dragon", "content": "Once upon a time...", "cover_description": "A dragon",
+        }))
+        processor.voice_agent = Mock(process=AsyncMock(return_value=(b"audio", "audio/mpeg")),
+                                     can_synthesize_paragraphs=Mock(return_value=False), cache=None)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("src.core.story_processor.get_supabase_service", lambda: supabase)
+            await processor.process_voice_to_story("story-1", "UklGRg==", "kid-123", "en")
+
+        processor.speech_agent.process.assert_awaited_once_with("UklGRg==", language="en")
+        assert processor.storyteller_agent.process.await_args.args[0] == "A dragon who loves soup"
+        assert supabase.create_story_input.await_args.args[0]["input_type"] == "audio_transcription"
+        final_update = supabase.finalize_story.await_args.args[1]
+        assert final_update["status"] == "pending"
+        assert final_update["audio_error"] == "storage down"
+        assert final_update["cover_image_metadata"]["reason"] == "Artist agent not available"
+        story_id, status, timeline = supabase.save_story_timeline.await_args.args
+        assert (story_id, status) == ("story-1", "completed")
+        stages = {entry["name"] for entry in timeline["spans"] if entry["name"].startswith("stage.")}
+        assert {"stage.transcription", "stage.storyteller", "stage.voice", "stage.finalize"} <= stages
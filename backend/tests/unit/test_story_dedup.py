@@ -0,0 +1,82 @@
+"""Unit tests for story request deduplication."""
+import asyncio
+import base64
+import uuid
+import pytest
+
+from src.core.exceptions import ValidationError
+from src.core.story_dedup import StoryDeduplicator, image_content_hash
+from src.types.domain import StoryStatus
+from src.types.requests import CreateKidRequest
+
+IMAGE = base64.b64encode(b"\x89PNG drawing bytes").decode()
+
+
+async def create_story(local_repo, story_id, status="processing"):
+    kid = await local_repo.create_kid(CreateKidRequest(
+        user_id="11111111-1111-1111-1111-111111111111", name="Alice", age=6, avatar_type="profile1"))
+    return await local_repo.create_story({"id": story_id, "kid_id": kid.id, "title": "New Story", "content": "",
+                                          "language": "en", "status": status})
+
+
+class TestRequestKeys:
+    """Requests are keyed by idempotency key and by what they ask for."""
+
+    def test_image_keys(self):
+        dedup = StoryDeduplicator(None, {"window_seconds": 600, "idempotency_ttl_seconds": 86400})
+
+        keys = dedup.image_request_keys("kid-1", "en", IMAGE, idempotency_key="abc")
+
+        assert keys == {"idempotency:kid-1:abc": 86400, f"image:kid-1:en:{image_content_hash(IMAGE)}": 600}
+        assert image_content_hash(f"data:image/png;base64,{IMAGE}") == image_content_hash(IMAGE)
+        assert dedup.image_request_keys("kid-1", "lv", IMAGE) != dedup.image_request_keys("kid-1", "en", IMAGE)
+
+    def test_disabled_and_invalid_keys(self):
+        assert StoryDeduplicator(None, {"enabled": False}).image_request_keys("kid-1", "en", IMAGE, "abc") == {}
+        with pytest.raises(ValidationError):
+            StoryDeduplicator(None, {}).image_request_keys("kid-1", "en", IMAGE, "x" * 300)
+
+
+class TestStoryDeduplicator:
+    """The first request claims its keys; repeats attach to its story."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_attaches_to_existing_story(self, local_repo):
+        dedup = StoryDeduplicator(local_repo, {})
+        keys = dedup.image_request_keys("kid-1", "en", IMAGE)
+        first_id = str(uuid.uuid4())
+
+        assert await dedup.claim(keys, first_id) is None
+        # Claimed but the story row is not created yet: still in flight
+        pending = await dedup.claim(keys, str(uuid.uuid4()))
+        assert (pending.story_id, pending.status) == (first_id, StoryStatus.PROCESSING)
+
+        await create_story(local_repo, first_id, status="approved")
+        retry_keys = dedup.image_request_keys("kid-1", "en", IMAGE, idempotency_key="retry-1")
+        duplicate = await dedup.claim(retry_keys, str(uuid.uuid4()))
+        assert (duplicate.story_id, duplicate.status) == (first_id, StoryStatus.APPROVED)
+
+    @pytest.mark.asyncio
+    async def test_failed_story_claim_is_taken_over(self, local_repo):
+        dedup = StoryDeduplicator(local_repo, {})
+        keys = dedup.image_request_keys("kid-1", "en", IMAGE)
+        failed_id = str(uuid.uuid4())
+        await dedup.claim(keys, failed_id)
+        await create_story(local_repo, failed_id, status="error")
+
+        retry_id = str(uuid.uuid4())
+        assert await dedup.claim(keys, retry_id) is None
+        assert (await dedup.claim(keys, str(uuid.uuid4()))).story_id == retry_id
+
+    @pytest.mark.asyncio
+    async def test_released_and_expired_claims_are_free(self, local_repo):
+        dedup = StoryDeduplicator(local_repo, {"window_seconds": 0.05})
+        keys = dedup.image_request_keys("kid-1", "en", IMAGE)
+        story_id = str(uuid.uuid4())
+
+        await dedup.claim(keys, story_id)
+        await dedup.release(keys, story_id)
+        assert await dedup.claim(keys, str(uuid.uuid4())) is None
+
+        await asyncio.sleep(0.1)
+        assert await local_repo.claim_story_request(keys, str(uuid.uuid4())) is None
@@ -0,0 +1,114 @@
+"""Unit tests for streamed story parsing and paragraph-by-paragraph TTS."""
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock
+
+from src.agents.storyteller.streaming import StoryStreamParser
+from src.agents.voice.agent import VoiceAgent
+from src.agents.voice.audio import concat_mp3, strip_id3
+from src.core.streamed_speech import StreamedSpeech, split_paragraphs
+
+STORY = {
+    "title": "The \"Brave\" Cat",
+    "content": "Once upon a time 🐱 lived a cat.\n\nShe found a map.\n\nThe end.",
+    "cover_description": "A cat holding a map",
+}
+
+
+def feed_in_chunks(raw, size):
+    parser = StoryStreamParser()
+    events = []
+    for i in range(0, len(raw), size):
+        events += parser.feed(raw[i:i + size])
+    return parser, events
+
+
+class TestStoryStreamParser:
+    """Fields and paragraphs are released as soon as they are complete."""
+
+    @pytest.mark.parametrize("size", [1, 3, 16, 1000])
+    def test_events_for_any_chunking(self, size):
+        raw = "```json\n" + json.dumps(STORY) + "\n```"
+
+        parser, events = feed_in_chunks(raw, size)
+
+        assert events == [
+            ("title", 'The "Brave" Cat'),
+            ("paragraph", "Once upon a time 🐱 lived a cat."),
+            ("paragraph", "She found a map."),
+            ("paragraph", "The end."),
+            ("cover_description", "A cat holding a map"),
+        ]
+        assert parser.text == raw
+
+    def test_paragraph_released_before_content_closes(self):
+        parser = StoryStreamParser()
+
+        assert parser.feed('{"title": "T", "content": "First part.\\n') == [("title", "T")]
+        assert parser.feed('\\nSecond') == [("paragraph", "First part.")]
+
+    def test_ignores_other_values(self):
+        raw = json.dumps({"meta": {"content": "no"}, "words": [1, 2], "content": "Only this."})
+
+        _, events = feed_in_chunks(raw, 4)
+
+        assert events == [("paragraph", "Only this.")]
+
+
+class TestAudioConcat:
+    """MP3 segments are joined without metadata tags in between."""
+
+    def test_tags_between_segments_are_removed(self):
+        id3 = b"ID3\x04\x00\x00\x00\x00\x00\x02ab"
+        trailer = b"TAG" + b"\x00" * 125
+        segments = [id3 + b"one" + trailer, id3 + b"two" + trailer]
+
+        assert concat_mp3(segments) == id3 + b"one" + b"two" + trailer
+        assert strip_id3(b"plain") == b"plain"
+
+
+class TestStreamedSpeech:
+    """Paragraph TTS started during streaming is reused only when it matches the final story."""
+
+    def make_speech(self, synthesize):
+        voice_agent = Mock(join_segments=VoiceAgent.join_segments)
+        voice_agent.synthesize_chunk = synthesize
+        return StreamedSpeech(voice_agent, "en", "story-1")
+
+    @pytest.mark.asyncio
+    async def test_segments_are_joined_in_order(self):
+        async def synthesize(text, language):
+            await asyncio.sleep(0.01 if text == "One." else 0)
+            return text.encode(), "audio/mpeg"
+
+        speech = self.make_speech(synthesize)
+        for paragraph in ("One.", "Two."):
+            speech.on_event("paragraph", paragraph)
+        speech.on_event("title", "ignored")
+
+        assert await speech.finish("One.\n\nTwo.") == (b"One.Two.", "audio/mpeg")
+
+    @pytest.mark.asyncio
+    async def test_mismatched_content_is_discarded(self):
+        async def synthesize(text, language):
+            return text.encode(), "audio/mpeg"
+
+        speech = self.make_speech(synthesize)
+        speech.on_event("paragraph", "One.")
+
+        assert await speech.finish("One.\n\nTwo.") is None
+
+    @pytest.mark.asyncio
+    async def test_failed_segment_raises(self):
+        async def synthesize(text, language):
+            raise RuntimeError("tts down")
+
+        speech = self.make_speech(synthesize)
+        speech.on_event("paragraph", "One.")
+
+        with pytest.raises(RuntimeError):
+            await speech.finish("One.")
+
+    def test_split_paragraphs(self):
+        assert split_paragraphs(" A.\n\n\n\nB. \n\n") == ["A.", "B."]
@@ -0,0 +1,121 @@
+"""Unit tests for the coalescing story write buffer."""
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.core.story_write_buffer import StoryWriteBuffer
+from src.core.story_processor import StoryProcessor
+from src.types.domain import Kid
+
+
+@pytest.fixture
+def supabase():
+    """Mock service whose update_story records every PATCH."""
+    service = Mock()
+    service.update_story = AsyncMock(return_value=Mock(id="story-1"))
+    service.finalize_story = AsyncMock(return_value=Mock(id="story-1"))
+    return service
+
+
+class TestStoryWriteBuffer:
+    """Test write coalescing behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_non_polled_fields_are_buffered(self, supabase):
+        """Audio and cover fields wait for the next flush."""
+        writes = StoryWriteBuffer(supabase, "story-1")
+
+        await writes.update({"audio_filename": "story-1.mp3"})
+        await writes.update({"cover_image_url": "https://cdn/cover.png"})
+
+        supabase.update_story.assert_not_called()
+        assert writes.pending == {
+            "audio_filename": "story-1.mp3",
+            "cover_image_url": "https://cdn/cover.png",
+        }
+
+    @pytest.mark.asyncio
+    async def test_polled_field_flushes_everything_in_one_write(self, supabase):
+        """A status update carries all buffered fields with it."""
+        writes = StoryWriteBuffer(supabase, "story-1")
+
+        await writes.update({"audio_filename": "story-1.mp3"})
+        await writes.update({"status": "approved"})
+
+        supabase.update_story.assert_awaited_once_with(
+            "story-1", {"audio_filename": "story-1.mp3", "status": "approved"}
+        )
+        assert writes.writes == 1
+        assert writes.pending == {}
+
+    @pytest.mark.asyncio
+    async def test_flush_with_nothing_pending_is_noop(self, supabase):
+        """Empty flushes never hit the database."""
+        writes = StoryWriteBuffer(supabase, "story-1")
+
+        await writes.flush()
+
+        supabase.update_story.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_fields(self, supabase):
+        """Fields survive a failed write so the next flush retries them."""
+        supabase.update_story.side_effect = [Exception("network"), Mock(id="story-1")]
+        writes = StoryWriteBuffer(supabase, "story-1")
+        await writes.update({"audio_filename": "story-1.mp3"})
+
+        with pytest.raises(Exception, match="network"):
+            await writes.update({"status": "approved"})
+        await writes.flush()
+
+        assert supabase.update_story.await_args.args[1] == {
+            "audio_filename": "story-1.mp3",
+            "status": "approved",
+        }
+
+
+    @pytest.mark.asyncio
+    async def test_finalize_carries_buffered_fields(self, supabase):
+        """The terminal write goes through finalize_story with everything pending."""
+        writes = StoryWriteBuffer(supabase, "story-1")
+        await writes.update({"audio_filename": "story-1.mp3"})
+
+        await writes.finalize({"status": "approved"})
+
+        supabase.finalize_story.assert_awaited_once_with(
+            "story-1", {"audio_filename": "story-1.mp3", "status": "approved"}
+        )
+        supabase.update_story.assert_not_called()
+        assert writes.pending == {}
+
+
+class TestProcessorWriteCount:
+    """A full text pipeline run should only write the story twice (content, then finalize)."""
+
+    @pytest.mark.asyncio
+    async def test_text_pipeline_makes_two_story_writes(self, supabase, sample_kid_data):
+        processor = StoryProcessor.__new__(StoryProcessor)
+        processor.supabase = supabase
+        processor.artist_agent = None
+        processor.storyteller_agent = Mock(process=AsyncMock(return_value={
+            "title": "The Happy Cat",
+            "content": "Once upon a time...",
+            "cover_description": "A cat in a garden",
+        }))
+        processor.voice_agent = Mock(process=AsyncMock(return_value=(b"audio", "audio/mpeg")), cache=None)
+        supabase.get_kid = AsyncMock(return_value=Kid(**sample_kid_data))
+        supabase.upload_audio = AsyncMock(return_value="story-1.mp3")
+        supabase.get_user_approval_mode = AsyncMock(return_value="auto")
+        supabase.client = Mock(supabase_url="https://test.supabase.co")
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("src.core.story_processor.get_supabase_service", lambda: supabase)
+            await processor.process_text_to_story("story-1", "A cat in a garden", "kid-123", "en")
+
+        assert supabase.update_story.await_count == 1
+        assert supabase.finalize_story.await_count == 1
+        supabase.get_kid.assert_awaited_once()
+        supabase.get_user_approval_mode.assert_awaited_once()
+        final_update = supabase.finalize_story.await_args.args[1]
+        assert final_update["status"] == "approved"
+        assert final_update["audio_filename"] == "story-1.mp3"
+        assert "cover_image_url" in final_update
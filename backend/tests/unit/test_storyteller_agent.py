@@ -164,7 +164,7 @@ class TestStorytellerAgent:
         with patch('openai.OpenAI') as mock_openai:
             mock_openai.return_value = Mock()
             client = agent.get_vendor_client()
-            mock_openai.assert_called_once_with(api_key="test-api-key")
+            mock_openai.assert_called_once_with(api_key="test-api-key", max_retries=0)
         
         # Test Google initialization (mocked)
         agent.vendor = AgentVendor.GOOGLE
@@ -252,6 +252,33 @@ Once upon a time, there was a brave little dragon named Sparky. """ + "He loved
             assert result["content"]
             assert "dragon" in result["content"].lower()
 
+    
+    @pytest.mark.asyncio
+    async def test_streaming_reports_paragraphs_before_returning(self, agent_config):
+        """Streaming mode reports each paragraph as it completes and returns the parsed story."""
+        agent = create_storyteller_agent({**agent_config, "streaming": True})
+        paragraphs = ["Emma met a friendly dragon in the garden behind her house one sunny morning.",
+                      "Together they flew over the green hills and waved at every cloud they passed."]
+        raw = json.dumps({
+            "title": "Emma's Dragon",
+            "content": "\n\n".join(paragraphs),
+            "cover_description": "A girl riding a dragon"
+        })
+        
+        async def deltas(*args):
+            for i in range(0, len(raw), 5):
+                yield raw[i:i + 5]
+        
+        events = []
+        with patch.object(agent, '_stream_with_vendor', side_effect=deltas):
+            result = await agent.process(
+                "A dragon", on_event=lambda kind, text: events.append((kind, text)), kid_name="Emma", age=5
+            )
+        
+        assert [text for kind, text in events if kind == "paragraph"] == paragraphs
+        assert ("cover_description", "A girl riding a dragon") in events
+        assert result["content"] == "\n\n".join(paragraphs)
+
 
 class TestStoryModels:
     """Test story model validation."""
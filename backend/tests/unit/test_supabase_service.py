@@ -0,0 +1,281 @@
+"""Unit tests for SupabaseService data-layer behaviour (no network access)."""
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from postgrest import SyncPostgrestClient
+
+from src.services.supabase import SupabaseService
+from src.types.requests import UpdateKidRequest
+from src.core.pagination import encode_cursor, keyset_filter
+
+
+TEST_CONFIG = {
+    "supabase": {
+        "storage": {"bucket": "test-audio"},
+        "io_workers": 8,
+    }
+}
+
+
+@pytest.fixture
+def service():
+    """SupabaseService with a mocked client."""
+    with patch("src.services.supabase.get_config", return_value=TEST_CONFIG), \
+         patch("src.services.supabase.create_client", return_value=MagicMock()):
+        svc = SupabaseService(url="https://test.supabase.co", key="test-key")
+    yield svc
+    svc.close()
+
+
+class SlowQuery:
+    """Stand-in for a PostgREST builder whose execute() blocks like real network I/O."""
+
+    def __init__(self, delay: float, data=None):
+        self.delay = delay
+        self.data = data or []
+
+    def execute(self):
+        time.sleep(self.delay)
+        return MagicMock(data=self.data)
+
+
+class TestNonBlockingDataLayer:
+    """Blocking supabase-py calls must not stall the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_queries_overlap_on_io_pool(self, service):
+        """Eight 100ms queries should complete in far less than 800ms."""
+        start = time.perf_counter()
+        await asyncio.gather(*(service._execute(SlowQuery(0.1)) for _ in range(8)))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self, service):
+        """Other coroutines keep running while a query is in flight."""
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(service._execute(SlowQuery(0.1)), ticker())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.09
+
+    @pytest.mark.asyncio
+    async def test_get_kid_returns_none_when_missing(self, service):
+        """get_kid maps an empty result to None."""
+        service.client.table.return_value.select.return_value.eq.return_value = SlowQuery(0, [])
+
+        assert await service.get_kid("missing") is None
+
+
+class TestParentProfileCache:
+    """Parent settings come from one cached auth admin lookup."""
+
+    @pytest.fixture
+    def auth_user(self):
+        user = MagicMock()
+        user.user.email = "parent@example.com"
+        user.user.user_metadata = {
+            "approval_mode": "email",
+            "notification_preferences": {"new_story": False},
+        }
+        return user
+
+    @pytest.mark.asyncio
+    async def test_accessors_share_one_auth_call(self, service, auth_user):
+        get_user = service.client.auth.admin.get_user_by_id
+        get_user.return_value = auth_user
+
+        assert await service.get_user_approval_mode("user-1") == "email"
+        assert await service.get_user_email("user-1") == "parent@example.com"
+        assert await service.get_user_notification_preferences("user-1") == {
+            "new_story": False,
+            "email_notifications": True,
+        }
+        assert get_user.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_forces_refetch(self, service, auth_user):
+        get_user = service.client.auth.admin.get_user_by_id
+        get_user.return_value = auth_user
+        await service.get_user_approval_mode("user-1")
+
+        auth_user.user.user_metadata = {"approval_mode": "app"}
+        service.invalidate_parent_profile("user-1")
+
+        assert await service.get_user_approval_mode("user-1") == "app"
+        assert get_user.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_auth_failure_falls_back_to_defaults_uncached(self, service, auth_user):
+        get_user = service.client.auth.admin.get_user_by_id
+        get_user.side_effect = [Exception("auth down"), auth_user]
+
+        assert await service.get_user_approval_mode("user-1") == "auto"
+        assert await service.get_user_approval_mode("user-1") == "email"
+
+
+class TestKidProfileCache:
+    """get_kid is served read-through and kept fresh by kid writes."""
+
+    @pytest.fixture
+    def kid_row(self, sample_kid_data):
+        return dict(sample_kid_data)
+
+    @pytest.mark.asyncio
+    async def test_repeat_reads_hit_cache(self, service, kid_row):
+        query = MagicMock(wraps=SlowQuery(0, [kid_row]))
+        service.client.table.return_value.select.return_value.eq.return_value = query
+
+        first = await service.get_kid("kid-123")
+        second = await service.get_kid("kid-123")
+
+        assert first.name == second.name == kid_row["name"]
+        assert query.execute.call_count == 1
+        assert service.cache_stats()[0]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_update_refreshes_cached_kid(self, service, kid_row):
+        table = service.client.table.return_value
+        table.select.return_value.eq.return_value = SlowQuery(0, [kid_row])
+        await service.get_kid("kid-123")
+
+        table.update.return_value.eq.return_value = SlowQuery(0, [{**kid_row, "name": "Renamed"}])
+        await service.update_kid("kid-123", UpdateKidRequest(name="Renamed"))
+
+        assert (await service.get_kid("kid-123")).name == "Renamed"
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_cached_kid(self, service, kid_row):
+        table = service.client.table.return_value
+        table.select.return_value.eq.return_value = SlowQuery(0, [kid_row])
+        await service.get_kid("kid-123")
+
+        table.delete.return_value.eq.return_value = SlowQuery(0, [kid_row])
+        await service.delete_kid("kid-123")
+        table.select.return_value.eq.return_value = SlowQuery(0, [])
+
+        assert await service.get_kid("kid-123") is None
+
+
+class TestStoryCount:
+    """Story counts come from a head-only count query."""
+
+    @pytest.mark.asyncio
+    async def test_count_uses_exact_head_query(self, service):
+        select = service.client.table.return_value.select
+        select.return_value.eq.return_value = MagicMock(
+            execute=MagicMock(return_value=MagicMock(data=[], count=57))
+        )
+
+        assert await service.count_stories_for_kid("kid-123") == 57
+        select.assert_called_once_with("id", count="exact", head=True)
+
+
+class TestStorageUploads:
+    """Re-uploads of a retried job's objects replace them instead of failing."""
+
+    @pytest.mark.asyncio
+    async def test_upsert_is_passed_to_storage(self, service):
+        upload = service.client.storage.from_.return_value.upload
+
+        await service.upload_file("story-covers", "generated/s1/cover.png", b"png", "image/png", upsert=True)
+        await service.upload_file("story-uploads", "s1/input", b"img", "image/jpeg")
+
+        assert upload.call_args_list[0].kwargs["file_options"]["upsert"] == "true"
+        assert upload.call_args_list[1].kwargs["file_options"]["upsert"] == "false"
+
+
+class TestKeysetListing:
+    """Story listings seek by cursor instead of scanning an offset."""
+
+    @pytest.mark.asyncio
+    async def test_cursor_replaces_offset(self, service):
+        query = MagicMock()
+        query.eq.return_value = query
+        query.or_.return_value = query
+        query.order.return_value = query
+        query.limit.return_value = query
+        query.execute.return_value = MagicMock(data=[])
+        service.client.table.return_value.select.return_value = query
+        cursor = encode_cursor("2024-05-01T00:00:00+00:00", "99999999-9999-4999-8999-999999999999")
+
+        await service.get_stories_for_kid("kid-123", limit=10, offset=40, cursor=cursor)
+
+        query.or_.assert_called_once_with(keyset_filter(cursor))
+        query.offset.assert_not_called()
+        assert [c.args[0] for c in query.order.call_args_list] == ["created_at", "id"]
+
+
+class TestListProjection:
+    """Summary listings select only the columns list screens render."""
+
+    @pytest.mark.asyncio
+    async def test_summary_view_skips_heavy_columns(self, service):
+        query = MagicMock()
+        query.eq.return_value = query
+        query.order.return_value = query
+        query.limit.return_value = query
+        query.execute.return_value = MagicMock(data=[{
+            "id": "story-1", "kid_id": "kid-123", "title": "The Happy Cat",
+            "status": "approved", "language": "en", "created_at": "2024-01-01T00:00:00Z",
+        }])
+        select = service.client.table.return_value.select
+        select.return_value = query
+
+        stories = await service.get_stories_for_kid("kid-123", view="summary")
+
+        columns = select.call_args.args[0]
+        for heavy in ("content", "cover_image_metadata", "image_description", "*"):
+            assert heavy not in columns.split(", ")
+        assert stories[0].title == "The Happy Cat"
+        assert stories[0].content == ""
+
+
+class TestPendingQueue:
+    """The pending review queue is scoped, paged and joined to one input."""
+
+    @pytest.mark.asyncio
+    async def test_query_is_scoped_and_bounded(self, service):
+        query = MagicMock()
+        for method in ("eq", "or_", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data=[{
+            "id": "story-1", "kid_id": "kid-123", "title": "The Happy Cat",
+            "status": "pending", "language": "en", "created_at": "2024-01-01T00:00:00Z",
+            "kids": {"name": "Alice", "user_id": "user-456"},
+            "story_inputs": [{"input_value": "A cat in a garden"}],
+        }])
+        service.client.table.return_value.select.return_value = query
+
+        stories = await service.get_pending_stories(user_id="user-456", limit=10)
+
+        query.eq.assert_any_call("kids.user_id", "user-456")
+        query.limit.assert_any_call(1, foreign_table="story_inputs")
+        query.limit.assert_any_call(10)
+        assert stories[0].child_name == "Alice"
+        assert stories[0].image_description == "A cat in a garden"
+
+    @pytest.mark.asyncio
+    async def test_embedded_inputs_are_ordered_by_their_own_param(self, service):
+        service.client.table = SyncPostgrestClient("https://test.supabase.co/rest/v1").from_
+        executed = []
+
+        async def execute(query):
+            executed.append(query)
+            return MagicMock(data=[])
+        service._execute = execute
+
+        await service.get_pending_stories(user_id="user-456", limit=10)
+
+        params = executed[0].params
+        assert params.get("order") == "created_at.desc,id.desc"
+        assert params.get("story_inputs.order") == "created_at.asc"
+        assert params.get("story_inputs.limit") == "1"
@@ -0,0 +1,91 @@
+"""Unit tests for pipeline timing spans."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.core.stage_graph import Stage, StageGraph
+from src.utils.timing import Timeline, span, current_span, timed
+
+
+class FakeAgent:
+    vendor = Mock(value="openai")
+    model = "gpt-4o"
+
+    @timed("agent.fake")
+    async def process(self, input_data, **kwargs):
+        current_span().set(retries=1)
+        return input_data.upper()
+
+
+class TestTimeline:
+    """Spans land on the timeline of the run they belong to, including spawned tasks."""
+
+    @pytest.mark.asyncio
+    async def test_spans_are_recorded_across_tasks(self):
+        timeline = Timeline()
+
+        async def upload():
+            with span("storage.upload", bytes_in=3):
+                await asyncio.sleep(0)
+
+        with timeline.record():
+            with span("stage.voice"):
+                await asyncio.create_task(upload())
+            assert await FakeAgent().process("héllo") == "HÉLLO"
+
+        names = [entry["name"] for entry in timeline.to_dict()["spans"]]
+        assert names == ["stage.voice", "storage.upload", "agent.fake"]
+        agent_span = timeline.to_dict()["spans"][2]
+        assert agent_span["vendor"] == "openai"
+        assert agent_span["model"] == "gpt-4o"
+        assert (agent_span["bytes_in"], agent_span["bytes_out"], agent_span["retries"]) == (6, 6, 1)
+
+    @pytest.mark.asyncio
+    async def test_nothing_is_recorded_without_a_timeline(self):
+        with span("stage.vision") as timing:
+            timing.set(vendor="google")
+            current_span().set(model="gemini")
+
+        assert timing.attrs == {}
+        assert await FakeAgent().process("x") == "X"
+
+    @pytest.mark.asyncio
+    async def test_errors_and_span_limit(self):
+        timeline = Timeline(max_spans=1)
+
+        with timeline.record():
+            with pytest.raises(ValueError):
+                with span("agent.vision"):
+                    raise ValueError("bad image")
+            with span("agent.storyteller"):
+                pass
+
+        data = timeline.to_dict()
+        assert data["spans"] == [{"name": "agent.vision", "start_ms": data["spans"][0]["start_ms"],
+                                  "ms": data["spans"][0]["ms"], "error": "ValueError"}]
+        assert data["dropped_spans"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stage_spans_record_retries_and_recovered_failures(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("blip")
+            return "ok"
+
+        async def broken():
+            raise RuntimeError("down")
+
+        timeline = Timeline()
+        with timeline.record():
+            await StageGraph([
+                Stage("vision", flaky, retries=1),
+                Stage("artist", broken, optional=True, recover=AsyncMock(return_value=None)),
+            ]).run()
+
+        spans = {entry["name"]: entry for entry in timeline.to_dict()["spans"]}
+        assert spans["stage.vision"]["retries"] == 1
+        assert "error" not in spans["stage.vision"]
+        assert spans["stage.artist"]["error"] == "RuntimeError"
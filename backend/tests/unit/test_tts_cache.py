@@ -0,0 +1,119 @@
+"""Unit tests for the content-addressed TTS audio cache."""
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.agents.voice.agent import VoiceAgent
+from src.agents.voice.cache import TtsAudioCache, is_cached_audio
+from src.core.story_processor import StoryProcessor
+from src.types.domain import Kid
+from src.types.requests import CreateKidRequest
+
+VOICE_CONFIG = {
+    "languages": {"en": {"vendor": "openai", "voice": "coral"}, "ru": {"vendor": "openai", "voice": "coral"}},
+    "vendors": {
+        "openai": {
+            "api_key": "test-key",
+            "model": "gpt-4o-mini-tts",
+            "default_settings": {"response_format": "mp3", "instructions": "Warm"},
+            "language_overrides": {"ru": {"settings": {"instructions": "Тепло"}}},
+        }
+    },
+}
+
+
+def voice_agent(config=VOICE_CONFIG) -> VoiceAgent:
+    agent = VoiceAgent.__new__(VoiceAgent)
+    agent.voice_config = config
+    return agent
+
+
+class TestCacheKey:
+    """The key covers the text and every setting that changes the audio, not the API key."""
+
+    def test_key_changes_with_text_and_settings(self):
+        agent = voice_agent()
+        key = agent.cache_key("Once upon a time", "en")
+
+        assert key == agent.cache_key("Once upon a time", "en")
+        assert key != agent.cache_key("Once upon a time.", "en")
+        assert key != agent.cache_key("Once upon a time", "ru")
+
+        rotated = {**VOICE_CONFIG, "vendors": {"openai": {**VOICE_CONFIG["vendors"]["openai"], "api_key": "new"}}}
+        assert voice_agent(rotated).cache_key("Once upon a time", "en") == key
+        other_voice = {**VOICE_CONFIG, "languages": {"en": {"vendor": "openai", "voice": "nova"}}}
+        assert voice_agent(other_voice).cache_key("Once upon a time", "en") != key
+
+
+class TestTtsAudioCache:
+    """Audio is uploaded once per key; unreferenced idle objects are evicted."""
+
+    @pytest.mark.asyncio
+    async def test_store_then_hit(self, local_repo):
+        cache = TtsAudioCache(local_repo, {})
+
+        assert await cache.lookup("abc") is None
+        filename = await cache.store("abc", b"mp3 bytes", "audio/mpeg")
+
+        assert filename == "tts/abc.mp3"
+        assert is_cached_audio(filename) and not is_cached_audio("story-1.mp3")
+        assert await cache.lookup("abc") == "tts/abc.mp3"
+        assert (local_repo.storage_root / local_repo.storage_bucket / filename).read_bytes() == b"mp3 bytes"
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_unreferenced(self, local_repo):
+        cache = TtsAudioCache(local_repo, {"max_entries": 1, "min_idle_seconds": 0})
+        kid = await local_repo.create_kid(CreateKidRequest(
+            user_id="11111111-1111-1111-1111-111111111111", name="Alice", age=6, avatar_type="profile1"))
+        await cache.store("referenced", b"a", "audio/mpeg")
+        await local_repo.create_story({"kid_id": kid.id, "title": "Story", "content": "", "language": "en",
+                                       "status": "approved", "audio_filename": "tts/referenced.mp3"})
+        await cache.store("stale", b"b", "audio/mpeg")
+        await cache.store("fresh", b"c", "audio/mpeg")
+
+        assert await local_repo.find_tts_audio("stale") is None
+        assert not (local_repo.storage_root / local_repo.storage_bucket / "tts/stale.mp3").exists()
+        assert await cache.lookup("referenced") == "tts/referenced.mp3"
+        assert await cache.lookup("fresh") == "tts/fresh.mp3"
+
+    @pytest.mark.asyncio
+    async def test_recently_used_objects_are_kept(self, local_repo):
+        for key in ("one", "two"):
+            evicted = await local_repo.save_tts_audio(key, f"tts/{key}.mp3", "audio/mpeg", 10,
+                                                      max_entries=1, max_bytes=10, min_idle_seconds=3600)
+            assert evicted == []
+
+
+class TestProcessorAudioReuse:
+    """A second story with the same text points at the first one's audio."""
+
+    @pytest.mark.asyncio
+    async def test_same_text_is_synthesized_once(self, local_repo, sample_kid_data):
+        supabase = Mock()
+        supabase.update_story = AsyncMock(return_value=Mock(id="story-1"))
+        supabase.finalize_story = AsyncMock(return_value=Mock(id="story-1"))
+        supabase.get_kid = AsyncMock(return_value=Kid(**sample_kid_data))
+        supabase.get_user_approval_mode = AsyncMock(return_value="auto")
+        supabase.client = Mock(supabase_url="https://test.supabase.co")
+
+        agent = voice_agent()
+        agent.process = AsyncMock(return_value=(b"audio", "audio/mpeg"))
+        agent.can_synthesize_paragraphs = Mock(return_value=False)
+        agent._cache = TtsAudioCache(local_repo, {})
+        agent.voice_config = {**VOICE_CONFIG, "cache": {"enabled": True}}
+
+        processor = StoryProcessor.__new__(StoryProcessor)
+        processor.supabase = supabase
+        processor.artist_agent = None
+        processor.storyteller_agent = Mock(streaming=False, process=AsyncMock(return_value={
+            "title": "The Happy Cat", "content": "Once upon a time...", "cover_description": "A cat",
+        }))
+        processor.voice_agent = agent
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("src.core.story_processor.get_supabase_service", lambda: supabase)
+            for story_id in ("story-1", "story-2"):
+                await processor.process_text_to_story(story_id, "A cat in a garden", "kid-123", "en")
+
+        agent.process.assert_awaited_once()
+        first, second = (call.args[1]["audio_filename"] for call in supabase.finalize_story.await_args_list)
+        assert first == second == f"tts/{agent.cache_key('Once upon a time...', 'en')}.mp3"
@@ -0,0 +1,143 @@
+"""Unit tests for the vision description cache."""
+import base64
+import io
+import pytest
+from unittest.mock import AsyncMock
+from PIL import Image, ImageDraw
+
+from src.agents.base import AgentVendor
+from src.agents.vision.agent import VisionAgent
+from src.agents.vision.cache import VisionDescriptionCache
+from src.utils.image_hash import perceptual_hash, hamming_distance
+
+SCOPE = "google/gemini/v1-abc"
+
+
+def drawing(size=(256, 192), fmt="PNG", flip=False) -> bytes:
+    """A simple picture: diagonal gradient with a dark box."""
+    image = Image.new("RGB", size)
+    width, height = size
+    for x in range(width):
+        for y in range(height):
+            shade = int(255 * (x + y) / (width + height))
+            image.putpixel((x, y), (shade, 255 - shade, 120))
+    box = (width // 4, height // 4, width // 2, height // 2)
+    image.paste((20, 20, 20), box)
+    if flip:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=70)
+    return buffer.getvalue()
+
+
+def sparse_drawing(draw) -> bytes:
+    """A few strokes on a blank white page, like a young child's drawing."""
+    image = Image.new("RGB", (1024, 768), "white")
+    draw(ImageDraw.Draw(image))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+SPARSE_DRAWINGS = {
+    "circle": sparse_drawing(lambda d: d.ellipse((480, 360, 540, 420), outline="black", width=4)),
+    "line": sparse_drawing(lambda d: d.line((200, 300, 600, 320), fill="black", width=4)),
+    "word": sparse_drawing(lambda d: d.text((500, 380), "cat", fill="black")),
+    "rectangle": sparse_drawing(lambda d: d.rectangle((300, 200, 360, 240), outline="black", width=3)),
+    "blank": sparse_drawing(lambda d: None),
+}
+
+
+class TestPerceptualHash:
+    """dHash survives re-encoding and resizing but tells different pictures apart."""
+
+    def test_reencoded_and_resized_images_stay_close(self):
+        original = perceptual_hash(drawing())
+
+        assert hamming_distance(original, perceptual_hash(drawing(size=(128, 96), fmt="JPEG"))) <= 4
+        assert hamming_distance(original, perceptual_hash(drawing(flip=True))) > 10
+        assert perceptual_hash(b"not an image") is None
+
+    def test_sparse_drawings_have_no_perceptual_hash(self):
+        # These all hash within 4 bits of each other, so comparing them is meaningless
+        for name, image in SPARSE_DRAWINGS.items():
+            assert perceptual_hash(image) is None, name
+
+
+class TestVisionDescriptionCache:
+    """Descriptions are found by exact bytes or a near perceptual hash, and bounded."""
+
+    @pytest.mark.asyncio
+    async def test_exact_and_similar_hits(self, local_repo):
+        cache = VisionDescriptionCache(local_repo, {"max_distance": 4})
+        original = cache.image_keys(base64.b64encode(drawing()).decode())
+        await cache.store(SCOPE, original, "A green and pink picture with a black box", "kid-1")
+
+        assert await cache.lookup(SCOPE, original, "kid-1") == "A green and pink picture with a black box"
+        resized = cache.image_keys(base64.b64encode(drawing(size=(128, 96), fmt="JPEG")).decode())
+        assert resized.content_hash != original.content_hash
+        assert await cache.lookup(SCOPE, resized, "kid-1") == "A green and pink picture with a black box"
+        assert await cache.lookup("openai/gpt-4o/v1-abc", original, "kid-1") is None
+        flipped = cache.image_keys(base64.b64encode(drawing(flip=True)).decode())
+        assert await cache.lookup(SCOPE, flipped, "kid-1") is None
+
+    @pytest.mark.asyncio
+    async def test_similar_matches_stay_within_one_kid(self, local_repo):
+        cache = VisionDescriptionCache(local_repo, {"max_distance": 4})
+        original = cache.image_keys(base64.b64encode(drawing()).decode())
+        await cache.store(SCOPE, original, "A green and pink picture with a black box", "kid-1")
+        resized = cache.image_keys(base64.b64encode(drawing(size=(128, 96), fmt="JPEG")).decode())
+
+        # The exact same bytes are shared; a merely similar picture is not
+        assert await cache.lookup(SCOPE, original, "kid-2") == "A green and pink picture with a black box"
+        assert await cache.lookup(SCOPE, resized, "kid-2") is None
+        assert await cache.lookup(SCOPE, resized) is None
+
+    @pytest.mark.asyncio
+    async def test_distinct_sparse_drawings_do_not_match(self, local_repo):
+        cache = VisionDescriptionCache(local_repo, {"max_distance": 4})
+        keys = {name: cache.image_keys(base64.b64encode(image).decode())
+                for name, image in SPARSE_DRAWINGS.items()}
+        await cache.store(SCOPE, keys["circle"], "A circle", "kid-1")
+
+        for name in ("line", "word", "rectangle", "blank"):
+            assert await cache.lookup(SCOPE, keys[name], "kid-1") is None, name
+        assert await cache.lookup(SCOPE, keys["circle"], "kid-1") == "A circle"
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_are_evicted(self, local_repo):
+        for index in range(3):
+            await local_repo.save_vision_description(SCOPE, f"hash-{index}", None, "kid-1", f"picture {index}",
+                                                     max_entries=2)
+
+        assert await local_repo.find_vision_description(SCOPE, "hash-0", None, "kid-1", 4) is None
+        match = await local_repo.find_vision_description(SCOPE, "hash-2", None, "kid-1", 4)
+        assert match["description"] == "picture 2"
+
+    def test_scope_changes_with_prompt(self):
+        cache = VisionDescriptionCache(None, {"prompt_version": 2})
+
+        assert cache.scope("google", "gemini", "Describe it") != cache.scope("google", "gemini", "Describe more")
+        assert cache.scope("google", "gemini", "Describe it").startswith("google/gemini/v2-")
+
+
+class TestVisionAgentCache:
+    """A cached description skips the vendor call."""
+
+    @pytest.mark.asyncio
+    async def test_second_upload_uses_cache(self, local_repo):
+        agent = VisionAgent.__new__(VisionAgent)
+        agent.vendor = AgentVendor.GOOGLE
+        agent.model = "gemini"
+        agent.api_key = "test-key"
+        agent.config = {"cache": {"enabled": True}}
+        agent.prompts = {"image_caption": {"default": "Describe this image"}}
+        agent._client = object()
+        agent._cache = VisionDescriptionCache(local_repo, agent.config["cache"])
+        agent._process_google = AsyncMock(return_value="A cat in a garden")
+        image = base64.b64encode(drawing()).decode()
+
+        assert await agent.process(image, kid_id="kid-1") == "A cat in a garden"
+        assert await agent.process(image, kid_id="kid-1") == "A cat in a garden"
+
+        agent._process_google.assert_awaited_once()
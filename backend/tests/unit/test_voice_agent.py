@@ -0,0 +1,136 @@
+"""Unit tests for paragraph-parallel TTS and audio joining."""
+import io
+import struct
+import pytest
+from unittest.mock import patch
+
+from src.agents.voice.agent import VoiceAgent
+from src.agents.base import AgentVendor
+from src.agents.voice.audio import OggPage, concat_audio, concat_ogg_opus, ogg_crc, parse_ogg_pages
+
+# MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames
+MP3_HEADER = b"\xff\xfb\x90\x00"
+
+
+def mp3_frames(count, info_frame=False):
+    frames = []
+    if info_frame:
+        frames.append(MP3_HEADER + b"\x00" * 32 + b"Info" + b"\x00" * (417 - 40))
+    frames += [MP3_HEADER + b"\x00" * 413] * count
+    return b"".join(frames)
+
+
+def opus_file(serial, granules, tags_pages=1):
+    """Minimal Ogg Opus file: OpusHead page, OpusTags page(s), then audio pages."""
+    pages = [OggPage(0x02, 0, serial, 0, b"\x13", b"OpusHead" + b"\x00" * 11)]
+    for index in range(tags_pages):
+        last = index == tags_pages - 1
+        pages.append(OggPage(0x00 if index == 0 else 0x01, 0, serial, len(pages),
+                             b"\x0a" if last else b"\xff", b"t" * (10 if last else 255)))
+    for granule in granules:
+        pages.append(OggPage(0x00, granule, serial, len(pages), b"\x03", b"pkt"))
+    pages[-1].header_type |= 0x04
+    return b"".join(page.to_bytes() for page in pages)
+
+
+def make_agent(**parallel):
+    config = {
+        "languages": {"en": {"vendor": "openai", "voice": "coral"}},
+        "vendors": {"openai": {"api_key": "k", "model": "tts-1", "default_settings": {"response_format": "mp3"}}},
+        "parallel": {"enabled": True, "max_concurrency": 2, "min_chunk_chars": 0,
+                     "chunk_retries": 1, "retry_backoff_seconds": 0, **parallel},
+    }
+    return VoiceAgent(AgentVendor.OPENAI, config)
+
+
+class TestParallelSynthesis:
+    """Stories are voiced as concurrent paragraph chunks; only failed chunks are retried."""
+
+    def test_short_paragraphs_are_merged(self):
+        agent = make_agent(min_chunk_chars=10)
+
+        assert agent.split_chunks("Hi.\n\nA longer paragraph.\n\n\n\nEnd.") == [
+            "Hi.\n\nA longer paragraph.\n\nEnd."
+        ]
+        assert make_agent().split_chunks("One.\n\nTwo.") == ["One.", "Two."]
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_joined_in_order_and_only_failures_retried(self):
+        agent = make_agent()
+        calls = []
+
+        async def synthesize(text, language):
+            calls.append(text)
+            if text == "Two." and calls.count("Two.") == 1:
+                raise RuntimeError("timeout")
+            return mp3_frames(1, info_frame=True), "audio/mpeg"
+
+        with patch.object(agent, "_synthesize", side_effect=synthesize):
+            audio, content_type = await agent.process("One.\n\nTwo.\n\nThree.", language="en")
+
+        assert sorted(calls) == ["One.", "Three.", "Two.", "Two."]
+        assert content_type == "audio/mpeg"
+        assert audio == mp3_frames(3)
+
+    @pytest.mark.asyncio
+    async def test_chunk_failing_every_attempt_fails_the_story(self):
+        agent = make_agent()
+
+        async def synthesize(text, language):
+            if text == "Two.":
+                raise RuntimeError("vendor down")
+            return mp3_frames(1), "audio/mpeg"
+
+        with patch.object(agent, "_synthesize", side_effect=synthesize):
+            with pytest.raises(RuntimeError):
+                await agent.process("One.\n\nTwo.", language="en")
+
+    @pytest.mark.asyncio
+    async def test_disabled_sends_whole_text(self):
+        agent = make_agent(enabled=False)
+
+        with patch.object(agent, "_synthesize", return_value=(b"audio", "audio/mpeg")) as synthesize:
+            await agent.process("One.\n\nTwo.", language="en")
+
+        synthesize.assert_awaited_once_with("One.\n\nTwo.", "en")
+
+
+class TestAudioJoin:
+    """Joined files keep valid framing."""
+
+    def test_mp3_duration_covers_all_segments(self):
+        from mutagen.mp3 import MP3
+
+        joined = concat_audio([mp3_frames(10, info_frame=True), mp3_frames(20, info_frame=True)], "audio/mpeg")
+
+        assert len(joined) == 30 * 417
+        assert MP3(io.BytesIO(joined)).info.length == pytest.approx(30 * 1152 / 44100, rel=0.01)
+
+    def test_ogg_opus_becomes_one_logical_stream(self):
+        first = opus_file(111, [960, 1920])
+        second = opus_file(222, [1272, 2232], tags_pages=2)
+
+        pages = parse_ogg_pages(concat_ogg_opus([first, second]))
+
+        assert [page.body[:8] for page in pages[:1]] == [b"OpusHead"]
+        assert len(pages) == 2 + 2 + 2  # headers of the first file, audio of both
+        assert {page.serial for page in pages} == {111}
+        assert [page.sequence for page in pages] == list(range(6))
+        assert [page.granule for page in pages[2:]] == [960, 1920, 1920 + 1272, 1920 + 2232]
+        assert [bool(page.header_type & 0x04) for page in pages] == [False] * 5 + [True]
+        # Checksums were recomputed for the rewritten pages
+        joined = concat_ogg_opus([first, second])
+        offset = 0
+        for page in pages:
+            raw = page.to_bytes()
+            assert joined[offset:offset + len(raw)] == raw
+            stored = struct.unpack_from("<I", raw, 22)[0]
+            assert stored == ogg_crc(raw[:22] + b"\x00" * 4 + raw[26:])
+            offset += len(raw)
+
+    def test_ogg_crc_check_value(self):
+        assert ogg_crc(b"123456789") == 0x89A1897F
+
+    def test_unsupported_format(self):
+        with pytest.raises(ValueError):
+            concat_audio([b"a", b"b"], "audio/wav")
@@ -0,0 +1,88 @@
+"""Mira Storyteller Backend - Pipeline worker entry point.
+
+Runs story pipeline jobs from the story_jobs queue without serving HTTP, so API
+processes scale on request rate and worker processes on pipeline backlog. When
+dedicated workers are deployed, start the API with JOBS_EMBEDDED_WORKER=false.
+"""
+import asyncio
+import signal
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+from src.utils.config import load_config
+from src.utils.logger import setup_logging, get_logger
+
+# Load environment variables from root .env file
+load_dotenv("../.env")
+
+logger = get_logger("worker")
+
+
+def install_event_loop_policy(worker_config: Dict[str, Any]) -> None:
+    """Use uvloop when enabled and installed (optional dependency)."""
+    if not worker_config.get("uvloop", True):
+        return
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return
+    uvloop.install()
+    logger.info("Using uvloop event loop")
+
+
+async def run_worker(config: Dict[str, Any]) -> None:
+    """Run the story job worker until SIGINT/SIGTERM, then drain running jobs."""
+    from src.core import story_jobs
+    from src.core.story_processor import get_story_processor
+    from src.services.supabase import get_supabase_service
+
+    jobs_config = config.get("jobs", {})
+    worker_config = jobs_config.get("worker", {})
+
+    loop = asyncio.get_running_loop()
+    slow_callback_ms = worker_config.get("slow_callback_warning_ms")
+    if slow_callback_ms:
+        # Debug mode logs callbacks that block the loop longer than this
+        loop.set_debug(True)
+        loop.slow_callback_duration = slow_callback_ms / 1000
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Build agents up front so misconfiguration fails at startup, not on the first job
+    get_story_processor(config["agents"])
+
+    worker = await story_jobs.start_story_worker({
+        **jobs_config,
+        "concurrency": worker_config.get("concurrency", jobs_config.get("concurrency", 4))
+    })
+    logger.info(f"Pipeline worker {worker.worker_id} running")
+
+    await stop.wait()
+
+    logger.info("Pipeline worker shutting down...")
+    await story_jobs.stop_story_worker(worker_config.get("shutdown_timeout_seconds"))
+    get_supabase_service().close()
+
+
+def main() -> None:
+    config = load_config()
+    logging_config = config.get("logging", {})
+    setup_logging(
+        level=logging_config.get("level", "INFO"),
+        format_type=logging_config.get("format", "json")
+    )
+
+    worker_config = config.get("jobs", {}).get("worker", {})
+    # Workers get their own data-layer pool size; the API default is sized for requests
+    if worker_config.get("io_workers"):
+        config["supabase"]["io_workers"] = worker_config["io_workers"]
+
+    install_event_loop_policy(worker_config)
+    asyncio.run(run_worker(config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+-- Index-backed plan for the per-parent pending review queue
+-- (SupabaseService.get_pending_stories).
+--
+-- The query filters kids by user_id, joins stories on kid_id with
+-- status = 'pending', and seeks/orders on (created_at DESC, id DESC).
+-- The partial index holds only pending rows, so its size tracks the queue
+-- depth rather than the whole stories table.
+
+create index if not exists kids_user_id_idx
+    on public.kids (user_id);
+
+create index if not exists stories_pending_queue_idx
+    on public.stories (kid_id, created_at desc, id desc)
+    where status = 'pending';
+
+-- First input per story for the caption join
+create index if not exists story_inputs_story_id_created_at_idx
+    on public.story_inputs (story_id, created_at);
@@ -0,0 +1,114 @@
+-- Indexes for the filters the backend issues on every request, plus RPCs
+-- that turn multi-round-trip sequences into one atomic statement.
+--
+-- kids(user_id) is created in 20261016000000_pending_review_queue.sql.
+
+-- ---------------------------------------------------------------------------
+-- Indexes
+-- ---------------------------------------------------------------------------
+
+-- Child library: approved stories for a kid, newest first, keyset on (created_at, id)
+create index if not exists stories_kid_status_created_idx
+    on public.stories (kid_id, status, created_at desc, id desc);
+
+-- Parent dashboard listing and head-only story counts for a kid (any status)
+create index if not exists stories_kid_created_idx
+    on public.stories (kid_id, created_at desc, id desc);
+
+-- Status-wide scans (unscoped pending queue, maintenance jobs)
+create index if not exists stories_status_created_idx
+    on public.stories (status, created_at desc);
+
+-- get_story_input_by_type
+create index if not exists story_inputs_story_id_input_type_idx
+    on public.story_inputs (story_id, input_type);
+
+-- Email review links look tokens up by value; tokens are one-time and unique
+create unique index if not exists story_review_tokens_token_idx
+    on public.story_review_tokens (token);
+
+-- ---------------------------------------------------------------------------
+-- consume_review_token: validate, burn the token, set the story status and log
+-- the review action in one transaction. Returns no rows when the token is
+-- unknown, expired or was already used, so a double-clicked email link can
+-- never apply two reviews.
+-- ---------------------------------------------------------------------------
+create or replace function public.consume_review_token(
+    p_token text,
+    p_action text,
+    p_declined_reason text default null
+)
+returns table (story_id uuid, story_title text, kid_name text, user_id uuid, status text)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+    v_story_id uuid;
+begin
+    if p_action not in ('approve', 'decline') then
+        raise exception 'invalid review action: %', p_action using errcode = '22023';
+    end if;
+
+    -- Whoever deletes the row owns the review
+    delete from story_review_tokens t
+     where t.token = p_token
+       and t.expires_at > now()
+    returning t.story_id into v_story_id;
+
+    if v_story_id is null then
+        return;
+    end if;
+
+    update stories s
+       set status = case when p_action = 'approve' then 'approved' else 'rejected' end,
+           declined_reason = case when p_action = 'decline' then p_declined_reason else s.declined_reason end,
+           updated_at = now()
+     where s.id = v_story_id;
+
+    insert into story_review_actions (story_id, user_id, action, review_method, declined_reason)
+    select v_story_id, k.user_id, p_action, 'email', p_declined_reason
+      from stories s
+      join kids k on k.id = s.kid_id
+     where s.id = v_story_id;
+
+    return query
+    select s.id, s.title, k.name, k.user_id, s.status::text
+      from stories s
+      join kids k on k.id = s.kid_id
+     where s.id = v_story_id;
+end;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- finalize_story: apply the pipeline's buffered fields and terminal status in
+-- one statement. Only stories still in 'processing' are touched, so a retried
+-- or duplicate pipeline run can never overwrite a parent's review decision.
+-- Keys in p_fields that are not listed below are ignored.
+-- ---------------------------------------------------------------------------
+create or replace function public.finalize_story(p_story_id uuid, p_fields jsonb)
+returns setof public.stories
+language sql
+security definer
+set search_path = public
+as $$
+    update stories s
+       set (title, content, status, audio_filename, audio_error, audio_failed_at,
+            cover_image_url, cover_image_thumbnail_url, cover_image_metadata,
+            cover_image_generated_at)
+         = (select r.title, r.content, r.status, r.audio_filename, r.audio_error, r.audio_failed_at,
+                   r.cover_image_url, r.cover_image_thumbnail_url, r.cover_image_metadata,
+                   r.cover_image_generated_at
+              from jsonb_populate_record(s, p_fields) r),
+           updated_at = now()
+     where s.id = p_story_id
+       and s.status = 'processing'
+    returning s.*;
+$$;
+
+-- Both RPCs bypass RLS, so only the backend's service role may call them
+revoke all on function public.consume_review_token(text, text, text) from public, anon, authenticated;
+revoke all on function public.finalize_story(uuid, jsonb) from public, anon, authenticated;
+grant execute on function public.consume_review_token(text, text, text) to service_role;
+grant execute on function public.finalize_story(uuid, jsonb) to service_role;
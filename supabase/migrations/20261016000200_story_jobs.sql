@@ -0,0 +1,152 @@
+-- Durable queue for story pipeline runs. The API inserts a job row in the
+-- same request that creates the story; workers claim rows, heartbeat while
+-- they run and mark them succeeded or failed. A job whose worker died
+-- (deploy, crash, OOM) is picked up again once its heartbeat goes stale.
+
+create table if not exists public.story_jobs (
+    id uuid primary key default gen_random_uuid(),
+    kind text not null,
+    story_id uuid references public.stories (id) on delete cascade,
+    payload jsonb not null default '{}'::jsonb,
+    status text not null default 'queued'
+        check (status in ('queued', 'running', 'succeeded', 'failed')),
+    attempts integer not null default 0,
+    max_attempts integer not null default 3,
+    run_after timestamptz not null default now(),
+    locked_by text,
+    heartbeat_at timestamptz,
+    last_error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+-- Claim order for runnable jobs
+create index if not exists story_jobs_ready_idx
+    on public.story_jobs (run_after, created_at) where status = 'queued';
+
+-- Stale heartbeat sweep
+create index if not exists story_jobs_running_heartbeat_idx
+    on public.story_jobs (heartbeat_at) where status = 'running';
+
+create index if not exists story_jobs_story_id_idx
+    on public.story_jobs (story_id);
+
+-- Only the backend (service role) touches the queue
+alter table public.story_jobs enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- claim_story_jobs: hand up to p_limit runnable jobs to one worker. SKIP LOCKED
+-- lets any number of workers poll concurrently without claiming a job twice.
+-- ---------------------------------------------------------------------------
+create or replace function public.claim_story_jobs(p_worker text, p_limit integer)
+returns setof public.story_jobs
+language sql
+security definer
+set search_path = public
+as $$
+    update story_jobs j
+       set status = 'running',
+           attempts = j.attempts + 1,
+           locked_by = p_worker,
+           heartbeat_at = now(),
+           updated_at = now()
+     where j.id in (
+           select q.id
+             from story_jobs q
+            where q.status = 'queued'
+              and q.run_after <= now()
+            order by q.run_after, q.created_at
+            limit p_limit
+              for update skip locked)
+    returning j.*;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- heartbeat_story_jobs: uses the database clock so stale detection does not
+-- depend on worker clocks.
+-- ---------------------------------------------------------------------------
+create or replace function public.heartbeat_story_jobs(p_worker text, p_job_ids uuid[])
+returns integer
+language sql
+security definer
+set search_path = public
+as $$
+    with touched as (
+        update story_jobs
+           set heartbeat_at = now(), updated_at = now()
+         where id = any(p_job_ids)
+           and locked_by = p_worker
+           and status = 'running'
+        returning 1
+    )
+    select count(*)::integer from touched;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- fail_story_job: requeue after p_retry_in_seconds, or fail for good when it
+-- is null. Ignored if the worker no longer owns the job.
+-- ---------------------------------------------------------------------------
+create or replace function public.fail_story_job(
+    p_job_id uuid,
+    p_worker text,
+    p_error text,
+    p_retry_in_seconds double precision default null
+)
+returns setof public.story_jobs
+language sql
+security definer
+set search_path = public
+as $$
+    update story_jobs
+       set status = case when p_retry_in_seconds is null then 'failed' else 'queued' end,
+           run_after = case when p_retry_in_seconds is null then run_after
+                            else now() + make_interval(secs => p_retry_in_seconds) end,
+           last_error = p_error,
+           locked_by = null,
+           updated_at = now()
+     where id = p_job_id
+       and locked_by = p_worker
+       and status = 'running'
+    returning *;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- requeue_stale_story_jobs: recover running jobs whose heartbeat is older than
+-- p_stale_seconds. Jobs out of attempts fail and their story, if still
+-- processing, is marked as error so the app stops polling it.
+-- ---------------------------------------------------------------------------
+create or replace function public.requeue_stale_story_jobs(p_stale_seconds double precision)
+returns setof public.story_jobs
+language sql
+security definer
+set search_path = public
+as $$
+    with stale as (
+        update story_jobs j
+           set status = case when j.attempts >= j.max_attempts then 'failed' else 'queued' end,
+               locked_by = null,
+               last_error = 'worker heartbeat lost',
+               run_after = now(),
+               updated_at = now()
+         where j.status = 'running'
+           and j.heartbeat_at < now() - make_interval(secs => p_stale_seconds)
+        returning j.*
+    ), errored as (
+        update stories s
+           set status = 'error', updated_at = now()
+          from stale
+         where stale.status = 'failed'
+           and s.id = stale.story_id
+           and s.status = 'processing'
+    )
+    select * from stale;
+$$;
+
+revoke all on function public.claim_story_jobs(text, integer) from public, anon, authenticated;
+revoke all on function public.heartbeat_story_jobs(text, uuid[]) from public, anon, authenticated;
+revoke all on function public.fail_story_job(uuid, text, text, double precision) from public, anon, authenticated;
+revoke all on function public.requeue_stale_story_jobs(double precision) from public, anon, authenticated;
+grant execute on function public.claim_story_jobs(text, integer) to service_role;
+grant execute on function public.heartbeat_story_jobs(text, uuid[]) to service_role;
+grant execute on function public.fail_story_job(uuid, text, text, double precision) to service_role;
+grant execute on function public.requeue_stale_story_jobs(double precision) to service_role;
@@ -0,0 +1,76 @@
+-- Shared counters for inbound API rate limiting (rate_limit.backend =
+-- repository). Each (key, window) keeps one row per fixed window; the API
+-- estimates the sliding-window rate from the current and previous rows, so
+-- every API worker enforces the same limit.
+
+create table if not exists public.rate_limit_counters (
+    key text not null,
+    window_seconds integer not null,
+    window_index bigint not null,
+    count integer not null default 0,
+    primary key (key, window_seconds, window_index)
+);
+
+alter table public.rate_limit_counters enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- rate_limit_hit: count one request for p_key if it fits under p_limit in the
+-- sliding p_window_seconds window. Returns 0 when allowed, otherwise the
+-- seconds until it would be (same math as utils/rate_limit.py).
+-- ---------------------------------------------------------------------------
+create or replace function public.rate_limit_hit(p_key text, p_window_seconds integer, p_limit integer)
+returns double precision
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_now double precision := extract(epoch from clock_timestamp());
+    v_index bigint := floor(v_now / p_window_seconds);
+    v_elapsed double precision := v_now - v_index * p_window_seconds;
+    v_previous integer;
+    v_current integer;
+    v_retry double precision;
+begin
+    insert into rate_limit_counters (key, window_seconds, window_index, count)
+    values (p_key, p_window_seconds, v_index, 0)
+    on conflict (key, window_seconds, window_index) do nothing;
+
+    -- Row lock serialises concurrent hits on the same key
+    select count into v_current
+      from rate_limit_counters
+     where key = p_key and window_seconds = p_window_seconds and window_index = v_index
+       for update;
+
+    select coalesce(max(count), 0) into v_previous
+      from rate_limit_counters
+     where key = p_key and window_seconds = p_window_seconds and window_index = v_index - 1;
+
+    if v_previous * (1 - v_elapsed / p_window_seconds) + v_current + 1 <= p_limit then
+        v_retry := 0;
+    elsif v_current + 1 > p_limit then
+        v_retry := (p_window_seconds - v_elapsed)
+                   + p_window_seconds * (1 - (p_limit - 1)::double precision / v_current);
+    else
+        v_retry := greatest(
+            p_window_seconds * (1 - (p_limit - 1 - v_current)::double precision / v_previous) - v_elapsed, 0);
+    end if;
+
+    if v_retry = 0 then
+        update rate_limit_counters
+           set count = count + 1
+         where key = p_key and window_seconds = p_window_seconds and window_index = v_index;
+    end if;
+
+    -- Occasional cleanup of windows that can no longer affect any estimate
+    if random() < 0.01 then
+        delete from rate_limit_counters
+         where (window_index + 2) * window_seconds < v_now;
+    end if;
+
+    return v_retry;
+end;
+$$;
+
+revoke all on function public.rate_limit_hit(text, integer, integer) from public, anon, authenticated;
+grant execute on function public.rate_limit_hit(text, integer, integer) to service_role;
@@ -0,0 +1,54 @@
+-- Timing spans of story pipeline runs. The processor writes one row per run
+-- (including failed attempts) with the spans of every stage, agent call,
+-- storage upload and story write, so latency can be attributed per stage
+-- and per vendor.
+
+create table if not exists public.story_timelines (
+    id uuid primary key default gen_random_uuid(),
+    story_id uuid not null references public.stories (id) on delete cascade,
+    status text not null check (status in ('completed', 'failed')),
+    total_ms double precision,
+    spans jsonb not null default '[]'::jsonb,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists story_timelines_story_id_created_at_idx
+    on public.story_timelines (story_id, created_at);
+create index if not exists story_timelines_created_at_idx
+    on public.story_timelines (created_at);
+
+alter table public.story_timelines enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- story_timeline_spans: one row per span, for latency queries, e.g. p95 per
+-- stage and vendor over the last day:
+--
+--   select name, vendor, count(*),
+--          percentile_cont(0.95) within group (order by duration_ms) as p95_ms
+--     from story_timeline_spans
+--    where created_at > now() - interval '1 day'
+--    group by name, vendor
+--    order by p95_ms desc;
+-- ---------------------------------------------------------------------------
+create or replace view public.story_timeline_spans
+with (security_invoker = true) as
+select t.id as timeline_id,
+       t.story_id,
+       t.status as run_status,
+       t.created_at,
+       s.span ->> 'name' as name,
+       (s.span ->> 'start_ms')::double precision as start_ms,
+       (s.span ->> 'ms')::double precision as duration_ms,
+       s.span ->> 'vendor' as vendor,
+       s.span ->> 'model' as model,
+       (s.span ->> 'bytes_in')::bigint as bytes_in,
+       (s.span ->> 'bytes_out')::bigint as bytes_out,
+       coalesce((s.span ->> 'retries')::integer, 0) as retries,
+       s.span ->> 'error' as error
+  from public.story_timelines t
+ cross join lateral jsonb_array_elements(t.spans) as s(span);
+
+revoke all on public.story_timelines from anon, authenticated;
+revoke all on public.story_timeline_spans from anon, authenticated;
+grant select, insert on public.story_timelines to service_role;
+grant select on public.story_timeline_spans to service_role;
@@ -0,0 +1,71 @@
+-- Generation request keys claimed by a story, so retried or repeated
+-- /stories/generate and /stories/submit-text requests attach to the story
+-- the first request started instead of running another pipeline. Keys are
+-- the client's Idempotency-Key (scoped by kid) and a content key such as
+-- (kid, language, image sha256); each expires after its own window.
+--
+-- Claims are taken before the story row exists, so story_id is not a
+-- foreign key; the API treats claims of missing or failed stories as free.
+
+create table if not exists public.story_requests (
+    key text primary key,
+    story_id uuid not null,
+    expires_at timestamptz not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists story_requests_story_id_idx on public.story_requests (story_id);
+create index if not exists story_requests_expires_at_idx on public.story_requests (expires_at);
+
+alter table public.story_requests enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- claim_story_request: claim every key in p_keys for p_story_id, each for the
+-- matching p_ttl_seconds. Returns no rows when all keys were claimed; if an
+-- unexpired claim already holds one of them, nothing is claimed and that
+-- claim is returned with its age.
+-- ---------------------------------------------------------------------------
+create or replace function public.claim_story_request(p_keys text[], p_ttl_seconds integer[], p_story_id uuid)
+returns table (story_id uuid, age_seconds double precision)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_claimed integer;
+begin
+    delete from story_requests r
+     where r.key = any(p_keys) and r.expires_at <= now();
+
+    -- A concurrent claim of the same key blocks here until it commits
+    insert into story_requests (key, story_id, expires_at)
+    select k.key, p_story_id, now() + make_interval(secs => k.ttl)
+      from unnest(p_keys, p_ttl_seconds) as k(key, ttl)
+    on conflict (key) do nothing;
+    get diagnostics v_claimed = row_count;
+
+    if v_claimed = cardinality(p_keys) then
+        -- Occasional cleanup of expired claims
+        if random() < 0.01 then
+            delete from story_requests r where r.expires_at <= now();
+        end if;
+        return;
+    end if;
+
+    -- Lost at least one key: undo the partial claim and report the holder
+    delete from story_requests r
+     where r.key = any(p_keys) and r.story_id = p_story_id and r.created_at = now();
+
+    return query
+        select r.story_id, extract(epoch from now() - r.created_at)::double precision
+          from story_requests r
+         where r.key = any(p_keys)
+         order by r.created_at
+         limit 1;
+end;
+$$;
+
+revoke all on function public.claim_story_request(text[], integer[], uuid) from public, anon, authenticated;
+grant execute on function public.claim_story_request(text[], integer[], uuid) to service_role;
+
+grant select, insert, update, delete on public.story_requests to service_role;
@@ -0,0 +1,102 @@
+-- Cache of image descriptions made by the vision agent, so a drawing or photo
+-- uploaded again (same bytes, or re-encoded / resized) skips the multimodal
+-- call. Entries are scoped by vendor, model and prompt version; the table is
+-- bounded by the API's max_entries, evicting the least recently used.
+
+create table if not exists public.vision_descriptions (
+    scope text not null,
+    content_hash text not null,
+    -- 64-bit difference hash of the image (signed), null if it could not be decoded
+    perceptual_hash bigint,
+    description text not null,
+    hits integer not null default 0,
+    last_used_at timestamptz not null default now(),
+    created_at timestamptz not null default now(),
+    primary key (scope, content_hash)
+);
+
+create index if not exists vision_descriptions_scope_phash_idx
+    on public.vision_descriptions (scope, perceptual_hash);
+create index if not exists vision_descriptions_last_used_at_idx
+    on public.vision_descriptions (last_used_at);
+
+alter table public.vision_descriptions enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- match_vision_description: the description of the image with p_content_hash
+-- in p_scope, else the one whose perceptual hash differs in the fewest bits
+-- (at most p_max_distance). The match is marked as used.
+-- ---------------------------------------------------------------------------
+create or replace function public.match_vision_description(
+    p_scope text, p_content_hash text, p_perceptual_hash bigint, p_max_distance integer)
+returns table (content_hash text, description text, distance integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_hash text;
+    v_description text;
+    v_distance integer;
+begin
+    select v.content_hash, v.description, 0
+      into v_hash, v_description, v_distance
+      from vision_descriptions v
+     where v.scope = p_scope and v.content_hash = p_content_hash;
+
+    if v_hash is null and p_perceptual_hash is not null then
+        -- The scope is bounded by max_entries, so scanning it is cheap
+        select v.content_hash, v.description, bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64))::integer
+          into v_hash, v_description, v_distance
+          from vision_descriptions v
+         where v.scope = p_scope
+           and v.perceptual_hash is not null
+           and bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64)) <= p_max_distance
+         order by bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64))
+         limit 1;
+    end if;
+
+    if v_hash is null then
+        return;
+    end if;
+
+    update vision_descriptions v
+       set hits = v.hits + 1, last_used_at = now()
+     where v.scope = p_scope and v.content_hash = v_hash;
+
+    return query select v_hash, v_description, v_distance;
+end;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- save_vision_description: upsert one description and evict the least
+-- recently used rows beyond p_max_entries.
+-- ---------------------------------------------------------------------------
+create or replace function public.save_vision_description(
+    p_scope text, p_content_hash text, p_perceptual_hash bigint, p_description text, p_max_entries integer)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into vision_descriptions (scope, content_hash, perceptual_hash, description)
+    values (p_scope, p_content_hash, p_perceptual_hash, p_description)
+    on conflict (scope, content_hash) do update
+        set description = excluded.description, last_used_at = now();
+
+    delete from vision_descriptions v
+     using (
+        select scope, content_hash
+          from vision_descriptions
+         order by last_used_at desc
+        offset p_max_entries
+     ) stale
+     where v.scope = stale.scope and v.content_hash = stale.content_hash;
+end;
+$$;
+
+revoke all on function public.match_vision_description(text, text, bigint, integer) from public, anon, authenticated;
+grant execute on function public.match_vision_description(text, text, bigint, integer) to service_role;
+revoke all on function public.save_vision_description(text, text, bigint, text, integer) from public, anon, authenticated;
+grant execute on function public.save_vision_description(text, text, bigint, text, integer) to service_role;
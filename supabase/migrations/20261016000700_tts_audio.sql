@@ -0,0 +1,98 @@
+-- Synthesized story audio stored once per cache key: sha256 of the text,
+-- TTS vendor, model, voice and merged settings. Stories whose text and voice
+-- settings are unchanged (regenerations, parent edits elsewhere) point their
+-- audio_filename at the shared object (tts/<key>.<ext> in the audio bucket)
+-- instead of synthesizing and uploading it again.
+--
+-- Beyond the API's max_entries / max_bytes the least recently used objects
+-- are evicted, but only those no story references and that have been idle
+-- for min_idle_seconds; the API deletes the returned files from storage.
+
+create table if not exists public.tts_audio (
+    key text primary key,
+    filename text not null,
+    content_type text not null,
+    size_bytes bigint not null,
+    hits integer not null default 0,
+    last_used_at timestamptz not null default now(),
+    created_at timestamptz not null default now()
+);
+
+create index if not exists tts_audio_last_used_at_idx on public.tts_audio (last_used_at);
+-- Reference check during eviction
+create index if not exists stories_audio_filename_idx on public.stories (audio_filename);
+
+alter table public.tts_audio enable row level security;
+
+-- ---------------------------------------------------------------------------
+-- find_tts_audio: the stored object for p_key, marked as used.
+-- ---------------------------------------------------------------------------
+create or replace function public.find_tts_audio(p_key text)
+returns table (filename text, content_type text)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    return query
+        update tts_audio t
+           set hits = t.hits + 1, last_used_at = now()
+         where t.key = p_key
+        returning t.filename, t.content_type;
+end;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- save_tts_audio: record one uploaded object, then walk the objects from most
+-- to least recently used, keeping them while within p_max_entries and
+-- p_max_bytes. Past the budget, objects that no story references and that
+-- were not used within p_min_idle_seconds are deleted and returned.
+-- ---------------------------------------------------------------------------
+create or replace function public.save_tts_audio(
+    p_key text, p_filename text, p_content_type text, p_size_bytes bigint,
+    p_max_entries integer, p_max_bytes bigint, p_min_idle_seconds double precision)
+returns table (filename text)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_row record;
+    v_kept_entries integer := 0;
+    v_kept_bytes bigint := 0;
+begin
+    insert into tts_audio (key, filename, content_type, size_bytes)
+    values (p_key, p_filename, p_content_type, p_size_bytes)
+    on conflict (key) do update
+        set filename = excluded.filename, content_type = excluded.content_type,
+            size_bytes = excluded.size_bytes, last_used_at = now();
+
+    -- One eviction pass at a time
+    perform pg_advisory_xact_lock(hashtext('save_tts_audio'));
+
+    for v_row in
+        select t.key, t.filename, t.size_bytes, t.last_used_at,
+               exists (select 1 from stories s where s.audio_filename = t.filename) as referenced
+          from tts_audio t
+         order by t.last_used_at desc
+    loop
+        if (v_kept_entries >= p_max_entries or v_kept_bytes + v_row.size_bytes > p_max_bytes)
+           and not v_row.referenced
+           and v_row.last_used_at < now() - make_interval(secs => p_min_idle_seconds) then
+            delete from tts_audio t where t.key = v_row.key;
+            filename := v_row.filename;
+            return next;
+        else
+            v_kept_entries := v_kept_entries + 1;
+            v_kept_bytes := v_kept_bytes + v_row.size_bytes;
+        end if;
+    end loop;
+end;
+$$;
+
+revoke all on function public.find_tts_audio(text) from public, anon, authenticated;
+grant execute on function public.find_tts_audio(text) to service_role;
+revoke all on function public.save_tts_audio(text, text, text, bigint, integer, bigint, double precision)
+    from public, anon, authenticated;
+grant execute on function public.save_tts_audio(text, text, text, bigint, integer, bigint, double precision)
+    to service_role;
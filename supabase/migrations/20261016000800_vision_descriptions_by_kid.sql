@@ -0,0 +1,97 @@
+-- Near-identical (perceptual hash) vision cache matches are limited to the
+-- same kid's images. Sparse drawings on a blank page hash within a few bits
+-- of each other, so a global perceptual match could hand one child's image
+-- description (and story) to another family. Exact sha256 matches stay
+-- global. Rows cached before this migration have no kid and only match exactly.
+
+alter table public.vision_descriptions add column if not exists kid_id uuid;
+
+drop index if exists public.vision_descriptions_scope_phash_idx;
+create index if not exists vision_descriptions_scope_kid_idx
+    on public.vision_descriptions (scope, kid_id);
+
+drop function if exists public.match_vision_description(text, text, bigint, integer);
+drop function if exists public.save_vision_description(text, text, bigint, text, integer);
+
+-- ---------------------------------------------------------------------------
+-- match_vision_description: the description of the image with p_content_hash
+-- in p_scope, else the one of p_kid_id's images whose perceptual hash differs
+-- in the fewest bits (at most p_max_distance). The match is marked as used.
+-- ---------------------------------------------------------------------------
+create or replace function public.match_vision_description(
+    p_scope text, p_content_hash text, p_perceptual_hash bigint, p_kid_id uuid, p_max_distance integer)
+returns table (content_hash text, description text, distance integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_hash text;
+    v_description text;
+    v_distance integer;
+begin
+    select v.content_hash, v.description, 0
+      into v_hash, v_description, v_distance
+      from vision_descriptions v
+     where v.scope = p_scope and v.content_hash = p_content_hash;
+
+    if v_hash is null and p_perceptual_hash is not null and p_kid_id is not null then
+        select v.content_hash, v.description, bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64))::integer
+          into v_hash, v_description, v_distance
+          from vision_descriptions v
+         where v.scope = p_scope
+           and v.kid_id = p_kid_id
+           and v.perceptual_hash is not null
+           and bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64)) <= p_max_distance
+         order by bit_count((v.perceptual_hash # p_perceptual_hash)::bit(64))
+         limit 1;
+    end if;
+
+    if v_hash is null then
+        return;
+    end if;
+
+    update vision_descriptions v
+       set hits = v.hits + 1, last_used_at = now()
+     where v.scope = p_scope and v.content_hash = v_hash;
+
+    return query select v_hash, v_description, v_distance;
+end;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- save_vision_description: upsert one description of p_kid_id's image and
+-- evict the least recently used rows beyond p_max_entries.
+-- ---------------------------------------------------------------------------
+create or replace function public.save_vision_description(
+    p_scope text, p_content_hash text, p_perceptual_hash bigint, p_kid_id uuid,
+    p_description text, p_max_entries integer)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into vision_descriptions (scope, content_hash, perceptual_hash, kid_id, description)
+    values (p_scope, p_content_hash, p_perceptual_hash, p_kid_id, p_description)
+    on conflict (scope, content_hash) do update
+        set description = excluded.description, last_used_at = now();
+
+    delete from vision_descriptions v
+     using (
+        select scope, content_hash
+          from vision_descriptions
+         order by last_used_at desc
+        offset p_max_entries
+     ) stale
+     where v.scope = stale.scope and v.content_hash = stale.content_hash;
+end;
+$$;
+
+revoke all on function public.match_vision_description(text, text, bigint, uuid, integer)
+    from public, anon, authenticated;
+grant execute on function public.match_vision_description(text, text, bigint, uuid, integer) to service_role;
+revoke all on function public.save_vision_description(text, text, bigint, uuid, text, integer)
+    from public, anon, authenticated;
+grant execute on function public.save_vision_description(text, text, bigint, uuid, text, integer)
+    to service_role;